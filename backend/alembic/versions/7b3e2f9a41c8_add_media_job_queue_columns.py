@@ -0,0 +1,83 @@
+"""Add queue and lease columns to media jobs
+
+Revision ID: 7b3e2f9a41c8
+Revises: 1c6fed600e07
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+import sqlmodel
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7b3e2f9a41c8"
+down_revision: str | Sequence[str] | None = "1c6fed600e07"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("media_jobs") as batch_op:
+        batch_op.add_column(
+            sa.Column("parameters_json", sqlmodel.sql.sqltypes.AutoString(), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column("priority", sa.Integer(), nullable=False, server_default="0")
+        )
+        batch_op.add_column(
+            sa.Column("attempts", sa.Integer(), nullable=False, server_default="0")
+        )
+        batch_op.add_column(
+            sa.Column("max_retries", sa.Integer(), nullable=False, server_default="3")
+        )
+        batch_op.add_column(
+            sa.Column(
+                "available_at",
+                sa.DateTime(),
+                nullable=False,
+                server_default=sa.text("CURRENT_TIMESTAMP"),
+            )
+        )
+        batch_op.add_column(
+            sa.Column("lease_owner", sqlmodel.sql.sqltypes.AutoString(), nullable=True)
+        )
+        batch_op.add_column(sa.Column("lease_expires_at", sa.DateTime(), nullable=True))
+
+    op.create_index(
+        "ix_media_jobs_claim",
+        "media_jobs",
+        ["status", "priority", "available_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_media_jobs_lease",
+        "media_jobs",
+        ["status", "lease_expires_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_media_jobs_character_status",
+        "media_jobs",
+        ["character_id", "status"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_media_jobs_character_status", table_name="media_jobs")
+    op.drop_index("ix_media_jobs_lease", table_name="media_jobs")
+    op.drop_index("ix_media_jobs_claim", table_name="media_jobs")
+    with op.batch_alter_table("media_jobs") as batch_op:
+        batch_op.drop_column("lease_expires_at")
+        batch_op.drop_column("lease_owner")
+        batch_op.drop_column("available_at")
+        batch_op.drop_column("max_retries")
+        batch_op.drop_column("attempts")
+        batch_op.drop_column("priority")
+        batch_op.drop_column("parameters_json")
@@ -1,3 +1,5 @@
+from collections import OrderedDict, deque
+
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
@@ -5,7 +7,9 @@ from ..data import (
     character_evolution_db,
     character_presence_db,
     characters_db,
+    data_fingerprint,
     episodes_db,
+    mark_data_changed,
     relationships_db,
 )
 from ..models import (
@@ -23,6 +27,11 @@ from ..models import (
 
 router = APIRouter(prefix="/api/characters", tags=["characters"])
 
+MAX_GRAPH_DEPTH = 6
+
+# Relationship graphs kept by RelationshipIndex, least recently used evicted first
+MAX_CACHED_GRAPHS = 256
+
 RELATIONSHIP_TYPE_GROUPS = {
     "romantic": 1,
     "family": 2,
@@ -58,6 +67,167 @@ class RelationshipUpdate(BaseModel):
     description: str | None = None
 
 
+class RelationshipIndex:
+    """
+    Per-character adjacency over relationships_db.
+
+    The relationship write routes keep it up to date incrementally; any
+    other change to the data (seen through data_fingerprint) triggers a full
+    rebuild. Relationship graphs are memoized per (character, depth,
+    max_fanout) and dropped when a write touches a character they contain.
+    The memo holds at most ``max_graphs`` graphs, and a max_fanout no
+    character reaches shares the unlimited graph's entry.
+    """
+
+    def __init__(self, max_graphs: int = MAX_CACHED_GRAPHS):
+        self.adjacency: dict[str, dict[str, Relationship]] = {}
+        self.graphs: OrderedDict[tuple, tuple[RelationshipGraphResponse, frozenset[str]]] = (
+            OrderedDict()
+        )
+        self.max_graphs = max_graphs
+        self.fingerprint: tuple | None = None
+
+    def sync(self):
+        """Rebuild from relationships_db if it changed behind the index's back."""
+        fingerprint = data_fingerprint()
+        if fingerprint == self.fingerprint:
+            return
+
+        self.adjacency = {}
+        for rel in relationships_db.values():
+            self._link(rel)
+        self.graphs.clear()
+        self.fingerprint = fingerprint
+
+    def replace(self, old: Relationship | None, new: Relationship | None):
+        """Apply one relationship write that has already been made to relationships_db."""
+        touched = set()
+        for rel in (old, new):
+            if rel is not None:
+                touched.update((rel.from_character_id, rel.to_character_id))
+        if old is not None:
+            for char_id in (old.from_character_id, old.to_character_id):
+                self.adjacency.get(char_id, {}).pop(old.id, None)
+        if new is not None:
+            self._link(new)
+
+        stale = [
+            key for key, (_, members) in self.graphs.items() if not touched.isdisjoint(members)
+        ]
+        for key in stale:
+            del self.graphs[key]
+        self.fingerprint = data_fingerprint()
+
+    def relationships_of(self, character_id: str) -> list[Relationship]:
+        self.sync()
+        return list(self.adjacency.get(character_id, {}).values())
+
+    def graph(
+        self, character_id: str, depth: int, max_fanout: int | None
+    ) -> RelationshipGraphResponse:
+        """Memoized relationship graph around a character."""
+        self.sync()
+        widest = max(map(len, self.adjacency.values()), default=0)
+        if max_fanout is not None and max_fanout >= widest:
+            # Caps nothing, so the graph is the same as without a cap
+            max_fanout = None
+        key = (character_id, depth, max_fanout)
+        if key in self.graphs:
+            self.graphs.move_to_end(key)
+        else:
+            self.graphs[key] = self._build_graph(character_id, depth, max_fanout)
+            if len(self.graphs) > self.max_graphs:
+                self.graphs.popitem(last=False)
+        return self.graphs[key][0]
+
+    def _link(self, rel: Relationship):
+        self.adjacency.setdefault(rel.from_character_id, {})[rel.id] = rel
+        self.adjacency.setdefault(rel.to_character_id, {})[rel.id] = rel
+
+    def _build_graph(
+        self, character_id: str, depth: int, max_fanout: int | None
+    ) -> tuple[RelationshipGraphResponse, frozenset[str]]:
+        # BFS over both directions of each relationship; every relationship
+        # touching a character closer than `depth` is included
+        distance = {character_id: 0}
+        queue = deque([character_id])
+        relationships: dict[str, Relationship] = {}
+
+        while queue:
+            char_id = queue.popleft()
+            if distance[char_id] >= depth:
+                continue
+
+            taken = 0
+            for rel in self.adjacency.get(char_id, {}).values():
+                if rel.id in relationships:
+                    continue
+                if max_fanout is not None and taken >= max_fanout:
+                    break
+                taken += 1
+                relationships[rel.id] = rel
+
+                other = rel.to_character_id
+                if other == char_id:
+                    other = rel.from_character_id
+                if other not in distance:
+                    distance[other] = distance[char_id] + 1
+                    queue.append(other)
+
+        nodes = []
+        for char_id in distance:
+            char = characters_db.get(char_id)
+            if char:
+                is_center = char_id == character_id
+                nodes.append(
+                    D3GraphNode(
+                        id=char_id,
+                        name=char.name,
+                        group=1 if is_center else 2,
+                        radius=30 if is_center else 20,
+                        color="#c9a227" if is_center else "#6b7280",
+                        metadata={"role": char.role, "family": char.family},
+                    )
+                )
+
+        links = []
+        for rel in relationships.values():
+            rel_type = rel.relationship_type.lower()
+            links.append(
+                D3GraphLink(
+                    source=rel.from_character_id,
+                    target=rel.to_character_id,
+                    type=rel.relationship_type,
+                    value=RELATIONSHIP_TYPE_GROUPS.get(rel_type, 3),
+                    color=RELATIONSHIP_TYPE_COLORS.get(rel_type, "#718096"),
+                )
+            )
+
+        response = RelationshipGraphResponse(
+            nodes=nodes,
+            links=links,
+            center_character_id=character_id,
+            total_characters=len(nodes),
+            total_relationships=len(links),
+        )
+        return response, frozenset(distance)
+
+
+_relationship_index = RelationshipIndex()
+
+
+def _write_relationship(rel_id: str, relationship: Relationship | None):
+    """Store (or delete, with None) a relationship and keep the index in step."""
+    _relationship_index.sync()
+    old = relationships_db.get(rel_id)
+    if relationship is None:
+        del relationships_db[rel_id]
+    else:
+        relationships_db[rel_id] = relationship
+    mark_data_changed()
+    _relationship_index.replace(old, relationship)
+
+
 @router.get("", response_model=list[Character])
 async def list_characters():
     return list(characters_db.values())
@@ -75,79 +245,19 @@ async def get_character_relationships(character_id: str):
     if character_id not in characters_db:
         raise HTTPException(status_code=404, detail="Character not found")
 
-    character_relationships = [
-        rel
-        for rel in relationships_db.values()
-        if rel.from_character_id == character_id or rel.to_character_id == character_id
-    ]
-    return character_relationships
+    return _relationship_index.relationships_of(character_id)
 
 
 @router.get("/{character_id}/relationships/graph", response_model=RelationshipGraphResponse)
-async def get_character_relationship_graph(character_id: str, depth: int = 1):
+async def get_character_relationship_graph(
+    character_id: str,
+    depth: int = Query(1, ge=0, le=MAX_GRAPH_DEPTH),
+    max_fanout: int | None = Query(None, ge=1, description="Max relationships per character"),
+):
     if character_id not in characters_db:
         raise HTTPException(status_code=404, detail="Character not found")
 
-    included_character_ids = {character_id}
-    relevant_relationships: list[Relationship] = []
-
-    current_layer = {character_id}
-    for _ in range(depth):
-        next_layer = set()
-        for rel in relationships_db.values():
-            if rel.from_character_id in current_layer:
-                next_layer.add(rel.to_character_id)
-                relevant_relationships.append(rel)
-                included_character_ids.add(rel.to_character_id)
-            elif rel.to_character_id in current_layer:
-                next_layer.add(rel.from_character_id)
-                relevant_relationships.append(rel)
-                included_character_ids.add(rel.from_character_id)
-        current_layer = next_layer
-
-    seen_rel_ids = set()
-    unique_relationships = []
-    for rel in relevant_relationships:
-        if rel.id not in seen_rel_ids:
-            seen_rel_ids.add(rel.id)
-            unique_relationships.append(rel)
-
-    nodes = []
-    for char_id in included_character_ids:
-        char = characters_db.get(char_id)
-        if char:
-            is_center = char_id == character_id
-            nodes.append(
-                D3GraphNode(
-                    id=char_id,
-                    name=char.name,
-                    group=1 if is_center else 2,
-                    radius=30 if is_center else 20,
-                    color="#c9a227" if is_center else "#6b7280",
-                    metadata={"role": char.role, "family": char.family},
-                )
-            )
-
-    links = []
-    for rel in unique_relationships:
-        rel_type = rel.relationship_type.lower()
-        links.append(
-            D3GraphLink(
-                source=rel.from_character_id,
-                target=rel.to_character_id,
-                type=rel.relationship_type,
-                value=RELATIONSHIP_TYPE_GROUPS.get(rel_type, 3),
-                color=RELATIONSHIP_TYPE_COLORS.get(rel_type, "#718096"),
-            )
-        )
-
-    return RelationshipGraphResponse(
-        nodes=nodes,
-        links=links,
-        center_character_id=character_id,
-        total_characters=len(nodes),
-        total_relationships=len(links),
-    )
+    return _relationship_index.graph(character_id, depth, max_fanout)
 
 
 @router.post("/relationships", response_model=Relationship, status_code=201)
@@ -170,7 +280,7 @@ async def create_relationship(data: RelationshipCreate):
         relationship_type=data.relationship_type,
         description=data.description,
     )
-    relationships_db[rel_id] = new_relationship
+    _write_relationship(rel_id, new_relationship)
     return new_relationship
 
 
@@ -188,7 +298,7 @@ async def update_relationship(relationship_id: str, data: RelationshipUpdate):
         updated_data["description"] = data.description
 
     updated_relationship = Relationship(**updated_data)
-    relationships_db[relationship_id] = updated_relationship
+    _write_relationship(relationship_id, updated_relationship)
     return updated_relationship
 
 
@@ -196,7 +306,7 @@ async def update_relationship(relationship_id: str, data: RelationshipUpdate):
 async def delete_relationship(relationship_id: str):
     if relationship_id not in relationships_db:
         raise HTTPException(status_code=404, detail="Relationship not found")
-    del relationships_db[relationship_id]
+    _write_relationship(relationship_id, None)
     return None
 
 
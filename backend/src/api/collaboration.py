@@ -0,0 +1,158 @@
+import asyncio
+import json
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+
+from ..collaboration.hub import CollaborationHub
+from ..collaboration.store import OpLogStore, check_doc_id
+from ..collaboration.sync import decode_op_batch
+
+router = APIRouter(prefix="/api/collaboration", tags=["collaboration"])
+
+# Op logs and snapshots of collaborative documents
+COLLABORATION_DIR = Path(__file__).parent.parent.parent.parent / "data" / "collaboration"
+
+_hub: CollaborationHub | None = None
+
+
+def get_hub() -> CollaborationHub:
+    """Get the shared hub hosting every open document."""
+    global _hub
+    if _hub is None:
+        _hub = CollaborationHub(OpLogStore(str(COLLABORATION_DIR)))
+    return _hub
+
+
+async def shutdown_hub():
+    """Snapshot every open document and close the op logs (app shutdown)."""
+    global _hub
+    if _hub is not None:
+        await _hub.shutdown()
+        _hub = None
+
+
+@router.get("/metrics")
+async def get_collaboration_metrics():
+    """Hub throughput, queue depth and fan-out latency."""
+    return get_hub().get_metrics()
+
+
+@router.get("/{doc_id}")
+async def get_document_snapshot(doc_id: str):
+    """Full snapshot (nodes plus uncompacted log tail) of a document."""
+    try:
+        check_doc_id(doc_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    hub = get_hub()
+    session = hub.get_session(doc_id)
+    if session is None:
+        if hub.store is None or not hub.store.exists(doc_id):
+            raise HTTPException(status_code=404, detail=f"Document {doc_id} not found")
+        session = hub.open(doc_id).session
+    return {
+        **session.get_snapshot(),
+        "active_users": session.get_active_users(),
+    }
+
+
+def parse_sync_message(text: str) -> dict[str, int] | None:
+    """
+    Vector clock of a client's text frame, or None if it is not a sync request.
+
+    Raises:
+        ValueError: If the frame is not valid JSON or the clock is malformed
+    """
+    payload = json.loads(text)
+    if not isinstance(payload, dict) or payload.get("type") != "sync":
+        return None
+    clock = payload.get("vector_clock", {})
+    if not isinstance(clock, dict):
+        raise ValueError("vector_clock must be an object")
+    try:
+        return {str(k): int(v) for k, v in clock.items()}
+    except TypeError as exc:
+        raise ValueError(f"Invalid vector clock entry: {exc}") from exc
+
+
+@router.websocket("/{doc_id}/ws")
+async def collaborate(websocket: WebSocket, doc_id: str, user_id: str):
+    """
+    Delta-sync channel for one user of a document.
+
+    Client -> server:
+      - text ``{"type": "sync", "vector_clock": {...}}`` reports the client's
+        full clock; the server replies with the ops it is missing
+      - binary op batches carry the client's own edits
+    Server -> client:
+      - binary op batches, coalesced across bursts of remote edits
+      - text ``{"type": "snapshot", "document": {...}}`` when the client is
+        behind the compacted log and must reload
+      - close code 1003 after a frame that cannot be decoded or carries
+        another user's ops
+    """
+    try:
+        check_doc_id(doc_id)
+    except ValueError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    hub = get_hub()
+    send_lock = asyncio.Lock()
+
+    async def send_bytes(data: bytes):
+        async with send_lock:
+            await websocket.send_bytes(data)
+
+    async def reject(reason: str):
+        # Close reasons are limited to 123 bytes
+        async with send_lock:
+            await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason=reason[:120])
+
+    connection = hub.connect(doc_id, user_id, send_bytes)
+    session = connection.session
+    sender = asyncio.create_task(connection.run())
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if message.get("bytes") is not None:
+                try:
+                    ops = decode_op_batch(message["bytes"])
+                except ValueError as exc:
+                    await reject(str(exc))
+                    break
+                forged = next((op for op in ops if op.user_id != user_id), None)
+                if forged is not None:
+                    await reject(f"Op {forged.op_id} belongs to another user")
+                    break
+                # Merged by the document's actor on its next tick
+                await hub.submit(doc_id, user_id, ops)
+                continue
+
+            try:
+                clock = parse_sync_message(message.get("text") or "{}")
+            except ValueError as exc:
+                await reject(str(exc))
+                break
+            if clock is None:
+                continue
+
+            if session.document.requires_snapshot(clock):
+                async with send_lock:
+                    await websocket.send_json(
+                        {"type": "snapshot", "document": session.get_snapshot()}
+                    )
+                clock = dict(session.document.vector_clock)
+            connection.update_clock(clock)
+            connection.notify()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        hub.disconnect(doc_id, user_id)
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, HTTPException
+import hashlib
+from collections import defaultdict
 
-from ..data import characters_db, episodes_db, mythos_db, relationships_db
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from ..data import characters_db, data_fingerprint, episodes_db, mythos_db, relationships_db
 from ..models import GraphData, GraphEdge, GraphNode
 
 router = APIRouter(prefix="/api/graph", tags=["graph"])
@@ -71,34 +74,90 @@ def build_full_graph() -> GraphData:
     return GraphData(nodes=nodes, edges=edges)
 
 
+class PrebuiltGraph:
+    """
+    The full graph built once per data version.
+
+    Keeps the validated models, the JSON body and its ETag for
+    ``GET /api/graph``, and an adjacency index (node id -> incident edge
+    positions) so neighbourhood lookups touch only the edges they need.
+    """
+
+    def __init__(self, graph: GraphData):
+        self.graph = graph
+        self.body = graph.model_dump_json().encode()
+        self.etag = f'"{hashlib.blake2b(self.body, digest_size=16).hexdigest()}"'
+
+        self.node_positions: dict[str, list[int]] = defaultdict(list)
+        for i, node in enumerate(graph.nodes):
+            self.node_positions[node.id].append(i)
+
+        self.adjacency: dict[str, list[int]] = defaultdict(list)
+        for i, edge in enumerate(graph.edges):
+            self.adjacency[edge.source].append(i)
+            if edge.target != edge.source:
+                self.adjacency[edge.target].append(i)
+
+    def related(self, entity_id: str) -> GraphData:
+        """An entity, its direct neighbours and every edge among them."""
+        edges = self.graph.edges
+        related_ids = {entity_id}
+        for i in self.adjacency.get(entity_id, ()):
+            related_ids.add(edges[i].source)
+            related_ids.add(edges[i].target)
+
+        edge_positions = {
+            i
+            for node_id in related_ids
+            for i in self.adjacency.get(node_id, ())
+            if edges[i].source in related_ids and edges[i].target in related_ids
+        }
+        node_positions = [
+            i for node_id in related_ids for i in self.node_positions.get(node_id, ())
+        ]
+
+        return GraphData(
+            nodes=[self.graph.nodes[i] for i in sorted(node_positions)],
+            edges=[edges[i] for i in sorted(edge_positions)],
+        )
+
+
+_prebuilt: PrebuiltGraph | None = None
+_prebuilt_fingerprint: tuple | None = None
+
+
+def get_prebuilt_graph() -> PrebuiltGraph:
+    """Get the cached full graph, rebuilding it if the data has changed."""
+    global _prebuilt, _prebuilt_fingerprint
+    fingerprint = data_fingerprint()
+    if _prebuilt is None or fingerprint != _prebuilt_fingerprint:
+        _prebuilt = PrebuiltGraph(build_full_graph())
+        _prebuilt_fingerprint = fingerprint
+    return _prebuilt
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
 @router.get("", response_model=GraphData)
-async def get_full_graph():
+async def get_full_graph(request: Request):
     """Get all nodes and edges for graph visualization"""
-    return build_full_graph()
+    prebuilt = get_prebuilt_graph()
+    headers = {"ETag": prebuilt.etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, prebuilt.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=prebuilt.body, media_type="application/json", headers=headers)
 
 
 @router.get("/related/{entity_id}", response_model=GraphData)
 async def get_related_entities(entity_id: str):
     """Get related entities for a specific entity"""
-    # Find all direct connections
-    full_graph = build_full_graph()
-
-    related_ids = {entity_id}
-
-    # Find connected nodes
-    for edge in full_graph.edges:
-        if edge.source == entity_id:
-            related_ids.add(edge.target)
-        elif edge.target == entity_id:
-            related_ids.add(edge.source)
-
-    # Filter nodes and edges
-    filtered_nodes = [n for n in full_graph.nodes if n.id in related_ids]
-    filtered_edges = [
-        e for e in full_graph.edges if e.source in related_ids and e.target in related_ids
-    ]
-
-    if not filtered_nodes:
+    related = get_prebuilt_graph().related(entity_id)
+    if not related.nodes:
         raise HTTPException(status_code=404, detail="Entity not found")
 
-    return GraphData(nodes=filtered_nodes, edges=filtered_edges)
+    return related
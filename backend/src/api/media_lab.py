@@ -1,4 +1,3 @@
-from datetime import UTC, datetime
 from uuid import uuid4
 from pathlib import Path
 from fastapi import APIRouter, HTTPException, Query, Depends
@@ -7,7 +6,16 @@ from sqlmodel import Session
 
 import json
 
+from ..db.db_models import MediaJob
 from ..media_lab.executor import JobExecutor
+from ..media_lab.job_store import (
+    API_STATUS,
+    COMPLETED,
+    DB_STATUS,
+    JobOutcome,
+    JobStore,
+    get_job_store,
+)
 from ..media_lab.presets import get_preset_manager
 from ..media_lab.registry import ModelRegistry
 from ..media_lab.workbench import Workbench
@@ -38,243 +46,195 @@ from ..models import (
 
 router = APIRouter(prefix="/api/media-lab", tags=["media-lab"])
 
-# In-memory storage for demo (would be DB in production)
-_jobs_store = {}
-_artifacts_store = {}
-
 # Executor instance for deterministic job processing
 _executor = JobExecutor()
 
 # Model registry singleton
 _model_registry = ModelRegistry()
 
+# Workflows the API runs inline instead of leaving them for a worker
+_INLINE_WORKFLOWS = {
+    "interpolate": (_executor.execute_interpolation, "interpolated_video"),
+    "enhance": (_executor.execute_enhance, "enhanced_image"),
+}
+
+# Lease owner for jobs the API runs inline
+_API_WORKER_ID = "api"
 
-def _get_job_or_404(job_id: str) -> dict:
+
+def _get_job_or_404(store: JobStore, job_id: str) -> MediaJob:
     """Helper to fetch job or raise 404"""
-    if job_id not in _jobs_store:
+    job = store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
-    return _jobs_store[job_id]
+    return job
+
+
+def _build_artifacts(store: JobStore, job_id: str) -> list[ArtifactData]:
+    """Build artifact DTOs for a job, decoding stored metadata"""
+    return [
+        ArtifactData(
+            id=artifact.id,
+            artifact_type=artifact.artifact_type,
+            file_path=artifact.file_path,
+            file_size_bytes=artifact.file_size_bytes,
+            metadata_json=json.loads(artifact.metadata_json) if artifact.metadata_json else None,
+        )
+        for artifact in store.artifacts(job_id)
+    ]
 
 
-def _build_job_response(job_id: str) -> MediaJobResponse:
+def _build_job_response(store: JobStore, job: MediaJob) -> MediaJobResponse:
     """Build response DTO from stored job"""
-    job = _get_job_or_404(job_id)
-    artifacts = [ArtifactData(**artifact) for artifact in _artifacts_store.get(job_id, [])]
     return MediaJobResponse(
-        id=job_id,
-        character_id=job["character_id"],
-        workflow_type=job["workflow_type"],
-        status=job["status"],
-        progress=job["progress"],
-        error_message=job.get("error_message"),
-        artifacts=artifacts,
-        created_at=job["created_at"],
-        updated_at=job["updated_at"],
+        id=job.id,
+        character_id=job.character_id,
+        workflow_type=job.workflow_type,
+        status=API_STATUS[job.status],
+        progress=job.progress,
+        error_message=job.error_message,
+        artifacts=_build_artifacts(store, job.id),
+        created_at=job.created_at,
+        updated_at=job.updated_at,
     )
 
 
-def _execute_interpolate_job(job_id: str, session: Session) -> None:
-    """Execute interpolation job immediately and persist results."""
-    job = _jobs_store[job_id]
-    try:
-        job["status"] = "RUNNING"
-        result = _executor.execute_interpolation(job_id, job["parameters"])
-        job["status"] = "SUCCEEDED"
-        job["progress"] = 100
-        job["updated_at"] = datetime.now(UTC).replace(tzinfo=None)
-
-        from ..db.artifact_ops import create_artifact
-        
-        artifact_dict = {
-            "id": str(uuid4()),
-            "artifact_type": "interpolated_video",
-            "file_path": result["artifact_path"],
-            "file_size_bytes": None,
-            "metadata_json": result["metadata"],
-        }
-        
-        # Persist artifact to database
-        artifact_db = create_artifact(
-            session,
-            job_id=job_id,
-            artifact_type=artifact_dict["artifact_type"],
-            file_path=artifact_dict["file_path"],
-            metadata_json=artifact_dict["metadata_json"],
-        )
-        
-        # Update in-memory store with DB ID
-        artifact_dict["id"] = artifact_db.id
-        _artifacts_store[job_id] = [artifact_dict]
-    except ValueError as e:
-        job["status"] = "FAILED"
-        job["progress"] = 0
-        job["error_message"] = str(e)
-        job["updated_at"] = datetime.now(UTC).replace(tzinfo=None)
+def _execute_inline_job(store: JobStore, job: MediaJob) -> MediaJob:
+    """Claim a just-submitted enhance/interpolate job and run it immediately.
 
+    The lease is renewed while the job runs, so a slow job is not reclaimed
+    and run a second time by a worker. Validation errors fail the job
+    without an automatic retry.
+    """
+    execute, artifact_type = _INLINE_WORKFLOWS[job.workflow_type]
+    claimed = store.claim(_API_WORKER_ID, job_id=job.id)
+    if claimed is None:
+        # Already taken by a worker sharing the store
+        return store.get(job.id) or job
 
-def _execute_enhance_job(job_id: str, session: Session) -> None:
-    """Execute enhancement job immediately and persist results."""
-    job = _jobs_store[job_id]
     try:
-        job["status"] = "RUNNING"
-        result = _executor.execute_enhance(job_id, job["parameters"])
-        job["status"] = "SUCCEEDED"
-        job["progress"] = 100
-        job["updated_at"] = datetime.now(UTC).replace(tzinfo=None)
-
-        from ..db.artifact_ops import create_artifact
-        
-        artifact_dict = {
-            "id": str(uuid4()),
-            "artifact_type": "enhanced_image",
-            "file_path": result["artifact_path"],
-            "file_size_bytes": None,
-            "metadata_json": result["metadata"],
-        }
-        
-        # Persist artifact to database
-        artifact_db = create_artifact(
-            session,
-            job_id=job_id,
-            artifact_type=artifact_dict["artifact_type"],
-            file_path=artifact_dict["file_path"],
-            metadata_json=artifact_dict["metadata_json"],
-        )
-        
-        # Update in-memory store with DB ID
-        artifact_dict["id"] = artifact_db.id
-        _artifacts_store[job_id] = [artifact_dict]
+        with store.keep_leases(_API_WORKER_ID):
+            result = execute(job.id, claimed.parameters)
     except ValueError as e:
-        job["status"] = "FAILED"
-        job["progress"] = 0
-        job["error_message"] = str(e)
-        job["updated_at"] = datetime.now(UTC).replace(tzinfo=None)
+        return store.fail(job.id, _API_WORKER_ID, str(e), retry=False) or claimed
+
+    artifact = {
+        "artifact_type": artifact_type,
+        "file_path": result["artifact_path"],
+        "metadata": result["metadata"],
+    }
+    (completed,) = store.settle(_API_WORKER_ID, [JobOutcome(job.id, COMPLETED, artifact=artifact)])
+    return completed or claimed
 
 
+# The /jobs handlers are plain functions so FastAPI runs them in its threadpool:
+# the store's SQLite calls block (up to the 30 s busy timeout) and must stay
+# off the event loop
 @router.post("/jobs", response_model=MediaJobResponse)
-async def submit_job(
+def submit_job(
     request: MediaJobSubmitRequest,
-    session: Session = Depends(get_session),
+    store: JobStore = Depends(get_job_store),
 ):
     """Submit a new media job
 
     For enhance and interpolate workflows, executes immediately with validation.
     Returns job with SUCCEEDED status and progress=100 on success, or FAILED with
-    error_message on validation error. Other workflow types are QUEUED.
+    error_message on validation error. Other workflow types are QUEUED for a worker.
     """
-    job_id = str(uuid4())
-    now = datetime.now(UTC).replace(tzinfo=None)
-
-    _jobs_store[job_id] = {
-        "character_id": request.character_id,
-        "workflow_type": request.workflow_type,
-        "status": "QUEUED",
-        "progress": 0,
-        "error_message": None,
-        "parameters": request.parameters,
-        "created_at": now,
-        "updated_at": now,
-    }
-    _artifacts_store[job_id] = []
+    job = store.submit(request.character_id, request.workflow_type, request.parameters)
 
-    # Execute enhance and interpolate workflows immediately
-    if request.workflow_type == "interpolate":
-        _execute_interpolate_job(job_id, session)
-    elif request.workflow_type == "enhance":
-        _execute_enhance_job(job_id, session)
+    if request.workflow_type in _INLINE_WORKFLOWS:
+        job = _execute_inline_job(store, job)
 
-    return _build_job_response(job_id)
+    return _build_job_response(store, job)
 
 
 @router.get("/jobs", response_model=MediaJobListResponse)
-async def list_jobs(
+def list_jobs(
     status: str | None = Query(None, description="Filter by status"),
     workflow_type: str | None = Query(None, description="Filter by workflow type"),
     character_id: str | None = Query(None, description="Filter by character"),
+    store: JobStore = Depends(get_job_store),
 ):
-    """List all media jobs with optional filters"""
-    jobs = []
-
-    for job_id, job in _jobs_store.items():
-        if status and job["status"] != status:
-            continue
-        if workflow_type and job["workflow_type"] != workflow_type:
-            continue
-        if character_id and job["character_id"] != character_id:
-            continue
-
-        jobs.append(_build_job_response(job_id))
-
-    # Sort by created_at descending
-    jobs.sort(key=lambda j: j.created_at, reverse=True)
+    """List all media jobs with optional filters, newest first"""
+    if status and status not in DB_STATUS:
+        jobs = []
+    else:
+        jobs = store.list_jobs(
+            status=DB_STATUS.get(status) if status else None,
+            workflow_type=workflow_type,
+            character_id=character_id,
+        )
 
     return MediaJobListResponse(
         total=len(jobs),
-        jobs=jobs,
+        jobs=[_build_job_response(store, job) for job in jobs],
     )
 
 
 @router.get("/jobs/{job_id}", response_model=MediaJobResponse)
-async def get_job(job_id: str):
+def get_job(job_id: str, store: JobStore = Depends(get_job_store)):
     """Get job details by ID
 
     Returns current job status, progress, error message (if any), and artifacts.
     """
-    return _build_job_response(job_id)
+    return _build_job_response(store, _get_job_or_404(store, job_id))
 
 
 @router.post("/jobs/{job_id}/cancel", response_model=MediaJobResponse)
-async def cancel_job(job_id: str, request: CancelJobRequest | None = None):
+def cancel_job(
+    job_id: str,
+    request: CancelJobRequest | None = None,
+    store: JobStore = Depends(get_job_store),
+):
     """Cancel a queued or running job
 
     Only cancels jobs in QUEUED or RUNNING state.
-    Sets status to CANCELLED.
+    Sets status to CANCELLED; a running job's worker stops at its next heartbeat.
     """
-    job = _get_job_or_404(job_id)
-
-    # Only allow cancellation if in cancellable state
-    if job["status"] not in ("QUEUED", "RUNNING"):
-        raise HTTPException(status_code=409, detail=f"Cannot cancel job in {job['status']} state")
+    _get_job_or_404(store, job_id)
 
-    job["status"] = "CANCELLED"
-    job["updated_at"] = datetime.now(UTC).replace(tzinfo=None)
+    job = store.cancel(job_id)
+    if job is None:
+        current = API_STATUS[_get_job_or_404(store, job_id).status]
+        raise HTTPException(status_code=409, detail=f"Cannot cancel job in {current} state")
 
-    return _build_job_response(job_id)
+    return _build_job_response(store, job)
 
 
 @router.post("/jobs/{job_id}/retry", response_model=MediaJobResponse)
-async def retry_job(job_id: str, request: RetryJobRequest | None = None):
+def retry_job(
+    job_id: str,
+    request: RetryJobRequest | None = None,
+    store: JobStore = Depends(get_job_store),
+):
     """Retry a failed job
 
     Resets status to QUEUED and progress to 0.
     Only allows retry from FAILED state.
     """
-    job = _get_job_or_404(job_id)
+    _get_job_or_404(store, job_id)
 
-    # Only allow retry from FAILED state
-    if job["status"] != "FAILED":
+    job = store.retry(job_id)
+    if job is None:
+        current = API_STATUS[_get_job_or_404(store, job_id).status]
         raise HTTPException(
-            status_code=409, detail=f"Can only retry FAILED jobs, current status: {job['status']}"
+            status_code=409, detail=f"Can only retry FAILED jobs, current status: {current}"
         )
 
-    job["status"] = "QUEUED"
-    job["progress"] = 0
-    job["error_message"] = None
-    job["updated_at"] = datetime.now(UTC).replace(tzinfo=None)
-
-    return _build_job_response(job_id)
+    return _build_job_response(store, job)
 
 
 @router.get("/jobs/{job_id}/artifacts", response_model=ArtifactListResponse)
-async def get_job_artifacts(job_id: str):
+def get_job_artifacts(job_id: str, store: JobStore = Depends(get_job_store)):
     """Get all artifacts for a job
 
     Returns list of artifact metadata (file paths, types, sizes).
     """
     # Verify job exists
-    _get_job_or_404(job_id)
+    _get_job_or_404(store, job_id)
 
-    artifacts = [ArtifactData(**artifact) for artifact in _artifacts_store.get(job_id, [])]
+    artifacts = _build_artifacts(store, job_id)
 
     return ArtifactListResponse(
         job_id=job_id,
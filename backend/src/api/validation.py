@@ -1,11 +1,17 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 
 from ..validation.consistency import run_validation
 
 router = APIRouter(prefix="/api/validation", tags=["validation"])
 
 
+# Plain def: FastAPI runs it in its threadpool, so waiting on the validation
+# process pool does not block the event loop
 @router.get("")
-async def validate_consistency():
-    report = run_validation()
+def validate_consistency(
+    changed_beats: list[str] | None = Query(
+        None, description="Beat IDs to re-validate besides those detected by content hash"
+    ),
+):
+    report = run_validation(changed_beat_ids=changed_beats)
     return report.summary()
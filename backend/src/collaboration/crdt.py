@@ -3,13 +3,20 @@ Collaborative Editing with CRDT (Conflict-free Replicated Data Types).
 Enables real-time collaborative editing of narrative content.
 """
 
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, Iterable, List, Optional, Any, Set, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
+from bisect import bisect_right
+from itertools import count, islice
 import time
 import hashlib
 import json
-from collections import defaultdict
+from collections import defaultdict, deque
+
+from .text import TextCRDT
+
+# Ops parked waiting for causal predecessors; later early arrivals are dropped
+MAX_BUFFERED_OPS = 10_000
 
 
 class OperationType(Enum):
@@ -19,6 +26,8 @@ class OperationType(Enum):
     DELETE = "delete"
     UPDATE = "update"
     MOVE = "move"
+    TEXT_INSERT = "text_insert"
+    TEXT_DELETE = "text_delete"
 
 
 @dataclass
@@ -79,10 +88,25 @@ class CRDTNode:
     created_at: float = 0.0
     version: int = 1
     deleted: bool = False
+    # Sequence CRDT backing ``content`` once it is edited character-wise
+    text: Optional[TextCRDT] = None
+    # [clock sum, user_id, op_id] of the whole-content update in effect, if any
+    content_stamp: Optional[List] = None
+
+    @property
+    def epoch(self) -> Optional[str]:
+        """Op id of the content update the text sequence was seeded from."""
+        return self.content_stamp[2] if self.content_stamp else None
+
+    def text_state(self) -> TextCRDT:
+        """Get the node's sequence CRDT, seeding it from the current content."""
+        if self.text is None:
+            self.text = TextCRDT(self.content)
+        return self.text
 
     def to_dict(self) -> Dict:
         """Convert to dictionary."""
-        return {
+        data = {
             "node_id": self.node_id,
             "node_type": self.node_type,
             "content": self.content,
@@ -94,6 +118,11 @@ class CRDTNode:
             "version": self.version,
             "deleted": self.deleted,
         }
+        if self.text is not None:
+            data["text"] = self.text.to_dict()
+        if self.content_stamp is not None:
+            data["content_stamp"] = list(self.content_stamp)
+        return data
 
     @classmethod
     def from_dict(cls, data: Dict) -> "CRDTNode":
@@ -109,6 +138,8 @@ class CRDTNode:
             created_at=data.get("created_at", 0.0),
             version=data.get("version", 1),
             deleted=data.get("deleted", False),
+            text=TextCRDT.from_dict(data["text"]) if data.get("text") else None,
+            content_stamp=data.get("content_stamp"),
         )
 
 
@@ -119,22 +150,53 @@ class CRDTDocument:
     Supports concurrent editing without conflicts using operation-based CRDTs.
     """
 
-    def __init__(self, doc_id: str, doc_type: str = "narrative"):
+    def __init__(
+        self, doc_id: str, doc_type: str = "narrative", max_buffered: int = MAX_BUFFERED_OPS
+    ):
         """
         Initialize a CRDT document.
 
         Args:
             doc_id: Unique document identifier
             doc_type: Type of document (narrative, character, etc.)
+            max_buffered: Most ops held back waiting for their predecessors
         """
         self.doc_id = doc_id
         self.doc_type = doc_type
+        self.max_buffered = max_buffered
+        # Early ops refused because the causal buffer was full
+        self.dropped_operations = 0
         self.nodes: Dict[str, CRDTNode] = {}
         self.operations: List[CRDTOperation] = []
         self.vector_clock: Dict[str, int] = defaultdict(int)
         self.root_id: Optional[str] = None
         self.users: Set[str] = set()
 
+        # op_id -> operation, for O(1) duplicate detection
+        self._op_index: Dict[str, CRDTOperation] = {}
+        # Causal delivery buffer: ops whose dependencies have not arrived yet,
+        # keyed by the (user_id, clock value) they are waiting for
+        self._buffered: Dict[str, CRDTOperation] = {}
+        self._waiting: Dict[Tuple[str, int], List[CRDTOperation]] = defaultdict(list)
+        self._id_counter = count()
+
+        # Last vector clock acknowledged by each known replica, and the clock
+        # up to which operations have been folded into the node snapshot
+        self.replica_clocks: Dict[str, Dict[str, int]] = {}
+        self.snapshot_clock: Dict[str, int] = {}
+
+        # Per-user op index sorted by the user's own clock entry, plus each
+        # op's position in the log, so deltas are found by bisection
+        self._user_seqs: Dict[str, List[int]] = defaultdict(list)
+        self._user_ops: Dict[str, List[CRDTOperation]] = defaultdict(list)
+        self._unclocked_ops: List[CRDTOperation] = []
+        self._log_position: Dict[str, int] = {}
+        self._log_counter = count()
+
+        # Nodes whose text ops could not be integrated; this replica has
+        # diverged on them and must reload a snapshot
+        self.resync_nodes: Set[str] = set()
+
     def create_node(
         self,
         node_type: str,
@@ -204,8 +266,13 @@ class CRDTDocument:
         node = self.nodes[node_id]
 
         if field == "content":
-            node.content = value
-        elif field == "attributes":
+            op = self._create_operation(OperationType.UPDATE, node_id, field, value, user_id)
+            self._replace_content(node, op)
+            node.version += 1
+            self.users.add(user_id)
+            return True
+
+        if field == "attributes":
             node.attributes.update(value)
         elif field == "parent":
             # Update parent relationship
@@ -247,6 +314,73 @@ class CRDTDocument:
 
         return True
 
+    def insert_text(
+        self, node_id: str, index: int, text: str, user_id: str
+    ) -> Optional[CRDTOperation]:
+        """
+        Insert text into a node's content at a character index.
+
+        Unlike a ``content`` update, the op only carries the inserted span
+        and merges with concurrent edits instead of overwriting them.
+
+        Args:
+            node_id: ID of node to edit
+            index: Character index in the current content
+            text: Text to insert
+            user_id: ID of editing user
+
+        Returns:
+            The created operation, or None if the node does not exist
+        """
+        node = self.nodes.get(node_id)
+        if node is None or not text:
+            return None
+
+        sequence = node.text_state()
+        payload = sequence.local_insert(index, text, user_id)
+        if node.epoch is not None:
+            payload["epoch"] = node.epoch
+        node.content = sequence.value
+        node.version += 1
+
+        self.users.add(user_id)
+        return self._create_operation(
+            OperationType.TEXT_INSERT, node_id, "content", payload, user_id
+        )
+
+    def delete_text(
+        self, node_id: str, index: int, length: int, user_id: str
+    ) -> Optional[CRDTOperation]:
+        """
+        Delete a character range from a node's content.
+
+        Args:
+            node_id: ID of node to edit
+            index: Character index of the first deleted character
+            length: Number of characters to delete
+            user_id: ID of editing user
+
+        Returns:
+            The created operation, or None if nothing was deleted
+        """
+        node = self.nodes.get(node_id)
+        if node is None or length <= 0:
+            return None
+
+        sequence = node.text_state()
+        payload = sequence.local_delete(index, length)
+        if not payload["spans"]:
+            return None
+        if node.epoch is not None:
+            payload["epoch"] = node.epoch
+        node.content = sequence.value
+        node.version += 1
+
+        self.users.add(user_id)
+        return self._create_operation(
+            OperationType.TEXT_DELETE, node_id, "content", payload, user_id
+        )
+
     def get_node(self, node_id: str) -> Optional[CRDTNode]:
         """Get a node by ID."""
         return self.nodes.get(node_id)
@@ -285,37 +419,123 @@ class CRDTDocument:
 
         return build_tree(self.root_id)
 
-    def merge_operations(self, remote_ops: List[CRDTOperation]) -> List[CRDTOperation]:
+    def merge_operations(self, remote_ops: Iterable[CRDTOperation]) -> List[CRDTOperation]:
         """
         Merge remote operations into this document.
 
-        Implements CRDT merge logic for conflict resolution.
+        Implements CRDT merge logic for conflict resolution. Operations are
+        delivered in causal order: an op from user U with vector clock V is
+        applied only once this replica has seen V[U] - 1 ops from U and at
+        least V[K] ops from every other user K. Ops that arrive early are
+        buffered and applied as soon as their predecessors arrive.
 
         Args:
             remote_ops: Operations from another replica
 
         Returns:
-            List of applied operations
+            List of applied operations, in the order they were applied
         """
-        applied = []
+        applied: List[CRDTOperation] = []
+        ready: deque = deque()
 
         for op in remote_ops:
-            # Check if we've already seen this operation
-            if any(o.op_id == op.op_id for o in self.operations):
+            if op.op_id in self._op_index or op.op_id in self._buffered:
                 continue
+            self._schedule(op, ready)
 
-            # Update vector clock
-            self.vector_clock[op.user_id] = max(
-                self.vector_clock[op.user_id], op.vector_clock.get(op.user_id, 0)
-            )
+        while ready:
+            op = ready.popleft()
+            self._buffered.pop(op.op_id, None)
+
+            seq = op.vector_clock.get(op.user_id, 0)
+            if seq and seq <= self.vector_clock.get(op.user_id, 0):
+                # Already covered by our clock under a different op_id
+                continue
 
-            # Apply operation
             self._apply_operation(op)
-            self.operations.append(op)
+            self._record(op)
             applied.append(op)
 
+            if seq:
+                for waiter in self._waiting.pop((op.user_id, seq), []):
+                    self._schedule(waiter, ready)
+
         return applied
 
+    def merge_operation_stream(
+        self, op_stream: Iterable[CRDTOperation], batch_size: int = 10_000
+    ) -> int:
+        """
+        Merge a (possibly very large) stream of operations in fixed-size batches.
+
+        Only one batch is materialized at a time, so memory stays bounded by
+        ``batch_size`` plus whatever is held in the causal buffer.
+
+        Returns:
+            Number of operations applied
+        """
+        iterator = iter(op_stream)
+        total = 0
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return total
+            total += len(self.merge_operations(batch))
+
+    def get_buffered_operations(self) -> List[CRDTOperation]:
+        """Operations received but still waiting for causal predecessors."""
+        return list(self._buffered.values())
+
+    def has_operation(self, op_id: str) -> bool:
+        """Check whether an operation has been applied to this replica."""
+        return op_id in self._op_index
+
+    def _missing_dependency(self, op: CRDTOperation) -> Optional[Tuple[str, int]]:
+        """Return the first (user_id, clock value) this op still waits for, if any."""
+        seq = op.vector_clock.get(op.user_id, 0)
+        if seq > self.vector_clock.get(op.user_id, 0) + 1:
+            return (op.user_id, seq - 1)
+
+        for user_id, user_seq in op.vector_clock.items():
+            if user_id != op.user_id and user_seq > self.vector_clock.get(user_id, 0):
+                return (user_id, user_seq)
+
+        return None
+
+    def _schedule(self, op: CRDTOperation, ready: deque):
+        """Queue an op for delivery, or park it until its next dependency is met."""
+        dependency = self._missing_dependency(op)
+        if dependency is None:
+            ready.append(op)
+        else:
+            if op.op_id not in self._buffered and len(self._buffered) >= self.max_buffered:
+                # Its predecessors may never come (e.g. a forged clock); the
+                # sender can resend it after syncing
+                self.dropped_operations += 1
+                return
+            self._buffered[op.op_id] = op
+            self._waiting[dependency].append(op)
+
+    def _record(self, op: CRDTOperation):
+        """Append an applied op to the log, index it and advance the clock."""
+        self.operations.append(op)
+        self._index_operation(op)
+        seq = op.vector_clock.get(op.user_id, 0)
+        if seq > self.vector_clock.get(op.user_id, 0):
+            self.vector_clock[op.user_id] = seq
+
+    def _index_operation(self, op: CRDTOperation):
+        """Add an op to the id index and the per-user delta index."""
+        self._op_index[op.op_id] = op
+        self._log_position[op.op_id] = next(self._log_counter)
+        seq = op.vector_clock.get(op.user_id, 0)
+        if seq:
+            # Causal delivery guarantees each user's ops arrive in clock order
+            self._user_seqs[op.user_id].append(seq)
+            self._user_ops[op.user_id].append(op)
+        else:
+            self._unclocked_ops.append(op)
+
     def _create_operation(
         self, op_type: OperationType, target_id: str, field: str, value: Any, user_id: str
     ) -> CRDTOperation:
@@ -336,6 +556,12 @@ class CRDTDocument:
         )
 
         self.operations.append(op)
+        self._index_operation(op)
+
+        # A local edit may satisfy a dependency of a buffered remote op
+        waiters = self._waiting.pop((user_id, self.vector_clock[user_id]), [])
+        if waiters:
+            self.merge_operations(waiters)
 
         return op
 
@@ -356,7 +582,7 @@ class CRDTDocument:
             if op.target_id in self.nodes:
                 node = self.nodes[op.target_id]
                 if op.field == "content":
-                    node.content = op.value
+                    self._replace_content(node, op)
                 elif op.field == "attributes":
                     node.attributes.update(op.value)
                 node.version += 1
@@ -365,38 +591,189 @@ class CRDTDocument:
             if op.target_id in self.nodes:
                 self.nodes[op.target_id].deleted = True
 
+        elif op.op_type in (OperationType.TEXT_INSERT, OperationType.TEXT_DELETE):
+            node = self.nodes.get(op.target_id)
+            if node is None:
+                return
+            if op.value.get("epoch") != node.epoch:
+                # Edits the text a concurrent whole-content update replaced;
+                # every replica drops it, since the newer update wins everywhere
+                return
+            sequence = node.text_state()
+            try:
+                if op.op_type == OperationType.TEXT_INSERT:
+                    sequence.integrate_insert(op.value)
+                else:
+                    sequence.integrate_delete(op.value)
+            except KeyError:
+                # The origin is unknown, so this replica's text has diverged
+                self.resync_nodes.add(node.node_id)
+                return
+            node.content = sequence.value
+            node.version += 1
+
+    @staticmethod
+    def _replace_content(node: CRDTNode, op: CRDTOperation):
+        """
+        Apply a whole-content update as a last-writer-wins register.
+
+        Updates are ordered by the sum of their vector clock, so an update
+        always beats the ones it has seen, with the user and op ids breaking
+        ties between concurrent ones. The winner re-seeds the text sequence
+        and starts a new epoch; text ops made against an older epoch are
+        then ignored on every replica, whatever order they arrive in.
+        """
+        stamp = [sum(op.vector_clock.values()), op.user_id, op.op_id]
+        if node.content_stamp is not None and stamp <= node.content_stamp:
+            return
+        node.content = op.value
+        node.text = None
+        node.content_stamp = stamp
+
     def _generate_id(self) -> str:
         """Generate unique node ID."""
-        return f"node_{hashlib.md5(str(time.time()).encode()).hexdigest()[:12]}"
+        seed = f"{self.doc_id}:{time.time()}:{id(self)}:{next(self._id_counter)}"
+        return f"node_{hashlib.md5(seed.encode()).hexdigest()[:12]}"
 
     def _generate_op_id(self) -> str:
         """Generate unique operation ID."""
-        return f"op_{hashlib.md5(str(time.time()).encode()).hexdigest()[:12]}"
+        # The counter keeps ids unique when many ops share a timestamp
+        seed = f"{self.doc_id}:{time.time()}:{id(self)}:{next(self._id_counter)}"
+        return f"op_{hashlib.md5(seed.encode()).hexdigest()[:12]}"
+
+    def observe_replica_clock(self, replica_id: str, vector_clock: Dict[str, int]):
+        """
+        Record the vector clock a replica has acknowledged.
+
+        Clocks only move forward; a stale acknowledgement never lowers what
+        is already known about the replica.
+        """
+        known = self.replica_clocks.setdefault(replica_id, {})
+        for user_id, seq in vector_clock.items():
+            if seq > known.get(user_id, 0):
+                known[user_id] = seq
+
+    def forget_replica(self, replica_id: str):
+        """Stop tracking a replica so it no longer holds back compaction."""
+        self.replica_clocks.pop(replica_id, None)
+
+    def stable_clock(self) -> Dict[str, int]:
+        """
+        Pointwise minimum of this replica's clock and every known replica's clock.
+
+        Every operation covered by this clock has been seen by all known
+        replicas, so it is causally stable and can be garbage-collected.
+        """
+        stable = {user_id: seq for user_id, seq in self.vector_clock.items() if seq}
+        for clock in self.replica_clocks.values():
+            stable = {
+                user_id: min(seq, clock.get(user_id, 0))
+                for user_id, seq in stable.items()
+                if clock.get(user_id, 0)
+            }
+        return stable
+
+    def _is_stable(self, op: CRDTOperation, stable: Dict[str, int]) -> bool:
+        seq = op.vector_clock.get(op.user_id, 0)
+        return 0 < seq <= stable.get(op.user_id, 0)
+
+    def compact(self) -> int:
+        """
+        Fold causally stable operations into the snapshot and drop them.
+
+        The node map already reflects every applied op, so compaction only
+        has to trim the log, the op index and tombstones whose delete is
+        stable (no replica can still reference them).
+
+        Returns:
+            Number of operations removed from the log
+        """
+        stable = self.stable_clock()
+        if not stable:
+            return 0
+
+        tail: List[CRDTOperation] = []
+        dropped = 0
+        for op in self.operations:
+            if not self._is_stable(op, stable):
+                tail.append(op)
+                continue
+
+            dropped += 1
+            self._op_index.pop(op.op_id, None)
+            self._log_position.pop(op.op_id, None)
+            if op.op_type == OperationType.DELETE:
+                self._purge_tombstone(op.target_id)
+
+        self.operations = tail
+
+        # Stable ops form a prefix of each user's seq-sorted index
+        for user_id, seq in stable.items():
+            seqs = self._user_seqs.get(user_id)
+            if seqs:
+                cut = bisect_right(seqs, seq)
+                del seqs[:cut]
+                del self._user_ops[user_id][:cut]
+        for user_id, seq in stable.items():
+            if seq > self.snapshot_clock.get(user_id, 0):
+                self.snapshot_clock[user_id] = seq
+
+        return dropped
+
+    def _purge_tombstone(self, node_id: str):
+        """Physically remove a deleted node and unlink it from its parent."""
+        node = self.nodes.get(node_id)
+        if node is None or not node.deleted:
+            return
+
+        parent = self.nodes.get(node.parent) if node.parent else None
+        if parent is not None and node_id in parent.children:
+            parent.children.remove(node_id)
+
+        del self.nodes[node_id]
+        if self.root_id == node_id:
+            self.root_id = None
+
+    def requires_snapshot(self, since_vector_clock: Dict[str, int]) -> bool:
+        """Check whether a replica is too far behind to catch up from the log tail."""
+        return any(
+            since_vector_clock.get(user_id, 0) < seq for user_id, seq in self.snapshot_clock.items()
+        )
 
     def get_pending_operations(self, since_vector_clock: Dict[str, int]) -> List[CRDTOperation]:
         """
         Get operations that are new relative to a vector clock.
 
+        Each user's ops are bisected out of the per-user index, so the cost
+        is proportional to the number of missing ops rather than the log.
+
         Args:
             since_vector_clock: Vector clock to compare against
 
         Returns:
-            List of new operations
+            List of new operations, in log order
         """
-        pending = []
+        pending: List[CRDTOperation] = []
 
-        for op in self.operations:
-            # Check if this operation is newer than the given clock
-            op_time = op.vector_clock.get(op.user_id, 0)
-            known_time = since_vector_clock.get(op.user_id, 0)
+        for user_id, seqs in self._user_seqs.items():
+            start = bisect_right(seqs, since_vector_clock.get(user_id, 0))
+            if start < len(seqs):
+                pending.extend(self._user_ops[user_id][start:])
 
-            if op_time > known_time:
-                pending.append(op)
+        if not since_vector_clock:
+            # Ops without a clock entry cannot be ordered; only a fresh replica gets them
+            pending.extend(self._unclocked_ops)
 
+        pending.sort(key=lambda op: self._log_position[op.op_id])
         return pending
 
     def to_dict(self) -> Dict:
-        """Convert document to dictionary."""
+        """
+        Convert document to dictionary.
+
+        The node map is the snapshot; ``operations`` holds only the tail of
+        the log that has not been compacted yet.
+        """
         return {
             "doc_id": self.doc_id,
             "doc_type": self.doc_type,
@@ -404,7 +781,10 @@ class CRDTDocument:
             "nodes": {k: v.to_dict() for k, v in self.nodes.items()},
             "operations": [o.to_dict() for o in self.operations],
             "vector_clock": dict(self.vector_clock),
+            "snapshot_clock": dict(self.snapshot_clock),
+            "replica_clocks": {k: dict(v) for k, v in self.replica_clocks.items()},
             "users": list(self.users),
+            "buffered_operations": [o.to_dict() for o in self._buffered.values()],
         }
 
     @classmethod
@@ -414,8 +794,15 @@ class CRDTDocument:
         doc.root_id = data.get("root_id")
         doc.nodes = {k: CRDTNode.from_dict(v) for k, v in data.get("nodes", {}).items()}
         doc.operations = [CRDTOperation.from_dict(o) for o in data.get("operations", [])]
+        for op in doc.operations:
+            doc._index_operation(op)
         doc.vector_clock = defaultdict(int, data.get("vector_clock", {}))
+        doc.snapshot_clock = dict(data.get("snapshot_clock", {}))
+        doc.replica_clocks = {k: dict(v) for k, v in data.get("replica_clocks", {}).items()}
         doc.users = set(data.get("users", []))
+        buffered = [CRDTOperation.from_dict(o) for o in data.get("buffered_operations", [])]
+        if buffered:
+            doc.merge_operations(buffered)
         return doc
 
 
@@ -426,24 +813,29 @@ class CollaborationSession:
     Coordinates multiple users editing the same document.
     """
 
-    def __init__(self, session_id: str, document: CRDTDocument):
+    def __init__(self, session_id: str, document: CRDTDocument, compact_every: int = 1000):
         """
         Initialize collaboration session.
 
         Args:
             session_id: Unique session identifier
             document: CRDT document to collaborate on
+            compact_every: Attempt log compaction once the log grows by this many ops
         """
         self.session_id = session_id
         self.document = document
         self.connected_users: Dict[str, Dict] = {}
         self.last_sync: Dict[str, float] = {}
+        self.compact_every = compact_every
+        self._log_size_at_compaction = len(document.operations)
 
     def join(self, user_id: str, user_info: Optional[Dict] = None):
         """User joins the session."""
         self.connected_users[user_id] = user_info or {}
         self.last_sync[user_id] = time.time()
         self.document.users.add(user_id)
+        # A new replica pins the log until it acknowledges what it has seen
+        self.document.observe_replica_clock(user_id, {})
 
     def leave(self, user_id: str):
         """User leaves the session."""
@@ -451,26 +843,61 @@ class CollaborationSession:
             del self.connected_users[user_id]
         if user_id in self.last_sync:
             del self.last_sync[user_id]
+        self.document.forget_replica(user_id)
+
+    def acknowledge(self, user_id: str, vector_clock: Dict[str, int]):
+        """Record the clock a user's replica has reached and compact if worthwhile."""
+        if user_id not in self.connected_users:
+            return
+        self.document.observe_replica_clock(user_id, vector_clock)
+        self.maybe_compact()
+
+    def maybe_compact(self) -> int:
+        """Compact the document once enough new operations have accumulated."""
+        log_size = len(self.document.operations)
+        if log_size - self._log_size_at_compaction < self.compact_every:
+            return 0
+        dropped = self.document.compact()
+        self._log_size_at_compaction = len(self.document.operations)
+        return dropped
+
+    def get_snapshot(self) -> Dict:
+        """Full document state for a replica that is behind the snapshot clock."""
+        return self.document.to_dict()
 
     def apply_operation(self, op: CRDTOperation) -> bool:
         """Apply an operation from a user."""
         if op.user_id not in self.connected_users:
             return False
 
-        self.document._apply_operation(op)
-        self.document.operations.append(op)
+        # Goes through the causal buffer, so an early op is held, not lost
+        self.document.merge_operations([op])
         self.last_sync[op.user_id] = time.time()
 
         return True
 
-    def sync_for_user(self, user_id: str) -> List[CRDTOperation]:
-        """Get operations to sync to a specific user."""
+    def sync_for_user(
+        self, user_id: str, vector_clock: Optional[Dict[str, int]] = None
+    ) -> List[CRDTOperation]:
+        """
+        Get operations to sync to a specific user.
+
+        Args:
+            user_id: Connected user requesting a sync
+            vector_clock: The user's full vector clock. When omitted, the last
+                clock the user acknowledged is used.
+
+        Returns:
+            Operations the user is missing, in log order
+        """
         if user_id not in self.connected_users:
             return []
 
-        # Get operations since last sync
-        user_clock = {user_id: self.document.vector_clock.get(user_id, 0)}
+        if vector_clock is not None:
+            self.acknowledge(user_id, vector_clock)
+        self.last_sync[user_id] = time.time()
 
+        user_clock = self.document.replica_clocks.get(user_id, {})
         return self.document.get_pending_operations(user_clock)
 
     def get_active_users(self) -> List[str]:
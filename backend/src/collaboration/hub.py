@@ -0,0 +1,311 @@
+"""
+Multi-document collaboration hub.
+
+Every open document runs as an asyncio actor that owns its session. Edits are
+queued on a bounded inbox (producers wait when it is full), merged in one
+batch per tick, appended to the document's op log, and fanned out by waking
+each connection's coalescing sender. Documents without connections or edits
+for ``idle_timeout`` seconds are snapshotted to the op log store and evicted.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from .crdt import CollaborationSession, CRDTDocument, CRDTOperation
+from .store import DocumentLog, OpLogStore
+from .sync import SyncConnection, _running_loop, advance_clock
+
+
+class HubMetrics:
+    """Throughput and latency counters shared by every actor of a hub."""
+
+    def __init__(self, window: float = 10.0, latency_samples: int = 1024):
+        self.window = window
+        self.ops_merged = 0
+        self.batches_merged = 0
+        self.evictions = 0
+        self._merges: Deque[Tuple[float, int]] = deque()
+        self._fanout_latency: Deque[float] = deque(maxlen=latency_samples)
+
+    def record_merge(self, n_ops: int):
+        now = time.monotonic()
+        self.ops_merged += n_ops
+        self.batches_merged += 1
+        self._merges.append((now, n_ops))
+        self._trim(now)
+
+    def record_fanout(self, latency: float):
+        self._fanout_latency.append(latency)
+
+    def _trim(self, now: float):
+        while self._merges and now - self._merges[0][0] > self.window:
+            self._merges.popleft()
+
+    def ops_per_second(self) -> float:
+        """Merged ops per second over the sliding window."""
+        self._trim(time.monotonic())
+        return sum(n for _, n in self._merges) / self.window
+
+    def fanout_latency_ms(self) -> Dict[str, float]:
+        """Percentiles of notify-to-send latency over recent flushes."""
+        samples = sorted(self._fanout_latency)
+        if not samples:
+            return {"p50": 0.0, "p99": 0.0, "max": 0.0}
+
+        def percentile(q: float) -> float:
+            return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 3)
+
+        return {"p50": percentile(0.5), "p99": percentile(0.99), "max": percentile(1.0)}
+
+
+class DocumentActor:
+    """Owns one document's session, inbox and live connections."""
+
+    def __init__(
+        self,
+        hub: "CollaborationHub",
+        session: CollaborationSession,
+        log: Optional[DocumentLog] = None,
+    ):
+        self.hub = hub
+        self.session = session
+        self.log = log
+        self.connections: Dict[str, SyncConnection] = {}
+        self.inbox: Optional[asyncio.Queue] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def doc_id(self) -> str:
+        return self.session.session_id
+
+    @property
+    def alive(self) -> bool:
+        return (
+            self.task is not None
+            and not self.task.done()
+            and self.loop is not None
+            and not self.loop.is_closed()
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return self.inbox.qsize() if self.inbox is not None else 0
+
+    def start(self):
+        """Start (or restart) the actor on the running event loop."""
+        self.loop = asyncio.get_running_loop()
+        self.inbox = asyncio.Queue(maxsize=self.hub.max_queue)
+        self.task = self.loop.create_task(self.run())
+
+    async def submit(self, user_id: str, ops: List[CRDTOperation]):
+        """Queue a user's ops, waiting while the inbox is full."""
+        if _running_loop() is self.loop:
+            await self.inbox.put((user_id, ops))
+        else:
+            # asyncio queues are bound to their loop
+            future = asyncio.run_coroutine_threadsafe(self.inbox.put((user_id, ops)), self.loop)
+            await asyncio.wrap_future(future)
+
+    async def run(self):
+        """Actor loop: wait for edits, then merge everything queued this tick.
+
+        While the log has records waiting for fsync, the wait is cut short at
+        their deadline, so they become durable even if no further edit comes.
+        """
+        while True:
+            timeout = self.hub.idle_timeout
+            sync_due = self.log.sync_due_in() if self.log is not None else None
+            if sync_due is not None:
+                timeout = min(timeout, sync_due)
+            try:
+                item = await asyncio.wait_for(self.inbox.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                if sync_due is not None:
+                    self.log.sync()
+                    continue
+                if self.connections or not self.hub.evict(self):
+                    continue
+                return
+
+            if self.hub.tick_interval:
+                try:
+                    await asyncio.sleep(self.hub.tick_interval)
+                except asyncio.CancelledError:
+                    # Shutting down: keep the edit already taken from the inbox
+                    self.merge([item])
+                    raise
+
+            batch = [item]
+            while len(batch) < self.hub.max_batch:
+                try:
+                    batch.append(self.inbox.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            self.merge(batch)
+
+    def merge(self, batch: List[Tuple[str, List[CRDTOperation]]]) -> List[CRDTOperation]:
+        """Merge one tick's worth of queued ops, persist them and wake connections."""
+        ops: List[CRDTOperation] = []
+        for user_id, user_ops in batch:
+            ops.extend(user_ops)
+            connection = self.connections.get(user_id)
+            if connection is not None:
+                # Senders already have their own ops; never echo them back
+                advance_clock(connection.known_clock, user_ops)
+
+        applied = self.session.document.merge_operations(ops)
+        self.hub.metrics.record_merge(len(applied))
+        if not applied:
+            return applied
+
+        if self.log is not None:
+            self.log.append(applied)
+            if self.log.should_snapshot:
+                self.log.write_snapshot(self.session.document)
+        for connection in self.connections.values():
+            connection.notify()
+        return applied
+
+
+class CollaborationHub:
+    """Hosts many documents concurrently, one actor per open document."""
+
+    def __init__(
+        self,
+        store: Optional[OpLogStore] = None,
+        tick_interval: float = 0.005,
+        max_batch: int = 1000,
+        max_queue: int = 10_000,
+        max_send_ops: int = 5000,
+        idle_timeout: float = 300.0,
+        compact_every: int = 1000,
+    ):
+        """
+        Initialize the hub.
+
+        Args:
+            store: Op log store for persistence and eviction (None keeps
+                documents in memory only, and they are never evicted)
+            tick_interval: Seconds an actor waits after the first queued edit
+                so concurrent edits are merged together
+            max_batch: Maximum queued submissions merged per tick
+            max_queue: Inbox capacity per document before submitters wait
+            max_send_ops: Maximum ops per batch pushed to one client
+            idle_timeout: Seconds without edits or connections before eviction
+            compact_every: Passed to each CollaborationSession
+        """
+        self.store = store
+        self.tick_interval = tick_interval
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.max_send_ops = max_send_ops
+        self.idle_timeout = idle_timeout
+        self.compact_every = compact_every
+        self.metrics = HubMetrics()
+        self._actors: Dict[str, DocumentActor] = {}
+
+    def get_session(self, doc_id: str) -> Optional[CollaborationSession]:
+        """Session of an open document, or None."""
+        actor = self._actors.get(doc_id)
+        return actor.session if actor is not None else None
+
+    def open(self, doc_id: str) -> DocumentActor:
+        """Get a document's running actor, loading the document from the store if needed."""
+        actor = self._actors.get(doc_id)
+        if actor is None:
+            document = None
+            log = None
+            if self.store is not None:
+                document = self.store.load(doc_id)
+                log = self.store.open(doc_id)
+            session = CollaborationSession(
+                doc_id, document or CRDTDocument(doc_id), compact_every=self.compact_every
+            )
+            actor = self._actors[doc_id] = DocumentActor(self, session, log)
+        if not actor.alive:
+            actor.start()
+        return actor
+
+    async def submit(self, doc_id: str, user_id: str, ops: List[CRDTOperation]):
+        """Queue a user's ops for the document's next merge tick."""
+        await self.open(doc_id).submit(user_id, ops)
+
+    def connect(
+        self,
+        doc_id: str,
+        user_id: str,
+        send_bytes: Callable[[bytes], Awaitable[Any]],
+    ) -> SyncConnection:
+        """Register a push connection for a user of a document."""
+        actor = self.open(doc_id)
+        actor.session.join(user_id)
+        connection = SyncConnection(
+            actor.session,
+            user_id,
+            send_bytes,
+            max_batch_ops=self.max_send_ops,
+            on_flush=self.metrics.record_fanout,
+        )
+        actor.connections[user_id] = connection
+        return connection
+
+    def disconnect(self, doc_id: str, user_id: str):
+        """Close a user's connection and remove them from the session."""
+        actor = self._actors.get(doc_id)
+        if actor is None:
+            return
+        connection = actor.connections.pop(user_id, None)
+        if connection is not None:
+            connection.close()
+        actor.session.leave(user_id)
+
+    def evict(self, actor: DocumentActor) -> bool:
+        """Snapshot an idle document to the store and drop it from memory."""
+        if self.store is None or actor.connections or actor.queue_depth:
+            return False
+        if actor.log is not None:
+            actor.log.write_snapshot(actor.session.document)
+        self.store.release(actor.doc_id)
+        if self._actors.get(actor.doc_id) is actor:
+            del self._actors[actor.doc_id]
+        self.metrics.evictions += 1
+        return True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Hub-wide counters plus per-document queue depth."""
+        queue_depth = {doc_id: actor.queue_depth for doc_id, actor in self._actors.items()}
+        return {
+            "documents": len(self._actors),
+            "connections": sum(len(a.connections) for a in self._actors.values()),
+            "ops_merged": self.metrics.ops_merged,
+            "batches_merged": self.metrics.batches_merged,
+            "ops_per_second": round(self.metrics.ops_per_second(), 2),
+            "queue_depth": sum(queue_depth.values()),
+            "queue_depth_by_document": queue_depth,
+            "fanout_latency_ms": self.metrics.fanout_latency_ms(),
+            "evictions": self.metrics.evictions,
+        }
+
+    async def shutdown(self):
+        """Stop every actor, merge what is still queued and persist open documents."""
+        for actor in list(self._actors.values()):
+            for connection in actor.connections.values():
+                connection.close()
+            if actor.task is not None and actor.alive:
+                actor.task.cancel()
+                if actor.loop is _running_loop():
+                    await asyncio.wait([actor.task])
+            pending = []
+            while actor.queue_depth:
+                pending.append(actor.inbox.get_nowait())
+            if pending:
+                actor.merge(pending)
+            if actor.log is not None:
+                actor.log.write_snapshot(actor.session.document)
+        self._actors.clear()
+        if self.store is not None:
+            self.store.close()
+
@@ -0,0 +1,374 @@
+"""
+Durable storage for collaborative documents.
+
+Each document gets a directory holding an append-only op log and its latest
+snapshot:
+
+    <root>/<doc_id>/ops.log        b"CRDLOG1\\n" | record*
+    <root>/<doc_id>/snapshot.json  {"log_offset": N, "document": {...}}
+
+A record is ``length (u32) | crc32 (u32) | payload``, where the payload is an
+op batch in the sync wire format (see ``sync.encode_op_batch``). Every
+record is flushed to the OS as it is appended and fsynced in batches, at
+most ``fsync_interval`` seconds later. Writing a snapshot cuts the log back
+to its header, so loading reads the snapshot and replays only the records
+appended since. A record that is truncated or fails its checksum marks a
+torn write and is cut off on open.
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from .crdt import CRDTDocument, CRDTOperation
+from .sync import decode_op_batch, encode_op_batch
+
+LOG_MAGIC = b"CRDLOG1\n"
+_RECORD_HEADER = struct.Struct("<II")
+
+
+class DocumentLog:
+    """
+    Append-only op log and snapshot for one document.
+
+    Keeps an in-memory index from each user's clock entry to the offset of the
+    record holding that op, so the ops a replica is missing can be read from
+    disk without scanning the whole log.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        doc_id: str,
+        fsync_every: int = 64,
+        fsync_interval: float = 0.05,
+        snapshot_every: int = 1000,
+    ):
+        self.directory = directory
+        self.doc_id = doc_id
+        self.path = os.path.join(directory, "ops.log")
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+
+        self.records = 0
+        self.records_since_snapshot = 0
+        self.truncated_bytes = 0
+        self._unsynced = 0
+        # When the oldest record not yet fsynced was appended
+        self._unsynced_since = 0.0
+
+        # user_id -> (sorted seqs, offset of the record holding each seq)
+        self._seqs: Dict[str, List[int]] = {}
+        self._offsets: Dict[str, List[int]] = {}
+
+        os.makedirs(directory, exist_ok=True)
+        self._size = self._recover()
+        # Held open for appends until close()
+        self._file = open(self.path, "ab")  # noqa: SIM115
+        self.snapshot_offset = self._read_snapshot_offset()
+
+    # ------------------------------------------------------------------
+    # Recovery and indexing
+    # ------------------------------------------------------------------
+
+    def _recover(self) -> int:
+        """Validate the log, truncating any torn tail, and rebuild the index."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < len(LOG_MAGIC):
+            with open(self.path, "wb") as f:
+                f.write(LOG_MAGIC)
+                f.flush()
+                os.fsync(f.fileno())
+            return len(LOG_MAGIC)
+
+        end = len(LOG_MAGIC)
+        with open(self.path, "r+b") as f:
+            if f.read(len(LOG_MAGIC)) != LOG_MAGIC:
+                raise ValueError(f"Not a CRDT op log: {self.path}")
+            for offset, ops, record_end in self._scan(f, end):
+                self._index_record(offset, ops)
+                self.records += 1
+                end = record_end
+
+            size = f.seek(0, os.SEEK_END)
+            if size > end:
+                self.truncated_bytes = size - end
+                f.truncate(end)
+                f.flush()
+                os.fsync(f.fileno())
+        return end
+
+    @staticmethod
+    def _scan(f, offset: int) -> Iterator[Tuple[int, List[CRDTOperation], int]]:
+        """Yield (offset, ops, end offset) for each intact record from ``offset``."""
+        f.seek(offset)
+        while True:
+            header = f.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                return
+            length, checksum = _RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return
+            try:
+                ops = decode_op_batch(payload)
+            except (ValueError, IndexError, zlib.error):
+                return
+            end = offset + _RECORD_HEADER.size + length
+            yield offset, ops, end
+            offset = end
+
+    def _index_record(self, offset: int, ops: List[CRDTOperation]):
+        for op in ops:
+            seq = op.vector_clock.get(op.user_id, 0)
+            if not seq:
+                continue
+            seqs = self._seqs.setdefault(op.user_id, [])
+            if seqs and seq <= seqs[-1]:
+                continue
+            seqs.append(seq)
+            self._offsets.setdefault(op.user_id, []).append(offset)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, ops: List[CRDTOperation]) -> Optional[int]:
+        """
+        Append a batch of ops as one record.
+
+        The record is flushed to the OS straight away, so it survives a crash
+        of this process. It is fsynced once ``fsync_every`` records are
+        pending, or by the owner's timer once the oldest pending record is
+        ``fsync_interval`` seconds old (see :meth:`sync_due_in`); call
+        :meth:`sync` to force it.
+
+        Returns:
+            Offset of the new record, or None for an empty batch
+        """
+        if not ops:
+            return None
+
+        payload = encode_op_batch(ops)
+        offset = self._size
+        self._file.write(_RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+        self._size += _RECORD_HEADER.size + len(payload)
+        self._index_record(offset, ops)
+
+        self._file.flush()
+
+        self.records += 1
+        self.records_since_snapshot += 1
+        if not self._unsynced:
+            self._unsynced_since = time.monotonic()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or self.sync_due_in() == 0.0:
+            self.sync()
+        return offset
+
+    def sync_due_in(self) -> Optional[float]:
+        """Seconds until pending records must be fsynced, or None if none are pending."""
+        if not self._unsynced:
+            return None
+        return max(0.0, self._unsynced_since + self.fsync_interval - time.monotonic())
+
+    def sync(self):
+        """Flush and fsync every appended record."""
+        self._file.flush()
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    @property
+    def size(self) -> int:
+        """Logical size of the log, including records not yet fsynced."""
+        return self._size
+
+    @property
+    def should_snapshot(self) -> bool:
+        return self.records_since_snapshot >= self.snapshot_every
+
+    def write_snapshot(self, document: CRDTDocument):
+        """
+        Atomically replace the snapshot with the document's current state
+        and cut the log back to its header.
+
+        The document must already reflect every op appended so far. The
+        snapshot is durable before the log is cut; a crash in between only
+        replays ops the document already holds, which merging skips.
+        """
+        self.sync()
+        data = {"log_offset": len(LOG_MAGIC), "document": document.to_dict()}
+
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        _fsync_directory(self.directory)
+
+        self._file.truncate(len(LOG_MAGIC))
+        os.fsync(self._file.fileno())
+        self._size = len(LOG_MAGIC)
+        self._seqs.clear()
+        self._offsets.clear()
+        self.snapshot_offset = self._size
+        self.records_since_snapshot = 0
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _read_snapshot_offset(self) -> int:
+        snapshot = self._read_snapshot()
+        return snapshot["log_offset"] if snapshot else len(LOG_MAGIC)
+
+    def _read_snapshot(self) -> Optional[Dict]:
+        if not os.path.exists(self.snapshot_path):
+            return None
+        with open(self.snapshot_path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        # A snapshot can never cover more than the recovered log
+        snapshot["log_offset"] = min(snapshot.get("log_offset", len(LOG_MAGIC)), self._size)
+        return snapshot
+
+    def offset_for(self, since_vector_clock: Dict[str, int]) -> int:
+        """Offset of the first record holding an op not covered by the clock."""
+        offset = self._size
+        for user_id, seqs in self._seqs.items():
+            i = bisect_right(seqs, since_vector_clock.get(user_id, 0))
+            if i < len(seqs):
+                offset = min(offset, self._offsets[user_id][i])
+        return offset
+
+    def iter_records(self, start: int) -> Iterator[Tuple[int, List[CRDTOperation]]]:
+        """Yield (offset, ops) for every record from ``start`` to the end of the log."""
+        self._file.flush()
+        if start >= self._size:
+            return
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            offset = start
+            while offset < self._size:
+                length, _ = _RECORD_HEADER.unpack_from(m, offset)
+                body = offset + _RECORD_HEADER.size
+                yield offset, decode_op_batch(m[body : body + length])
+                offset = body + length
+
+    def read_since(self, since_vector_clock: Dict[str, int]) -> List[CRDTOperation]:
+        """
+        Read the ops a replica at ``since_vector_clock`` is missing, in log order.
+
+        Only ops appended since the last snapshot are still in the log.
+        """
+        ops: List[CRDTOperation] = []
+        for _, batch in self.iter_records(self.offset_for(since_vector_clock)):
+            ops.extend(
+                op
+                for op in batch
+                if op.vector_clock.get(op.user_id, 0) > since_vector_clock.get(op.user_id, 0)
+            )
+        return ops
+
+    def load(self) -> CRDTDocument:
+        """Rebuild the document from the latest snapshot plus the log tail."""
+        snapshot = self._read_snapshot()
+        if snapshot is not None:
+            document = CRDTDocument.from_dict(snapshot["document"])
+            start = snapshot["log_offset"]
+        else:
+            document = CRDTDocument(self.doc_id)
+            start = len(LOG_MAGIC)
+
+        for _, ops in self.iter_records(start):
+            document.merge_operations(ops)
+        return document
+
+    def close(self):
+        """Sync and close the log file."""
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+class OpLogStore:
+    """Directory of per-document op logs."""
+
+    def __init__(self, root: str, **log_options):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding one subdirectory per document
+            **log_options: Passed to each DocumentLog (fsync_every, ...)
+        """
+        self.root = root
+        self.log_options = log_options
+        self._logs: Dict[str, DocumentLog] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _directory(self, doc_id: str) -> str:
+        return os.path.join(self.root, quote(check_doc_id(doc_id), safe=""))
+
+    def exists(self, doc_id: str) -> bool:
+        return os.path.exists(os.path.join(self._directory(doc_id), "ops.log"))
+
+    def open(self, doc_id: str) -> DocumentLog:
+        """Get the (cached) log of a document, recovering it on first open."""
+        log = self._logs.get(doc_id)
+        if log is None:
+            log = DocumentLog(self._directory(doc_id), doc_id, **self.log_options)
+            self._logs[doc_id] = log
+        return log
+
+    def load(self, doc_id: str) -> Optional[CRDTDocument]:
+        """Load a stored document, or None if it was never persisted."""
+        if doc_id not in self._logs and not self.exists(doc_id):
+            return None
+        return self.open(doc_id).load()
+
+    def release(self, doc_id: str):
+        """Close a document's log (e.g. when the document is evicted)."""
+        log = self._logs.pop(doc_id, None)
+        if log is not None:
+            log.close()
+
+    def close(self):
+        """Close every open log."""
+        for doc_id in list(self._logs):
+            self.release(doc_id)
+
+
+def check_doc_id(doc_id: str) -> str:
+    """
+    Validate a document id before it names a directory.
+
+    Raises:
+        ValueError: If the id is empty, ``.`` or ``..``, or contains a path
+            separator or NUL
+    """
+    if doc_id in ("", ".", "..") or any(c in doc_id for c in ("/", "\\", "\0")):
+        raise ValueError(f"Invalid document id: {doc_id!r}")
+    return doc_id
+
+
+def _fsync_directory(path: str):
+    """Persist a rename in ``path`` (no-op where directories cannot be opened)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,280 @@
+"""
+Delta-sync protocol for collaborative documents.
+
+Clients send their full vector clock; the server answers with exactly the
+operations they are missing, packed into a compact binary batch:
+
+    b"CRDB" | version (1 byte) | zlib(payload)
+
+where the payload is a string table (op ids, user ids, targets, fields)
+followed by one record per op, with integers encoded as LEB128 varints and
+values as length-prefixed JSON.
+"""
+
+import asyncio
+import json
+import struct
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .crdt import CollaborationSession, CRDTOperation, OperationType
+
+MAGIC = b"CRDB"
+VERSION = 1
+
+_OP_TYPE_CODES = {op_type: code for code, op_type in enumerate(OperationType)}
+_OP_TYPES = list(OperationType)
+
+
+def _write_varint(out: bytearray, value: int):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data: memoryview, pos: int) -> tuple:
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_op_batch(ops: List[CRDTOperation]) -> bytes:
+    """Encode operations into a compact binary batch."""
+    strings: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        idx = strings.get(value)
+        if idx is None:
+            idx = strings[value] = len(strings)
+        return idx
+
+    body = bytearray()
+    _write_varint(body, len(ops))
+    for op in ops:
+        _write_varint(body, intern(op.op_id))
+        body.append(_OP_TYPE_CODES[op.op_type])
+        _write_varint(body, intern(op.target_id))
+        _write_varint(body, intern(op.field))
+        _write_varint(body, intern(op.user_id))
+        body += struct.pack("<d", op.timestamp)
+
+        _write_varint(body, len(op.vector_clock))
+        for user_id, seq in op.vector_clock.items():
+            _write_varint(body, intern(user_id))
+            _write_varint(body, seq)
+
+        _write_varint(body, len(op.parent_ops))
+        for parent in op.parent_ops:
+            _write_varint(body, intern(parent))
+
+        value = json.dumps(op.value, separators=(",", ":")).encode("utf-8")
+        _write_varint(body, len(value))
+        body += value
+
+    payload = bytearray()
+    _write_varint(payload, len(strings))
+    for value in strings:
+        encoded = value.encode("utf-8")
+        _write_varint(payload, len(encoded))
+        payload += encoded
+    payload += body
+
+    return MAGIC + bytes([VERSION]) + zlib.compress(bytes(payload))
+
+
+def decode_op_batch(data: bytes) -> List[CRDTOperation]:
+    """
+    Decode a batch produced by :func:`encode_op_batch`.
+
+    Raises:
+        ValueError: If the data is not a well-formed op batch
+    """
+    if data[:4] != MAGIC:
+        raise ValueError("Not a CRDT op batch")
+    if data[4:5] != bytes([VERSION]):
+        raise ValueError(f"Unsupported op batch version: {data[4:5].hex()}")
+    try:
+        return _decode_ops(data)
+    except (IndexError, KeyError, TypeError, struct.error, zlib.error) as exc:
+        raise ValueError(f"Malformed CRDT op batch: {exc}") from exc
+
+
+def _decode_ops(data: bytes) -> List[CRDTOperation]:
+    view = memoryview(zlib.decompress(data[5:]))
+    pos = 0
+
+    count, pos = _read_varint(view, pos)
+    strings: List[str] = []
+    for _ in range(count):
+        length, pos = _read_varint(view, pos)
+        strings.append(bytes(view[pos : pos + length]).decode("utf-8"))
+        pos += length
+
+    n_ops, pos = _read_varint(view, pos)
+    ops: List[CRDTOperation] = []
+    for _ in range(n_ops):
+        op_id, pos = _read_varint(view, pos)
+        op_type = _OP_TYPES[view[pos]]
+        pos += 1
+        target_id, pos = _read_varint(view, pos)
+        field, pos = _read_varint(view, pos)
+        user_id, pos = _read_varint(view, pos)
+        (timestamp,) = struct.unpack_from("<d", view, pos)
+        pos += 8
+
+        clock_len, pos = _read_varint(view, pos)
+        vector_clock = {}
+        for _ in range(clock_len):
+            clock_user, pos = _read_varint(view, pos)
+            seq, pos = _read_varint(view, pos)
+            vector_clock[strings[clock_user]] = seq
+
+        parents_len, pos = _read_varint(view, pos)
+        parent_ops = []
+        for _ in range(parents_len):
+            parent, pos = _read_varint(view, pos)
+            parent_ops.append(strings[parent])
+
+        value_len, pos = _read_varint(view, pos)
+        value = json.loads(bytes(view[pos : pos + value_len]))
+        pos += value_len
+        if op_type in (OperationType.TEXT_INSERT, OperationType.TEXT_DELETE) and not isinstance(
+            value, dict
+        ):
+            raise ValueError(f"Text op {strings[op_id]} has no payload")
+
+        ops.append(
+            CRDTOperation(
+                op_id=strings[op_id],
+                op_type=op_type,
+                target_id=strings[target_id],
+                field=strings[field],
+                value=value,
+                timestamp=timestamp,
+                user_id=strings[user_id],
+                vector_clock=vector_clock,
+                parent_ops=parent_ops,
+            )
+        )
+
+    return ops
+
+
+def advance_clock(clock: Dict[str, int], ops: List[CRDTOperation]):
+    """Raise a clock to cover each op's own entry."""
+    for op in ops:
+        seq = op.vector_clock.get(op.user_id, 0)
+        if seq > clock.get(op.user_id, 0):
+            clock[op.user_id] = seq
+
+
+class SyncConnection:
+    """
+    Push channel from a session to one connected client.
+
+    Notifications only set an event; the sender loop then ships everything
+    the client is missing in a single batch, so bursts of edits between two
+    sends are coalesced. A slow client therefore never has more than one
+    send in flight: it falls behind and receives larger batches, capped at
+    ``max_batch_ops`` per send.
+    """
+
+    def __init__(
+        self,
+        session: CollaborationSession,
+        user_id: str,
+        send_bytes: Callable[[bytes], Awaitable[Any]],
+        max_batch_ops: Optional[int] = None,
+        on_flush: Optional[Callable[[float], None]] = None,
+    ):
+        self.session = session
+        self.user_id = user_id
+        self.send_bytes = send_bytes
+        self.max_batch_ops = max_batch_ops
+        self.on_flush = on_flush
+        self.known_clock: Dict[str, int] = {}
+        self.batches_sent = 0
+        self.ops_sent = 0
+        self._wakeup = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed = False
+        # When the oldest unsent notification arrived, for fan-out latency
+        self._notified_at: Optional[float] = None
+
+    def notify(self):
+        """Signal that new operations may be available (safe from any thread)."""
+        if self._notified_at is None:
+            self._notified_at = time.perf_counter()
+        loop = self._loop
+        if loop is None or _running_loop() is loop:
+            self._wakeup.set()
+        else:
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    def update_clock(self, vector_clock: Dict[str, int]):
+        """Record the client's reported clock and let the session compact."""
+        for user_id, seq in vector_clock.items():
+            if seq > self.known_clock.get(user_id, 0):
+                self.known_clock[user_id] = seq
+        # Only what the client reports having applied is safe to compact away
+        self.session.acknowledge(self.user_id, vector_clock)
+
+    def receive(self, ops: List[CRDTOperation]) -> List[CRDTOperation]:
+        """Merge ops sent by this client; they are never echoed back."""
+        advance_clock(self.known_clock, ops)
+        return self.session.document.merge_operations(ops)
+
+    async def flush(self) -> Optional[List[CRDTOperation]]:
+        """Send one batch with every op the client is missing, if any."""
+        notified_at, self._notified_at = self._notified_at, None
+        ops = self.session.document.get_pending_operations(self.known_clock)
+        if not ops:
+            return None
+        if self.max_batch_ops is not None and len(ops) > self.max_batch_ops:
+            # Pending ops are in causal order, so a prefix is safe to apply;
+            # the remainder goes out on the next pass of the sender loop
+            ops = ops[: self.max_batch_ops]
+            self._notified_at = notified_at
+            self._wakeup.set()
+
+        await self.send_bytes(encode_op_batch(ops))
+        advance_clock(self.known_clock, ops)
+        self.batches_sent += 1
+        self.ops_sent += len(ops)
+        if notified_at is not None and self.on_flush is not None:
+            self.on_flush(time.perf_counter() - notified_at)
+        return ops
+
+    async def run(self):
+        """Sender loop: wait for a notification, then flush a coalesced batch."""
+        self._loop = asyncio.get_running_loop()
+        while not self._closed:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if self._closed:
+                return
+            await self.flush()
+
+    def close(self):
+        """Stop the sender loop."""
+        self._closed = True
+        self.notify()
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
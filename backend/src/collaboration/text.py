@@ -0,0 +1,273 @@
+"""
+Sequence CRDT for character-level editing of node content.
+
+An RGA (Replicated Growable Array) in which runs of characters typed by the
+same user are stored as a single block, in the style of YATA/Yjs. Every
+character has an id ``(user_id, lamport)``; a block covers the ids
+``lamport .. lamport + length - 1`` of one user, and each character's left
+origin is the character typed just before it.
+
+Concurrent inserts at the same position are ordered by the RGA rule: when
+integrating an insert after its origin, skip every element with a greater
+``(lamport, user_id)`` stamp. Causal delivery (see ``CRDTDocument``)
+guarantees an insert's origin is always present when it is integrated.
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# (user_id, lamport) of a single character
+CharId = Tuple[str, int]
+
+# Id space used for the content a node had before its first text edit
+SEED_USER = ""
+
+
+@dataclass
+class TextBlock:
+    """A run of consecutive characters inserted by one user."""
+
+    user_id: str
+    start: int
+    length: int
+    content: Optional[str]  # None once the run is deleted (tombstone)
+    origin: Optional[CharId]
+
+    @property
+    def deleted(self) -> bool:
+        return self.content is None
+
+    @property
+    def stamp(self) -> Tuple[int, str]:
+        """RGA precedence of the block's first character."""
+        return (self.start, self.user_id)
+
+    def last_id(self) -> CharId:
+        return (self.user_id, self.start + self.length - 1)
+
+    def to_list(self) -> list:
+        return [self.user_id, self.start, self.length, self.content, self.origin]
+
+    @classmethod
+    def from_list(cls, data: list) -> "TextBlock":
+        origin = tuple(data[4]) if data[4] is not None else None
+        return cls(data[0], data[1], data[2], data[3], origin)
+
+
+class TextCRDT:
+    """
+    Run-length encoded RGA text.
+
+    Memory is proportional to the number of edit runs rather than the number
+    of characters, and ops only carry the inserted text or deleted id spans.
+    """
+
+    def __init__(self, initial: str = ""):
+        self.blocks: List[TextBlock] = []
+        self.max_lamport = 0
+        # Per-user block index, sorted by start, for id -> block lookups
+        self._starts: Dict[str, List[int]] = {}
+        self._by_user: Dict[str, List[TextBlock]] = {}
+        self._value: Optional[str] = None
+
+        if initial:
+            self._insert_block(0, TextBlock(SEED_USER, 1, len(initial), initial, None))
+            self.max_lamport = len(initial)
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    @property
+    def value(self) -> str:
+        """Visible text."""
+        if self._value is None:
+            self._value = "".join(b.content for b in self.blocks if b.content is not None)
+        return self._value
+
+    def __len__(self) -> int:
+        return len(self.value)
+
+    # ------------------------------------------------------------------
+    # Local edits (return op payloads)
+    # ------------------------------------------------------------------
+
+    def local_insert(self, index: int, text: str, user_id: str) -> Dict:
+        """Insert text at a visible index and return the op payload."""
+        origin = self._visible_id_before(index)
+        payload = {
+            "id": [user_id, self.max_lamport + 1],
+            "origin": list(origin) if origin else None,
+            "text": text,
+        }
+        self.integrate_insert(payload)
+        return payload
+
+    def local_delete(self, index: int, length: int) -> Dict:
+        """Delete ``length`` visible characters at ``index`` and return the op payload."""
+        spans: List[list] = []
+        position = 0
+        end = index + length
+        for block in self.blocks:
+            if block.deleted:
+                continue
+            block_end = position + block.length
+            lo = max(index, position)
+            hi = min(end, block_end)
+            if lo < hi:
+                start = block.start + (lo - position)
+                if spans and spans[-1][0] == block.user_id and spans[-1][1] + spans[-1][2] == start:
+                    spans[-1][2] += hi - lo
+                else:
+                    spans.append([block.user_id, start, hi - lo])
+            position = block_end
+            if position >= end:
+                break
+
+        payload = {"spans": spans}
+        self.integrate_delete(payload)
+        return payload
+
+    # ------------------------------------------------------------------
+    # Integration of (local or remote) ops
+    # ------------------------------------------------------------------
+
+    def integrate_insert(self, payload: Dict):
+        """Integrate an insert op payload ``{"id", "origin", "text"}``."""
+        user_id, lamport = payload["id"]
+        text = payload["text"]
+        origin = tuple(payload["origin"]) if payload.get("origin") else None
+        if not text:
+            return
+
+        position = 0
+        if origin is not None:
+            position = self._split_after(origin) + 1
+
+        # RGA: skip over everything inserted concurrently with higher precedence
+        stamp = (lamport, user_id)
+        while position < len(self.blocks) and self.blocks[position].stamp > stamp:
+            position += 1
+
+        previous = self.blocks[position - 1] if position > 0 else None
+        if (
+            previous is not None
+            and not previous.deleted
+            and previous.user_id == user_id
+            and previous.start + previous.length == lamport
+            and origin == previous.last_id()
+        ):
+            # Continuing a run: extend the block instead of adding a new one
+            previous.content += text
+            previous.length += len(text)
+        else:
+            self._insert_block(position, TextBlock(user_id, lamport, len(text), text, origin))
+
+        self.max_lamport = max(self.max_lamport, lamport + len(text) - 1)
+        self._value = None
+
+    def integrate_delete(self, payload: Dict):
+        """Integrate a delete op payload ``{"spans": [[user_id, start, length], ...]}``."""
+        for user_id, start, length in payload["spans"]:
+            end = start + length
+            cursor = start
+            while cursor < end:
+                block = self._find(user_id, cursor)
+                if block is None:
+                    break
+                if block.start < cursor:
+                    self._split(block, cursor - block.start)
+                    continue
+                if block.start + block.length > end:
+                    self._split(block, end - block.start)
+                block.content = None
+                cursor = block.start + block.length
+        self._value = None
+
+    # ------------------------------------------------------------------
+    # Block bookkeeping
+    # ------------------------------------------------------------------
+
+    def _visible_id_before(self, index: int) -> Optional[CharId]:
+        if index <= 0:
+            return None
+        position = 0
+        last: Optional[CharId] = None
+        for block in self.blocks:
+            if block.deleted:
+                continue
+            if position + block.length >= index:
+                return (block.user_id, block.start + index - position - 1)
+            position += block.length
+            last = block.last_id()
+        return last
+
+    def _find(self, user_id: str, lamport: int) -> Optional[TextBlock]:
+        starts = self._starts.get(user_id)
+        if not starts:
+            return None
+        i = bisect_right(starts, lamport) - 1
+        if i < 0:
+            return None
+        block = self._by_user[user_id][i]
+        if lamport >= block.start + block.length:
+            return None
+        return block
+
+    def _insert_block(self, position: int, block: TextBlock):
+        self.blocks.insert(position, block)
+        starts = self._starts.setdefault(block.user_id, [])
+        blocks = self._by_user.setdefault(block.user_id, [])
+        i = bisect_right(starts, block.start)
+        starts.insert(i, block.start)
+        blocks.insert(i, block)
+
+    def _split(self, block: TextBlock, offset: int) -> TextBlock:
+        """Split a block so that its first ``offset`` characters stay in place."""
+        right = TextBlock(
+            user_id=block.user_id,
+            start=block.start + offset,
+            length=block.length - offset,
+            content=block.content[offset:] if block.content is not None else None,
+            origin=(block.user_id, block.start + offset - 1),
+        )
+        block.length = offset
+        if block.content is not None:
+            block.content = block.content[:offset]
+        self._insert_block(self._index_of(block) + 1, right)
+        return right
+
+    def _split_after(self, char_id: CharId) -> int:
+        """Make ``char_id`` the last char of its block; return that block's position."""
+        block = self._find(*char_id)
+        if block is None:
+            raise KeyError(f"Unknown text origin {char_id}")
+        offset = char_id[1] - block.start + 1
+        if offset < block.length:
+            self._split(block, offset)
+        return self._index_of(block)
+
+    def _index_of(self, block: TextBlock) -> int:
+        for i, candidate in enumerate(self.blocks):
+            if candidate is block:
+                return i
+        raise ValueError("Block not in sequence")
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict:
+        return {
+            "max_lamport": self.max_lamport,
+            "blocks": [b.to_list() for b in self.blocks],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TextCRDT":
+        text = cls()
+        for position, block in enumerate(data.get("blocks", [])):
+            text._insert_block(position, TextBlock.from_list(block))
+        text.max_lamport = data.get("max_lamport", 0)
+        return text
@@ -679,3 +679,34 @@ print(f"  Causality Edges: {len(causality_edges_db)}")
 
 claims_db = load_claims_from_json()
 print(f"  Knowledge Claims: {len(claims_db)}")
+
+
+# Bumped on every write to the in-memory dicts through the API, so that
+# caches built from them (prebuilt graphs, adjacency indexes) know to rebuild
+_data_version = 0
+
+
+def mark_data_changed() -> int:
+    """Record a write to the in-memory data and return the new version"""
+    global _data_version
+    _data_version += 1
+    return _data_version
+
+
+def data_fingerprint() -> tuple:
+    """
+    Cheap change marker for caches derived from the in-memory data.
+
+    Combines the write counter with the size of each dict, so inserts and
+    deletes made without going through mark_data_changed are caught too.
+    """
+    return (
+        _data_version,
+        len(episodes_db),
+        len(characters_db),
+        len(relationships_db),
+        len(mythos_db),
+        len(beats_db),
+        len(causality_edges_db),
+        len(claims_db),
+    )
@@ -3,6 +3,7 @@
 These models use SQLModel which combines SQLAlchemy ORM with Pydantic validation.
 """
 
+import json
 import uuid
 from datetime import datetime
 from enum import Enum
@@ -153,7 +154,14 @@ class MediaJob(SQLModel, table=True):
     """
 
     __tablename__ = "media_jobs"
-    __table_args__ = (Index("ix_media_jobs_workflow_status", "workflow_type", "status"),)
+    __table_args__ = (
+        Index("ix_media_jobs_workflow_status", "workflow_type", "status"),
+        # Claim order: best pending job that is available now
+        Index("ix_media_jobs_claim", "status", "priority", "available_at"),
+        # Lease expiry scan and per-character running counts
+        Index("ix_media_jobs_lease", "status", "lease_expires_at"),
+        Index("ix_media_jobs_character_status", "character_id", "status"),
+    )
 
     id: str = Field(
         default_factory=lambda: str(uuid.uuid4()),
@@ -169,6 +177,17 @@ class MediaJob(SQLModel, table=True):
     )
     progress: int = Field(default=0, ge=0, le=100, description="Progress percentage (0-100)")
     error_message: str | None = Field(default=None, description="Error details if job failed")
+    parameters_json: str | None = Field(default=None, description="JSON workflow parameters")
+    priority: int = Field(default=0, description="Higher priorities are claimed first")
+    attempts: int = Field(default=0, description="Times the job has been claimed")
+    max_retries: int = Field(default=3, description="Retries allowed after the first attempt")
+    available_at: datetime = Field(
+        default_factory=datetime.utcnow, description="Earliest time the job may be claimed"
+    )
+    lease_owner: str | None = Field(default=None, description="Worker holding the job")
+    lease_expires_at: datetime | None = Field(
+        default=None, description="When the worker's lease lapses unless renewed"
+    )
     created_at: datetime = Field(
         default_factory=datetime.utcnow, description="Job creation timestamp"
     )
@@ -176,6 +195,11 @@ class MediaJob(SQLModel, table=True):
         default_factory=datetime.utcnow, description="Last update timestamp"
     )
 
+    @property
+    def parameters(self) -> dict:
+        """Decoded workflow parameters."""
+        return json.loads(self.parameters_json) if self.parameters_json else {}
+
 
 class MediaArtifact(SQLModel, table=True):
     """Generated media artifact metadata.
@@ -4,6 +4,9 @@ This module provides Neo4j integration for the Shadow Lore Forge project,
 including connection management, CRUD operations, and graph queries.
 """
 
+from .analytics import GraphAnalytics, get_analytics
+from .importer import ImportPipeline, NodeSpec, RelationshipSpec, plan_from_data
+from .memory_graph import InMemoryGraph, get_memory_graph, reset_memory_graph
 from .neo4j_adapter import Neo4jAdapter, close_adapter, get_adapter, init_adapter
 from .queries import (
     ANALYSIS_QUERIES,
@@ -12,6 +15,7 @@ from .queries import (
     NODE_QUERIES,
     PATH_QUERIES,
     RELATIONSHIP_QUERIES,
+    SCHEMA_QUERIES,
     SUBGRAPH_QUERIES,
     TEMPORAL_QUERIES,
     build_node_query,
@@ -20,7 +24,9 @@ from .queries import (
     build_temporal_query,
     get_all_query_templates,
 )
+from .query_cache import QueryCache, get_query_cache
 from .routes import router
+from .sync import SyncEngine, SyncManifest
 
 __all__ = [
     # Adapter
@@ -28,6 +34,22 @@ __all__ = [
     "get_adapter",
     "init_adapter",
     "close_adapter",
+    "QueryCache",
+    "get_query_cache",
+    # In-process graph
+    "InMemoryGraph",
+    "get_memory_graph",
+    "reset_memory_graph",
+    "GraphAnalytics",
+    "get_analytics",
+    # Bulk import
+    "ImportPipeline",
+    "NodeSpec",
+    "RelationshipSpec",
+    "plan_from_data",
+    # Incremental sync
+    "SyncEngine",
+    "SyncManifest",
     # Query templates
     "NODE_QUERIES",
     "RELATIONSHIP_QUERIES",
@@ -36,6 +58,7 @@ __all__ = [
     "TEMPORAL_QUERIES",
     "ANALYSIS_QUERIES",
     "BULK_QUERIES",
+    "SCHEMA_QUERIES",
     "DOMAIN_QUERIES",
     # Query builders
     "build_node_query",
@@ -0,0 +1,415 @@
+"""In-process graph engine for Shadow Lore Forge.
+
+Builds a CSR (compressed sparse row) adjacency over the loaded data
+dictionaries and serves the same traversal operations as ``Neo4jAdapter``
+(neighbors, subgraph, paths, shortest path, degree) without a database.
+Results use the same shapes as the adapter so routes can switch backends.
+
+Graph model (mirrors the Neo4j import in ``routes.bulk_import_data``):
+
+- ``Character``, ``Beat`` and ``Mythos`` nodes, keyed by their ``id``
+- ``(Character)-[:RELATES_TO]->(Character)`` from relationships_db
+- ``(Beat)-[:CAUSES]->(Beat)`` from causality_edges_db
+- ``(Character)-[:CONNECTS_TO]->(Mythos)`` from ``MythosElement.related_characters``
+- ``(Character)-[:APPEARS_IN]->(Beat)`` from each beat's ``characters``
+"""
+
+from __future__ import annotations
+
+import bisect
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any
+
+import numpy as np
+
+from .paths import PathEngine
+
+
+def _csr(keys: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Row pointers and edge ids sorted by ``keys`` (source or target node)."""
+    order = np.argsort(keys, kind="stable").astype(np.int64)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n), out=indptr[1:])
+    return indptr, order
+
+
+class InMemoryGraph:
+    """Immutable property graph with CSR adjacency in both directions.
+
+    Nodes are added with :meth:`add_node` and relationships with
+    :meth:`add_relationship`; :meth:`freeze` then builds the CSR arrays.
+    """
+
+    def __init__(self) -> None:
+        self.node_ids: list[str] = []
+        self.node_labels: list[str] = []
+        self.node_props: list[dict[str, Any]] = []
+        self.index: dict[str, int] = {}
+
+        self.rel_types: list[str] = []
+        self._type_codes: dict[str, int] = {}
+        self._src: list[int] = []
+        self._dst: list[int] = []
+        self._types: list[int] = []
+        self.edge_props: list[dict[str, Any]] = []
+
+        self.edge_src = np.zeros(0, dtype=np.int64)
+        self.edge_dst = np.zeros(0, dtype=np.int64)
+        self.edge_type = np.zeros(0, dtype=np.int64)
+        self.out_indptr = np.zeros(1, dtype=np.int64)
+        self.out_edges = np.zeros(0, dtype=np.int64)
+        self.in_indptr = np.zeros(1, dtype=np.int64)
+        self.in_edges = np.zeros(0, dtype=np.int64)
+
+    # =========================================================================
+    # Construction
+    # =========================================================================
+
+    def add_node(self, node_id: str, label: str, properties: dict[str, Any]) -> int:
+        """Add a node (first definition of an id wins) and return its index."""
+        if node_id in self.index:
+            return self.index[node_id]
+        i = len(self.node_ids)
+        self.index[node_id] = i
+        self.node_ids.append(node_id)
+        self.node_labels.append(label)
+        self.node_props.append({**properties, "id": node_id})
+        return i
+
+    def add_relationship(
+        self,
+        from_id: str,
+        to_id: str,
+        rel_type: str,
+        properties: dict[str, Any] | None = None,
+    ) -> bool:
+        """Add a relationship; returns False if either endpoint is unknown."""
+        src = self.index.get(from_id)
+        dst = self.index.get(to_id)
+        if src is None or dst is None:
+            return False
+        code = self._type_codes.get(rel_type)
+        if code is None:
+            code = self._type_codes[rel_type] = len(self.rel_types)
+            self.rel_types.append(rel_type)
+        self._src.append(src)
+        self._dst.append(dst)
+        self._types.append(code)
+        self.edge_props.append(properties or {})
+        return True
+
+    def freeze(self) -> InMemoryGraph:
+        """Build the CSR arrays from the added relationships."""
+        n = len(self.node_ids)
+        self.edge_src = np.array(self._src, dtype=np.int64)
+        self.edge_dst = np.array(self._dst, dtype=np.int64)
+        self.edge_type = np.array(self._types, dtype=np.int64)
+        self.out_indptr, self.out_edges = _csr(self.edge_src, n)
+        self.in_indptr, self.in_edges = _csr(self.edge_dst, n)
+        return self
+
+    @classmethod
+    def from_data(
+        cls,
+        characters: Mapping[str, Any],
+        relationships: Mapping[str, Any],
+        beats: Mapping[str, dict[str, Any]],
+        causality_edges: Mapping[str, dict[str, Any]],
+        mythos: Mapping[str, Any],
+    ) -> InMemoryGraph:
+        """Build the graph from the data dictionaries in ``data.py``."""
+        graph = cls()
+
+        for char in characters.values():
+            graph.add_node(
+                char.id,
+                "Character",
+                {
+                    "name": char.name,
+                    "role": char.role,
+                    "family": char.family,
+                    "description": char.description,
+                },
+            )
+        for beat in beats.values():
+            graph.add_node(
+                beat["beat_id"],
+                "Beat",
+                {
+                    "beat_id": beat["beat_id"],
+                    "episode_id": beat.get("episode_id"),
+                    "start_seconds": beat.get("start_seconds"),
+                    "end_seconds": beat.get("end_seconds"),
+                    "summary": beat.get("summary", ""),
+                    "location": beat.get("location", ""),
+                    "intensity": beat.get("intensity", 1),
+                },
+            )
+        for element in mythos.values():
+            graph.add_node(
+                element.id, "Mythos", {"name": element.name, "category": element.category}
+            )
+
+        for rel in relationships.values():
+            graph.add_relationship(
+                rel.from_character_id,
+                rel.to_character_id,
+                "RELATES_TO",
+                {"relationship_type": rel.relationship_type, "description": rel.description},
+            )
+        for edge in causality_edges.values():
+            graph.add_relationship(
+                edge["from_beat_id"],
+                edge["to_beat_id"],
+                "CAUSES",
+                {
+                    "edge_type": edge.get("type", ""),
+                    "version": edge.get("version", "bst"),
+                    "confidence": edge.get("confidence", 0.5),
+                },
+            )
+        for element in mythos.values():
+            for char_id in element.related_characters or []:
+                graph.add_relationship(char_id, element.id, "CONNECTS_TO")
+        for beat in beats.values():
+            for char_id in beat.get("characters", []):
+                graph.add_relationship(char_id, beat["beat_id"], "APPEARS_IN")
+
+        return graph.freeze()
+
+    # =========================================================================
+    # Low-level access
+    # =========================================================================
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def relationship_count(self) -> int:
+        return len(self.edge_props)
+
+    def _type_filter(self, rel_types: Iterable[str] | None) -> set[int] | None:
+        if not rel_types:
+            return None
+        return {self._type_codes[t] for t in rel_types if t in self._type_codes}
+
+    def _incident(
+        self, i: int, direction: str = "both", types: set[int] | None = None
+    ) -> Iterator[tuple[int, int]]:
+        """Yield (edge id, neighbor index) for the relationships of node ``i``."""
+        # Per-edge lookups go through the plain lists; NumPy scalar indexing
+        # is slower than list indexing inside a Python loop
+        edge_types = self._types
+        if direction in ("out", "both"):
+            dst = self._dst
+            for e in self.out_edges[self.out_indptr[i] : self.out_indptr[i + 1]].tolist():
+                if types is None or edge_types[e] in types:
+                    yield e, dst[e]
+        if direction in ("in", "both"):
+            src = self._src
+            for e in self.in_edges[self.in_indptr[i] : self.in_indptr[i + 1]].tolist():
+                if types is None or edge_types[e] in types:
+                    yield e, src[e]
+
+    def _node(self, i: int) -> dict[str, Any]:
+        return {**self.node_props[i], "_label": self.node_labels[i]}
+
+    def _relationship(self, e: int) -> dict[str, Any]:
+        return {
+            **self.edge_props[e],
+            "_internal_id": e,
+            "type": self.rel_types[self._types[e]],
+            "from_id": self.node_ids[self._src[e]],
+            "to_id": self.node_ids[self._dst[e]],
+        }
+
+    def _bfs(
+        self,
+        start: int,
+        max_depth: int,
+        direction: str = "both",
+        types: set[int] | None = None,
+    ) -> dict[int, int]:
+        """Hop distance from ``start`` to every node within ``max_depth``."""
+        dist = {start: 0}
+        frontier = [start]
+        for depth in range(1, max_depth + 1):
+            next_frontier = []
+            for u in frontier:
+                for _, v in self._incident(u, direction, types):
+                    if v not in dist:
+                        dist[v] = depth
+                        next_frontier.append(v)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return dist
+
+    # =========================================================================
+    # Neo4jAdapter-compatible operations
+    # =========================================================================
+
+    def get_node(self, node_id: str) -> dict[str, Any] | None:
+        """Get a node's properties (plus ``_label``) by id."""
+        i = self.index.get(node_id)
+        return self._node(i) if i is not None else None
+
+    def list_nodes(
+        self, label: str, limit: int = 100, after: str | None = None
+    ) -> list[dict[str, Any]]:
+        """List nodes of a label ordered by id, starting after the id ``after``."""
+        ids = sorted(nid for nid, lab in zip(self.node_ids, self.node_labels) if lab == label)
+        start = bisect.bisect_right(ids, after) if after is not None else 0
+        return [self._node(self.index[nid]) for nid in ids[start : start + limit]]
+
+    def get_relationships(
+        self, node_id: str, direction: str = "both", rel_type: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Get all relationships of a node."""
+        i = self.index.get(node_id)
+        if i is None:
+            return []
+        types = self._type_filter([rel_type] if rel_type else None)
+        return [self._relationship(e) for e, _ in self._incident(i, direction, types)]
+
+    def get_neighbors(
+        self, node_id: str, rel_type: str | None = None, direction: str = "both"
+    ) -> list[dict[str, Any]]:
+        """Get immediate neighbors with relationship info (adapter format)."""
+        i = self.index.get(node_id)
+        if i is None:
+            return []
+        types = self._type_filter([rel_type] if rel_type else None)
+        neighbors = []
+        for e, j in self._incident(i, direction, types):
+            neighbor = self._node(j)
+            neighbor["_relationship"] = dict(self.edge_props[e])
+            neighbor["_relationship_type"] = self.rel_types[self._types[e]]
+            neighbor["_from_id"] = self.node_ids[self._src[e]]
+            neighbor["_to_id"] = self.node_ids[self._dst[e]]
+            neighbors.append(neighbor)
+        return neighbors
+
+    def get_subgraph(
+        self, center_id: str, depth: int = 2, rel_types: list[str] | None = None
+    ) -> dict[str, list]:
+        """Nodes within ``depth`` hops (either direction) and the relationships between them.
+
+        A relationship is included when it lies on a path of at most ``depth``
+        hops from the center, i.e. one endpoint is closer than ``depth``.
+        """
+        i = self.index.get(center_id)
+        if i is None:
+            return {"nodes": [], "relationships": []}
+        types = self._type_filter(rel_types)
+        dist = self._bfs(i, depth, "both", types)
+        if len(dist) == 1:
+            return {"nodes": [], "relationships": []}
+
+        relationships = []
+        seen: set[int] = set()
+        for u, d in dist.items():
+            if d >= depth:
+                continue
+            for e, v in self._incident(u, "both", types):
+                if e not in seen and v in dist:
+                    seen.add(e)
+                    relationships.append(self._relationship(e))
+
+        nodes = [self._node(i)] + [self._node(u) for u in dist if u != i]
+        return {"nodes": nodes, "relationships": relationships}
+
+    def find_paths(
+        self,
+        start_id: str,
+        end_id: str,
+        max_depth: int = 5,
+        rel_types: list[str] | None = None,
+        limit: int = 10,
+        weight: str | None = "confidence",
+    ) -> list[dict[str, Any]]:
+        """Find up to ``limit`` directed loopless paths, best first.
+
+        Paths are ranked by the product of their ``weight`` confidences (or
+        by hop count when ``weight`` is None); see :class:`PathEngine`.
+        """
+        engine = PathEngine(self, rel_types, direction="out", weight=weight, timeout=None)
+        search = engine.k_shortest(start_id, end_id, k=limit, max_depth=max_depth)
+        return [engine.describe(path) for path in search.paths]
+
+    def shortest_path(
+        self,
+        start_id: str,
+        end_id: str,
+        max_depth: int = 5,
+        rel_types: list[str] | None = None,
+        direction: str = "both",
+    ) -> dict[str, Any] | None:
+        """Shortest path (fewest hops) between two nodes, or None."""
+        engine = PathEngine(self, rel_types, direction=direction, weight=None, timeout=None)
+        search = engine.shortest(start_id, end_id, max_depth=max_depth)
+        return engine.summarize(search.paths[0]) if search.paths else None
+
+    def degrees(self) -> np.ndarray:
+        """Total (in + out) degree of every node."""
+        return np.diff(self.out_indptr) + np.diff(self.in_indptr)
+
+    def degree(self, node_id: str) -> dict[str, Any] | None:
+        """Degree of a node and the relationship types it participates in."""
+        i = self.index.get(node_id)
+        if i is None:
+            return None
+        codes = {self._types[e] for e, _ in self._incident(i)}
+        return {
+            "total_degree": int(self.degrees()[i]),
+            "rel_types": sorted(self.rel_types[c] for c in codes),
+        }
+
+    def central_nodes(self, label: str, limit: int = 10) -> list[dict[str, Any]]:
+        """Most connected nodes of a label (nodes without relationships are skipped)."""
+        degrees = self.degrees()
+        candidates = [
+            i for i, lab in enumerate(self.node_labels) if lab == label and degrees[i] > 0
+        ]
+        candidates.sort(key=lambda i: (-degrees[i], self.node_ids[i]))
+        return [
+            {
+                "id": self.node_ids[i],
+                "name": self.node_props[i].get("name"),
+                "degree": int(degrees[i]),
+            }
+            for i in candidates[:limit]
+        ]
+
+
+# Global in-memory graph, built lazily from data.py
+_memory_graph: InMemoryGraph | None = None
+_memory_graph_fingerprint: tuple | None = None
+
+
+def get_memory_graph() -> InMemoryGraph:
+    """Get the in-memory graph of the loaded data, rebuilding it after data changes."""
+    global _memory_graph, _memory_graph_fingerprint
+    from ..data import (
+        beats_db,
+        causality_edges_db,
+        characters_db,
+        data_fingerprint,
+        mythos_db,
+        relationships_db,
+    )
+
+    fingerprint = data_fingerprint()
+    if _memory_graph is None or fingerprint != _memory_graph_fingerprint:
+        _memory_graph = InMemoryGraph.from_data(
+            characters_db, relationships_db, beats_db, causality_edges_db, mythos_db
+        )
+        _memory_graph_fingerprint = fingerprint
+    return _memory_graph
+
+
+def reset_memory_graph() -> None:
+    """Drop the in-memory graph so the next access rebuilds it from the data."""
+    global _memory_graph
+    _memory_graph = None
@@ -6,17 +6,33 @@ for the Neo4j graph database backend.
 
 from __future__ import annotations
 
+import functools
 import logging
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 from typing import Any
 
-from neo4j import AsyncDriver, AsyncGraphDatabase, AsyncSession
+from neo4j import READ_ACCESS, WRITE_ACCESS, AsyncDriver, AsyncGraphDatabase, AsyncSession, Query
 from neo4j.exceptions import Neo4jError, ServiceUnavailable
 
+from .query_cache import get_query_cache
+
 logger = logging.getLogger(__name__)
 
 
+def invalidates_reads(method):
+    """Drop cached read results once a writing method has run."""
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            get_query_cache().invalidate()
+
+    return wrapper
+
+
 class Neo4jAdapter:
     """Async Neo4j adapter with connection pooling and CRUD operations.
 
@@ -78,12 +94,16 @@ class Neo4jAdapter:
             logger.info("Neo4j connection closed")
 
     @asynccontextmanager
-    async def session(self) -> AsyncIterator[AsyncSession]:
-        """Get a session from the connection pool."""
+    async def session(self, access_mode: str = WRITE_ACCESS) -> AsyncIterator[AsyncSession]:
+        """Get a session from the connection pool.
+
+        Args:
+            access_mode: READ_ACCESS for sessions the server must keep read-only.
+        """
         if self._driver is None:
             await self.connect()
 
-        session = self._driver.session(database=self.database)
+        session = self._driver.session(database=self.database, default_access_mode=access_mode)
         try:
             yield session
         finally:
@@ -116,6 +136,7 @@ class Neo4jAdapter:
     # Node CRUD Operations
     # =========================================================================
 
+    @invalidates_reads
     async def create_node(
         self,
         label: str,
@@ -183,6 +204,7 @@ class Neo4jAdapter:
             node_data["_internal_id"] = record["internal_id"]
             return node_data
 
+    @invalidates_reads
     async def update_node(
         self,
         label: str,
@@ -222,6 +244,7 @@ class Neo4jAdapter:
             node_data["_internal_id"] = record["internal_id"]
             return node_data
 
+    @invalidates_reads
     async def delete_node(
         self,
         label: str,
@@ -254,40 +277,73 @@ class Neo4jAdapter:
         self,
         label: str,
         limit: int = 100,
-        skip: int = 0,
+        after: str | None = None,
     ) -> list[dict[str, Any]]:
-        """List all nodes of a given label.
+        """List nodes of a given label ordered by id.
 
         Args:
             label: Node label
             limit: Maximum number of nodes to return
-            skip: Number of nodes to skip (for pagination)
+            after: Only return nodes with an id greater than this one
+                (the last id of the previous page)
 
         Returns:
             List of node data
         """
+        return [node async for node in self._node_page(label, limit, after)]
+
+    async def iter_nodes(
+        self,
+        label: str,
+        page_size: int = 1000,
+        after: str | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream every node of a label ordered by id.
+
+        Pages are fetched with keyset pagination on ``n.id`` in separate
+        short sessions, so memory use is bounded by ``page_size`` however
+        many nodes the label has.
+
+        Args:
+            label: Node label
+            page_size: Nodes fetched per round trip
+            after: Resume after this node id
+
+        Yields:
+            Node data
+        """
+        while True:
+            count = 0
+            async for node in self._node_page(label, page_size, after):
+                count += 1
+                after = node["id"]
+                yield node
+            if count < page_size:
+                return
+
+    async def _node_page(
+        self, label: str, limit: int, after: str | None
+    ) -> AsyncIterator[dict[str, Any]]:
         query = f"""
         MATCH (n:{label})
+        WHERE $after IS NULL OR n.id > $after
         RETURN n, id(n) as internal_id
         ORDER BY n.id
-        SKIP $skip LIMIT $limit
+        LIMIT $limit
         """
 
         async with self.session() as session:
-            result = await session.run(query, skip=skip, limit=limit)
-            records = await result.data()
-
-            nodes = []
-            for record in records:
+            result = await session.run(query, after=after, limit=limit)
+            async for record in result:
                 node_data = dict(record["n"])
                 node_data["_internal_id"] = record["internal_id"]
-                nodes.append(node_data)
-            return nodes
+                yield node_data
 
     # =========================================================================
     # Relationship CRUD Operations
     # =========================================================================
 
+    @invalidates_reads
     async def create_relationship(
         self,
         from_label: str,
@@ -393,6 +449,7 @@ class Neo4jAdapter:
                 relationships.append(rel_data)
             return relationships
 
+    @invalidates_reads
     async def delete_relationship(
         self,
         from_id: str,
@@ -432,34 +489,41 @@ class Neo4jAdapter:
         end_id: str,
         max_depth: int = 5,
         rel_types: list[str] | None = None,
+        limit: int = 10,
+        timeout: float | None = None,
     ) -> list[dict[str, Any]]:
-        """Find all paths between two nodes.
+        """Find the shortest directed paths between two nodes.
+
+        Uses ``allShortestPaths`` rather than enumerating every path up to
+        ``max_depth``, which explodes on dense graphs.
 
         Args:
             start_id: Starting node ID
             end_id: Ending node ID
             max_depth: Maximum path length
             rel_types: Optional list of relationship types to follow
+            limit: Maximum number of paths to return
+            timeout: Transaction timeout in seconds
 
         Returns:
             List of paths, each containing nodes and relationships
         """
-        rel_filter = ""
-        if rel_types:
-            rel_filter = "|".join(rel_types)
-            rel_filter = f"[{rel_filter}]"
-        else:
-            rel_filter = f"[*1..{max_depth}]"
+        rel_filter = f":{'|'.join(rel_types)}" if rel_types else ""
 
         query = f"""
-        MATCH path = (start {{id: $start_id}})-{rel_filter}->(end {{id: $end_id}})
-        WHERE length(path) <= $max_depth
+        MATCH (start {{id: $start_id}}), (end {{id: $end_id}})
+        MATCH path = allShortestPaths((start)-[{rel_filter}*1..{int(max_depth)}]->(end))
         RETURN path, length(path) as path_length
-        LIMIT 10
+        LIMIT $limit
         """
 
         async with self.session() as session:
-            result = await session.run(query, start_id=start_id, end_id=end_id, max_depth=max_depth)
+            result = await session.run(
+                Query(query, timeout=timeout),
+                start_id=start_id,
+                end_id=end_id,
+                limit=limit,
+            )
             records = await result.data()
 
             paths = []
@@ -473,6 +537,45 @@ class Neo4jAdapter:
                 paths.append(path_data)
             return paths
 
+    async def shortest_path(
+        self,
+        start_id: str,
+        end_id: str,
+        max_depth: int = 5,
+        rel_types: list[str] | None = None,
+        timeout: float | None = None,
+    ) -> dict[str, Any] | None:
+        """Find the shortest (fewest hops, any direction) path between two nodes.
+
+        Args:
+            start_id: Starting node ID
+            end_id: Ending node ID
+            max_depth: Maximum path length
+            rel_types: Optional list of relationship types to follow
+            timeout: Transaction timeout in seconds
+
+        Returns:
+            Path summary with node ids/labels and relationship types, or None
+        """
+        rel_filter = f":{'|'.join(rel_types)}" if rel_types else ""
+
+        query = f"""
+        MATCH (start {{id: $start_id}}), (end {{id: $end_id}})
+        MATCH path = shortestPath((start)-[{rel_filter}*1..{int(max_depth)}]-(end))
+        RETURN length(path) as path_length,
+               [node in nodes(path) | {{id: node.id, labels: labels(node)}}] as nodes,
+               [rel in relationships(path) | {{type: type(rel)}}] as relationships
+        """
+        params = {"start_id": start_id, "end_id": end_id}
+
+        async def load():
+            async with self.session(READ_ACCESS) as session:
+                result = await session.run(Query(query, timeout=timeout), **params)
+                record = await result.single()
+                return dict(record) if record else None
+
+        return await get_query_cache().get_or_load(query, params, load)
+
     async def get_subgraph(
         self,
         center_id: str,
@@ -503,38 +606,98 @@ class Neo4jAdapter:
                collect(DISTINCT rels) as rel_collections
         """
 
-        async with self.session() as session:
-            result = await session.run(query, center_id=center_id, depth=depth)
-            record = await result.single()
+        async def load():
+            async with self.session(READ_ACCESS) as session:
+                result = await session.run(query, center_id=center_id, depth=depth)
+                record = await result.single()
 
-            if record is None:
-                return {"nodes": [], "relationships": []}
-
-            # Flatten relationships (they come as list of lists)
-            all_rels = []
-            for rel_list in record["rel_collections"]:
-                all_rels.extend(rel_list)
-
-            # Deduplicate relationships
-            seen_rels = set()
-            unique_rels = []
-            for rel in all_rels:
-                rel_id = rel.id
-                if rel_id not in seen_rels:
-                    seen_rels.add(rel_id)
-                    rel_data = dict(rel)
-                    rel_data["_internal_id"] = rel_id
-                    unique_rels.append(rel_data)
-
-            nodes = [dict(record["center"])]
-            for node in record["nodes"]:
-                node_data = dict(node)
-                nodes.append(node_data)
+                if record is None:
+                    return {"nodes": [], "relationships": []}
+
+                # Flatten relationships (they come as list of lists)
+                all_rels = []
+                for rel_list in record["rel_collections"]:
+                    all_rels.extend(rel_list)
+
+                # Deduplicate relationships
+                seen_rels = set()
+                unique_rels = []
+                for rel in all_rels:
+                    rel_id = rel.id
+                    if rel_id not in seen_rels:
+                        seen_rels.add(rel_id)
+                        rel_data = dict(rel)
+                        rel_data["_internal_id"] = rel_id
+                        unique_rels.append(rel_data)
+
+                nodes = [dict(record["center"])]
+                for node in record["nodes"]:
+                    node_data = dict(node)
+                    nodes.append(node_data)
 
-            return {
-                "nodes": nodes,
-                "relationships": unique_rels,
-            }
+                return {
+                    "nodes": nodes,
+                    "relationships": unique_rels,
+                }
+
+        params = {"center_id": center_id, "depth": depth}
+        return await get_query_cache().get_or_load(query, params, load)
+
+    async def stream_subgraph(
+        self,
+        center_id: str,
+        depth: int = 2,
+        rel_types: list[str] | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream a subgraph centered around a node, record by record.
+
+        Unlike :meth:`get_subgraph`, no records are collected on either side:
+        distinct nodes (center included) are yielded first, then the
+        relationships among them, as the driver receives them. Only node ids
+        are kept between the two queries, so relationships are matched once
+        each instead of once per variable-length path through them.
+
+        Args:
+            center_id: Center node ID
+            depth: How many hops to include
+            rel_types: Optional relationship type filter
+
+        Yields:
+            ``{"kind": "node", "label": ..., "data": {...}}`` and
+            ``{"kind": "relationship", "type": ..., "from_id": ..., "to_id": ..., "data": {...}}``
+        """
+        rel_filter = f":{'|'.join(rel_types)}" if rel_types else ""
+
+        node_query = f"""
+        MATCH (center {{id: $center_id}})-[{rel_filter}*0..{depth}]-(n)
+        RETURN DISTINCT n, labels(n)[0] as label
+        """
+        rel_query = f"""
+        MATCH (a)-[r{rel_filter}]->(b)
+        WHERE a.id IN $ids AND b.id IN $ids
+        RETURN r, type(r) as rel_type, a.id as from_id, b.id as to_id
+        """
+
+        node_ids = set()
+        async with self.session(READ_ACCESS) as session:
+            result = await session.run(node_query, center_id=center_id)
+            async for record in result:
+                node = dict(record["n"])
+                node_ids.add(node.get("id"))
+                yield {"kind": "node", "label": record["label"], "data": node}
+
+            node_ids.discard(None)
+            if not node_ids:
+                return
+            result = await session.run(rel_query, ids=list(node_ids))
+            async for record in result:
+                yield {
+                    "kind": "relationship",
+                    "type": record["rel_type"],
+                    "from_id": record["from_id"],
+                    "to_id": record["to_id"],
+                    "data": dict(record["r"]),
+                }
 
     async def get_neighbors(
         self,
@@ -568,35 +731,44 @@ class Neo4jAdapter:
                startNode(r).id as from_id, endNode(r).id as to_id
         """
 
-        async with self.session() as session:
-            result = await session.run(query, node_id=node_id)
-            records = await result.data()
+        async def load():
+            async with self.session(READ_ACCESS) as session:
+                result = await session.run(query, node_id=node_id)
+                records = await result.data()
 
-            neighbors = []
-            for record in records:
-                neighbor_data = dict(record["neighbor"])
-                neighbor_data["_relationship"] = dict(record["relationship"])
-                neighbor_data["_relationship_type"] = record["rel_type"]
-                neighbor_data["_from_id"] = record["from_id"]
-                neighbor_data["_to_id"] = record["to_id"]
-                neighbors.append(neighbor_data)
-            return neighbors
+                neighbors = []
+                for record in records:
+                    neighbor_data = dict(record["neighbor"])
+                    neighbor_data["_relationship"] = dict(record["relationship"])
+                    neighbor_data["_relationship_type"] = record["rel_type"]
+                    neighbor_data["_from_id"] = record["from_id"]
+                    neighbor_data["_to_id"] = record["to_id"]
+                    neighbors.append(neighbor_data)
+                return neighbors
+
+        return await get_query_cache().get_or_load(query, {"node_id": node_id}, load)
 
     # =========================================================================
     # Bulk Import Operations
     # =========================================================================
 
+    @invalidates_reads
     async def bulk_import_nodes(
         self,
         label: str,
         nodes: list[dict[str, Any]],
         batch_size: int = 1000,
     ) -> dict[str, Any]:
-        """Bulk import nodes using UNWIND for efficiency.
+        """Bulk import nodes using UNWIND + MERGE on ``id``.
+
+        Re-importing the same nodes updates their properties instead of
+        creating duplicates. For large imports prefer
+        :class:`~.importer.ImportPipeline`, which also creates the id
+        constraints and runs batches concurrently.
 
         Args:
             label: Node label
-            nodes: List of node property dictionaries
+            nodes: List of node property dictionaries (each with an ``id``)
             batch_size: Number of nodes per batch
 
         Returns:
@@ -607,22 +779,22 @@ class Neo4jAdapter:
 
         query = f"""
         UNWIND $nodes as node
-        CREATE (n:{label})
-        SET n = node
+        MERGE (n:{label} {{id: node.id}})
+        SET n += node
         RETURN count(n) as created
         """
 
-        for i in range(0, len(nodes), batch_size):
-            batch = nodes[i : i + batch_size]
+        async with self.session() as session:
+            for i in range(0, len(nodes), batch_size):
+                batch = nodes[i : i + batch_size]
 
-            try:
-                async with self.session() as session:
+                try:
                     result = await session.run(query, nodes=batch)
                     record = await result.single()
                     total_created += record["created"] if record else 0
-            except Neo4jError as e:
-                logger.error(f"Error importing batch {i // batch_size}: {e}")
-                errors.append({"batch": i // batch_size, "error": str(e)})
+                except Neo4jError as e:
+                    logger.error(f"Error importing batch {i // batch_size}: {e}")
+                    errors.append({"batch": i // batch_size, "error": str(e)})
 
         return {
             "total": len(nodes),
@@ -631,18 +803,23 @@ class Neo4jAdapter:
             "error_details": errors,
         }
 
+    @invalidates_reads
     async def bulk_import_relationships(
         self,
         rel_type: str,
         relationships: list[dict[str, Any]],
         batch_size: int = 1000,
+        from_label: str | None = None,
+        to_label: str | None = None,
     ) -> dict[str, Any]:
-        """Bulk import relationships using UNWIND.
+        """Bulk import relationships using UNWIND + MERGE.
 
         Args:
             rel_type: Relationship type
             relationships: List of relationship dicts with 'from_id', 'to_id', and properties
             batch_size: Number of relationships per batch
+            from_label: Label of the source nodes (enables an index lookup)
+            to_label: Label of the target nodes (enables an index lookup)
 
         Returns:
             Import statistics
@@ -650,26 +827,28 @@ class Neo4jAdapter:
         total_created = 0
         errors = []
 
+        from_match = f":{from_label}" if from_label else ""
+        to_match = f":{to_label}" if to_label else ""
         query = f"""
         UNWIND $relationships as rel
-        MATCH (a {{id: rel.from_id}})
-        MATCH (b {{id: rel.to_id}})
-        CREATE (a)-[r:{rel_type}]->(b)
-        SET r = rel.properties
+        MATCH (a{from_match} {{id: rel.from_id}})
+        MATCH (b{to_match} {{id: rel.to_id}})
+        MERGE (a)-[r:{rel_type}]->(b)
+        SET r += rel.properties
         RETURN count(r) as created
         """
 
-        for i in range(0, len(relationships), batch_size):
-            batch = relationships[i : i + batch_size]
+        async with self.session() as session:
+            for i in range(0, len(relationships), batch_size):
+                batch = relationships[i : i + batch_size]
 
-            try:
-                async with self.session() as session:
+                try:
                     result = await session.run(query, relationships=batch)
                     record = await result.single()
                     total_created += record["created"] if record else 0
-            except Neo4jError as e:
-                logger.error(f"Error importing relationship batch {i // batch_size}: {e}")
-                errors.append({"batch": i // batch_size, "error": str(e)})
+                except Neo4jError as e:
+                    logger.error(f"Error importing relationship batch {i // batch_size}: {e}")
+                    errors.append({"batch": i // batch_size, "error": str(e)})
 
         return {
             "total": len(relationships),
@@ -678,6 +857,7 @@ class Neo4jAdapter:
             "error_details": errors,
         }
 
+    @invalidates_reads
     async def clear_database(self, confirm: bool = False) -> dict[str, Any]:
         """Clear all nodes and relationships from the database.
 
@@ -710,6 +890,7 @@ class Neo4jAdapter:
     # Custom Query Execution
     # =========================================================================
 
+    @invalidates_reads
     async def execute_query(
         self,
         query: str,
@@ -736,10 +917,14 @@ class Neo4jAdapter:
         query: str,
         parameters: dict[str, Any] | None = None,
     ) -> list[dict[str, Any]]:
-        """Execute a read-only Cypher query.
+        """Execute a client-supplied read-only Cypher query.
+
+        The query runs in a READ_ACCESS session, so the server rejects any
+        write in it, and is never cached: arbitrary Cypher may be
+        non-deterministic. Server-side templates use execute_cached_read.
 
         Args:
-            query: Cypher query string (should be read-only)
+            query: Cypher query string
             parameters: Query parameters
 
         Returns:
@@ -747,10 +932,59 @@ class Neo4jAdapter:
         """
         params = parameters or {}
 
-        async with self.session() as session:
+        async with self.session(READ_ACCESS) as session:
             result = await session.run(query, **params)
-            records = await result.data()
-            return records
+            return await result.data()
+
+    async def execute_cached_read(
+        self,
+        query: str,
+        parameters: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Execute one of the server's fixed read query templates.
+
+        Results are served from the shared query cache when possible. Only
+        pass queries built by the server; client Cypher goes through
+        execute_read_query.
+
+        Args:
+            query: Cypher query string built from a server-side template
+            parameters: Query parameters
+
+        Returns:
+            List of record dictionaries
+        """
+        params = parameters or {}
+
+        async def load():
+            async with self.session(READ_ACCESS) as session:
+                result = await session.run(query, **params)
+                return await result.data()
+
+        return await get_query_cache().get_or_load(query, params, load)
+
+    async def stream_read_query(
+        self,
+        query: str,
+        parameters: dict[str, Any] | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Execute a read-only Cypher query, yielding records as they arrive.
+
+        Runs in a READ_ACCESS session and bypasses the query cache.
+
+        Args:
+            query: Cypher query string
+            parameters: Query parameters
+
+        Yields:
+            Record dictionaries
+        """
+        params = parameters or {}
+
+        async with self.session(READ_ACCESS) as session:
+            result = await session.run(query, **params)
+            async for record in result:
+                yield record.data()
 
 
 # Global adapter instance
@@ -0,0 +1,368 @@
+"""Path search over the in-process graph.
+
+Enumerating every variable-length path up to ``max_depth`` and keeping the
+first few explodes combinatorially on dense causality graphs. The
+:class:`PathEngine` answers path questions with targeted searches instead:
+
+- bidirectional BFS for the fewest-hop path
+- hop-bounded Dijkstra for the most confident path: an edge costs
+  ``-log(confidence)``, so the cheapest path has the highest product of
+  confidences
+- Yen's algorithm for the k best loopless paths
+
+Searches are pruned by the hop distance to the target and take a time
+budget; when it runs out they return what they have found so far, flagged
+as truncated.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .memory_graph import InMemoryGraph
+
+# Upper bound on the number of paths a single search may return
+MAX_PATHS = 50
+# Default time budget of a search, in seconds
+DEFAULT_TIMEOUT = 2.0
+
+# Confidence assumed for edges without one, and the floor that keeps
+# -log(confidence) finite
+DEFAULT_CONFIDENCE = 1.0
+MIN_CONFIDENCE = 1e-6
+
+REVERSE_DIRECTION = {"out": "in", "in": "out", "both": "both"}
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when its time budget is exhausted."""
+
+
+@dataclass
+class Path:
+    """A path as node and edge indexes into the graph, with its total cost."""
+
+    nodes: list[int]
+    edges: list[int]
+    cost: float
+
+    @property
+    def length(self) -> int:
+        return len(self.edges)
+
+
+@dataclass
+class PathSearch:
+    """Paths found by a search, best first."""
+
+    paths: list[Path] = field(default_factory=list)
+    truncated: bool = False
+    seconds: float = 0.0
+
+
+class PathEngine:
+    """Shortest and k-shortest path searches over an :class:`InMemoryGraph`.
+
+    Args:
+        graph: Graph to search
+        rel_types: Relationship types to follow (all when None)
+        direction: Follow relationships ``out`` (start to end), ``in`` or ``both`` ways
+        weight: Edge property holding the confidence; None counts hops
+        timeout: Time budget per search in seconds (None for unbounded)
+    """
+
+    def __init__(
+        self,
+        graph: InMemoryGraph,
+        rel_types: list[str] | None = None,
+        direction: str = "out",
+        weight: str | None = "confidence",
+        timeout: float | None = DEFAULT_TIMEOUT,
+    ):
+        self.graph = graph
+        self.types = graph._type_filter(rel_types)
+        self.direction = direction
+        self.weight = weight
+        self.timeout = timeout
+        self._deadline: float | None = None
+
+    # =========================================================================
+    # Searches
+    # =========================================================================
+
+    def shortest(self, start_id: str, end_id: str, max_depth: int = 5) -> PathSearch:
+        """The single best path: fewest hops, or most confident when weighted."""
+        if self.weight is not None:
+            return self.k_shortest(start_id, end_id, k=1, max_depth=max_depth)
+
+        def run(start: int, end: int, found: list[Path]):
+            path = self._bidirectional_bfs(start, end, max_depth)
+            if path is not None:
+                found.append(path)
+
+        return self._search(start_id, end_id, run)
+
+    def k_shortest(
+        self, start_id: str, end_id: str, k: int = 10, max_depth: int = 5
+    ) -> PathSearch:
+        """Up to ``k`` loopless paths of at most ``max_depth`` hops, best first (Yen)."""
+        k = min(k, MAX_PATHS)
+
+        def run(start: int, end: int, found: list[Path]):
+            to_end = self._distances(end, max_depth, reverse=True)
+            if start not in to_end:
+                return
+            first = self._dijkstra(start, end, max_depth, to_end)
+            if first is None:
+                return
+
+            found.append(first)
+            seen = {tuple(first.edges)}
+            candidates: list[tuple[float, int, tuple[int, ...], tuple[int, ...]]] = []
+            while len(found) < k:
+                previous = found[-1]
+                for i in range(previous.length):
+                    root_nodes = previous.nodes[: i + 1]
+                    root_edges = previous.edges[:i]
+                    # Edges leaving the spur node along already-found paths with this root
+                    banned_edges = {p.edges[i] for p in found if p.nodes[: i + 1] == root_nodes}
+                    spur = self._dijkstra(
+                        root_nodes[-1],
+                        end,
+                        max_depth - i,
+                        to_end,
+                        banned_nodes=set(root_nodes[:-1]),
+                        banned_edges=banned_edges,
+                    )
+                    if spur is None:
+                        continue
+                    edges = tuple(root_edges + spur.edges)
+                    if edges in seen:
+                        continue
+                    seen.add(edges)
+                    cost = sum(self._cost(e) for e in root_edges) + spur.cost
+                    nodes = tuple(root_nodes[:-1] + spur.nodes)
+                    heapq.heappush(candidates, (cost, len(edges), edges, nodes))
+
+                if not candidates:
+                    break
+                cost, _, edges, nodes = heapq.heappop(candidates)
+                found.append(Path(list(nodes), list(edges), cost))
+
+        return self._search(start_id, end_id, run)
+
+    def _search(
+        self, start_id: str, end_id: str, run: Callable[[int, int, list[Path]], None]
+    ) -> PathSearch:
+        """Run a search under the time budget; ``run`` appends paths best first."""
+        started = time.monotonic()
+        self._deadline = started + self.timeout if self.timeout is not None else None
+        result = PathSearch()
+
+        start = self.graph.index.get(start_id)
+        end = self.graph.index.get(end_id)
+        if start is not None and end is not None and start != end:
+            try:
+                run(start, end, result.paths)
+            except SearchTimeout:
+                # Paths already appended are final; only further ones are missing
+                result.truncated = True
+
+        result.seconds = time.monotonic() - started
+        return result
+
+    # =========================================================================
+    # Building blocks
+    # =========================================================================
+
+    def _check_deadline(self):
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise SearchTimeout
+
+    def _neighbors(self, u: int, reverse: bool = False) -> Iterator[tuple[int, int]]:
+        direction = REVERSE_DIRECTION[self.direction] if reverse else self.direction
+        return self.graph._incident(u, direction, self.types)
+
+    def _cost(self, e: int) -> float:
+        if self.weight is None:
+            return 1.0
+        confidence = self.graph.edge_props[e].get(self.weight)
+        if confidence is None:
+            confidence = DEFAULT_CONFIDENCE
+        return -math.log(min(max(float(confidence), MIN_CONFIDENCE), 1.0))
+
+    def _distances(self, source: int, max_depth: int, reverse: bool = False) -> dict[int, int]:
+        """Hop distance from ``source`` to every node within ``max_depth``."""
+        dist = {source: 0}
+        frontier = [source]
+        for depth in range(1, max_depth + 1):
+            self._check_deadline()
+            next_frontier = []
+            for u in frontier:
+                for _, v in self._neighbors(u, reverse):
+                    if v not in dist:
+                        dist[v] = depth
+                        next_frontier.append(v)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return dist
+
+    def _bidirectional_bfs(self, start: int, end: int, max_depth: int) -> Path | None:
+        """Fewest-hop path, growing the smaller frontier from either end."""
+        # node -> (previous node, edge) towards start / towards end
+        forward: dict[int, tuple[int, int] | None] = {start: None}
+        backward: dict[int, tuple[int, int] | None] = {end: None}
+        forward_frontier, backward_frontier = [start], [end]
+        forward_depth = backward_depth = 0
+
+        while (
+            forward_frontier and backward_frontier and forward_depth + backward_depth < max_depth
+        ):
+            self._check_deadline()
+            grow_forward = len(forward_frontier) <= len(backward_frontier)
+            frontier = forward_frontier if grow_forward else backward_frontier
+            parents, others = (forward, backward) if grow_forward else (backward, forward)
+
+            next_frontier = []
+            meeting = None
+            for u in frontier:
+                for e, v in self._neighbors(u, reverse=not grow_forward):
+                    if v in parents:
+                        continue
+                    parents[v] = (u, e)
+                    next_frontier.append(v)
+                    if meeting is None and v in others:
+                        meeting = v
+
+            if grow_forward:
+                forward_frontier, forward_depth = next_frontier, forward_depth + 1
+            else:
+                backward_frontier, backward_depth = next_frontier, backward_depth + 1
+            if meeting is not None:
+                return self._join(forward, backward, meeting)
+        return None
+
+    def _join(
+        self,
+        forward: dict[int, tuple[int, int] | None],
+        backward: dict[int, tuple[int, int] | None],
+        meeting: int,
+    ) -> Path:
+        nodes, edges = [meeting], []
+        step = forward[meeting]
+        while step is not None:
+            u, e = step
+            nodes.append(u)
+            edges.append(e)
+            step = forward[u]
+        nodes.reverse()
+        edges.reverse()
+        step = backward[meeting]
+        while step is not None:
+            u, e = step
+            nodes.append(u)
+            edges.append(e)
+            step = backward[u]
+        return Path(nodes, edges, float(len(edges)))
+
+    def _dijkstra(
+        self,
+        start: int,
+        end: int,
+        max_hops: int,
+        to_end: dict[int, int],
+        banned_nodes: set[int] | frozenset[int] = frozenset(),
+        banned_edges: set[int] | frozenset[int] = frozenset(),
+    ) -> Path | None:
+        """Cheapest path of at most ``max_hops`` hops.
+
+        States are (node, hops). A state is dominated once the same node has
+        been settled with no more hops, since that one was also no more
+        expensive, so each node is settled at most ``max_hops`` times.
+        """
+        best_hops: dict[int, int] = {}
+        costs: dict[tuple[int, int], float] = {(start, 0): 0.0}
+        parents: dict[tuple[int, int], tuple[int, int] | None] = {(start, 0): None}
+        heap = [(0.0, 0, start)]
+
+        while heap:
+            self._check_deadline()
+            cost, hops, u = heapq.heappop(heap)
+            if best_hops.get(u, max_hops + 1) <= hops:
+                continue
+            best_hops[u] = hops
+            if u == end:
+                return self._unwind(parents, (u, hops), cost)
+
+            for e, v in self._neighbors(u):
+                if v in banned_nodes or e in banned_edges:
+                    continue
+                remaining = to_end.get(v)
+                if remaining is None or hops + 1 + remaining > max_hops:
+                    continue
+                if best_hops.get(v, max_hops + 1) <= hops + 1:
+                    continue
+                key = (v, hops + 1)
+                new_cost = cost + self._cost(e)
+                if new_cost < costs.get(key, math.inf):
+                    costs[key] = new_cost
+                    parents[key] = (u, e)
+                    heapq.heappush(heap, (new_cost, hops + 1, v))
+        return None
+
+    @staticmethod
+    def _unwind(
+        parents: dict[tuple[int, int], tuple[int, int] | None],
+        state: tuple[int, int],
+        cost: float,
+    ) -> Path:
+        nodes, edges = [state[0]], []
+        step = parents[state]
+        while step is not None:
+            u, e = step
+            nodes.append(u)
+            edges.append(e)
+            state = (u, state[1] - 1)
+            step = parents[state]
+        nodes.reverse()
+        edges.reverse()
+        return Path(nodes, edges, cost)
+
+    # =========================================================================
+    # Result formats
+    # =========================================================================
+
+    def confidence(self, path: Path) -> float | None:
+        """Product of edge confidences (None for unweighted searches)."""
+        if self.weight is None:
+            return None
+        return math.exp(-path.cost)
+
+    def describe(self, path: Path) -> dict[str, Any]:
+        """Full path in the adapter's ``find_paths`` format."""
+        graph = self.graph
+        return {
+            "length": path.length,
+            "confidence": self.confidence(path),
+            "nodes": [graph._node(u) for u in path.nodes],
+            "relationships": [graph._relationship(e) for e in path.edges],
+        }
+
+    def summarize(self, path: Path) -> dict[str, Any]:
+        """Compact path in the ``shortestPath`` query's format."""
+        graph = self.graph
+        return {
+            "path_length": path.length,
+            "confidence": self.confidence(path),
+            "nodes": [
+                {"id": graph.node_ids[u], "labels": [graph.node_labels[u]]} for u in path.nodes
+            ],
+            "relationships": [{"type": graph.rel_types[graph._types[e]]} for e in path.edges],
+        }
@@ -32,12 +32,13 @@ NODE_QUERIES = {
     MATCH (n:{label} {{id: $node_id}})
     DETACH DELETE n
     """,
-    # List nodes with pagination
+    # List nodes with keyset pagination ($after = last id of the previous page)
     "list_nodes": """
     MATCH (n:{label})
+    WHERE $after IS NULL OR n.id > $after
     RETURN n, id(n) as internal_id
     ORDER BY n.id
-    SKIP $skip LIMIT $limit
+    LIMIT $limit
     """,
     # Count nodes by label
     "count_nodes": """
@@ -287,6 +288,71 @@ BULK_QUERIES = {
     SET r += rel.properties
     RETURN count(r) as merged
     """,
+    # Merge relationships between labeled endpoints (uses the id indexes)
+    "merge_labeled_relationships": """
+    UNWIND $relationships as rel
+    MATCH (a:{from_label} {{id: rel.from_id}})
+    MATCH (b:{to_label} {{id: rel.to_id}})
+    MERGE (a)-[r:{rel_type}]->(b)
+    SET r += rel.properties
+    RETURN count(r) as merged
+    """,
+    # Merge relationships keyed by their own id, so parallel edges survive
+    "merge_keyed_relationships": """
+    UNWIND $relationships as rel
+    MATCH (a:{from_label} {{id: rel.from_id}})
+    MATCH (b:{to_label} {{id: rel.to_id}})
+    MERGE (a)-[r:{rel_type} {{id: rel.id}}]->(b)
+    SET r += rel.properties
+    RETURN count(r) as merged
+    """,
+    # Merge nodes and replace their properties, so dropped ones are removed
+    "replace_nodes": """
+    UNWIND $nodes as node
+    MERGE (n:{label} {{id: node.id}})
+    SET n = node
+    RETURN count(n) as merged
+    """,
+    # Merge relationships between labeled endpoints and replace their properties
+    "replace_labeled_relationships": """
+    UNWIND $relationships as rel
+    MATCH (a:{from_label} {{id: rel.from_id}})
+    MATCH (b:{to_label} {{id: rel.to_id}})
+    MERGE (a)-[r:{rel_type}]->(b)
+    SET r = rel.properties
+    RETURN count(r) as merged
+    """,
+    # Merge relationships by id and replace their properties (keeping the id)
+    "replace_keyed_relationships": """
+    UNWIND $relationships as rel
+    MATCH (a:{from_label} {{id: rel.from_id}})
+    MATCH (b:{to_label} {{id: rel.to_id}})
+    MERGE (a)-[r:{rel_type} {{id: rel.id}}]->(b)
+    SET r = rel.properties, r.id = rel.id
+    RETURN count(r) as merged
+    """,
+}
+
+
+# ============================================================================
+# Schema Queries
+# ============================================================================
+
+SCHEMA_QUERIES = {
+    # Unique id per label; also creates the backing index used by MERGE/MATCH
+    "unique_id_constraint": """
+    CREATE CONSTRAINT {name} IF NOT EXISTS
+    FOR (n:{label}) REQUIRE n.id IS UNIQUE
+    """,
+    # Range index on a frequently filtered property
+    "property_index": """
+    CREATE INDEX {name} IF NOT EXISTS
+    FOR (n:{label}) ON (n.{property})
+    """,
+    # Block until every index is online
+    "await_indexes": """
+    CALL db.awaitIndexes()
+    """,
 }
 
 
@@ -477,5 +543,6 @@ def get_all_query_templates() -> dict[str, dict[str, str]]:
         "temporal": TEMPORAL_QUERIES,
         "analysis": ANALYSIS_QUERIES,
         "bulk": BULK_QUERIES,
+        "schema": SCHEMA_QUERIES,
         "domain": DOMAIN_QUERIES,
     }
@@ -0,0 +1,168 @@
+"""Result cache for read queries against Neo4j.
+
+Hot graph views (beats of an episode, causality chains, subgraphs,
+neighbors, degrees) issue the same Cypher with the same parameters over and
+over. :class:`QueryCache` keeps their results keyed by the normalized query
+text and parameters:
+
+- bounded size with least-recently-used eviction
+- a TTL, as a backstop for writes made outside this process
+- invalidation on every write made through the adapter, the bulk import
+  pipeline or the incremental sync
+- concurrent identical misses share one database round trip
+
+Hits and misses are counted per API route (see :data:`query_route`), so
+``/cache/metrics`` shows which views benefit.
+
+Cached results are shared between callers and must be treated as read-only.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from typing import Any
+
+# Route template of the request being served, used to attribute hits/misses
+query_route: ContextVar[str] = ContextVar("query_route", default="other")
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace so formatting differences share a cache entry."""
+    return " ".join(query.split())
+
+
+class QueryCache:
+    """Size-bounded LRU + TTL cache of read-query results."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, str], tuple[float, Any]] = OrderedDict()
+        self._pending: dict[tuple[str, str], asyncio.Future] = {}
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.route_stats: dict[str, dict[str, int]] = {}
+
+    def key(self, query: str, params: dict[str, Any] | None) -> tuple[str, str]:
+        return (
+            normalize_query(query),
+            json.dumps(params or {}, sort_keys=True, separators=(",", ":"), default=str),
+        )
+
+    async def get_or_load(
+        self,
+        query: str,
+        params: dict[str, Any] | None,
+        load: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Return the cached result for (query, params), loading it on a miss."""
+        key = self.key(query, params)
+        stats = self.route_stats.setdefault(query_route.get(), {"hits": 0, "misses": 0})
+
+        while True:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                stats["hits"] += 1
+                return entry[1]
+
+            pending = self._pending.get(key)
+            if pending is None:
+                break
+            # Someone is already fetching this exact result
+            try:
+                value = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Only the loader was cancelled, not us: load it ourselves
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                continue
+            self.hits += 1
+            stats["hits"] += 1
+            return value
+
+        self.misses += 1
+        stats["misses"] += 1
+        generation = self._generation
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; don't warn about an unretrieved exception
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            # A write landed while loading: the value may already be stale
+            if generation == self._generation:
+                self._store(key, value)
+            return value
+        finally:
+            # invalidate() may have handed the key to a newer load
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def _store(self, key: tuple[str, str], value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self):
+        """Drop every cached result; called after any write to the database."""
+        self._generation += 1
+        self._entries.clear()
+        # Loads already in flight may have read the old data; later lookups
+        # must not join them
+        self._pending.clear()
+        self.invalidations += 1
+
+    def get_metrics(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "routes": {
+                route: {
+                    **stats,
+                    "hit_rate": stats["hits"] / (stats["hits"] + stats["misses"])
+                    if stats["hits"] + stats["misses"]
+                    else 0.0,
+                }
+                for route, stats in sorted(self.route_stats.items())
+            },
+        }
+
+
+# Global cache shared by the adapter, importer and sync engine
+_query_cache: QueryCache | None = None
+
+
+def get_query_cache() -> QueryCache:
+    """Get the shared read-query cache."""
+    global _query_cache
+    if _query_cache is None:
+        _query_cache = QueryCache()
+    return _query_cache
@@ -4,24 +4,63 @@ Provides REST API endpoints for Neo4j operations including:
 - Connection status checks
 - Bulk data import from JSON
 - Custom Cypher query execution
+- NDJSON streaming of large result sets (nodes, subgraphs, read queries)
 - Path finding between nodes
+
+Traversal and analysis endpoints are served from the in-process graph
+(``memory_graph``) by default; pass ``backend=neo4j`` to run them against
+the Neo4j database instead. PageRank, betweenness and community scores
+come precomputed from ``analytics``.
 """
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
+import re
+from collections.abc import AsyncIterator
+from dataclasses import asdict
+from pathlib import Path
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from neo4j.exceptions import Neo4jError
 from pydantic import BaseModel, Field
 
 from ..data import beats_db, causality_edges_db, characters_db, claims_db, episodes_db
 from ..models import GraphData, GraphEdge, GraphNode
-from .neo4j_adapter import get_adapter
+from .analytics import PROJECTIONS, get_analytics
+from .importer import ImportPipeline, ImportReport, plan_from_data
+from .memory_graph import get_memory_graph
+from .neo4j_adapter import Neo4jAdapter, get_adapter
+from .paths import DEFAULT_TIMEOUT, MAX_PATHS, PathEngine
 from .queries import build_temporal_query
+from .query_cache import get_query_cache, query_route
+from .sync import SyncEngine
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/api/graph/neo4j", tags=["neo4j"])
+
+
+async def track_query_route(request: Request):
+    """Attribute read-query cache hits and misses to the route being served."""
+    route = request.scope.get("route")
+    query_route.set(getattr(route, "path", request.url.path))
+
+
+router = APIRouter(
+    prefix="/api/graph/neo4j", tags=["neo4j"], dependencies=[Depends(track_query_route)]
+)
+
+# Default and maximum time budget of a path search
+PATH_TIMEOUT_MS = int(DEFAULT_TIMEOUT * 1000)
+MAX_PATH_TIMEOUT_MS = 10_000
+
+# Content hashes of what has been written to Neo4j, for incremental sync
+SYNC_MANIFEST_PATH = (
+    Path(__file__).parent.parent.parent.parent / "data" / "neo4j" / "sync_manifest.json"
+)
 
 
 # ============================================================================
@@ -62,6 +101,13 @@ class PathFindRequest(BaseModel):
     end_id: str = Field(..., description="Ending node ID")
     max_depth: int = Field(default=5, ge=1, le=10, description="Maximum path depth")
     rel_types: list[str] | None = Field(default=None, description="Relationship types to follow")
+    limit: int = Field(default=10, ge=1, le=MAX_PATHS, description="Maximum paths to return")
+    weighted: bool = Field(
+        default=True, description="Rank paths by edge confidence instead of hop count"
+    )
+    timeout_ms: int = Field(
+        default=PATH_TIMEOUT_MS, ge=10, le=MAX_PATH_TIMEOUT_MS, description="Search time budget"
+    )
 
 
 class PathFindResponse(BaseModel):
@@ -71,6 +117,9 @@ class PathFindResponse(BaseModel):
     path_count: int
     start_id: str
     end_id: str
+    truncated: bool = Field(
+        default=False, description="The time budget ran out; more paths may exist"
+    )
 
 
 class BulkImportResponse(BaseModel):
@@ -80,6 +129,22 @@ class BulkImportResponse(BaseModel):
     nodes_imported: int = 0
     relationships_imported: int = 0
     errors: list[dict[str, Any]] = []
+    seconds: float = 0.0
+    batches: list[dict[str, Any]] = Field(
+        default_factory=list, description="Per-batch rows, duration and rows/second"
+    )
+
+
+class SyncResponse(BaseModel):
+    """Incremental sync response."""
+
+    status: str
+    dry_run: bool = False
+    upserts: dict[str, int] = Field(default_factory=dict)
+    deletes: dict[str, int] = Field(default_factory=dict)
+    transactions: int = 0
+    seconds: float = 0.0
+    errors: list[dict[str, Any]] = []
 
 
 class ImportStats(BaseModel):
@@ -95,15 +160,53 @@ class ImportStats(BaseModel):
 # ============================================================================
 
 
-async def get_neo4j_adapter():
-    """Get Neo4j adapter instance."""
+async def connect_neo4j() -> Neo4jAdapter:
+    """Get a connected Neo4j adapter, or fail the request with a 503."""
     adapter = get_adapter()
     try:
         await adapter.connect()
-        yield adapter
     except Exception as e:
         logger.error(f"Neo4j connection error: {e}")
         raise HTTPException(status_code=503, detail=f"Neo4j unavailable: {e}")
+    return adapter
+
+
+async def get_neo4j_adapter() -> Neo4jAdapter:
+    """Get Neo4j adapter instance (route dependency)."""
+    return await connect_neo4j()
+
+
+def backend_query():
+    """Query parameter selecting the graph backend for traversal routes."""
+    return Query(
+        default="memory",
+        pattern="^(memory|neo4j)$",
+        description="'memory' (in-process graph) or 'neo4j'",
+    )
+
+
+_sync_engine: SyncEngine | None = None
+
+
+def get_sync_engine(adapter: Neo4jAdapter) -> SyncEngine:
+    """Get the shared sync engine and its on-disk manifest."""
+    global _sync_engine
+    if _sync_engine is None or _sync_engine.adapter is not adapter:
+        _sync_engine = SyncEngine(adapter, SYNC_MANIFEST_PATH)
+    return _sync_engine
+
+
+def _current_plan():
+    from ..data import relationships_db
+
+    return plan_from_data(
+        characters=characters_db,
+        episodes=episodes_db,
+        beats=beats_db,
+        claims=claims_db,
+        relationships=relationships_db,
+        causality_edges=causality_edges_db,
+    )
 
 
 # ============================================================================
@@ -130,6 +233,12 @@ async def get_neo4j_status(
     )
 
 
+@router.get("/cache/metrics", response_model=dict[str, Any])
+async def get_query_cache_metrics():
+    """Read-query cache size, hit rate and per-route hits/misses."""
+    return get_query_cache().get_metrics()
+
+
 # ============================================================================
 # Import Endpoints
 # ============================================================================
@@ -138,6 +247,8 @@ async def get_neo4j_status(
 @router.post("/import", response_model=BulkImportResponse)
 async def bulk_import_data(
     clear_existing: bool = Query(default=False, description="Clear database before import"),
+    batch_size: int = Query(default=1000, ge=1, le=50000, description="Rows per batch"),
+    concurrency: int = Query(default=4, ge=1, le=32, description="Batches in flight"),
     adapter=Depends(get_neo4j_adapter),
 ):
     """Bulk import all data from JSON files into Neo4j.
@@ -150,154 +261,36 @@ async def bulk_import_data(
     - Character relationships (relationships)
     - Causality edges (relationships)
 
+    Id constraints are created first and everything is MERGEd, so the
+    import can be re-run safely. Node batches run concurrently; each
+    relationship type starts once its endpoint labels are loaded.
+
     Args:
         clear_existing: If True, clears all existing data first
+        batch_size: Rows per batch
+        concurrency: Maximum batches in flight
 
     Returns:
-        Import statistics including counts and errors
+        Import statistics including counts, per-batch throughput and errors
     """
-    nodes_imported = 0
-    relationships_imported = 0
-    errors = []
-
     try:
         # Clear existing data if requested
         if clear_existing:
             logger.info("Clearing existing Neo4j data...")
             await adapter.clear_database(confirm=True)
 
-        # Import Characters
-        logger.info(f"Importing {len(characters_db)} characters...")
-        char_nodes = [
-            {
-                "id": char.id,
-                "name": char.name,
-                "role": char.role,
-                "family": char.family,
-                "description": char.description,
-            }
-            for char in characters_db.values()
-        ]
-        char_result = await adapter.bulk_import_nodes("Character", char_nodes)
-        nodes_imported += char_result["created"]
-        if char_result["errors"]:
-            errors.append({"entity": "characters", "details": char_result["error_details"]})
-
-        # Import Episodes
-        logger.info(f"Importing {len(episodes_db)} episodes...")
-        ep_nodes = [
-            {
-                "id": ep.id,
-                "title": ep.title,
-                "episode_number": ep.episode_number,
-                "season": ep.season,
-                "air_date": ep.air_date,
-                "synopsis": ep.synopsis,
-            }
-            for ep in episodes_db.values()
-        ]
-        ep_result = await adapter.bulk_import_nodes("Episode", ep_nodes)
-        nodes_imported += ep_result["created"]
-        if ep_result["errors"]:
-            errors.append({"entity": "episodes", "details": ep_result["error_details"]})
-
-        # Import Beats
-        logger.info(f"Importing {len(beats_db)} beats...")
-        beat_nodes = [
-            {
-                "id": beat["beat_id"],
-                "beat_id": beat["beat_id"],
-                "episode_id": beat["episode_id"],
-                "start_time": beat["start_time"],
-                "end_time": beat["end_time"],
-                "start_seconds": beat["start_seconds"],
-                "end_seconds": beat["end_seconds"],
-                "summary": beat.get("summary", ""),
-                "location": beat.get("location", ""),
-                "intensity": beat.get("intensity", 1),
-                "content_types": beat.get("content_types", []),
-                "characters": beat.get("characters", []),
-            }
-            for beat in beats_db.values()
-        ]
-        beat_result = await adapter.bulk_import_nodes("Beat", beat_nodes)
-        nodes_imported += beat_result["created"]
-        if beat_result["errors"]:
-            errors.append({"entity": "beats", "details": beat_result["error_details"]})
-
-        # Import Claims
-        logger.info(f"Importing {len(claims_db)} claims...")
-        claim_nodes = [
-            {
-                "id": claim["claim_id"],
-                "claim_id": claim["claim_id"],
-                "type": claim.get("type", ""),
-                "subject": claim.get("subject", ""),
-                "predicate": claim.get("predicate", ""),
-                "object": str(claim.get("object", "")),
-                "canon_layer": claim.get("canon_layer", "bst"),
-                "confidence": claim.get("confidence", 0.5),
-            }
-            for claim in claims_db.values()
-        ]
-        claim_result = await adapter.bulk_import_nodes("Claim", claim_nodes)
-        nodes_imported += claim_result["created"]
-        if claim_result["errors"]:
-            errors.append({"entity": "claims", "details": claim_result["error_details"]})
-
-        # Import Character Relationships
-        from ..data import relationships_db
-
-        logger.info(f"Importing {len(relationships_db)} character relationships...")
-        rels = [
-            {
-                "from_id": rel.from_character_id,
-                "to_id": rel.to_character_id,
-                "properties": {
-                    "relationship_type": rel.relationship_type,
-                    "description": rel.description,
-                },
-            }
-            for rel in relationships_db.values()
-        ]
-        rel_result = await adapter.bulk_import_relationships("RELATES_TO", rels)
-        relationships_imported += rel_result["created"]
-        if rel_result["errors"]:
-            errors.append(
-                {"entity": "character_relationships", "details": rel_result["error_details"]}
-            )
+        nodes, relationships = _current_plan()
+        pipeline = ImportPipeline(adapter, batch_size=batch_size, concurrency=concurrency)
+        report = await pipeline.run(nodes, relationships)
 
-        # Import Causality Edges
-        logger.info(f"Importing {len(causality_edges_db)} causality edges...")
-        causality_rels = [
-            {
-                "from_id": edge["from_beat_id"],
-                "to_id": edge["to_beat_id"],
-                "properties": {
-                    "edge_type": edge.get("type", ""),
-                    "version": edge.get("version", "bst"),
-                    "confidence": edge.get("confidence", 0.5),
-                },
-            }
-            for edge in causality_edges_db.values()
-        ]
-        causality_result = await adapter.bulk_import_relationships("CAUSES", causality_rels)
-        relationships_imported += causality_result["created"]
-        if causality_result["errors"]:
-            errors.append(
-                {"entity": "causality_edges", "details": causality_result["error_details"]}
-            )
-
-        logger.info(
-            f"Import complete: {nodes_imported} nodes, {relationships_imported} relationships"
-        )
+        # A clean full import is the baseline for later incremental syncs
+        sync_engine = get_sync_engine(adapter)
+        if report.errors:
+            sync_engine.manifest.clear()
+        else:
+            sync_engine.mark_synced(nodes, relationships)
 
-        return BulkImportResponse(
-            status="success",
-            nodes_imported=nodes_imported,
-            relationships_imported=relationships_imported,
-            errors=errors,
-        )
+        return _import_response(report)
 
     except Exception as e:
         logger.error(f"Bulk import failed: {e}")
@@ -307,6 +300,8 @@ async def bulk_import_data(
 @router.post("/import/beats-only", response_model=BulkImportResponse)
 async def import_beats_only(
     clear_existing: bool = Query(default=False, description="Clear beats before import"),
+    batch_size: int = Query(default=1000, ge=1, le=50000, description="Rows per batch"),
+    concurrency: int = Query(default=4, ge=1, le=32, description="Batches in flight"),
     adapter=Depends(get_neo4j_adapter),
 ):
     """Import only narrative beats and causality edges.
@@ -319,53 +314,63 @@ async def import_beats_only(
             query = "MATCH (b:Beat) DETACH DELETE b"
             await adapter.execute_query(query)
 
-        # Import Beats
-        beat_nodes = [
-            {
-                "id": beat["beat_id"],
-                "beat_id": beat["beat_id"],
-                "episode_id": beat["episode_id"],
-                "start_time": beat["start_time"],
-                "end_time": beat["end_time"],
-                "start_seconds": beat["start_seconds"],
-                "end_seconds": beat["end_seconds"],
-                "summary": beat.get("summary", ""),
-                "location": beat.get("location", ""),
-                "intensity": beat.get("intensity", 1),
-                "content_types": beat.get("content_types", []),
-                "characters": beat.get("characters", []),
-            }
-            for beat in beats_db.values()
-        ]
-        beat_result = await adapter.bulk_import_nodes("Beat", beat_nodes)
-
-        # Import Causality Edges
-        causality_rels = [
-            {
-                "from_id": edge["from_beat_id"],
-                "to_id": edge["to_beat_id"],
-                "properties": {
-                    "edge_type": edge.get("type", ""),
-                    "version": edge.get("version", "bst"),
-                    "confidence": edge.get("confidence", 0.5),
-                },
-            }
-            for edge in causality_edges_db.values()
-        ]
-        causality_result = await adapter.bulk_import_relationships("CAUSES", causality_rels)
-
-        return BulkImportResponse(
-            status="success",
-            nodes_imported=beat_result["created"],
-            relationships_imported=causality_result["created"],
-            errors=[],
-        )
+        nodes, relationships = plan_from_data(beats=beats_db, causality_edges=causality_edges_db)
+        pipeline = ImportPipeline(adapter, batch_size=batch_size, concurrency=concurrency)
+        report = await pipeline.run(nodes, relationships)
+        # Only part of the data was written; the next sync re-checks everything
+        get_sync_engine(adapter).manifest.clear()
+        return _import_response(report)
 
     except Exception as e:
         logger.error(f"Beats import failed: {e}")
         raise HTTPException(status_code=500, detail=f"Import failed: {e}")
 
 
+@router.post("/sync", response_model=SyncResponse)
+async def sync_data(
+    dry_run: bool = Query(default=False, description="Only report what would change"),
+    adapter=Depends(get_neo4j_adapter),
+):
+    """Incrementally sync the loaded data to Neo4j.
+
+    Compares characters, episodes, beats, claims, relationships and
+    causality edges with the manifest of the last sync (or full import) and
+    writes only new, changed and removed entities, in batched transactions.
+    """
+    try:
+        nodes, relationships = _current_plan()
+        report = await get_sync_engine(adapter).sync(nodes, relationships, dry_run=dry_run)
+    except Exception as e:
+        logger.error(f"Sync failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Sync failed: {e}")
+
+    if report.errors:
+        status = "partial"
+    else:
+        status = "success" if report.changed else "unchanged"
+    return SyncResponse(
+        status=status,
+        dry_run=report.dry_run,
+        upserts=report.upserts,
+        deletes=report.deletes,
+        transactions=report.transactions,
+        seconds=report.seconds,
+        errors=report.errors,
+    )
+
+
+def _import_response(report: ImportReport) -> BulkImportResponse:
+    errors = report.errors
+    return BulkImportResponse(
+        status="partial" if errors else "success",
+        nodes_imported=report.nodes_written,
+        relationships_imported=report.relationships_written,
+        errors=errors,
+        seconds=report.seconds,
+        batches=[asdict(b) for b in report.batches],
+    )
+
+
 # ============================================================================
 # Query Endpoints
 # ============================================================================
@@ -379,7 +384,8 @@ async def execute_cypher_query(
     """Execute a custom Cypher query.
 
     Allows running arbitrary Cypher queries against Neo4j.
-    Use with caution - read-only queries are recommended.
+    Use with caution - read-only queries are recommended. Read-only queries
+    run in a read session (writes are rejected) and are never cached.
 
     Args:
         request: Query request with Cypher string and parameters
@@ -430,7 +436,7 @@ async def get_beats_by_episode(
     query = build_temporal_query("beats_by_episode")
 
     try:
-        results = await adapter.execute_read_query(query, {"episode_id": episode_id})
+        results = await adapter.execute_cached_read(query, {"episode_id": episode_id})
         return results
     except Exception as e:
         logger.error(f"Failed to get beats: {e}")
@@ -458,7 +464,7 @@ async def get_causality_chain(
     query = build_temporal_query("causality_chain", max_depth=max_depth)
 
     try:
-        results = await adapter.execute_read_query(
+        results = await adapter.execute_cached_read(
             query,
             {"start_beat_id": beat_id, "limit": 10},
         )
@@ -468,20 +474,136 @@ async def get_causality_chain(
         raise HTTPException(status_code=500, detail=f"Query failed: {e}")
 
 
+# ============================================================================
+# Streaming Endpoints
+# ============================================================================
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+LABEL_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+async def _ndjson(records: AsyncIterator[dict[str, Any]]) -> AsyncIterator[str]:
+    """Serialize records one per line as the driver produces them.
+
+    Once streaming has started the status code can no longer change, so a
+    failure ends the stream with a final ``{"error": ...}`` line.
+    """
+    try:
+        async for record in records:
+            yield json.dumps(record, default=str) + "\n"
+    except Exception as e:
+        logger.error(f"Streaming query failed: {e}")
+        yield json.dumps({"error": str(e)}) + "\n"
+
+
+def _validate_names(*names: str):
+    """Labels and relationship types are interpolated into Cypher; allow identifiers only."""
+    for name in names:
+        if not LABEL_PATTERN.fullmatch(name):
+            raise HTTPException(status_code=400, detail=f"Invalid label or type: {name!r}")
+
+
+@router.get("/stream/nodes/{label}")
+async def stream_nodes(
+    label: str,
+    after: str | None = Query(default=None, description="Resume after this node id"),
+    page_size: int = Query(default=1000, ge=1, le=10000),
+    adapter=Depends(get_neo4j_adapter),
+):
+    """Export every node of a label as NDJSON, ordered by id.
+
+    Pages through Neo4j with keyset pagination on ``n.id``, so exporting
+    the whole beat graph uses constant memory. An interrupted export can be
+    resumed by passing the last received id as ``after``.
+    """
+    _validate_names(label)
+    return StreamingResponse(
+        _ndjson(adapter.iter_nodes(label, page_size=page_size, after=after)),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+@router.get("/stream/subgraph/{node_id}")
+async def stream_subgraph(
+    node_id: str,
+    depth: int = Query(default=2, ge=1, le=5),
+    rel_types: list[str] | None = Query(default=None),
+    adapter=Depends(get_neo4j_adapter),
+):
+    """Stream the subgraph around a node as NDJSON: node lines, then relationship lines."""
+    _validate_names(*(rel_types or []))
+    return StreamingResponse(
+        _ndjson(adapter.stream_subgraph(center_id=node_id, depth=depth, rel_types=rel_types)),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+@router.post("/stream/query")
+async def stream_cypher_query(
+    request: CypherQueryRequest,
+    adapter=Depends(get_neo4j_adapter),
+):
+    """Execute a read-only Cypher query and stream its records as NDJSON."""
+    if not request.read_only:
+        raise HTTPException(status_code=400, detail="Only read-only queries can be streamed")
+    return StreamingResponse(
+        _ndjson(adapter.stream_read_query(request.query, request.parameters)),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
 # ============================================================================
 # Path Finding Endpoints
 # ============================================================================
 
 
+def _is_timeout(error: Neo4jError) -> bool:
+    return "TransactionTimedOut" in (error.code or "")
+
+
+# The path searches are CPU-bound for up to MAX_PATH_TIMEOUT_MS, so the
+# routes run them in a worker thread to keep the event loop responsive.
+
+
+def _memory_paths(request: PathFindRequest) -> tuple[list[dict[str, Any]], bool]:
+    engine = PathEngine(
+        get_memory_graph(),
+        rel_types=request.rel_types,
+        direction="out",
+        weight="confidence" if request.weighted else None,
+        timeout=request.timeout_ms / 1000,
+    )
+    search = engine.k_shortest(
+        request.start_id, request.end_id, k=request.limit, max_depth=request.max_depth
+    )
+    return [engine.describe(path) for path in search.paths], search.truncated
+
+
+def _memory_shortest_path(
+    start_id: str, end_id: str, max_depth: int, weighted: bool, timeout_ms: int
+) -> tuple[dict[str, Any] | None, bool]:
+    engine = PathEngine(
+        get_memory_graph(),
+        direction="both",
+        weight="confidence" if weighted else None,
+        timeout=timeout_ms / 1000,
+    )
+    search = engine.shortest(start_id, end_id, max_depth=max_depth)
+    path = engine.summarize(search.paths[0]) if search.paths else None
+    return path, search.truncated
+
+
 @router.post("/paths", response_model=PathFindResponse)
 async def find_paths(
     request: PathFindRequest,
-    adapter=Depends(get_neo4j_adapter),
+    backend: str = backend_query(),
 ):
     """Find paths between two nodes.
 
-    Finds all paths up to max_depth between start and end nodes.
-    Optionally filter by relationship types.
+    The in-memory backend returns the ``limit`` best directed paths up to
+    ``max_depth`` (Yen's k-shortest paths, ranked by the product of edge
+    confidences when ``weighted``). Neo4j returns its shortest paths.
+    Either search stops after ``timeout_ms`` and reports ``truncated``.
 
     Args:
         request: Path finding parameters
@@ -489,21 +611,39 @@ async def find_paths(
     Returns:
         List of paths with nodes and relationships
     """
+    if backend == "neo4j":
+        adapter = await connect_neo4j()
+
+    truncated = False
     try:
-        paths = await adapter.find_paths(
-            start_id=request.start_id,
-            end_id=request.end_id,
-            max_depth=request.max_depth,
-            rel_types=request.rel_types,
-        )
+        if backend == "memory":
+            paths, truncated = await asyncio.to_thread(_memory_paths, request)
+        else:
+            _validate_names(*(request.rel_types or []))
+            try:
+                paths = await adapter.find_paths(
+                    start_id=request.start_id,
+                    end_id=request.end_id,
+                    max_depth=request.max_depth,
+                    rel_types=request.rel_types,
+                    limit=request.limit,
+                    timeout=request.timeout_ms / 1000,
+                )
+            except Neo4jError as e:
+                if not _is_timeout(e):
+                    raise
+                paths, truncated = [], True
 
         return PathFindResponse(
             paths=paths,
             path_count=len(paths),
             start_id=request.start_id,
             end_id=request.end_id,
+            truncated=truncated,
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Path finding failed: {e}")
         raise HTTPException(status_code=500, detail=f"Path finding failed: {e}")
@@ -514,12 +654,17 @@ async def find_shortest_path(
     start_id: str = Query(..., description="Starting node ID"),
     end_id: str = Query(..., description="Ending node ID"),
     max_depth: int = Query(default=5, ge=1, le=10),
-    adapter=Depends(get_neo4j_adapter),
+    weighted: bool = Query(
+        default=False, description="Most confident path instead of fewest hops (memory only)"
+    ),
+    timeout_ms: int = Query(default=PATH_TIMEOUT_MS, ge=10, le=MAX_PATH_TIMEOUT_MS),
+    backend: str = backend_query(),
 ):
-    """Find the shortest path between two nodes.
+    """Find the shortest path between two nodes, in either direction.
 
-    Uses Neo4j's shortestPath algorithm to find the most direct
-    connection between two nodes.
+    The in-memory backend uses bidirectional BFS (or confidence-weighted
+    Dijkstra when ``weighted``); Neo4j uses its shortestPath algorithm.
+    The search stops after ``timeout_ms``.
 
     Args:
         start_id: Starting node ID
@@ -529,33 +674,37 @@ async def find_shortest_path(
     Returns:
         Shortest path with nodes and relationships
     """
-    query = """
-    MATCH path = shortestPath(
-        (start {id: $start_id})-[*1..$max_depth]-(end {id: $end_id})
-    )
-    RETURN path,
-           length(path) as path_length,
-           [node in nodes(path) | {id: node.id, labels: labels(node)}] as nodes,
-           [rel in relationships(path) | {type: type(rel)}] as relationships
-    """
+    if backend == "neo4j":
+        adapter = await connect_neo4j()
 
+    truncated = False
     try:
-        results = await adapter.execute_read_query(
-            query,
-            {"start_id": start_id, "end_id": end_id, "max_depth": max_depth},
-        )
-
-        if not results:
+        if backend == "memory":
+            path, truncated = await asyncio.to_thread(
+                _memory_shortest_path, start_id, end_id, max_depth, weighted, timeout_ms
+            )
+        else:
+            try:
+                path = await adapter.shortest_path(
+                    start_id, end_id, max_depth=max_depth, timeout=timeout_ms / 1000
+                )
+            except Neo4jError as e:
+                if not _is_timeout(e):
+                    raise
+                path, truncated = None, True
+
+        if path is None:
             return {
                 "found": False,
-                "message": "No path found between nodes",
+                "message": "Search timed out" if truncated else "No path found between nodes",
+                "truncated": truncated,
                 "start_id": start_id,
                 "end_id": end_id,
             }
 
         return {
             "found": True,
-            "path": results[0],
+            "path": path,
             "start_id": start_id,
             "end_id": end_id,
         }
@@ -569,7 +718,7 @@ async def find_shortest_path(
 async def get_subgraph(
     node_id: str,
     depth: int = Query(default=2, ge=1, le=5),
-    adapter=Depends(get_neo4j_adapter),
+    backend: str = backend_query(),
 ):
     """Get subgraph centered around a node.
 
@@ -583,8 +732,14 @@ async def get_subgraph(
     Returns:
         Graph data with nodes and edges
     """
+    if backend == "neo4j":
+        adapter = await connect_neo4j()
+
     try:
-        subgraph = await adapter.get_subgraph(center_id=node_id, depth=depth)
+        if backend == "memory":
+            subgraph = get_memory_graph().get_subgraph(center_id=node_id, depth=depth)
+        else:
+            subgraph = await adapter.get_subgraph(center_id=node_id, depth=depth)
 
         # Convert to GraphData format
         nodes = [
@@ -619,7 +774,7 @@ async def get_neighbors(
     node_id: str,
     rel_type: str | None = Query(default=None, description="Filter by relationship type"),
     direction: str = Query(default="both", pattern="^(out|in|both)$"),
-    adapter=Depends(get_neo4j_adapter),
+    backend: str = backend_query(),
 ):
     """Get immediate neighbors of a node.
 
@@ -631,6 +786,12 @@ async def get_neighbors(
     Returns:
         List of neighbor nodes with relationship info
     """
+    if backend == "memory":
+        return get_memory_graph().get_neighbors(
+            node_id=node_id, rel_type=rel_type, direction=direction
+        )
+
+    adapter = await connect_neo4j()
     try:
         neighbors = await adapter.get_neighbors(
             node_id=node_id,
@@ -652,7 +813,7 @@ async def get_neighbors(
 @router.get("/analysis/degree/{node_id}", response_model=dict[str, Any])
 async def get_node_degree(
     node_id: str,
-    adapter=Depends(get_neo4j_adapter),
+    backend: str = backend_query(),
 ):
     """Get the degree (number of connections) of a node.
 
@@ -668,8 +829,15 @@ async def get_node_degree(
            collect(DISTINCT type(r)) as rel_types
     """
 
+    if backend == "neo4j":
+        adapter = await connect_neo4j()
+
     try:
-        results = await adapter.execute_read_query(query, {"node_id": node_id})
+        if backend == "memory":
+            degree = get_memory_graph().degree(node_id)
+            results = [degree] if degree is not None else []
+        else:
+            results = await adapter.execute_cached_read(query, {"node_id": node_id})
 
         if not results:
             raise HTTPException(status_code=404, detail="Node not found")
@@ -691,7 +859,7 @@ async def get_node_degree(
 async def get_central_nodes(
     label: str = Query(default="Beat", description="Node label to analyze"),
     limit: int = Query(default=10, ge=1, le=50),
-    adapter=Depends(get_neo4j_adapter),
+    backend: str = backend_query(),
 ):
     """Find most connected nodes (highest degree).
 
@@ -712,10 +880,64 @@ async def get_central_nodes(
     LIMIT $limit
     """
 
+    if backend == "memory":
+        return get_memory_graph().central_nodes(label, limit=limit)
+
+    adapter = await connect_neo4j()
     try:
-        results = await adapter.execute_read_query(query, {"limit": limit})
+        results = await adapter.execute_cached_read(query, {"limit": limit})
         return results
 
     except Exception as e:
         logger.error(f"Failed to get central nodes: {e}")
         raise HTTPException(status_code=500, detail=f"Query failed: {e}")
+
+
+def projection_query():
+    """Shared ``projection`` query parameter for the analytics routes."""
+    return Query(
+        default="causality",
+        pattern=f"^({'|'.join(PROJECTIONS)})$",
+        description="Graph to analyze: causality (beats) or relationships (characters)",
+    )
+
+
+@router.get("/analysis/pagerank", response_model=list[dict[str, Any]])
+async def get_pagerank(
+    projection: str = projection_query(),
+    limit: int = Query(default=10, ge=1, le=100),
+):
+    """Top nodes by PageRank, computed in-process and cached per data version."""
+    return get_analytics(projection).top("pagerank", limit=limit)
+
+
+@router.get("/analysis/betweenness", response_model=list[dict[str, Any]])
+async def get_betweenness(
+    projection: str = projection_query(),
+    limit: int = Query(default=10, ge=1, le=100),
+):
+    """Most pivotal nodes by (sampled) betweenness centrality."""
+    return get_analytics(projection).top("betweenness", limit=limit)
+
+
+@router.get("/analysis/communities", response_model=dict[str, Any])
+async def get_communities(
+    projection: str = projection_query(),
+    min_size: int = Query(default=1, ge=1),
+):
+    """Louvain communities, largest first, with members ranked by PageRank."""
+    analytics = get_analytics(projection)
+    return {
+        "projection": projection,
+        "modularity": analytics.modularity,
+        "communities": analytics.community_groups(min_size=min_size),
+    }
+
+
+@router.get("/analysis/scores/{node_id}", response_model=dict[str, Any])
+async def get_node_scores(node_id: str, projection: str = projection_query()):
+    """PageRank, betweenness and community of a single node."""
+    scores = get_analytics(projection).scores(node_id)
+    if scores is None:
+        raise HTTPException(status_code=404, detail="Node not found")
+    return scores
@@ -0,0 +1,334 @@
+"""Incremental (change-data-capture) sync from the loaded data to Neo4j.
+
+Instead of wiping and reloading the database, :class:`SyncEngine` keeps a
+manifest of content hashes of everything it has written. Each sync builds
+the same rows as the bulk import (``importer.plan_from_data``), hashes
+them, and sends only the difference:
+
+- new or changed nodes and relationships as ``UNWIND ... MERGE`` batches
+  that replace all properties, so properties dropped from a row go too
+- removed ones as ``UNWIND ... DELETE`` batches
+
+Every batch is its own write transaction, applied in dependency order
+(relationship deletes, node deletes, node upserts, relationship upserts).
+The manifest is updated per successful batch and saved at the end, so a
+failed sync resends only what did not make it. Editing one beat costs a
+single one-row transaction.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from neo4j.exceptions import Neo4jError
+
+from .importer import ImportPipeline, NodeSpec, RelationshipSpec
+from .neo4j_adapter import Neo4jAdapter
+from .queries import BULK_QUERIES
+from .query_cache import get_query_cache
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+DELETE_NODES = """
+UNWIND $ids as id
+MATCH (n:{label} {{id: id}})
+DETACH DELETE n
+"""
+
+DELETE_RELATIONSHIPS = """
+UNWIND $relationships as rel
+MATCH (a:{from_label} {{id: rel.from_id}})-[r:{rel_type}]->(b:{to_label} {{id: rel.to_id}})
+WHERE rel.id IS NULL OR r.id = rel.id
+DELETE r
+"""
+
+
+def content_hash(row: dict[str, Any]) -> str:
+    """Stable hash of a row as it would be written to Neo4j."""
+    payload = json.dumps(row, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _relationship_key(row: dict[str, Any]) -> str:
+    return row.get("id") or f"{row['from_id']}->{row['to_id']}"
+
+
+@dataclass
+class SyncBatch:
+    """One UNWIND statement of a sync, run as its own transaction."""
+
+    operation: str
+    entity: str
+    query: str
+    param: str
+    rows: list[Any]
+    # Manifest changes to apply once the batch has committed
+    applied: dict[str, Any | None]
+    # Relationships removed along with deleted nodes (DETACH DELETE), by type
+    detached: dict[str, dict[str, None]] = field(default_factory=dict)
+
+
+@dataclass
+class SyncReport:
+    """What a sync sent, or would send when ``dry_run`` is set."""
+
+    dry_run: bool = False
+    upserts: dict[str, int] = field(default_factory=dict)
+    deletes: dict[str, int] = field(default_factory=dict)
+    transactions: int = 0
+    seconds: float = 0.0
+    errors: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.upserts or self.deletes)
+
+
+class SyncManifest:
+    """Content hashes of what has been written, persisted as JSON.
+
+    ``entities`` maps a label or relationship type to ``{key: entry}``.
+    Node entries are the row hash; relationship entries are
+    ``[hash, from_id, to_id]`` so deletes can match the endpoints by index.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.entities: dict[str, dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.entities = data.get("entities", {})
+
+    @property
+    def empty(self) -> bool:
+        return not any(self.entities.values())
+
+    def apply(self, entity: str, changes: dict[str, Any | None]):
+        """Record committed upserts (entry) and deletes (None)."""
+        entries = self.entities.setdefault(entity, {})
+        for key, entry in changes.items():
+            if entry is None:
+                entries.pop(key, None)
+            else:
+                entries[key] = entry
+
+    def save(self):
+        """Atomically replace the manifest file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "entities": self.entities}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        self.entities = {}
+        self.path.unlink(missing_ok=True)
+
+
+class SyncEngine:
+    """Diffs import plans against a manifest and applies the delta to Neo4j."""
+
+    def __init__(self, adapter: Neo4jAdapter, manifest_path: Path | str, batch_size: int = 1000):
+        self.adapter = adapter
+        self.manifest = SyncManifest(manifest_path)
+        self.batch_size = batch_size
+        self._lock = asyncio.Lock()
+
+    # =========================================================================
+    # Diffing
+    # =========================================================================
+
+    def diff(
+        self, nodes: list[NodeSpec], relationships: list[RelationshipSpec]
+    ) -> list[SyncBatch]:
+        """Batches needed to bring Neo4j from the manifest state to the plan."""
+        node_deletes: list[SyncBatch] = []
+        node_upserts: list[SyncBatch] = []
+        rel_deletes: list[SyncBatch] = []
+        rel_upserts: list[SyncBatch] = []
+
+        for spec in nodes:
+            known = self.manifest.entities.get(spec.label, {})
+            current = {row["id"]: (row, content_hash(row)) for row in spec.rows}
+
+            changed = [(i, h) for i, (_, h) in current.items() if known.get(i) != h]
+            removed = [i for i in known if i not in current]
+
+            query = BULK_QUERIES["replace_nodes"].format(label=spec.label)
+            for chunk in self._chunks(changed):
+                node_upserts.append(
+                    SyncBatch(
+                        "upsert",
+                        spec.label,
+                        query,
+                        "nodes",
+                        [current[i][0] for i, _ in chunk],
+                        dict(chunk),
+                    )
+                )
+            query = DELETE_NODES.format(label=spec.label)
+            for chunk in self._chunks(removed):
+                node_deletes.append(
+                    SyncBatch("delete", spec.label, query, "ids", chunk, dict.fromkeys(chunk))
+                )
+
+        for spec in relationships:
+            known = self.manifest.entities.get(spec.rel_type, {})
+            current = {
+                _relationship_key(row): (row, [content_hash(row), row["from_id"], row["to_id"]])
+                for row in spec.rows
+            }
+
+            changed = [(k, e) for k, (_, e) in current.items() if known.get(k) != e]
+            # A relationship whose endpoints moved is a different relationship
+            removed = [
+                k
+                for k, entry in known.items()
+                if k not in current or current[k][1][1:] != entry[1:]
+            ]
+
+            template = (
+                "replace_keyed_relationships" if spec.keyed else "replace_labeled_relationships"
+            )
+            query = BULK_QUERIES[template].format(
+                from_label=spec.from_label, to_label=spec.to_label, rel_type=spec.rel_type
+            )
+            for chunk in self._chunks(changed):
+                rel_upserts.append(
+                    SyncBatch(
+                        "upsert",
+                        spec.rel_type,
+                        query,
+                        "relationships",
+                        [current[k][0] for k, _ in chunk],
+                        dict(chunk),
+                    )
+                )
+
+            query = DELETE_RELATIONSHIPS.format(
+                from_label=spec.from_label, to_label=spec.to_label, rel_type=spec.rel_type
+            )
+            for chunk in self._chunks(removed):
+                rows = [
+                    {
+                        "id": k if spec.keyed else None,
+                        "from_id": known[k][1],
+                        "to_id": known[k][2],
+                    }
+                    for k in chunk
+                ]
+                # Moved relationships are re-added by the upsert batches
+                applied = {k: None for k in chunk if k not in current}
+                rel_deletes.append(
+                    SyncBatch("delete", spec.rel_type, query, "relationships", rows, applied)
+                )
+
+        for batch in node_deletes:
+            self._detach(batch, relationships)
+
+        return rel_deletes + node_deletes + node_upserts + rel_upserts
+
+    def _detach(self, batch: SyncBatch, relationships: list[RelationshipSpec]):
+        """Drop manifest entries of relationships attached to the batch's nodes."""
+        deleted = set(batch.rows)
+        for spec in relationships:
+            known = self.manifest.entities.get(spec.rel_type, {})
+            keys = {
+                key: None
+                for key, (_, from_id, to_id) in known.items()
+                if (spec.from_label == batch.entity and from_id in deleted)
+                or (spec.to_label == batch.entity and to_id in deleted)
+            }
+            if keys:
+                batch.detached.setdefault(spec.rel_type, {}).update(keys)
+
+    def _chunks(self, items: list) -> list[list]:
+        return [items[i : i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+
+    # =========================================================================
+    # Applying
+    # =========================================================================
+
+    async def sync(
+        self,
+        nodes: list[NodeSpec],
+        relationships: list[RelationshipSpec],
+        dry_run: bool = False,
+    ) -> SyncReport:
+        """Send the delta between the manifest and the plan to Neo4j."""
+        async with self._lock:
+            started = time.perf_counter()
+            report = SyncReport(dry_run=dry_run)
+            batches = self.diff(nodes, relationships)
+
+            for batch in batches:
+                counts = report.upserts if batch.operation == "upsert" else report.deletes
+                counts[batch.entity] = counts.get(batch.entity, 0) + len(batch.rows)
+
+            if dry_run or not batches:
+                report.seconds = time.perf_counter() - started
+                return report
+
+            if self.manifest.empty:
+                # First sync against this database: make MERGE lookups indexed
+                await ImportPipeline(self.adapter).ensure_schema(nodes)
+
+            try:
+                for batch in batches:
+                    try:
+                        async with self.adapter.session() as session:
+                            await session.execute_write(
+                                _run_batch, batch.query, batch.param, batch.rows
+                            )
+                    except Neo4jError as e:
+                        logger.error(f"Sync {batch.operation} of {batch.entity} failed: {e}")
+                        report.errors.append(
+                            {"operation": batch.operation, "entity": batch.entity, "error": str(e)}
+                        )
+                        continue
+                    report.transactions += 1
+                    self.manifest.apply(batch.entity, batch.applied)
+                    for rel_type, keys in batch.detached.items():
+                        self.manifest.apply(rel_type, keys)
+            finally:
+                self.manifest.save()
+                get_query_cache().invalidate()
+
+            report.seconds = time.perf_counter() - started
+            logger.info(
+                f"Sync complete: {sum(report.upserts.values())} upserts, "
+                f"{sum(report.deletes.values())} deletes in {report.transactions} transactions"
+            )
+            return report
+
+    def mark_synced(self, nodes: list[NodeSpec], relationships: list[RelationshipSpec]):
+        """Record a plan as fully written (e.g. after a successful bulk import)."""
+        self.manifest.entities = {}
+        for spec in nodes:
+            self.manifest.apply(spec.label, {row["id"]: content_hash(row) for row in spec.rows})
+        for spec in relationships:
+            self.manifest.apply(
+                spec.rel_type,
+                {
+                    _relationship_key(row): [content_hash(row), row["from_id"], row["to_id"]]
+                    for row in spec.rows
+                },
+            )
+        self.manifest.save()
+
+
+async def _run_batch(tx, query: str, param: str, rows: list[Any]):
+    result = await tx.run(query, {param: rows})
+    await result.consume()
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -7,6 +8,7 @@ from fastapi.staticfiles import StaticFiles
 from .api import (
     causality,
     characters,
+    collaboration,
     episodes,
     graph,
     knowledge,
@@ -18,10 +20,19 @@ from .api import (
 )
 from .graphdb import router as neo4j_router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Persist open collaborative documents before the process exits
+    await collaboration.shutdown_hub()
+
+
 app = FastAPI(
     title="Blod Wiki API",
     description="API for Blod svett tårar Dark Adaptation Wiki",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS for frontend
@@ -51,6 +62,7 @@ app.include_router(causality.router)
 app.include_router(knowledge.router)
 app.include_router(validation.router)
 app.include_router(media_lab.router)
+app.include_router(collaboration.router)
 app.include_router(neo4j_router)
 
 
@@ -1,11 +1,12 @@
 """Media Lab worker runtime package.
 
-Provides queue management, job execution, and lifecycle transitions
-for asynchronous media processing workflows.
+Provides queue management (in memory and SQLite-backed), job execution,
+and lifecycle transitions for asynchronous media processing workflows.
 """
 
 from .artifact_manager import ArtifactManager
 from .executor import JobExecutor
+from .job_store import JobStore
 from .queue import JobQueue
 
-__all__ = ["ArtifactManager", "JobQueue", "JobExecutor"]
+__all__ = ["ArtifactManager", "JobQueue", "JobExecutor", "JobStore"]
@@ -0,0 +1,328 @@
+"""DAG scheduling for media pipelines.
+
+``DagPipeline`` runs stages as the nodes of a directed acyclic graph rather
+than a fixed sequence. Each node lists the nodes it consumes and starts as
+soon as all of them have finished. Independent branches, such as several
+detailer ROIs or upscalers on different variants, therefore overlap: their
+CPU work runs on the StageExecutor while the event loop drives the others.
+
+Every node runs once over the whole batch (PipelineStage.execute_batch),
+on per-item contexts forked from its inputs:
+
+- a root node forks the item's initial context;
+- a node with one input forks that input's result;
+- a fan-in node merges its inputs in order, later inputs winning on
+  conflicting keys, and also sees each input's image as
+  ``images[<input id>]``.
+
+When several nodes run the same stage type (e.g. a 2x and a 4x upscaler on
+one image), their contexts carry ``node_id`` so each writes its own artifact
+file and metadata entry instead of overwriting the other's.
+
+After a run, ``report()`` gives per-node timings and the critical path.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from .pipeline import PipelineContext, PipelineStage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class PipelineNode:
+    """A stage placed in the pipeline graph."""
+
+    id: str
+    stage: PipelineStage
+    inputs: list[str] = field(default_factory=list)
+    # Context keys passed on to dependents; empty passes everything
+    outputs: list[str] = field(default_factory=list)
+    # Position in the pipeline config, as used by checkpoint_stages
+    index: int = 0
+
+
+@dataclass(slots=True)
+class StageTiming:
+    """Wall-clock span of one node, in seconds from the start of the run."""
+
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        """Seconds the node took."""
+        return self.end - self.start
+
+
+class DagPipeline:
+    """Runs pipeline stages as a DAG, with independent branches in parallel."""
+
+    def __init__(self, nodes: list[PipelineNode]):
+        """Validate the graph and put its nodes in dependency order.
+
+        Args:
+            nodes: Graph nodes, in config order.
+
+        Raises:
+            ValueError: If ids repeat, an input is unknown, or the graph has a cycle.
+        """
+        self.nodes: dict[str, PipelineNode] = {}
+        for node in nodes:
+            if node.id in self.nodes:
+                raise ValueError(f"Duplicate stage id: {node.id}")
+            self.nodes[node.id] = node
+        for node in nodes:
+            for input_id in node.inputs:
+                if input_id not in self.nodes:
+                    raise ValueError(f"Stage {node.id} has unknown input: {input_id}")
+
+        self.order = self._topological_order(nodes)
+        consumed = {input_id for node in nodes for input_id in node.inputs}
+        self.sinks = [node.id for node in self.order if node.id not in consumed]
+        # Nodes whose stage type repeats; their outputs are qualified by node id
+        stage_types = Counter(type(node.stage) for node in nodes)
+        self.qualified = {node.id for node in nodes if stage_types[type(node.stage)] > 1}
+        self.timings: dict[str, StageTiming] = {}
+        self.wall_seconds = 0.0
+
+    @classmethod
+    def chain(cls, stages: list[PipelineStage]) -> "DagPipeline":
+        """Build a linear graph where each stage consumes the one before it.
+
+        Args:
+            stages: Ordered stages.
+
+        Returns:
+            DagPipeline equivalent to Pipeline(stages).
+        """
+        nodes = [
+            PipelineNode(
+                id=str(index),
+                stage=stage,
+                inputs=[str(index - 1)] if index else [],
+                index=index,
+            )
+            for index, stage in enumerate(stages)
+        ]
+        return cls(nodes)
+
+    @property
+    def stages(self) -> list[PipelineStage]:
+        """Stages in dependency order."""
+        return [node.stage for node in self.order]
+
+    @staticmethod
+    def _topological_order(nodes: list[PipelineNode]) -> list[PipelineNode]:
+        waiting = {node.id: len(set(node.inputs)) for node in nodes}
+        dependents: dict[str, list[str]] = {node.id: [] for node in nodes}
+        for node in nodes:
+            for input_id in set(node.inputs):
+                dependents[input_id].append(node.id)
+
+        by_id = {node.id: node for node in nodes}
+        ready = [node.id for node in nodes if waiting[node.id] == 0]
+        order: list[PipelineNode] = []
+        while ready:
+            node_id = ready.pop(0)
+            order.append(by_id[node_id])
+            for dependent in dependents[node_id]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+
+        if len(order) != len(nodes):
+            cycle = sorted(node_id for node_id, count in waiting.items() if count)
+            raise ValueError(f"Pipeline graph has a cycle through: {', '.join(cycle)}")
+        return order
+
+    async def execute_batch(self, contexts: list[PipelineContext]) -> list[PipelineContext]:
+        """Run every node over the batch, independent branches concurrently.
+
+        Args:
+            contexts: One initial context per batch item.
+
+        Returns:
+            One context per item, merged from the sink nodes. It lists the
+            artifacts of every node and carries the first error raised on the
+            item's path, if any.
+        """
+        started = time.perf_counter()
+        self.timings = {}
+        results: dict[str, list[PipelineContext]] = {}
+        final_stages = {self.nodes[sink].index for sink in self.sinks}
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def run(node: PipelineNode) -> None:
+            if node.inputs:
+                await asyncio.gather(*(tasks[input_id] for input_id in node.inputs))
+
+            items = [
+                self._fork(base, node, [results[input_id][position] for input_id in node.inputs])
+                for position, base in enumerate(contexts)
+            ]
+            for item in items:
+                item.stage_index = node.index
+                item.final_stages = final_stages
+            live = [position for position, item in enumerate(items) if not item.error]
+
+            start = time.perf_counter() - started
+            if live:
+                artifact_counts = [len(items[position].artifacts) for position in live]
+                outcome = await node.stage.execute_batch([items[position] for position in live])
+                for position, item, artifact_count in zip(
+                    live, outcome, artifact_counts, strict=True
+                ):
+                    items[position] = item
+                    if not item.error and len(item.artifacts) > artifact_count:
+                        item.stage_artifacts[node.index] = item.artifacts[-1]
+            self.timings[node.id] = StageTiming(start, time.perf_counter() - started)
+
+            for item in items:
+                item.stage_index = None
+            results[node.id] = items
+
+        # Nodes are created in dependency order, so every input task exists
+        for node in self.order:
+            tasks[node.id] = asyncio.create_task(run(node))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        finally:
+            self.wall_seconds = time.perf_counter() - started
+
+        merged = [self._collect(position, results) for position in range(len(contexts))]
+        # A stage may pass its input view through as its output; the merged
+        # context then takes over the storage from the node that owns it
+        kept = {id(image.storage): image for item in merged for image in item.images.values()}
+        for node in self.order:
+            if node.id not in self.sinks:
+                for item in results[node.id]:
+                    for image in item.images.values():
+                        if image.owned and id(image.storage) in kept:
+                            kept[id(image.storage)].owned = True
+                            image.owned = False
+                    item.release_images()
+        return merged
+
+    def _fork(
+        self, base: PipelineContext, node: PipelineNode, parents: list[PipelineContext]
+    ) -> PipelineContext:
+        """Context for one item at ``node``, built from its inputs' results."""
+        item = PipelineContext()
+        item.checkpoint_stages = base.checkpoint_stages
+        item.data = dict(base.data)
+        item.metadata = dict(base.metadata)
+        if node.id in self.qualified:
+            item.node_id = node.id
+
+        for input_id, parent in zip(node.inputs, parents, strict=True):
+            keys = self.nodes[input_id].outputs or parent.data.keys()
+            for key in keys:
+                if key in parent.data:
+                    item.data[key] = parent.data[key]
+            item.metadata.update(parent.metadata)
+            if parent.error and item.error is None:
+                item.error = parent.error
+
+            image = parent.get_image("image")
+            if image is not None:
+                # Views only: the parent keeps ownership until the run ends,
+                # and shared memory still reaches worker processes by name
+                item.images["image"] = image.view()
+                if len(parents) > 1:
+                    item.images[input_id] = image.view()
+        return item
+
+    def _collect(
+        self, position: int, results: dict[str, list[PipelineContext]]
+    ) -> PipelineContext:
+        """Merge one item's results across the graph."""
+        item = PipelineContext()
+        sinks = [results[sink][position] for sink in self.sinks]
+        item.checkpoint_stages = sinks[0].checkpoint_stages
+        for sink_id, sink in zip(self.sinks, sinks, strict=True):
+            item.data.update(sink.data)
+            item.metadata.update(sink.metadata)
+            # The sink's output moves to the merged context; the last sink's is "image"
+            image = sink.images.pop("image", None)
+            sink.release_images()
+            if image is None:
+                continue
+            item.images["image"] = image
+            if len(sinks) > 1:
+                item.images[sink_id] = image
+
+        owner: dict[str, str] = {}
+        for node in self.order:
+            node_item = results[node.id][position]
+            for artifact in node_item.artifacts:
+                if artifact in owner:
+                    logger.warning(
+                        "Stages %s and %s wrote the same artifact %s",
+                        owner[artifact],
+                        node.id,
+                        artifact,
+                    )
+                    continue
+                owner[artifact] = node.id
+                item.artifacts.append(artifact)
+            item.stage_artifacts.update(node_item.stage_artifacts)
+            if node_item.error and item.error is None:
+                item.error = node_item.error
+        return item
+
+    def report(self) -> dict[str, Any]:
+        """Per-node timings and the critical path of the last run.
+
+        The critical path is the chain of dependent nodes with the largest
+        summed duration: the part of the graph that bounds wall time.
+
+        Returns:
+            Dictionary with 'stage_timings' (start/end/duration per node id),
+            'critical_path' (node ids), 'critical_path_seconds' and
+            'wall_seconds'.
+        """
+        finish: dict[str, float] = {}
+        via: dict[str, str | None] = {}
+        for node in self.order:
+            timing = self.timings.get(node.id)
+            if timing is None:
+                continue
+            slowest = max(
+                (input_id for input_id in node.inputs if input_id in finish),
+                key=finish.__getitem__,
+                default=None,
+            )
+            finish[node.id] = timing.duration + (finish[slowest] if slowest else 0.0)
+            via[node.id] = slowest
+
+        path: list[str] = []
+        node_id = max(finish, key=finish.__getitem__, default=None)
+        while node_id is not None:
+            path.append(node_id)
+            node_id = via[node_id]
+        path.reverse()
+
+        return {
+            "stage_timings": {
+                node_id: {
+                    "stage": self.nodes[node_id].stage.name,
+                    "start": round(timing.start, 6),
+                    "end": round(timing.end, 6),
+                    "duration": round(timing.duration, 6),
+                }
+                for node_id, timing in self.timings.items()
+            },
+            "critical_path": path,
+            "critical_path_seconds": round(finish[path[-1]], 6) if path else 0.0,
+            "wall_seconds": round(self.wall_seconds, 6),
+        }
@@ -0,0 +1,692 @@
+"""Durable media job queue backed by SQLite.
+
+Jobs live in the ``media_jobs`` table so a restart keeps every queued and
+running job, and several API and worker processes can share one database:
+
+- the database runs in WAL mode, so readers never block the single writer
+- workers claim a job atomically with ``UPDATE ... RETURNING`` inside a
+  ``BEGIN IMMEDIATE`` transaction and hold it under a time-limited lease
+- workers renew their leases with heartbeats; a job whose lease lapses
+  (its worker died) is put back in the queue, or failed once its retries
+  are used up
+- progress updates are buffered in memory and written in one transaction
+  per flush instead of one commit per update; ``settle`` likewise writes a
+  batch of finished jobs, with their artifacts, in one transaction
+
+A claim first picks the character: the one with the highest-priority ready
+job, then the fewest running jobs (so one character's batch cannot starve
+the rest), then the oldest ready job. It then takes that character's next
+job by priority, availability and submission time.
+"""
+
+import json
+import logging
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Connection, Engine, bindparam, case, event, func, insert, select, update
+from sqlmodel import SQLModel, create_engine
+
+from ..db.database import DATABASE_URL
+from ..db.db_models import MediaArtifact, MediaJob, MediaJobStatus
+from .queue import JobTask
+
+logger = logging.getLogger(__name__)
+
+# Seconds a claim stays valid without a heartbeat
+DEFAULT_LEASE_SECONDS = 30.0
+
+# API (executor) statuses for the stored ones, and back
+API_STATUS = {
+    MediaJobStatus.PENDING.value: "QUEUED",
+    MediaJobStatus.PROCESSING.value: "RUNNING",
+    MediaJobStatus.COMPLETED.value: "SUCCEEDED",
+    MediaJobStatus.FAILED.value: "FAILED",
+    MediaJobStatus.CANCELLED.value: "CANCELLED",
+}
+DB_STATUS = {api: db for db, api in API_STATUS.items()}
+
+_jobs = MediaJob.__table__
+_artifacts = MediaArtifact.__table__
+
+PENDING = MediaJobStatus.PENDING.value
+PROCESSING = MediaJobStatus.PROCESSING.value
+COMPLETED = MediaJobStatus.COMPLETED.value
+FAILED = MediaJobStatus.FAILED.value
+CANCELLED = MediaJobStatus.CANCELLED.value
+
+
+def _utcnow() -> datetime:
+    # Aware UTC: newer SQLModel releases refuse naive datetimes, and SQLite
+    # stores both the same way
+    return datetime.now(UTC)
+
+
+def _configure_sqlite(engine: Engine) -> None:
+    """Enable WAL and let write transactions take the lock up front.
+
+    pysqlite's own transaction handling is switched off so SQLAlchemy's
+    ``begin`` event decides how each transaction starts. Connections opened
+    with the ``sqlite_immediate`` execution option issue ``BEGIN IMMEDIATE``,
+    which takes the write lock before reading and so cannot fail with a
+    deadlock when two claims race.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        dbapi_conn.isolation_level = None
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn: Connection):
+        immediate = conn.get_execution_options().get("sqlite_immediate")
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+
+def _to_job(row) -> MediaJob:
+    return MediaJob(**row._mapping)
+
+
+@dataclass(slots=True)
+class JobOutcome:
+    """How a worker's attempt at a job ended, for JobStore.settle."""
+
+    job_id: str
+    # COMPLETED, FAILED, or PENDING to hand the job back uncounted
+    status: str
+    error: str | None = None
+    # Whether a failure may use an automatic retry
+    retry: bool = True
+    # add_artifact keyword arguments, stored only if the job completes
+    artifact: dict[str, Any] | None = None
+
+
+class JobStore:
+    """Persistent, multi-process media job queue."""
+
+    def __init__(
+        self,
+        url: str = DATABASE_URL,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        retry_base_delay: float = 1.0,
+        retry_max_delay: float = 300.0,
+        clock: Callable[[], datetime] = _utcnow,
+    ):
+        """Open (and if needed create) the job tables.
+
+        Args:
+            url: SQLite database URL.
+            lease_seconds: How long a claim stays valid without a heartbeat.
+            retry_base_delay: Delay in seconds before the first automatic
+                retry; each further retry doubles it.
+            retry_max_delay: Upper bound on the retry delay in seconds.
+            clock: UTC time source (injectable for tests).
+        """
+        self.engine = create_engine(
+            url,
+            echo=False,
+            # timeout is SQLite's busy wait for the write lock
+            connect_args={"check_same_thread": False, "timeout": 30},
+        )
+        _configure_sqlite(self.engine)
+        SQLModel.metadata.create_all(self.engine, tables=[_jobs, _artifacts])
+
+        self.lease = timedelta(seconds=lease_seconds)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._clock = clock
+
+        self._progress: dict[str, int] = {}
+        self._progress_lock = threading.Lock()
+
+    @contextmanager
+    def _write(self) -> Iterator[Connection]:
+        with self.engine.connect() as conn:
+            conn.execution_options(sqlite_immediate=True)
+            with conn.begin():
+                yield conn
+
+    # Submission and reads
+
+    def submit(
+        self,
+        character_id: str,
+        workflow_type: str,
+        parameters: dict[str, Any] | None = None,
+        priority: int = 0,
+        max_retries: int = 3,
+    ) -> MediaJob:
+        """Queue a new job.
+
+        Args:
+            character_id: Character being processed.
+            workflow_type: Type of workflow (enhance, interpolate, generate, blend).
+            parameters: Workflow-specific parameters.
+            priority: Higher priorities are claimed first.
+            max_retries: Automatic retries allowed after the first attempt.
+
+        Returns:
+            The stored pending job.
+        """
+        now = self._clock()
+        job = MediaJob(
+            character_id=character_id,
+            workflow_type=workflow_type,
+            status=PENDING,
+            parameters_json=json.dumps(parameters or {}),
+            priority=priority,
+            max_retries=max_retries,
+            available_at=now,
+            created_at=now,
+            updated_at=now,
+        )
+        with self._write() as conn:
+            conn.execute(insert(_jobs).values(**job.model_dump()))
+        return job
+
+    def get(self, job_id: str) -> MediaJob | None:
+        """Get a job by ID.
+
+        Args:
+            job_id: Job identifier.
+
+        Returns:
+            MediaJob or None if not found.
+        """
+        with self.engine.connect() as conn:
+            row = conn.execute(select(_jobs).where(_jobs.c.id == job_id)).first()
+        return _to_job(row) if row else None
+
+    def list_jobs(
+        self,
+        status: str | None = None,
+        workflow_type: str | None = None,
+        character_id: str | None = None,
+    ) -> list[MediaJob]:
+        """List jobs, newest first.
+
+        Args:
+            status: Optional stored status filter.
+            workflow_type: Optional workflow filter.
+            character_id: Optional character filter.
+
+        Returns:
+            Matching jobs.
+        """
+        query = select(_jobs).order_by(_jobs.c.created_at.desc())
+        if status:
+            query = query.where(_jobs.c.status == status)
+        if workflow_type:
+            query = query.where(_jobs.c.workflow_type == workflow_type)
+        if character_id:
+            query = query.where(_jobs.c.character_id == character_id)
+        with self.engine.connect() as conn:
+            return [_to_job(row) for row in conn.execute(query)]
+
+    # Worker side
+
+    def claim(
+        self,
+        worker_id: str,
+        workflow_types: list[str] | None = None,
+        job_id: str | None = None,
+    ) -> MediaJob | None:
+        """Atomically take the next available job under a lease.
+
+        Expired leases are requeued in the same transaction, so a crashed
+        worker's jobs become claimable without a separate reaper.
+
+        Args:
+            worker_id: Identifier of the claiming worker (e.g. host:pid:n).
+            workflow_types: Only claim jobs of these workflows.
+            job_id: Claim this specific job if it is pending.
+
+        Returns:
+            The claimed job (status processing, attempts incremented), or
+            None if nothing is available.
+        """
+        now = self._clock()
+        with self._write() as conn:
+            self._requeue_expired(conn, now)
+            if job_id is None:
+                target = self._next_job_id(workflow_types, now)
+            else:
+                target = bindparam("target_id", job_id)
+            row = conn.execute(
+                update(_jobs)
+                .where(_jobs.c.id == target, _jobs.c.status == PENDING)
+                .values(
+                    status=PROCESSING,
+                    lease_owner=worker_id,
+                    lease_expires_at=now + self.lease,
+                    attempts=_jobs.c.attempts + 1,
+                    progress=0,
+                    error_message=None,
+                    updated_at=now,
+                )
+                .returning(*_jobs.c)
+            ).first()
+        return _to_job(row) if row else None
+
+    def _next_job_id(self, workflow_types: list[str] | None, now: datetime):
+        """Scalar subquery choosing the job a claim should take."""
+
+        def ready(table):
+            conditions = [table.c.status == PENDING, table.c.available_at <= now]
+            if workflow_types:
+                conditions.append(table.c.workflow_type.in_(workflow_types))
+            return conditions
+
+        waiting = _jobs.alias("waiting")
+        characters = (
+            select(
+                waiting.c.character_id,
+                func.max(waiting.c.priority).label("top_priority"),
+                func.min(waiting.c.available_at).label("oldest"),
+            )
+            .where(*ready(waiting))
+            .group_by(waiting.c.character_id)
+            .subquery("characters")
+        )
+        running = _jobs.alias("running")
+        busy = (
+            select(func.count())
+            .select_from(running)
+            .where(
+                running.c.character_id == characters.c.character_id,
+                running.c.status == PROCESSING,
+            )
+            .scalar_subquery()
+        )
+        character = (
+            select(characters.c.character_id)
+            .order_by(characters.c.top_priority.desc(), busy, characters.c.oldest)
+            .limit(1)
+            .scalar_subquery()
+        )
+
+        candidate = _jobs.alias("candidate")
+        return (
+            select(candidate.c.id)
+            .where(*ready(candidate), candidate.c.character_id == character)
+            .order_by(
+                candidate.c.priority.desc(),
+                candidate.c.available_at,
+                candidate.c.created_at,
+            )
+            .limit(1)
+            .scalar_subquery()
+        )
+
+    def heartbeat(self, worker_id: str) -> set[str]:
+        """Renew every lease held by a worker and flush buffered progress.
+
+        Args:
+            worker_id: Worker identifier.
+
+        Returns:
+            IDs of the jobs the worker still holds. A job missing from the
+            set was cancelled or lost its lease and should be abandoned.
+        """
+        now = self._clock()
+        with self._write() as conn:
+            self._flush(conn, now)
+            rows = conn.execute(
+                update(_jobs)
+                .where(_jobs.c.lease_owner == worker_id, _jobs.c.status == PROCESSING)
+                .values(lease_expires_at=now + self.lease)
+                .returning(_jobs.c.id)
+            )
+            return {row.id for row in rows}
+
+    def record_progress(self, job_id: str, progress: int) -> None:
+        """Buffer a progress update until the next flush or heartbeat.
+
+        Args:
+            job_id: Job identifier.
+            progress: Progress percentage (0-100).
+        """
+        with self._progress_lock:
+            self._progress[job_id] = max(0, min(100, progress))
+
+    def flush(self) -> int:
+        """Write buffered progress updates in a single transaction.
+
+        Returns:
+            Number of updates written.
+        """
+        with self._write() as conn:
+            return self._flush(conn, self._clock())
+
+    def _flush(self, conn: Connection, now: datetime) -> int:
+        with self._progress_lock:
+            pending, self._progress = self._progress, {}
+        if not pending:
+            return 0
+        conn.execute(
+            update(_jobs)
+            .where(_jobs.c.id == bindparam("job_id"), _jobs.c.status == PROCESSING)
+            .values(progress=bindparam("new_progress"), updated_at=now),
+            [{"job_id": job_id, "new_progress": value} for job_id, value in pending.items()],
+        )
+        return len(pending)
+
+    @contextmanager
+    def keep_leases(self, worker_id: str, interval: float | None = None) -> Iterator[None]:
+        """Heartbeat a worker's leases from a background thread while the block runs.
+
+        For callers that run a job synchronously and so cannot heartbeat
+        between steps, such as the API's inline jobs.
+
+        Args:
+            worker_id: Worker identifier.
+            interval: Seconds between heartbeats; defaults to a third of the lease.
+        """
+        interval = interval or self.lease.total_seconds() / 3
+        stop = threading.Event()
+
+        def renew():
+            while not stop.wait(interval):
+                try:
+                    self.heartbeat(worker_id)
+                except Exception:
+                    logger.exception("Heartbeat for worker %s failed", worker_id)
+
+        thread = threading.Thread(target=renew, name=f"lease-{worker_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, job_id: str, worker_id: str) -> MediaJob | None:
+        """Mark a held job as completed.
+
+        Args:
+            job_id: Job identifier.
+            worker_id: Worker holding the lease.
+
+        Returns:
+            The completed job, or None if the worker no longer holds it.
+        """
+        return self.settle(worker_id, [JobOutcome(job_id, COMPLETED)])[0]
+
+    def fail(
+        self, job_id: str, worker_id: str, error: str, retry: bool = True
+    ) -> MediaJob | None:
+        """Record a failed attempt.
+
+        While attempts remain (and ``retry`` is set) the job goes back to
+        pending after an exponential backoff of ``retry_base_delay *
+        2**(attempts - 1)`` seconds, capped at ``retry_max_delay``.
+
+        Args:
+            job_id: Job identifier.
+            worker_id: Worker holding the lease.
+            error: Error message to store.
+            retry: Whether an automatic retry is allowed.
+
+        Returns:
+            The updated job, or None if the worker no longer holds it.
+        """
+        return self.settle(worker_id, [JobOutcome(job_id, FAILED, error, retry)])[0]
+
+    def release(self, job_id: str, worker_id: str) -> MediaJob | None:
+        """Hand a held job back to the queue without counting the attempt.
+
+        Used when a worker shuts down mid-job rather than the job failing.
+
+        Args:
+            job_id: Job identifier.
+            worker_id: Worker holding the lease.
+
+        Returns:
+            The requeued job, or None if the worker no longer holds it.
+        """
+        return self.settle(worker_id, [JobOutcome(job_id, PENDING)])[0]
+
+    def settle(self, worker_id: str, outcomes: list[JobOutcome]) -> list[MediaJob | None]:
+        """Write the outcomes of several held jobs in one transaction.
+
+        Args:
+            worker_id: Worker holding the leases.
+            outcomes: How each job ended.
+
+        Returns:
+            The updated job for each outcome, in order, or None where the
+            worker no longer holds the job (its artifact is then dropped).
+        """
+        with self._progress_lock:
+            for outcome in outcomes:
+                self._progress.pop(outcome.job_id, None)
+        now = self._clock()
+        with self._write() as conn:
+            return [self._settle(conn, worker_id, outcome, now) for outcome in outcomes]
+
+    def _settle(
+        self, conn: Connection, worker_id: str, outcome: JobOutcome, now: datetime
+    ) -> MediaJob | None:
+        if outcome.status == COMPLETED:
+            values = {"status": COMPLETED, "progress": 100, "error_message": None}
+        elif outcome.status == PENDING:
+            values = {
+                "status": PENDING,
+                "progress": 0,
+                "attempts": _jobs.c.attempts - 1,
+                "available_at": now,
+            }
+        else:
+            job = conn.execute(
+                select(_jobs.c.attempts, _jobs.c.max_retries).where(
+                    _jobs.c.id == outcome.job_id
+                )
+            ).first()
+            if job is None:
+                return None
+            values = {"status": FAILED, "progress": 0, "error_message": outcome.error}
+            if outcome.retry and job.attempts <= job.max_retries:
+                delay = min(self.retry_base_delay * 2 ** (job.attempts - 1), self.retry_max_delay)
+                values.update(status=PENDING, available_at=now + timedelta(seconds=delay))
+
+        row = conn.execute(
+            update(_jobs)
+            .where(
+                _jobs.c.id == outcome.job_id,
+                _jobs.c.status == PROCESSING,
+                _jobs.c.lease_owner == worker_id,
+            )
+            .values(lease_owner=None, lease_expires_at=None, updated_at=now, **values)
+            .returning(*_jobs.c)
+        ).first()
+        if row is None:
+            return None
+        if outcome.status == COMPLETED and outcome.artifact is not None:
+            conn.execute(
+                insert(_artifacts).values(
+                    **self._artifact(outcome.job_id, **outcome.artifact).model_dump()
+                )
+            )
+        return _to_job(row)
+
+    def requeue_expired(self) -> int:
+        """Return jobs whose lease lapsed to the queue.
+
+        Returns:
+            Number of jobs requeued or failed.
+        """
+        with self._write() as conn:
+            return self._requeue_expired(conn, self._clock())
+
+    def _requeue_expired(self, conn: Connection, now: datetime) -> int:
+        exhausted = _jobs.c.attempts > _jobs.c.max_retries
+        result = conn.execute(
+            update(_jobs)
+            .where(_jobs.c.status == PROCESSING, _jobs.c.lease_expires_at < now)
+            .values(
+                status=case((exhausted, FAILED), else_=PENDING),
+                error_message=case((exhausted, "Lease expired"), else_=None),
+                progress=0,
+                lease_owner=None,
+                lease_expires_at=None,
+                available_at=now,
+                updated_at=now,
+            )
+        )
+        return result.rowcount
+
+    # User actions
+
+    def cancel(self, job_id: str) -> MediaJob | None:
+        """Cancel a pending or running job.
+
+        A running job's worker finds out at its next heartbeat.
+
+        Args:
+            job_id: Job identifier.
+
+        Returns:
+            The cancelled job, or None if it was not pending or running.
+        """
+        now = self._clock()
+        with self._write() as conn:
+            row = conn.execute(
+                update(_jobs)
+                .where(_jobs.c.id == job_id, _jobs.c.status.in_([PENDING, PROCESSING]))
+                .values(
+                    status=CANCELLED,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    updated_at=now,
+                )
+                .returning(*_jobs.c)
+            ).first()
+        return _to_job(row) if row else None
+
+    def retry(self, job_id: str) -> MediaJob | None:
+        """Requeue a failed job with a fresh set of attempts.
+
+        Args:
+            job_id: Job identifier.
+
+        Returns:
+            The requeued job, or None if it was not failed.
+        """
+        now = self._clock()
+        with self._write() as conn:
+            row = conn.execute(
+                update(_jobs)
+                .where(_jobs.c.id == job_id, _jobs.c.status == FAILED)
+                .values(
+                    status=PENDING,
+                    progress=0,
+                    error_message=None,
+                    attempts=0,
+                    available_at=now,
+                    updated_at=now,
+                )
+                .returning(*_jobs.c)
+            ).first()
+        return _to_job(row) if row else None
+
+    # Artifacts
+
+    def add_artifact(
+        self,
+        job_id: str,
+        artifact_type: str,
+        file_path: str,
+        file_size_bytes: int | None = None,
+        metadata: dict | str | None = None,
+    ) -> MediaArtifact:
+        """Store an artifact produced by a job.
+
+        Args:
+            job_id: Job that produced the artifact.
+            artifact_type: Type of artifact (image, video, etc.).
+            file_path: Relative path to artifact file.
+            file_size_bytes: Optional file size in bytes.
+            metadata: Optional metadata (dict or JSON string).
+
+        Returns:
+            Created MediaArtifact.
+        """
+        artifact = self._artifact(job_id, artifact_type, file_path, file_size_bytes, metadata)
+        with self._write() as conn:
+            conn.execute(insert(_artifacts).values(**artifact.model_dump()))
+        return artifact
+
+    def _artifact(
+        self,
+        job_id: str,
+        artifact_type: str,
+        file_path: str,
+        file_size_bytes: int | None = None,
+        metadata: dict | str | None = None,
+    ) -> MediaArtifact:
+        if isinstance(metadata, dict):
+            metadata = json.dumps(metadata)
+        return MediaArtifact(
+            job_id=job_id,
+            artifact_type=artifact_type,
+            file_path=file_path,
+            file_size_bytes=file_size_bytes,
+            metadata_json=metadata,
+            created_at=self._clock(),
+        )
+
+    def artifacts(self, job_id: str) -> list[MediaArtifact]:
+        """Get all artifacts stored for a job.
+
+        Args:
+            job_id: Job identifier.
+
+        Returns:
+            Artifacts in creation order.
+        """
+        query = (
+            select(_artifacts)
+            .where(_artifacts.c.job_id == job_id)
+            .order_by(_artifacts.c.created_at)
+        )
+        with self.engine.connect() as conn:
+            return [MediaArtifact(**row._mapping) for row in conn.execute(query)]
+
+
+def to_task(job: MediaJob) -> JobTask:
+    """Build the JobTask a workflow dispatcher expects from a stored job.
+
+    Args:
+        job: Claimed job.
+
+    Returns:
+        JobTask whose retry_count reflects previous attempts.
+    """
+    return JobTask(
+        job_id=job.id,
+        character_id=job.character_id,
+        workflow_type=job.workflow_type,
+        parameters=job.parameters,
+        created_at=job.created_at,
+        retry_count=max(0, job.attempts - 1),
+        max_retries=job.max_retries,
+        priority=job.priority,
+    )
+
+
+_job_store: JobStore | None = None
+
+
+def get_job_store() -> JobStore:
+    """Get the process-wide JobStore for the application database."""
+    global _job_store
+    if _job_store is None:
+        _job_store = JobStore()
+    return _job_store
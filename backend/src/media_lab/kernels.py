@@ -0,0 +1,180 @@
+"""CPU-bound image kernels used by the pipeline stages.
+
+Module-level, side-effect-free functions so ``StageExecutor`` can run them
+in a thread or a worker process. Kernels that produce an image follow
+NumPy's ``out=`` convention and write into a caller-provided uint8 array
+instead of returning a new one; that is what lets a process pool hand
+results back through shared memory.
+
+The mock "diffusion" kernels keep the exact arithmetic the stages used
+when they did this work inline. They also accept a stack of same-shaped
+images (N, H, W, C) and then filter each image independently, which is how
+batched stage execution processes a whole batch in one call.
+"""
+
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+
+def image_shape(path: str) -> tuple[int, int, int]:
+    """Shape of the RGB array an image decodes to, read from its header only.
+
+    Args:
+        path: Image file path.
+
+    Returns:
+        (height, width, 3).
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the file is not a readable image.
+    """
+    if not Path(path).exists():
+        raise FileNotFoundError(f"Image file not found: {path}")
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+    except Exception as e:
+        raise ValueError(f"Failed to load image from {path}: {str(e)}") from e
+    return (height, width, 3)
+
+
+def load_rgb(path: str, out: np.ndarray) -> None:
+    """Decode an image file as RGB into ``out``.
+
+    Args:
+        path: Image file path.
+        out: uint8 array shaped as returned by image_shape().
+    """
+    with Image.open(path) as img:
+        out[...] = np.asarray(img.convert("RGB"))
+
+
+def save_rgb(path: str, image: np.ndarray) -> None:
+    """Encode a uint8 RGB array to an image file, creating parent directories.
+
+    Args:
+        path: Destination path; the format follows its extension.
+        image: Image array (H, W, 3).
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Image.fromarray(image).save(path)
+
+
+def _spatial_sigma(image: np.ndarray, sigma: float) -> float | tuple[float, ...]:
+    """Gaussian sigma for an image, leaving the batch axis of a stack unblurred."""
+    if image.ndim == 4:
+        return (0.0, sigma, sigma, sigma)
+    return sigma
+
+
+def _blend_weights(mask: np.ndarray) -> np.ndarray:
+    """Mask as float32 weights in 0-1 with a channel axis for RGB blending."""
+    weights = np.asarray(mask).astype(np.float32)
+    if weights.max() > 1:
+        weights = weights / 255.0
+    if weights.ndim == 2:
+        weights = np.stack([weights] * 3, axis=-1)
+    return weights
+
+
+def unsharp_mask(image: np.ndarray, amount: float, sigma: float, out: np.ndarray) -> None:
+    """Sharpen by adding back ``amount`` times the detail lost to a Gaussian blur.
+
+    Args:
+        image: uint8 image array (H, W, C), or a stack (N, H, W, C).
+        amount: Strength of the detail boost.
+        sigma: Gaussian blur sigma.
+        out: uint8 array of the same shape receiving the result.
+    """
+    from scipy.ndimage import gaussian_filter
+
+    source = image.astype(np.float32)
+    base = gaussian_filter(source, sigma=_spatial_sigma(source, sigma))
+    enhanced = source + amount * (source - base)
+    out[...] = np.clip(enhanced, 0, 255).astype(np.uint8)
+
+
+def masked_blur(image: np.ndarray, mask: np.ndarray, sigma: float, out: np.ndarray) -> None:
+    """Blend a Gaussian-blurred copy into the masked region (mock inpainting).
+
+    Args:
+        image: uint8 image array.
+        mask: Mask (0=preserve, 1 or 255=inpaint), 2-D or per-channel.
+        sigma: Gaussian blur sigma.
+        out: uint8 array of the same shape receiving the result.
+    """
+    from scipy.ndimage import gaussian_filter
+
+    weights = _blend_weights(mask)
+    source = image.astype(np.float32)
+    blurred = gaussian_filter(source, sigma=sigma)
+    out[...] = (source * (1 - weights) + blurred * weights).astype(np.uint8)
+
+
+def composite_roi(
+    base_image: np.ndarray,
+    roi_image: np.ndarray,
+    roi: tuple[int, int, int, int],
+    mask: np.ndarray | None,
+    out: np.ndarray,
+) -> None:
+    """Paste a processed region back into the full image, optionally mask-blended.
+
+    Args:
+        base_image: Full uint8 image (H, W, C).
+        roi_image: Processed region.
+        roi: (x, y, width, height) of the region.
+        mask: Optional blend mask (0-1 or 0-255).
+        out: uint8 array shaped like base_image receiving the result.
+    """
+    x, y, w, h = roi
+    out[...] = base_image
+    if mask is not None:
+        weights = _blend_weights(mask)
+        out[y : y + h, x : x + w] = (
+            roi_image.astype(np.float32) * weights
+            + out[y : y + h, x : x + w].astype(np.float32) * (1 - weights)
+        ).astype(np.uint8)
+    else:
+        out[y : y + h, x : x + w] = roi_image
+
+
+def instruct_edit(
+    image: np.ndarray, instruction: str, guidance_scale: float, out: np.ndarray
+) -> None:
+    """Keyword-driven colour edits plus a guidance-scaled detail boost (mock pix2pix).
+
+    Args:
+        image: uint8 image array (H, W, 3), or a stack (N, H, W, 3).
+        instruction: Editing instruction.
+        guidance_scale: Text guidance scale.
+        out: uint8 array of the same shape receiving the result.
+    """
+    edited = image.astype(np.float32)
+    instruction_lower = instruction.lower()
+
+    if "red" in instruction_lower or "rouge" in instruction_lower:
+        edited[..., 0] = np.clip(edited[..., 0] * 1.2, 0, 255)
+    if "blue" in instruction_lower or "bleu" in instruction_lower:
+        edited[..., 2] = np.clip(edited[..., 2] * 1.2, 0, 255)
+    if "green" in instruction_lower or "vert" in instruction_lower:
+        edited[..., 1] = np.clip(edited[..., 1] * 1.2, 0, 255)
+    if "bright" in instruction_lower or "clair" in instruction_lower:
+        edited = np.clip(edited * 1.15, 0, 255)
+    if "dark" in instruction_lower or "sombre" in instruction_lower:
+        edited = np.clip(edited * 0.85, 0, 255)
+    if "saturate" in instruction_lower or "vibrant" in instruction_lower:
+        mean = edited.mean(axis=-1, keepdims=True)
+        edited = np.clip(mean + (edited - mean) * 1.3, 0, 255)
+
+    if len(instruction) > 0:
+        from scipy.ndimage import gaussian_filter
+
+        base = gaussian_filter(edited, sigma=_spatial_sigma(edited, 1.0))
+        guidance_factor = min(guidance_scale / 10.0, 1.0)
+        edited = np.clip(edited + guidance_factor * (edited - base) * 0.5, 0, 255)
+
+    out[...] = np.clip(edited, 0, 255).astype(np.uint8)
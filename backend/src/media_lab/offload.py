@@ -0,0 +1,294 @@
+"""Run CPU-heavy pipeline stage work off the event loop.
+
+Stage ``execute`` methods are coroutines on the API's event loop, so image
+decoding, filtering and encoding done inline stalls every other request.
+``StageExecutor`` sends that work to a shared pool instead:
+
+- ``"thread"`` (default): a thread pool. PIL decoding/encoding and NumPy's
+  large-array kernels release the GIL, and arrays are passed by reference.
+- ``"process"``: a process pool, for work that holds the GIL (such as
+  scipy.ndimage filters). Array arguments and results travel through
+  ``multiprocessing.shared_memory`` blocks; only their name, shape and
+  dtype are pickled. Arguments that already are a ``SharedArray`` are
+  passed by handle without a copy, and ``share_result=True`` hands the
+  result block itself back to the caller.
+- ``"inline"``: run in the calling coroutine (debugging).
+
+The mode comes from the ``MEDIA_LAB_STAGE_EXECUTOR`` environment variable
+and the pool size from ``MEDIA_LAB_STAGE_WORKERS``. Kernels (see
+``kernels.py``) write image results into an ``out`` array whose shape and
+dtype the caller passes to ``StageExecutor.run``.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+from typing import Any, NamedTuple
+
+import numpy as np
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+
+# (shape, dtype) of the array a kernel writes its result into
+OutSpec = tuple[tuple[int, ...], Any]
+
+
+class SharedHandle(NamedTuple):
+    """Picklable reference to a SharedArray."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+    def attach(self) -> "SharedArray":
+        """Map the shared block in this process."""
+        return SharedArray(self.shape, self.dtype, name=self.name)
+
+
+class SharedArray:
+    """NumPy array backed by a named shared-memory block.
+
+    The creating process owns the block and unlinks it on close; other
+    processes attach through ``handle().attach()`` and only unmap it.
+    """
+
+    def __init__(self, shape: tuple[int, ...], dtype: Any, name: str | None = None):
+        """Create a new block, or attach to an existing one by name.
+
+        Args:
+            shape: Array shape.
+            dtype: Array dtype.
+            name: Existing block to attach to; None creates a new block.
+        """
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self._owner = name is None
+        if self._owner:
+            size = max(1, int(np.prod(self.shape)) * self.dtype.itemsize)
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.array: np.ndarray | None = np.ndarray(self.shape, self.dtype, buffer=self._shm.buf)
+
+    @classmethod
+    def copy_of(cls, array: np.ndarray) -> "SharedArray":
+        """Create a block holding a copy of ``array``."""
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    def handle(self) -> SharedHandle:
+        """Picklable reference for passing the block to another process."""
+        return SharedHandle(self._shm.name, self.shape, self.dtype.str)
+
+    def close(self) -> None:
+        """Unmap the block, and free it if this process created it."""
+        if self.array is None:
+            return
+        self.array = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # A view outlived the block (e.g. held by a traceback); the mapping
+            # goes away once it is collected
+            pass
+        finally:
+            if self._owner:
+                self._shm.unlink()
+
+    def __enter__(self) -> "SharedArray":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _local(value: Any) -> Any:
+    """Unwrap a SharedArray argument for in-process execution."""
+    return value.array if isinstance(value, SharedArray) else value
+
+
+def _share(value: Any, blocks: list[SharedArray]) -> Any:
+    """Replace an array argument with a handle, copying plain ndarrays."""
+    if isinstance(value, SharedArray):
+        return value.handle()
+    if isinstance(value, np.ndarray):
+        shared = SharedArray.copy_of(value)
+        blocks.append(shared)
+        return shared.handle()
+    return value
+
+
+def _call_shared(
+    fn: Callable[..., Any],
+    args: tuple,
+    kwargs: dict[str, Any],
+    out: SharedHandle | None,
+) -> Any:
+    """Worker-process side of StageExecutor.run: attach, compute, detach."""
+    attached: list[SharedArray] = []
+
+    def resolve(value: Any) -> Any:
+        if isinstance(value, SharedHandle):
+            shared = value.attach()
+            attached.append(shared)
+            return shared.array
+        return value
+
+    try:
+        call_args = [resolve(value) for value in args]
+        call_kwargs = {key: resolve(value) for key, value in kwargs.items()}
+        if out is not None:
+            call_kwargs["out"] = resolve(out)
+        result = fn(*call_args, **call_kwargs)
+        del call_args, call_kwargs
+        return result
+    finally:
+        for shared in attached:
+            shared.close()
+
+
+class StageExecutor:
+    """Shared pool that runs CPU-bound stage kernels off the event loop."""
+
+    def __init__(self, kind: str = "thread", max_workers: int | None = None):
+        """Initialize executor; the pool itself starts on first use.
+
+        Args:
+            kind: "thread", "process" or "inline".
+            max_workers: Pool size (default: CPU count, at most 8 threads).
+
+        Raises:
+            ValueError: If kind is unknown.
+        """
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown stage executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self._pool: Executor | None = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                # spawn: forking a threaded server process can deadlock the child
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                workers = self.max_workers or min(8, os.cpu_count() or 1)
+                self._pool = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="media-stage"
+                )
+        return self._pool
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        out: OutSpec | None = None,
+        share_result: bool = False,
+        **kwargs: Any,
+    ) -> Any:
+        """Run ``fn`` on the pool and await its result.
+
+        Args:
+            fn: Module-level function (must be picklable for process pools).
+            *args: Positional arguments; ndarrays and SharedArrays go
+                through shared memory in process mode.
+            out: (shape, dtype) of a result array to allocate and pass to
+                ``fn`` as ``out=``. When given, that array is returned.
+            share_result: In process mode, return the ``out`` SharedArray
+                (owned by the caller) instead of copying it out.
+            **kwargs: Keyword arguments, treated like ``args``.
+
+        Returns:
+            The ``out`` array (or SharedArray) if requested, otherwise
+            ``fn``'s return value.
+        """
+        if self.kind == "process":
+            return await self._run_shared(fn, args, kwargs, out, share_result)
+
+        args = tuple(_local(value) for value in args)
+        kwargs = {key: _local(value) for key, value in kwargs.items()}
+        if out is not None:
+            kwargs["out"] = np.empty(*out)
+        if self.kind == "inline":
+            result = fn(*args, **kwargs)
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_pool(), partial(fn, *args, **kwargs))
+        return kwargs["out"] if out is not None else result
+
+    async def _run_shared(
+        self,
+        fn: Callable[..., Any],
+        args: tuple,
+        kwargs: dict[str, Any],
+        out: OutSpec | None,
+        share_result: bool,
+    ) -> Any:
+        blocks: list[SharedArray] = []
+        try:
+            call_args = tuple(_share(value, blocks) for value in args)
+            call_kwargs = {key: _share(value, blocks) for key, value in kwargs.items()}
+            result_block = None
+            if out is not None:
+                result_block = SharedArray(*out)
+                blocks.append(result_block)
+
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._get_pool(),
+                _call_shared,
+                fn,
+                call_args,
+                call_kwargs,
+                result_block.handle() if result_block else None,
+            )
+            if result_block is None:
+                return result
+            if share_result:
+                blocks.remove(result_block)
+                return result_block
+            # Copy out of the block so it can be freed straight away
+            return result_block.array.copy()
+        finally:
+            for block in blocks:
+                block.close()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool; a later run() starts a new one."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+
+_stage_executor: StageExecutor | None = None
+
+
+def get_stage_executor() -> StageExecutor:
+    """Get the process-wide StageExecutor, configured from the environment."""
+    global _stage_executor
+    if _stage_executor is None:
+        workers = os.environ.get("MEDIA_LAB_STAGE_WORKERS")
+        _stage_executor = StageExecutor(
+            kind=os.environ.get("MEDIA_LAB_STAGE_EXECUTOR", "thread"),
+            max_workers=int(workers) if workers else None,
+        )
+    return _stage_executor
+
+
+def set_stage_executor(executor: StageExecutor | None) -> StageExecutor | None:
+    """Replace the process-wide StageExecutor (None resets to the default).
+
+    Returns:
+        The previous executor, which the caller may shut down.
+    """
+    global _stage_executor
+    previous, _stage_executor = _stage_executor, executor
+    return previous
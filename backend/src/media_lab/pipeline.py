@@ -8,18 +8,77 @@ Provides abstract base class and concrete implementations for:
 """
 
 from abc import ABC, abstractmethod
+from collections.abc import Callable
 import json
 import logging
+import os
+import re
 from pathlib import Path
 from typing import Any, AsyncGenerator, Optional
 
+import numpy as np
+
+from . import kernels
+from .offload import OutSpec, SharedArray, StageExecutor, get_stage_executor
+
 logger = logging.getLogger(__name__)
 
 
+class ImageBuffer:
+    """Decoded RGB uint8 image handed from one stage to the next in memory.
+
+    Stages pass these through PipelineContext instead of writing a PNG and
+    decoding it again. The pixels live in a plain array, or in a SharedArray
+    when stage kernels run in worker processes, so they reach the workers by
+    name rather than by copy.
+    """
+
+    def __init__(
+        self, storage: np.ndarray | SharedArray, path: str | None = None, owned: bool = True
+    ):
+        """Wrap decoded pixels.
+
+        Args:
+            storage: uint8 array (H, W, C), or a SharedArray holding one.
+            path: File the image was read from or persisted to, if any.
+            owned: Whether release() frees the storage; False for views.
+        """
+        self.storage = storage
+        self.path = path
+        self.owned = owned
+
+    def view(self) -> "ImageBuffer":
+        """Non-owning reference to the same pixels (and shared memory block).
+
+        Returns:
+            ImageBuffer whose release() leaves the storage to this one.
+        """
+        return ImageBuffer(self.storage, path=self.path, owned=False)
+
+    @property
+    def array(self) -> np.ndarray:
+        """The pixels as an ndarray (a view, never a copy)."""
+        if isinstance(self.storage, SharedArray):
+            return self.storage.array
+        return self.storage
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """Array shape (H, W, C)."""
+        return self.array.shape
+
+    def release(self) -> None:
+        """Free shared memory backing the image, if any and owned."""
+        if self.owned and isinstance(self.storage, SharedArray):
+            self.storage.close()
+
+
 class PipelineContext:
     """Context object passed through pipeline stages.
 
     Stores intermediate results, metadata, and artifacts from each stage.
+    Decoded images are carried in ``images``; when ``checkpoint_stages`` is
+    set, only the final stage and those checkpoints write theirs to disk.
     """
 
     def __init__(self):
@@ -28,6 +87,17 @@ class PipelineContext:
         self.artifacts: list[str] = []
         self.metadata: dict[str, Any] = {}
         self.error: Optional[str] = None
+        self.images: dict[str, ImageBuffer] = {}
+        # Stage indices whose output is persisted besides the final one;
+        # None persists every stage
+        self.checkpoint_stages: set[int] | None = None
+        # Set by the pipeline running the stages; None when a stage runs on its own
+        self.stage_index: int | None = None
+        self.final_stages: set[int] | None = None
+        self.stage_artifacts: dict[int, str] = {}
+        # Graph node running the stage, set when several nodes run the same
+        # stage type; see node_path() and metadata_key()
+        self.node_id: str | None = None
 
     def set(self, key: str, value: Any) -> None:
         """Store value in context.
@@ -66,6 +136,74 @@ class PipelineContext:
         """
         self.error = error
 
+    def set_image(self, key: str, image: ImageBuffer) -> None:
+        """Store a decoded image, releasing the one it replaces.
+
+        Args:
+            key: Image key (stages hand off through "image").
+            image: Decoded image.
+        """
+        previous = self.images.get(key)
+        if previous is not None and previous is not image:
+            previous.release()
+        self.images[key] = image
+
+    def get_image(self, key: str) -> ImageBuffer | None:
+        """Retrieve a decoded image.
+
+        Args:
+            key: Image key.
+
+        Returns:
+            ImageBuffer or None if no stage has produced one.
+        """
+        return self.images.get(key)
+
+    def release_images(self) -> None:
+        """Free all decoded images held by the context."""
+        for image in self.images.values():
+            image.release()
+        self.images.clear()
+
+    def node_path(self, path: str) -> str:
+        """Make an artifact path unique to the running graph node.
+
+        Args:
+            path: Artifact path the stage would write on its own.
+
+        Returns:
+            The path with the node id appended to the file name, or the path
+            unchanged when no node id is set.
+        """
+        if self.node_id is None:
+            return path
+        root, ext = os.path.splitext(path)
+        return f"{root}_{re.sub(r'[^A-Za-z0-9_-]', '_', self.node_id)}{ext}"
+
+    def metadata_key(self, name: str) -> str:
+        """Metadata key for a stage's entry, qualified by the graph node if set.
+
+        Args:
+            name: Stage metadata key (e.g. 'upscaler').
+
+        Returns:
+            'name' or 'name:<node id>'.
+        """
+        return name if self.node_id is None else f"{name}:{self.node_id}"
+
+    def should_persist(self) -> bool:
+        """Whether the running stage should write its output to disk.
+
+        Returns:
+            True for the final stage, checkpointed stages, stages run on
+            their own, and every stage when no checkpoints are configured.
+        """
+        if self.checkpoint_stages is None or self.stage_index is None:
+            return True
+        if self.final_stages is not None and self.stage_index in self.final_stages:
+            return True
+        return self.stage_index in self.checkpoint_stages
+
     def save_artifact_file(self, artifact_path: str, filename: str = "") -> None:
         """Save artifact to disk and track in artifacts list.
         
@@ -95,9 +233,13 @@ class PipelineStage(ABC):
     """Abstract base class for pipeline stages.
 
     Each stage processes context and produces output for next stage.
-    All stages must implement execute() method asynchronously.
+    All stages must implement execute() method asynchronously, and should
+    hand CPU-heavy steps to run_cpu() so the event loop stays responsive.
     """
 
+    # Pool for CPU-heavy steps; None uses the shared get_stage_executor()
+    executor: StageExecutor | None = None
+
     def __init__(self, name: str):
         """Initialize pipeline stage.
 
@@ -106,6 +248,177 @@ class PipelineStage(ABC):
         """
         self.name = name
 
+    async def run_cpu(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        out: OutSpec | None = None,
+        share_result: bool = False,
+        **kwargs: Any,
+    ) -> Any:
+        """Run a CPU-bound kernel on the stage executor instead of the event loop.
+
+        Args:
+            fn: Module-level kernel (see media_lab.kernels).
+            *args: Kernel arguments; ImageBuffers are passed as their pixels.
+            out: (shape, dtype) of the result array the kernel writes into.
+            share_result: Keep a process-pool result in shared memory.
+            **kwargs: Kernel keyword arguments.
+
+        Returns:
+            The result array if ``out`` was given, otherwise the kernel's return value.
+        """
+        executor = self.executor or get_stage_executor()
+        args = tuple(_kernel_arg(value) for value in args)
+        kwargs = {key: _kernel_arg(value) for key, value in kwargs.items()}
+        return await executor.run(fn, *args, out=out, share_result=share_result, **kwargs)
+
+    async def run_image(
+        self, fn: Callable[..., Any], *args: Any, shape: tuple[int, ...], **kwargs: Any
+    ) -> ImageBuffer:
+        """Run an image kernel and wrap its uint8 result without copying it.
+
+        Args:
+            fn: Kernel taking an ``out`` array.
+            *args: Kernel arguments.
+            shape: Result shape.
+            **kwargs: Kernel keyword arguments.
+
+        Returns:
+            ImageBuffer over the kernel's output.
+        """
+        storage = await self.run_cpu(
+            fn, *args, out=(shape, np.uint8), share_result=True, **kwargs
+        )
+        return ImageBuffer(storage)
+
+    async def decode_image(self, image_path: str) -> ImageBuffer:
+        """Decode an image file on the stage executor.
+
+        Args:
+            image_path: Path to image file.
+
+        Returns:
+            ImageBuffer with the file's RGB pixels.
+
+        Raises:
+            FileNotFoundError: If image file not found.
+            ValueError: If image cannot be loaded.
+        """
+        shape = kernels.image_shape(image_path)
+        try:
+            image = await self.run_image(kernels.load_rgb, image_path, shape=shape)
+        except Exception as e:
+            raise ValueError(f"Failed to load image from {image_path}: {str(e)}") from e
+        image.path = image_path
+        return image
+
+    async def publish_image(
+        self, context: PipelineContext, image: ImageBuffer, image_path: str
+    ) -> bool:
+        """Hand a stage's output to the next stage, persisting it if required.
+
+        The image always goes into ``context.images["image"]``; it is only
+        encoded to ``image_path`` (and recorded as an artifact) when
+        ``context.should_persist()``.
+
+        Args:
+            context: Pipeline context.
+            image: Stage output.
+            image_path: Destination if persisted.
+
+        Returns:
+            True if the image was written to disk.
+        """
+        context.set_image("image", image)
+        if not context.should_persist():
+            return False
+        await self.save_image(image_path, image)
+        image.path = image_path
+        context.add_artifact(image_path)
+        return True
+
+    async def save_image(self, image_path: str, image: np.ndarray | ImageBuffer) -> None:
+        """Encode an RGB uint8 image to a file on the stage executor.
+
+        Args:
+            image_path: Destination path.
+            image: Image array (H, W, C) or ImageBuffer.
+        """
+        await self.run_cpu(kernels.save_rgb, image_path, image)
+
+    async def run_image_batch(
+        self, fn: Callable[..., Any], images: list[ImageBuffer], *args: Any, **kwargs: Any
+    ) -> list[ImageBuffer | Exception]:
+        """Run an image kernel over many images, one call per group of equal shapes.
+
+        Same-shaped images are stacked along a new leading axis, so the kernel
+        must accept (N, H, W, C) stacks (see media_lab.kernels). If a stacked
+        call fails, its images are retried one at a time so a bad item only
+        fails itself.
+
+        Args:
+            fn: Kernel taking an ``out`` array.
+            images: Input images.
+            *args: Further kernel arguments, shared by all images.
+            **kwargs: Kernel keyword arguments.
+
+        Returns:
+            Output image, or the exception it raised, for each input in order.
+        """
+        groups: dict[tuple[int, ...], list[int]] = {}
+        for index, image in enumerate(images):
+            groups.setdefault(image.shape, []).append(index)
+
+        results: list[ImageBuffer | Exception] = [None] * len(images)  # type: ignore[list-item]
+        for shape, indices in groups.items():
+            stack = np.stack([images[index].array for index in indices])
+            output = None
+            try:
+                output = await self.run_cpu(
+                    fn, stack, *args, out=(stack.shape, np.uint8), **kwargs
+                )
+            except Exception as e:
+                if len(indices) == 1:
+                    # Already a single-item call; retrying it would fail the same way
+                    results[indices[0]] = e
+                    continue
+                logger.warning("%s: batched %s failed, retrying per item", self.name, fn.__name__)
+            for row, index in enumerate(indices):
+                if output is not None:
+                    results[index] = ImageBuffer(output[row])
+                    continue
+                try:
+                    results[index] = await self.run_image(
+                        fn, images[index], *args, shape=shape, **kwargs
+                    )
+                except Exception as e:
+                    results[index] = e
+        return results
+
+    async def execute_batch(self, contexts: list[PipelineContext]) -> list[PipelineContext]:
+        """Execute the stage for every item of a batch.
+
+        Each context is one batch item with its own seed and parameters. The
+        default runs items one after another; stages override this to process
+        them together. Either way a failing item records its error on its own
+        context and the others carry on.
+
+        Args:
+            contexts: Contexts of the batch items still running.
+
+        Returns:
+            The updated contexts, in the same order.
+        """
+        results = []
+        for context in contexts:
+            try:
+                context = await self.execute(context)
+            except Exception as e:
+                context.set_error(f"{self.name} failed: {str(e)}")
+            results.append(context)
+        return results
+
     @abstractmethod
     async def execute(self, context: PipelineContext) -> PipelineContext:
         """Execute stage processing.
@@ -138,6 +451,11 @@ class PipelineStage(ABC):
         return True
 
 
+def _kernel_arg(value: Any) -> Any:
+    """Pass an ImageBuffer to a kernel as its (possibly shared) storage."""
+    return value.storage if isinstance(value, ImageBuffer) else value
+
+
 class TextToImageStage(PipelineStage):
     """Generate image from text prompt.
 
@@ -200,11 +518,13 @@ class TextToImageStage(PipelineStage):
             image_path = f"artifacts/{job_id}/batch_{batch_idx}/generated.png"
         else:
             image_path = f"artifacts/{job_id}/generated.png"
+        image_path = context.node_path(image_path)
 
         context.set("image", image_data)
         context.set("image_path", image_path)
-        context.save_artifact_file(image_path, "generated.png")
-        context.metadata["text_to_image"] = {
+        if context.should_persist():
+            context.save_artifact_file(image_path, "generated.png")
+        context.metadata[context.metadata_key("text_to_image")] = {
             "model": model,
             "prompt_length": len(prompt),
         }
@@ -266,12 +586,13 @@ class RefinerStage(PipelineStage):
             "detail_enhancement": True,
         }
 
-        refined_path = original_path.replace(".png", "_refined.png")
+        refined_path = context.node_path(original_path.replace(".png", "_refined.png"))
 
         context.set("image", refined_data)
         context.set("refined_path", refined_path)
-        context.save_artifact_file(refined_path, "refined.png")
-        context.metadata["refiner"] = {
+        if context.should_persist():
+            context.save_artifact_file(refined_path, "refined.png")
+        context.metadata[context.metadata_key("refiner")] = {
             "refinement_level": context.get("refinement_level", 2),
         }
 
@@ -332,12 +653,14 @@ class DetailerStage(PipelineStage):
             "texture_detail": True,
         }
 
-        detail_path = refined_path.replace("_refined.png", "_detailed.png")
+        # Replace the marker, not "_refined.png": a node id may follow it
+        detail_path = context.node_path(refined_path.replace("_refined", "_detailed"))
 
         context.set("image", detailed_data)
         context.set("detail_path", detail_path)
-        context.save_artifact_file(detail_path, "detailed.png")
-        context.metadata["detailer"] = {
+        if context.should_persist():
+            context.save_artifact_file(detail_path, "detailed.png")
+        context.metadata[context.metadata_key("detailer")] = {
             "detail_pass": 1,
             "edge_enhancement": True,
         }
@@ -412,12 +735,13 @@ class UpscalerStage(PipelineStage):
             "dimensions": upscaled_dims,
         }
 
-        upscaled_path = detail_path.replace("_detailed.png", "_upscaled.png")
+        upscaled_path = context.node_path(detail_path.replace("_detailed", "_upscaled"))
 
         context.set("image", upscaled_data)
         context.set("upscaled_path", upscaled_path)
-        context.save_artifact_file(upscaled_path, "upscaled.png")
-        context.metadata["upscaler"] = {
+        if context.should_persist():
+            context.save_artifact_file(upscaled_path, "upscaled.png")
+        context.metadata[context.metadata_key("upscaler")] = {
             "upscale_factor": upscale_factor,
             "original_dimensions": original_dims,
             "upscaled_dimensions": upscaled_dims,
@@ -453,13 +777,20 @@ class Pipeline:
         Raises:
             ValueError: If any stage fails.
         """
-        for stage in self.stages:
+        context.final_stages = {len(self.stages) - 1}
+        for index, stage in enumerate(self.stages):
             if context.error:
                 break
+            context.stage_index = index
+            artifact_count = len(context.artifacts)
             try:
                 context = await stage.execute(context)
             except Exception as e:
                 context.set_error(f"{stage.name} failed: {str(e)}")
+                context.release_images()
                 raise
+            if len(context.artifacts) > artifact_count:
+                context.stage_artifacts[index] = context.artifacts[-1]
+        context.stage_index = None
 
         return context
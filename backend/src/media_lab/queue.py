@@ -1,17 +1,34 @@
 """Job queue abstraction for media processing tasks.
 
-Provides a simple in-memory queue for job management with FIFO ordering
-and callback support for status updates.
+Provides an in-memory scheduler for job management with priorities,
+per-character fair sharing, delayed retries and callback support for
+status updates.
+
+Scheduling structure:
+
+- a heap of active priority levels (higher ``priority`` runs first)
+- per level, a round-robin ring of characters with pending jobs, so one
+  character's large batch cannot starve the others at the same priority
+- per (level, character), a FIFO deque of tasks
+- a heap of retries keyed by the time they become ready again
+
+Enqueue and dequeue are O(log P) for P distinct priority levels (O(1) in
+the common single-level case); cancellation is O(1) and leaves a tombstone
+that dequeue skips.
 """
 
 import contextlib
-from collections.abc import Callable
-from dataclasses import dataclass
+import heapq
+import itertools
+import time
+from collections import deque
+from collections.abc import Callable, Collection
+from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from typing import Any
 
 
-@dataclass
+@dataclass(slots=True)
 class JobTask:
     """Represents a job task in the queue."""
 
@@ -22,16 +39,52 @@ class JobTask:
     created_at: datetime
     retry_count: int = 0
     max_retries: int = 3
+    priority: int = 0
+    # Monotonic time before which a retry is not handed out
+    ready_at: float = 0.0
+
+
+@dataclass
+class _PriorityLevel:
+    """Round-robin ring of characters and their pending tasks at one priority."""
+
+    ring: deque[str] = field(default_factory=deque)
+    tasks: dict[str, deque[JobTask]] = field(default_factory=dict)
 
 
 class JobQueue:
-    """Simple FIFO queue for media job processing."""
+    """Priority queue with per-character fair sharing for media job processing."""
+
+    def __init__(
+        self,
+        retry_base_delay: float = 1.0,
+        retry_max_delay: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize empty queue.
+
+        Args:
+            retry_base_delay: Delay in seconds before the first retry; each
+                further retry doubles it.
+            retry_max_delay: Upper bound on the retry delay in seconds.
+            clock: Monotonic time source (injectable for tests).
+        """
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._clock = clock
+
+        # Negated priorities of levels that may hold tasks
+        self._level_heap: list[int] = []
+        self._levels: dict[int, _PriorityLevel] = {}
+        # (ready_at, sequence, task) for retries waiting out their backoff
+        self._delayed: list[tuple[float, int, JobTask]] = []
+        self._sequence = itertools.count()
+        # Live queued tasks by id; anything else found in the structures is a tombstone
+        self._queued: dict[str, JobTask] = {}
 
-    def __init__(self):
-        """Initialize empty queue."""
-        self._queue: list[JobTask] = []
         self._running: dict[str, JobTask] = {}
         self._callbacks: list[Callable[[str, str], None]] = []
+        self._ready_callbacks: list[Callable[[], None]] = []
 
     def enqueue(
         self,
@@ -39,14 +92,20 @@ class JobQueue:
         character_id: str,
         workflow_type: str,
         parameters: dict[str, Any],
+        priority: int = 0,
+        max_retries: int = 3,
     ) -> JobTask:
         """Add job to queue.
 
+        Enqueueing a job id that is already queued replaces the earlier task.
+
         Args:
             job_id: Unique job identifier.
             character_id: Character being processed.
             workflow_type: Type of workflow (enhance, interpolate, generate, blend).
             parameters: Workflow-specific parameters.
+            priority: Higher priorities are dequeued first.
+            max_retries: Retries allowed after failures.
 
         Returns:
             JobTask that was enqueued.
@@ -57,21 +116,149 @@ class JobQueue:
             workflow_type=workflow_type,
             parameters=parameters,
             created_at=datetime.now(UTC).replace(tzinfo=None),
+            max_retries=max_retries,
+            priority=priority,
         )
-        self._queue.append(task)
+        self._queued[job_id] = task
+        self._push_ready(task)
+        for callback in self._ready_callbacks:
+            with contextlib.suppress(Exception):
+                callback()
         return task
 
-    def dequeue(self) -> JobTask | None:
+    def dequeue(self, skip_workflows: Collection[str] = ()) -> JobTask | None:
         """Remove and return next job from queue.
 
+        Picks the highest priority level, then the next character in that
+        level's rotation, then that character's oldest task.
+
+        Args:
+            skip_workflows: Workflow types to leave in the queue (e.g. ones
+                at their concurrency limit). Each character's first task of
+                another workflow is taken instead.
+
         Returns:
-            JobTask or None if queue is empty.
+            JobTask or None if no job is ready.
         """
-        if not self._queue:
-            return None
-        task = self._queue.pop(0)
-        self._running[task.job_id] = task
-        return task
+        self._promote_delayed()
+        if skip_workflows:
+            return self._dequeue_skipping(skip_workflows)
+        while self._level_heap:
+            priority = -self._level_heap[0]
+            level = self._levels[priority]
+            if not level.ring:
+                heapq.heappop(self._level_heap)
+                del self._levels[priority]
+                continue
+
+            character_id = level.ring.popleft()
+            pending = level.tasks[character_id]
+            task = pending.popleft()
+            if pending:
+                level.ring.append(character_id)
+            else:
+                del level.tasks[character_id]
+
+            if self._queued.get(task.job_id) is not task:
+                continue  # cancelled or superseded
+            del self._queued[task.job_id]
+            self._running[task.job_id] = task
+            return task
+        return None
+
+    def _dequeue_skipping(self, skip_workflows: Collection[str]) -> JobTask | None:
+        """Slow path of dequeue: scan for the first task not in skip_workflows.
+
+        Characters passed over keep their place in the rotation.
+        """
+        for priority in sorted(self._levels, reverse=True):
+            level = self._levels[priority]
+            for slot, character_id in enumerate(level.ring):
+                pending = level.tasks[character_id]
+                for index, task in enumerate(pending):
+                    if self._queued.get(task.job_id) is not task:
+                        continue
+                    if task.workflow_type in skip_workflows:
+                        continue
+                    del pending[index]
+                    del level.ring[slot]
+                    if pending:
+                        level.ring.append(character_id)
+                    else:
+                        del level.tasks[character_id]
+                    del self._queued[task.job_id]
+                    self._running[task.job_id] = task
+                    return task
+        return None
+
+    def cancel(self, job_id: str) -> bool:
+        """Remove a queued (or retry-waiting) job in O(1).
+
+        Args:
+            job_id: Job identifier.
+
+        Returns:
+            True if the job was queued, False otherwise.
+        """
+        return self._queued.pop(job_id, None) is not None
+
+    def retry(self, task: JobTask) -> bool:
+        """Schedule a failed task to run again after an exponential backoff.
+
+        The delay is ``retry_base_delay * 2**retry_count``, capped at
+        ``retry_max_delay``. The task keeps its priority and character.
+
+        Args:
+            task: Task that failed (usually the one last dequeued).
+
+        Returns:
+            True if a retry was scheduled, False if retries are exhausted.
+        """
+        if task.retry_count >= task.max_retries:
+            return False
+        delay = min(self.retry_base_delay * 2**task.retry_count, self.retry_max_delay)
+        task.retry_count += 1
+        task.ready_at = self._clock() + delay
+        self._running.pop(task.job_id, None)
+        self._queued[task.job_id] = task
+        heapq.heappush(self._delayed, (task.ready_at, next(self._sequence), task))
+        return True
+
+    def next_ready_in(self) -> float | None:
+        """Seconds until the next retry becomes ready.
+
+        Returns:
+            0.0 if a job is ready now, the wait for the earliest retry, or
+            None if nothing is queued.
+        """
+        self._promote_delayed()
+        if any(level.ring for level in self._levels.values()):
+            return 0.0
+        while self._delayed:
+            ready_at, _, task = self._delayed[0]
+            if self._queued.get(task.job_id) is task:
+                return max(0.0, ready_at - self._clock())
+            heapq.heappop(self._delayed)
+        return None
+
+    def _push_ready(self, task: JobTask) -> None:
+        level = self._levels.get(task.priority)
+        if level is None:
+            level = self._levels[task.priority] = _PriorityLevel()
+            heapq.heappush(self._level_heap, -task.priority)
+        pending = level.tasks.get(task.character_id)
+        if pending is None:
+            pending = level.tasks[task.character_id] = deque()
+            level.ring.append(task.character_id)
+        pending.append(task)
+
+    def _promote_delayed(self) -> None:
+        """Move retries whose backoff has elapsed into the ready queues."""
+        now = self._clock()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, task = heapq.heappop(self._delayed)
+            if self._queued.get(task.job_id) is task:
+                self._push_ready(task)
 
     def mark_running(self, job_id: str) -> None:
         """Mark job as currently executing.
@@ -113,13 +300,24 @@ class JobQueue:
         """
         return self._running.get(job_id)
 
+    def is_queued(self, job_id: str) -> bool:
+        """Check if job is waiting in the queue (including retry backoff).
+
+        Args:
+            job_id: Job identifier.
+
+        Returns:
+            True if job is queued, False otherwise.
+        """
+        return job_id in self._queued
+
     def size(self) -> int:
         """Get number of jobs pending in queue.
 
         Returns:
-            Count of queued jobs.
+            Count of queued jobs, including retries waiting out their backoff.
         """
-        return len(self._queue)
+        return len(self._queued)
 
     def register_callback(self, callback: Callable[[str, str], None]) -> None:
         """Register callback for job status updates.
@@ -129,6 +327,25 @@ class JobQueue:
         """
         self._callbacks.append(callback)
 
+    def register_ready_callback(self, callback: Callable[[], None]) -> None:
+        """Register callback invoked whenever a job is enqueued.
+
+        Lets workers sleep until there is work instead of polling.
+
+        Args:
+            callback: Function with signature () -> None
+        """
+        self._ready_callbacks.append(callback)
+
+    def unregister_ready_callback(self, callback: Callable[[], None]) -> None:
+        """Remove a callback added by register_ready_callback, if present.
+
+        Args:
+            callback: Previously registered callback.
+        """
+        with contextlib.suppress(ValueError):
+            self._ready_callbacks.remove(callback)
+
     def notify_status_change(self, job_id: str, status: str) -> None:
         """Notify all registered callbacks of status change.
 
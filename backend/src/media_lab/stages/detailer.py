@@ -6,58 +6,18 @@ using diffusers pipelines (with mock/stub support for non-GPU environments).
 
 import contextlib
 import logging
-from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any
 
 import numpy as np
 from PIL import Image
 
+from .. import kernels
 from ..lora import LoRAConfig, LoRAManager
+from ..pipeline import ImageBuffer, PipelineContext, PipelineStage
 
 logger = logging.getLogger(__name__)
 
 
-class PipelineStage(ABC):
-    """Abstract base class for pipeline stages."""
-
-    def __init__(self, name: str):
-        """Initialize pipeline stage.
-
-        Args:
-            name: Stage name for logging and identification.
-        """
-        self.name = name
-
-    @abstractmethod
-    async def execute(self, context: "PipelineContext") -> "PipelineContext":
-        """Execute stage processing.
-
-        Args:
-            context: PipelineContext from previous stage.
-
-        Returns:
-            Updated PipelineContext for next stage.
-
-        Raises:
-            ValueError: If stage validation fails.
-        """
-        pass
-
-    async def validate_input(self, context: "PipelineContext") -> bool:
-        """Validate stage input requirements.
-
-        Override in subclass for custom validation.
-
-        Args:
-            context: PipelineContext to validate.
-
-        Returns:
-            True if valid, False otherwise.
-        """
-        return True
-
-
 class DetailerStage(PipelineStage):
     """Add fine detail enhancement to image with optional mask.
 
@@ -102,7 +62,7 @@ class DetailerStage(PipelineStage):
         self.loras = loras or []
         self.lora_manager = LoRAManager()
 
-    async def validate_input(self, context: "PipelineContext") -> bool:
+    async def validate_input(self, context: PipelineContext) -> bool:
         """Validate image exists from previous stage.
 
         Args:
@@ -163,30 +123,8 @@ class DetailerStage(PipelineStage):
         Returns:
             Composited image array.
         """
-        x, y, w, h = roi
-        result = base_image.copy()
-
-        if mask is not None:
-            # Blend with mask
-            mask_array = np.array(mask) if isinstance(mask, list | tuple) else mask
-            mask_normalized_raw = mask_array.astype(np.float32)
-            if mask_array.max() > 1:
-                mask_normalized = mask_normalized_raw / 255.0
-            else:
-                mask_normalized = mask_normalized_raw
-
-            # Ensure 3-channel mask for color blending
-            if len(mask_normalized.shape) == 2:
-                mask_normalized = np.stack([mask_normalized] * 3, axis=-1)
-
-            result[y : y + h, x : x + w] = (
-                roi_image.astype(np.float32) * mask_normalized
-                + result[y : y + h, x : x + w].astype(np.float32) * (1 - mask_normalized)
-            ).astype(np.uint8)
-        else:
-            # Direct replacement
-            result[y : y + h, x : x + w] = roi_image
-
+        result = np.empty_like(base_image)
+        kernels.composite_roi(base_image, roi_image, roi, mask, out=result)
         return result
 
     def load_image_file(self, image_path: str) -> np.ndarray:
@@ -216,7 +154,7 @@ class DetailerStage(PipelineStage):
 
     async def execute_inpainting(
         self,
-        context: "PipelineContext",
+        context: PipelineContext,
         image_array: np.ndarray,
         mask_array: np.ndarray,
     ) -> np.ndarray:
@@ -240,27 +178,12 @@ class DetailerStage(PipelineStage):
         )
 
         # Mock inpainting: apply Gaussian blur to masked regions to simulate refinement
-        from scipy.ndimage import gaussian_filter
-
-        # Normalize mask to 0-1
-        mask_normalized = mask_array.astype(np.float32)
-        if mask_normalized.max() > 1:
-            mask_normalized = mask_normalized / 255.0
-
-        # Ensure 3-channel mask
-        if len(mask_normalized.shape) == 2:
-            mask_normalized = np.stack([mask_normalized] * 3, axis=-1)
-
-        # Apply Gaussian blur to masked regions (simulating detail enhancement)
-        blurred = gaussian_filter(image_array.astype(np.float32), sigma=1.5)
-        result = (
-            image_array.astype(np.float32) * (1 - mask_normalized) + blurred * mask_normalized
-        ).astype(np.uint8)
-
-        return result
+        return await self.run_cpu(
+            kernels.masked_blur, image_array, mask_array, 1.5, out=(image_array.shape, np.uint8)
+        )
 
     async def execute_img2img(
-        self, context: "PipelineContext", image_array: np.ndarray
+        self, context: PipelineContext, image_array: np.ndarray
     ) -> np.ndarray:
         """Execute img2img enhancement without mask.
 
@@ -282,17 +205,15 @@ class DetailerStage(PipelineStage):
         )
 
         # Mock img2img: apply unsharp mask to simulate detail enhancement
-        from scipy.ndimage import gaussian_filter
-
-        # Apply unsharp masking for detail enhancement
-        base = gaussian_filter(image_array.astype(np.float32), sigma=2.0)
-        enhanced = image_array.astype(np.float32) + self.strength * (
-            image_array.astype(np.float32) - base
+        return await self.run_cpu(
+            kernels.unsharp_mask,
+            image_array,
+            self.strength,
+            2.0,
+            out=(image_array.shape, np.uint8),
         )
 
-        return np.clip(enhanced, 0, 255).astype(np.uint8)
-
-    async def execute(self, context: "PipelineContext") -> "PipelineContext":
+    async def execute(self, context: PipelineContext) -> PipelineContext:
         """Execute detail enhancement with optional mask support.
 
         Args:
@@ -326,16 +247,21 @@ class DetailerStage(PipelineStage):
             if isinstance(image_data, dict) and "image_path" in image_data:
                 image_path = image_data["image_path"]
 
-            if image_path and Path(image_path).exists():
-                image_array = self.load_image_file(image_path)
-            elif isinstance(image_data, dict):
-                # Create mock image from data
-                dims = image_data.get("dimensions", (512, 512))
-                image_array = np.random.randint(50, 200, (*dims, 3), dtype=np.uint8)
-            else:
-                error = "DetailerStage: Cannot load source image"
-                context.set_error(error)
-                raise ValueError(error)
+            # Use the previous stage's pixels before falling back to disk
+            image = context.get_image("image")
+            if image is None:
+                if image_path and Path(image_path).exists():
+                    image = await self.decode_image(image_path)
+                elif isinstance(image_data, dict):
+                    # Create mock image from data
+                    dims = image_data.get("dimensions", (512, 512))
+                    image = ImageBuffer(np.random.randint(50, 200, (*dims, 3), dtype=np.uint8))
+                else:
+                    error = "DetailerStage: Cannot load source image"
+                    context.set_error(error)
+                    raise ValueError(error)
+                context.set_image("image", image)
+            image_array = image.array
 
             # Check for ROI in context
             roi = context.get("roi")
@@ -376,7 +302,9 @@ class DetailerStage(PipelineStage):
                 mask_array = None
 
             # Composite back into full image
-            result_image = self.composite_roi(image_array, enhanced_roi, roi, mask_array)
+            result_image = await self.run_image(
+                kernels.composite_roi, image, enhanced_roi, roi, mask_array, shape=image.shape
+            )
 
             # Prepare output paths
             if image_path:
@@ -384,11 +312,10 @@ class DetailerStage(PipelineStage):
             else:
                 job_id = context.get("job_id", "unknown")
                 detail_path = f"artifacts/{job_id}/detailed.png"
+            detail_path = context.node_path(detail_path)
 
-            # Save result
-            result_pil = Image.fromarray(result_image)
-            Path(detail_path).parent.mkdir(parents=True, exist_ok=True)
-            result_pil.save(detail_path)
+            # Hand off to the next stage; save if final or checkpointed
+            persisted = await self.publish_image(context, result_image, detail_path)
 
             # Update context
             detailed_data = {
@@ -400,11 +327,11 @@ class DetailerStage(PipelineStage):
             }
 
             context.set("image", detailed_data)
-            context.set("detail_path", detail_path)
-            context.add_artifact(detail_path)
+            if persisted:
+                context.set("detail_path", detail_path)
 
             # Metadata
-            context.metadata["detailer"] = {
+            context.metadata[context.metadata_key("detailer")] = {
                 "model": self.model_name,
                 "mode": context.get("detailer_mode", "unknown"),
                 "roi": list(roi),
@@ -413,7 +340,10 @@ class DetailerStage(PipelineStage):
                 "output_shape": result_image.shape,
             }
 
-            logger.info("DetailerStage: Completed detail enhancement, saved to %s", detail_path)
+            logger.info(
+                "DetailerStage: Completed detail enhancement%s",
+                f", saved to {detail_path}" if persisted else "",
+            )
 
             return context
         finally:
@@ -422,30 +352,3 @@ class DetailerStage(PipelineStage):
                 with contextlib.suppress(ValueError, RuntimeError):
                     self.lora_manager.unload_loras(model)
 
-
-# Stub PipelineContext class for compatibility when imported independently
-class PipelineContext:
-    """Context object passed through pipeline stages."""
-
-    def __init__(self):
-        """Initialize empty pipeline context."""
-        self.data: dict[str, Any] = {}
-        self.artifacts: list[str] = []
-        self.metadata: dict[str, Any] = {}
-        self.error: str | None = None
-
-    def set(self, key: str, value: Any) -> None:
-        """Store value in context."""
-        self.data[key] = value
-
-    def get(self, key: str, default: Any = None) -> Any:
-        """Retrieve value from context."""
-        return self.data.get(key, default)
-
-    def add_artifact(self, artifact_path: str) -> None:
-        """Add artifact path to list."""
-        self.artifacts.append(artifact_path)
-
-    def set_error(self, error: str) -> None:
-        """Mark context as failed with error message."""
-        self.error = error
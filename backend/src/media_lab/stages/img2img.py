@@ -7,55 +7,17 @@ Provides Img2ImgStage for img2img refinement using configurable denoising streng
 import contextlib
 import logging
 from pathlib import Path
-from typing import Any
 
 import numpy as np
 from PIL import Image
 
+from .. import kernels
 from ..lora import LoRAConfig, LoRAManager
+from ..pipeline import ImageBuffer, PipelineContext, PipelineStage
 
 logger = logging.getLogger(__name__)
 
 
-class PipelineStage:
-    """Abstract base class for pipeline stages."""
-
-    def __init__(self, name: str):
-        """Initialize pipeline stage.
-
-        Args:
-            name: Stage name for logging and identification.
-        """
-        self.name = name
-
-    async def execute(self, context: "PipelineContext") -> "PipelineContext":
-        """Execute stage processing.
-
-        Args:
-            context: PipelineContext from previous stage.
-
-        Returns:
-            Updated PipelineContext for next stage.
-
-        Raises:
-            ValueError: If stage validation fails.
-        """
-        raise NotImplementedError
-
-    async def validate_input(self, context: "PipelineContext") -> bool:
-        """Validate stage input requirements.
-
-        Override in subclass for custom validation.
-
-        Args:
-            context: PipelineContext to validate.
-
-        Returns:
-            True if valid, False otherwise.
-        """
-        return True
-
-
 class Img2ImgStage(PipelineStage):
     """Image-to-image refinement with configurable denoising strength.
 
@@ -100,7 +62,7 @@ class Img2ImgStage(PipelineStage):
         self.loras = loras or []
         self.lora_manager = LoRAManager()
 
-    async def validate_input(self, context: "PipelineContext") -> bool:
+    async def validate_input(self, context: PipelineContext) -> bool:
         """Validate source image is available.
 
         Args:
@@ -137,8 +99,8 @@ class Img2ImgStage(PipelineStage):
             raise ValueError(f"Failed to load image from {image_path}: {str(e)}") from e
 
     async def execute_img2img(
-        self, context: "PipelineContext", image_array: np.ndarray
-    ) -> np.ndarray:
+        self, context: PipelineContext, image: ImageBuffer
+    ) -> ImageBuffer:
         """Execute img2img transformation.
 
         In production, this would call diffusers StableDiffusionImg2ImgPipeline.
@@ -146,10 +108,10 @@ class Img2ImgStage(PipelineStage):
 
         Args:
             context: Pipeline context.
-            image_array: Image array to transform.
+            image: Image to transform.
 
         Returns:
-            Transformed image array.
+            Transformed image.
         """
         logger.info(
             "Img2ImgStage: Executing img2img with model=%s, strength=%.2f, guidance=%.2f",
@@ -159,17 +121,11 @@ class Img2ImgStage(PipelineStage):
         )
 
         # Mock img2img: apply unsharp masking for detail enhancement
-        from scipy.ndimage import gaussian_filter
-
-        # Apply unsharp masking for transformation
-        base = gaussian_filter(image_array.astype(np.float32), sigma=2.0)
-        enhanced = image_array.astype(np.float32) + self.strength * (
-            image_array.astype(np.float32) - base
+        return await self.run_image(
+            kernels.unsharp_mask, image, self.strength, 2.0, shape=image.shape
         )
 
-        return np.clip(enhanced, 0, 255).astype(np.uint8)
-
-    async def execute(self, context: "PipelineContext") -> "PipelineContext":
+    async def execute(self, context: PipelineContext) -> PipelineContext:
         """Execute image-to-image transformation.
 
         Args:
@@ -198,104 +154,156 @@ class Img2ImgStage(PipelineStage):
                 logger.info(f"Img2ImgStage: Applying {len(self.loras)} LoRA(s)")
                 self.lora_manager.apply_loras(model, self.loras)
 
-            # Get source image
-            source_image_path = context.get("source_image_path")
-            image_data = context.get("image")
+            image = await self._prepare_input(context)
 
-            # Load image from file if path available
-            if source_image_path and Path(source_image_path).exists():
-                image_array = self.load_image_file(source_image_path)
-            elif isinstance(image_data, dict) and "image_path" in image_data:
-                image_array = self.load_image_file(image_data["image_path"])
-            elif isinstance(image_data, dict):
-                # Create mock image from data
-                dims = image_data.get("dimensions", (512, 512))
-                image_array = np.random.randint(50, 200, (*dims, 3), dtype=np.uint8)
-            else:
-                error = "Img2ImgStage: Cannot load source image"
-                context.set_error(error)
-                raise ValueError(error)
+            # Execute img2img transformation
+            transformed = await self.execute_img2img(context, image)
 
-            # Get strength from context (allows per-call override) or use default
-            strength = context.get("strength", self.strength)
+            await self._store_result(context, transformed)
+            return context
+        finally:
+            # Cleanup: remove any temporary LoRAs applied
+            if self.loras and model is not None:
+                with contextlib.suppress(ValueError, RuntimeError):
+                    self.lora_manager.unload_loras(model)
 
-            # Validate strength parameter
-            if not (0.0 <= strength <= 1.0):
-                error = f"Img2ImgStage: strength must be between 0.0 and 1.0, got {strength}"
-                context.set_error(error)
-                raise ValueError(error)
+    async def execute_batch(self, contexts: list[PipelineContext]) -> list[PipelineContext]:
+        """Transform a batch of items with one stacked kernel call per image size.
 
-            # Execute img2img transformation
-            transformed_array = await self.execute_img2img(context, image_array)
+        In production this would be a single batched diffusers call. LoRAs are
+        applied once for the batch, using the first item's model.
 
-            # Prepare output path
-            if source_image_path:
-                img2img_path = str(source_image_path).replace(".png", "_img2img.png")
-            else:
-                job_id = context.get("job_id", "unknown")
-                img2img_path = f"artifacts/{job_id}/img2img.png"
-
-            # Save result
-            transformed_pil = Image.fromarray(transformed_array)
-            Path(img2img_path).parent.mkdir(parents=True, exist_ok=True)
-            transformed_pil.save(img2img_path)
-
-            # Update context
-            transformed_data = {
-                **(image_data or {}),
-                "img2img_applied": True,
-                "dimensions": transformed_array.shape[:2][::-1],  # (W, H)
-            }
-
-            context.set("image", transformed_data)
-            context.set("img2img_path", img2img_path)
-            context.add_artifact(img2img_path)
+        Args:
+            contexts: Batch item contexts.
 
-            # Metadata
-            context.metadata["img2img"] = {
-                "model": self.model_name,
-                "strength": strength,
-                "guidance_scale": self.guidance_scale,
-                "output_shape": transformed_array.shape,
-                "source_path": source_image_path or "unknown",
-            }
+        Returns:
+            The updated contexts; failed items have their error set.
+        """
+        model = contexts[0].get("model") if contexts else None
+        try:
+            if self.loras and model is not None:
+                logger.info(f"Img2ImgStage: Applying {len(self.loras)} LoRA(s)")
+                self.lora_manager.apply_loras(model, self.loras)
+
+            ready: list[PipelineContext] = []
+            images: list[ImageBuffer] = []
+            for context in contexts:
+                try:
+                    if not await self.validate_input(context):
+                        raise ValueError(
+                            "Img2ImgStage requires 'source_image_path' in config "
+                            "or 'image' from previous stage"
+                        )
+                    images.append(await self._prepare_input(context))
+                    ready.append(context)
+                except Exception as e:
+                    context.set_error(f"{self.name} failed: {str(e)}")
 
             logger.info(
-                "Img2ImgStage: Completed img2img transformation, saved to %s",
-                img2img_path,
+                "Img2ImgStage: Executing batched img2img for %d item(s) with model=%s",
+                len(ready),
+                self.model_name,
             )
-
-            return context
+            # Mock img2img: unsharp masking over stacked images
+            results = await self.run_image_batch(kernels.unsharp_mask, images, self.strength, 2.0)
+            for context, result in zip(ready, results):
+                try:
+                    if isinstance(result, Exception):
+                        raise result
+                    await self._store_result(context, result)
+                except Exception as e:
+                    context.set_error(f"{self.name} failed: {str(e)}")
+            return contexts
         finally:
-            # Cleanup: remove any temporary LoRAs applied
             if self.loras and model is not None:
                 with contextlib.suppress(ValueError, RuntimeError):
                     self.lora_manager.unload_loras(model)
 
+    async def _prepare_input(self, context: PipelineContext) -> ImageBuffer:
+        """Resolve the source image and validate per-item parameters.
 
-# Stub PipelineContext class for compatibility when imported independently
-class PipelineContext:
-    """Context object passed through pipeline stages."""
+        Args:
+            context: Pipeline context.
 
-    def __init__(self):
-        """Initialize empty pipeline context."""
-        self.data: dict[str, Any] = {}
-        self.artifacts: list[str] = []
-        self.metadata: dict[str, Any] = {}
-        self.error: str | None = None
+        Returns:
+            Image to transform.
 
-    def set(self, key: str, value: Any) -> None:
-        """Store value in context."""
-        self.data[key] = value
+        Raises:
+            ValueError: If no source image is available or strength is invalid.
+        """
+        source_image_path = context.get("source_image_path")
+        image_data = context.get("image")
 
-    def get(self, key: str, default: Any = None) -> Any:
-        """Retrieve value from context."""
-        return self.data.get(key, default)
+        # Use the previous stage's pixels, else load from file if path available
+        image = context.get_image("image")
+        if image is None:
+            if source_image_path and Path(source_image_path).exists():
+                image = await self.decode_image(source_image_path)
+            elif isinstance(image_data, dict) and "image_path" in image_data:
+                image = await self.decode_image(image_data["image_path"])
+            elif isinstance(image_data, dict):
+                # Create mock image from data
+                dims = image_data.get("dimensions", (512, 512))
+                image = ImageBuffer(np.random.randint(50, 200, (*dims, 3), dtype=np.uint8))
+            else:
+                error = "Img2ImgStage: Cannot load source image"
+                context.set_error(error)
+                raise ValueError(error)
+            context.set_image("image", image)
+
+        # Get strength from context (allows per-call override) or use default
+        strength = context.get("strength", self.strength)
+
+        # Validate strength parameter
+        if not (0.0 <= strength <= 1.0):
+            error = f"Img2ImgStage: strength must be between 0.0 and 1.0, got {strength}"
+            context.set_error(error)
+            raise ValueError(error)
+
+        return image
 
-    def add_artifact(self, artifact_path: str) -> None:
-        """Add artifact path to list."""
-        self.artifacts.append(artifact_path)
+    async def _store_result(self, context: PipelineContext, transformed: ImageBuffer) -> None:
+        """Publish the transformed image and record data and metadata.
 
-    def set_error(self, error: str) -> None:
-        """Mark context as failed with error message."""
-        self.error = error
+        Args:
+            context: Pipeline context.
+            transformed: Stage output.
+        """
+        source_image_path = context.get("source_image_path")
+        image_data = context.get("image")
+
+        # Prepare output path
+        if source_image_path:
+            img2img_path = str(source_image_path).replace(".png", "_img2img.png")
+        else:
+            job_id = context.get("job_id", "unknown")
+            img2img_path = f"artifacts/{job_id}/img2img.png"
+        img2img_path = context.node_path(img2img_path)
+
+        # Hand off to the next stage; save if final or checkpointed
+        persisted = await self.publish_image(context, transformed, img2img_path)
+
+        # Update context
+        transformed_data = {
+            **(image_data or {}),
+            "img2img_applied": True,
+            "dimensions": transformed.shape[:2][::-1],  # (W, H)
+        }
+
+        context.set("image", transformed_data)
+        if persisted:
+            context.set("img2img_path", img2img_path)
+
+        # Metadata
+        context.metadata[context.metadata_key("img2img")] = {
+            "model": self.model_name,
+            "strength": context.get("strength", self.strength),
+            "guidance_scale": self.guidance_scale,
+            "output_shape": transformed.shape,
+            "source_path": source_image_path or "unknown",
+        }
+
+        logger.info(
+            "Img2ImgStage: Completed img2img transformation%s",
+            f", saved to {img2img_path}" if persisted else "",
+        )
@@ -6,51 +6,14 @@ using instruction-guided diffusion (mock implementation for testing).
 
 import logging
 from pathlib import Path
-from typing import Any
 
 import numpy as np
 from PIL import Image
 
-logger = logging.getLogger(__name__)
-
-
-class PipelineStage:
-    """Abstract base class for pipeline stages."""
+from .. import kernels
+from ..pipeline import ImageBuffer, PipelineContext, PipelineStage
 
-    def __init__(self, name: str):
-        """Initialize pipeline stage.
-
-        Args:
-            name: Stage name for logging and identification.
-        """
-        self.name = name
-
-    async def execute(self, context: "PipelineContext") -> "PipelineContext":
-        """Execute stage processing.
-
-        Args:
-            context: PipelineContext from previous stage.
-
-        Returns:
-            Updated PipelineContext for next stage.
-
-        Raises:
-            ValueError: If stage validation fails.
-        """
-        raise NotImplementedError
-
-    async def validate_input(self, context: "PipelineContext") -> bool:
-        """Validate stage input requirements.
-
-        Override in subclass for custom validation.
-
-        Args:
-            context: PipelineContext to validate.
-
-        Returns:
-            True if valid, False otherwise.
-        """
-        return True
+logger = logging.getLogger(__name__)
 
 
 class InstructPix2PixStage(PipelineStage):
@@ -95,7 +58,7 @@ class InstructPix2PixStage(PipelineStage):
         self.guidance_scale = guidance_scale
         self.image_guidance_scale = image_guidance_scale
 
-    async def validate_input(self, context: "PipelineContext") -> bool:
+    async def validate_input(self, context: PipelineContext) -> bool:
         """Validate source image and instruction are available.
 
         Args:
@@ -137,8 +100,8 @@ class InstructPix2PixStage(PipelineStage):
             raise ValueError(f"Failed to load image from {image_path}: {str(e)}") from e
 
     async def execute_instruct_pix2pix(
-        self, context: "PipelineContext", image_array: np.ndarray, instruction: str
-    ) -> np.ndarray:
+        self, context: PipelineContext, image: ImageBuffer, instruction: str
+    ) -> ImageBuffer:
         """Execute instruction-based image editing.
 
         In production, this would call diffusers InstructPix2PixPipeline.
@@ -146,11 +109,11 @@ class InstructPix2PixStage(PipelineStage):
 
         Args:
             context: Pipeline context.
-            image_array: Image array to edit.
+            image: Image to edit.
             instruction: Text instruction for editing.
 
         Returns:
-            Edited image array.
+            Edited image.
         """
         logger.info(
             "InstructPix2PixStage: Executing instruction-based editing with model=%s, guidance=%.2f, instruction='%s'",
@@ -159,50 +122,12 @@ class InstructPix2PixStage(PipelineStage):
             instruction[:50],  # Log first 50 chars of instruction
         )
 
-        # Mock instruction-based editing: apply subtle color shift based on instruction keywords
-        edited = image_array.astype(np.float32).copy()
-
-        # Parse instruction for common keywords
-        instruction_lower = instruction.lower()
-
-        # Apply mock edits based on instruction keywords
-        if "red" in instruction_lower or "rouge" in instruction_lower:
-            # Enhance red channel
-            edited[:, :, 0] = np.clip(edited[:, :, 0] * 1.2, 0, 255)
-
-        if "blue" in instruction_lower or "bleu" in instruction_lower:
-            # Enhance blue channel
-            edited[:, :, 2] = np.clip(edited[:, :, 2] * 1.2, 0, 255)
-
-        if "green" in instruction_lower or "vert" in instruction_lower:
-            # Enhance green channel
-            edited[:, :, 1] = np.clip(edited[:, :, 1] * 1.2, 0, 255)
-
-        if "bright" in instruction_lower or "clair" in instruction_lower:
-            # Increase brightness
-            edited = np.clip(edited * 1.15, 0, 255)
-
-        if "dark" in instruction_lower or "sombre" in instruction_lower:
-            # Decrease brightness
-            edited = np.clip(edited * 0.85, 0, 255)
-
-        if "saturate" in instruction_lower or "vibrant" in instruction_lower:
-            # Increase saturation (mock)
-            mean = edited.mean(axis=2, keepdims=True)
-            edited = np.clip(mean + (edited - mean) * 1.3, 0, 255)
-
-        # Default: apply subtle guidance-based adjustment
-        if len(instruction) > 0:
-            # Apply guidance-based enhancement (mock: slightly enhance detail)
-            from scipy.ndimage import gaussian_filter
-
-            base = gaussian_filter(edited, sigma=1.0)
-            guidance_factor = min(self.guidance_scale / 10.0, 1.0)  # Normalize to 0-1
-            edited = np.clip(edited + guidance_factor * (edited - base) * 0.5, 0, 255)
-
-        return np.clip(edited, 0, 255).astype(np.uint8)
+        # Mock instruction-based editing: colour shifts keyed on instruction words
+        return await self.run_image(
+            kernels.instruct_edit, image, instruction, self.guidance_scale, shape=image.shape
+        )
 
-    async def execute(self, context: "PipelineContext") -> "PipelineContext":
+    async def execute(self, context: PipelineContext) -> PipelineContext:
         """Execute instruction-based image editing.
 
         Args:
@@ -230,22 +155,25 @@ class InstructPix2PixStage(PipelineStage):
             source_image_path = context.get("source_image_path")
             image_data = context.get("image")
 
-            # Load image from file if path available
-            if source_image_path and Path(source_image_path).exists():
-                image_array = self.load_image_file(source_image_path)
-            elif isinstance(image_data, dict) and "image_path" in image_data:
-                image_array = self.load_image_file(image_data["image_path"])
-            elif isinstance(image_data, dict):
-                # Create mock image from data
-                dims = image_data.get("dimensions", (512, 512))
-                image_array = np.random.randint(50, 200, (*dims, 3), dtype=np.uint8)
-            else:
-                error = "InstructPix2PixStage: Cannot load source image"
-                context.set_error(error)
-                raise ValueError(error)
+            # Use the previous stage's pixels, else load from file if path available
+            image = context.get_image("image")
+            if image is None:
+                if source_image_path and Path(source_image_path).exists():
+                    image = await self.decode_image(source_image_path)
+                elif isinstance(image_data, dict) and "image_path" in image_data:
+                    image = await self.decode_image(image_data["image_path"])
+                elif isinstance(image_data, dict):
+                    # Create mock image from data
+                    dims = image_data.get("dimensions", (512, 512))
+                    image = ImageBuffer(np.random.randint(50, 200, (*dims, 3), dtype=np.uint8))
+                else:
+                    error = "InstructPix2PixStage: Cannot load source image"
+                    context.set_error(error)
+                    raise ValueError(error)
+                context.set_image("image", image)
 
             # Execute instruction-based editing
-            edited_array = await self.execute_instruct_pix2pix(context, image_array, instruction)
+            edited = await self.execute_instruct_pix2pix(context, image, instruction)
 
             # Prepare output path
             if source_image_path:
@@ -255,37 +183,36 @@ class InstructPix2PixStage(PipelineStage):
             else:
                 job_id = context.get("job_id", "unknown")
                 instruct_pix2pix_path = f"artifacts/{job_id}/instruct_pix2pix.png"
+            instruct_pix2pix_path = context.node_path(instruct_pix2pix_path)
 
-            # Save result
-            edited_pil = Image.fromarray(edited_array)
-            Path(instruct_pix2pix_path).parent.mkdir(parents=True, exist_ok=True)
-            edited_pil.save(instruct_pix2pix_path)
+            # Hand off to the next stage; save if final or checkpointed
+            persisted = await self.publish_image(context, edited, instruct_pix2pix_path)
 
             # Update context
             edited_data = {
                 **(image_data or {}),
                 "instruct_pix2pix_applied": True,
                 "instruction": instruction,
-                "dimensions": edited_array.shape[:2][::-1],  # (W, H)
+                "dimensions": edited.shape[:2][::-1],  # (W, H)
             }
 
             context.set("image", edited_data)
-            context.set("instruct_pix2pix_path", instruct_pix2pix_path)
-            context.add_artifact(instruct_pix2pix_path)
+            if persisted:
+                context.set("instruct_pix2pix_path", instruct_pix2pix_path)
 
             # Metadata
-            context.metadata["instruct_pix2pix"] = {
+            context.metadata[context.metadata_key("instruct_pix2pix")] = {
                 "model": self.model_name,
                 "instruction": instruction,
                 "guidance_scale": self.guidance_scale,
                 "image_guidance_scale": self.image_guidance_scale,
-                "output_shape": edited_array.shape,
+                "output_shape": edited.shape,
                 "source_path": source_image_path or "unknown",
             }
 
             logger.info(
-                "InstructPix2PixStage: Completed instruction-based editing, saved to %s",
-                instruct_pix2pix_path,
+                "InstructPix2PixStage: Completed instruction-based editing%s",
+                f", saved to {instruct_pix2pix_path}" if persisted else "",
             )
 
             return context
@@ -293,30 +220,3 @@ class InstructPix2PixStage(PipelineStage):
         except (FileNotFoundError, ValueError):
             raise
 
-
-# Stub PipelineContext class for compatibility when imported independently
-class PipelineContext:
-    """Context object passed through pipeline stages."""
-
-    def __init__(self):
-        """Initialize empty pipeline context."""
-        self.data: dict[str, Any] = {}
-        self.artifacts: list[str] = []
-        self.metadata: dict[str, Any] = {}
-        self.error: str | None = None
-
-    def set(self, key: str, value: Any) -> None:
-        """Store value in context."""
-        self.data[key] = value
-
-    def get(self, key: str, default: Any = None) -> Any:
-        """Retrieve value from context."""
-        return self.data.get(key, default)
-
-    def add_artifact(self, artifact_path: str) -> None:
-        """Add artifact path to list."""
-        self.artifacts.append(artifact_path)
-
-    def set_error(self, error: str) -> None:
-        """Mark context as failed with error message."""
-        self.error = error
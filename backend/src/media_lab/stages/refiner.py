@@ -7,55 +7,17 @@ with configurable denoising strength (diffusers pipeline with mock support).
 import contextlib
 import logging
 from pathlib import Path
-from typing import Any
 
 import numpy as np
 from PIL import Image
 
+from .. import kernels
 from ..lora import LoRAConfig, LoRAManager
+from ..pipeline import ImageBuffer, PipelineContext, PipelineStage
 
 logger = logging.getLogger(__name__)
 
 
-class PipelineStage:
-    """Abstract base class for pipeline stages."""
-
-    def __init__(self, name: str):
-        """Initialize pipeline stage.
-
-        Args:
-            name: Stage name for logging and identification.
-        """
-        self.name = name
-
-    async def execute(self, context: "PipelineContext") -> "PipelineContext":
-        """Execute stage processing.
-
-        Args:
-            context: PipelineContext from previous stage.
-
-        Returns:
-            Updated PipelineContext for next stage.
-
-        Raises:
-            ValueError: If stage validation fails.
-        """
-        raise NotImplementedError
-
-    async def validate_input(self, context: "PipelineContext") -> bool:
-        """Validate stage input requirements.
-
-        Override in subclass for custom validation.
-
-        Args:
-            context: PipelineContext to validate.
-
-        Returns:
-            True if valid, False otherwise.
-        """
-        return True
-
-
 class RefinerStage(PipelineStage):
     """Refine image with high-resolution detail enhancement via img2img.
 
@@ -97,7 +59,7 @@ class RefinerStage(PipelineStage):
         self.loras = loras or []
         self.lora_manager = LoRAManager()
 
-    async def validate_input(self, context: "PipelineContext") -> bool:
+    async def validate_input(self, context: PipelineContext) -> bool:
         """Validate image exists from previous stage.
 
         Args:
@@ -132,8 +94,8 @@ class RefinerStage(PipelineStage):
             raise ValueError(f"Failed to load image from {image_path}: {str(e)}") from e
 
     async def execute_img2img(
-        self, context: "PipelineContext", image_array: np.ndarray
-    ) -> np.ndarray:
+        self, context: PipelineContext, image: ImageBuffer
+    ) -> ImageBuffer:
         """Execute img2img refinement.
 
         In production, this would call diffusers StableDiffusionImg2ImgPipeline.
@@ -141,10 +103,10 @@ class RefinerStage(PipelineStage):
 
         Args:
             context: Pipeline context.
-            image_array: Image array to refine.
+            image: Image to refine.
 
         Returns:
-            Refined image array.
+            Refined image.
         """
         logger.info(
             "RefinerStage: Executing img2img with model=%s, strength=%.2f",
@@ -153,18 +115,11 @@ class RefinerStage(PipelineStage):
         )
 
         # Mock img2img: apply unsharp masking for detail enhancement
-        from scipy.ndimage import gaussian_filter
-
-        # Apply unsharp masking for high-resolution detail enhancement
-        # Lower blur sigma for subtler refinement
-        base = gaussian_filter(image_array.astype(np.float32), sigma=1.0)
-        enhanced = image_array.astype(np.float32) + self.strength * (
-            image_array.astype(np.float32) - base
+        return await self.run_image(
+            kernels.unsharp_mask, image, self.strength, 1.0, shape=image.shape
         )
 
-        return np.clip(enhanced, 0, 255).astype(np.uint8)
-
-    async def execute(self, context: "PipelineContext") -> "PipelineContext":
+    async def execute(self, context: PipelineContext) -> PipelineContext:
         """Execute high-resolution refinement via img2img.
 
         Args:
@@ -198,16 +153,20 @@ class RefinerStage(PipelineStage):
             if isinstance(image_data, dict) and "image_path" in image_data:
                 image_path = image_data["image_path"]
 
-            if image_path and Path(image_path).exists():
-                image_array = self.load_image_file(image_path)
-            elif isinstance(image_data, dict):
-                # Create mock image from data
-                dims = image_data.get("dimensions", (512, 512))
-                image_array = np.random.randint(50, 200, (*dims, 3), dtype=np.uint8)
-            else:
-                error = "RefinerStage: Cannot load source image"
-                context.set_error(error)
-                raise ValueError(error)
+            # Use the previous stage's pixels before falling back to disk
+            image = context.get_image("image")
+            if image is None:
+                if image_path and Path(image_path).exists():
+                    image = await self.decode_image(image_path)
+                elif isinstance(image_data, dict):
+                    # Create mock image from data
+                    dims = image_data.get("dimensions", (512, 512))
+                    image = ImageBuffer(np.random.randint(50, 200, (*dims, 3), dtype=np.uint8))
+                else:
+                    error = "RefinerStage: Cannot load source image"
+                    context.set_error(error)
+                    raise ValueError(error)
+                context.set_image("image", image)
 
             # Get strength from context (allows per-call override) or use default
             strength = context.get("strength", self.strength)
@@ -219,7 +178,7 @@ class RefinerStage(PipelineStage):
                 raise ValueError(error)
 
             # Execute img2img refinement
-            refined_array = await self.execute_img2img(context, image_array)
+            refined = await self.execute_img2img(context, image)
 
             # Prepare output path
             if image_path:
@@ -227,35 +186,34 @@ class RefinerStage(PipelineStage):
             else:
                 job_id = context.get("job_id", "unknown")
                 refined_path = f"artifacts/{job_id}/refined.png"
+            refined_path = context.node_path(refined_path)
 
-            # Save result
-            refined_pil = Image.fromarray(refined_array)
-            Path(refined_path).parent.mkdir(parents=True, exist_ok=True)
-            refined_pil.save(refined_path)
+            # Hand off to the next stage; save if final or checkpointed
+            persisted = await self.publish_image(context, refined, refined_path)
 
             # Update context
             refined_data = {
                 **image_data,
                 "refinement_level": 1,
                 "high_res_fix": True,
-                "dimensions": refined_array.shape[:2][::-1],  # (W, H)
+                "dimensions": refined.shape[:2][::-1],  # (W, H)
             }
 
             context.set("image", refined_data)
-            context.set("refined_path", refined_path)
-            context.add_artifact(refined_path)
+            if persisted:
+                context.set("refined_path", refined_path)
 
             # Metadata
-            context.metadata["refiner"] = {
+            context.metadata[context.metadata_key("refiner")] = {
                 "model": self.model_name,
                 "strength": strength,
-                "output_shape": refined_array.shape,
+                "output_shape": refined.shape,
                 "high_res_fix": True,
             }
 
             logger.info(
-                "RefinerStage: Completed high-resolution refinement, saved to %s",
-                refined_path,
+                "RefinerStage: Completed high-resolution refinement%s",
+                f", saved to {refined_path}" if persisted else "",
             )
 
             return context
@@ -265,30 +223,3 @@ class RefinerStage(PipelineStage):
                 with contextlib.suppress(ValueError, RuntimeError):
                     self.lora_manager.unload_loras(model)
 
-
-# Stub PipelineContext class for compatibility when imported independently
-class PipelineContext:
-    """Context object passed through pipeline stages."""
-
-    def __init__(self):
-        """Initialize empty pipeline context."""
-        self.data: dict[str, Any] = {}
-        self.artifacts: list[str] = []
-        self.metadata: dict[str, Any] = {}
-        self.error: str | None = None
-
-    def set(self, key: str, value: Any) -> None:
-        """Store value in context."""
-        self.data[key] = value
-
-    def get(self, key: str, default: Any = None) -> Any:
-        """Retrieve value from context."""
-        return self.data.get(key, default)
-
-    def add_artifact(self, artifact_path: str) -> None:
-        """Add artifact path to list."""
-        self.artifacts.append(artifact_path)
-
-    def set_error(self, error: str) -> None:
-        """Mark context as failed with error message."""
-        self.error = error
@@ -10,9 +10,9 @@ import logging
 import random
 from typing import Any
 
+from src.media_lab.dag import DagPipeline, PipelineNode
 from src.media_lab.pipeline import (
     DetailerStage,
-    Pipeline,
     PipelineContext,
     RefinerStage,
     TextToImageStage,
@@ -40,7 +40,7 @@ class Workbench:
             config: PipelineConfig defining stages and parameters.
         """
         self.config = config
-        self.pipeline: Pipeline | None = None
+        self.pipeline: DagPipeline | None = None
         self.context: PipelineContext | None = None
         self.checkpoint_artifacts: dict[str, dict[int, str]] = {}
         logger.info("Workbench initialized with %d stages", len(config.stages))
@@ -48,21 +48,36 @@ class Workbench:
     async def setup(self) -> None:
         """Setup pipeline from configuration.
 
-        Builds pipeline stages in order based on config.
+        Builds the stage graph from config. Stages wired with ``inputs`` form
+        a DAG; when no stage lists inputs they run as a chain in list order.
 
         Raises:
             ValueError: If stage type is unknown or config is invalid.
         """
         logger.info("Setting up pipeline with %d stages", len(self.config.stages))
-        stages = []
+        nodes = []
+        is_graph = any(stage_cfg.inputs for stage_cfg in self.config.stages)
 
-        for stage_cfg in self.config.stages:
+        for index, stage_cfg in enumerate(self.config.stages):
             stage = self._build_stage(stage_cfg)
-            stages.append(stage)
-            logger.debug("Added stage: %s", stage.name)
+            node_id = stage_cfg.id or f"{stage_cfg.stage_type}_{index}"
+            if is_graph:
+                inputs = list(stage_cfg.inputs)
+            else:
+                inputs = [nodes[-1].id] if nodes else []
+            nodes.append(
+                PipelineNode(
+                    id=node_id,
+                    stage=stage,
+                    inputs=inputs,
+                    outputs=list(stage_cfg.outputs),
+                    index=index,
+                )
+            )
+            logger.debug("Added stage: %s (%s)", stage.name, node_id)
 
-        self.pipeline = Pipeline(stages)
-        logger.info("Pipeline setup complete with %d stages", len(stages))
+        self.pipeline = DagPipeline(nodes)
+        logger.info("Pipeline setup complete with %d stages", len(nodes))
 
     def _build_stage(self, stage_cfg: StageConfig) -> Any:
         """Build a single pipeline stage from configuration.
@@ -107,9 +122,13 @@ class Workbench:
         Lifecycle:
         1. Setup pipeline from config
         2. Initialize context with input data
-        3. Run pipeline stages sequentially (batch_size times if batch_size > 1)
+        3. Run each stage once over all batch_size items, independent
+           branches concurrently (see DagPipeline.execute_batch)
         4. Return results and artifacts
 
+        A failing batch item does not stop the others; execution succeeds if
+        any item does, and failed items are listed in metadata['batch_failures'].
+
         Args:
             input_data: Input data for pipeline (e.g., prompt, seed, model).
             job_id: Job identifier for artifact paths.
@@ -119,7 +138,7 @@ class Workbench:
                 - 'success': bool, whether execution succeeded
                 - 'data': final context.data
                 - 'artifacts': list of artifact paths (multiple if batch_size > 1)
-                - 'metadata': stage metadata
+                - 'metadata': stage metadata, plus 'dag' stage timings and critical path
                 - 'error': error message if failed
 
         Raises:
@@ -152,73 +171,82 @@ class Workbench:
             # Merge input data and pipeline parameters
             merged_data = {**self.config.parameters, **input_data}
 
-            # Execute pipeline batch_size times
-            batch_artifacts = []
-            for batch_idx in range(self.config.batch_size):
-                logger.info("Executing batch %d/%d for job_id=%s", batch_idx + 1, self.config.batch_size, job_id)
+            if self.pipeline is None:
+                raise ValueError("Pipeline not initialized")
 
-                # Create fresh context for each batch iteration
-                self.context = PipelineContext()
-                self.context.set("job_id", job_id)
+            # Build one context per batch item: its own seed, shared parameters
+            contexts = []
+            for batch_idx in range(self.config.batch_size):
+                context = PipelineContext()
+                context.set("job_id", job_id)
                 # Add batch index to job_id for unique artifact paths
-                self.context.set("batch_idx", batch_idx)
+                context.set("batch_idx", batch_idx)
 
-                # Calculate seed for this iteration
+                # Calculate seed for this item
                 if self.config.seed == -1:
-                    # If seed was random, generate new random seed each iteration
-                    iteration_seed = random.randint(0, 2**32 - 1)
+                    # If seed was random, generate new random seed for each item
+                    item_seed = random.randint(0, 2**32 - 1)
                 else:
-                    # If seed was fixed, increment it for each iteration
-                    iteration_seed = base_seed + batch_idx
+                    # If seed was fixed, increment it for each item
+                    item_seed = base_seed + batch_idx
 
-                self.context.set("seed", iteration_seed)
-                self.context.set("sampler", self.config.sampler)
-                self.context.set("scheduler", self.config.scheduler)
+                if self.config.checkpoint_stages is not None:
+                    context.checkpoint_stages = set(self.config.checkpoint_stages)
+                context.set("seed", item_seed)
+                context.set("sampler", self.config.sampler)
+                context.set("scheduler", self.config.scheduler)
 
                 if self.config.source_image_path:
-                    self.context.set("source_image_path", self.config.source_image_path)
-                self.context.set("strength", self.config.strength)
+                    context.set("source_image_path", self.config.source_image_path)
+                context.set("strength", self.config.strength)
 
                 for key, value in merged_data.items():
-                    self.context.set(key, value)
+                    context.set(key, value)
 
-                logger.debug("Context batch %d initialized with seed=%d", batch_idx, iteration_seed)
+                logger.debug("Context batch %d initialized with seed=%d", batch_idx, item_seed)
+                contexts.append(context)
 
-                # Execute pipeline
-                if self.pipeline is None:
-                    raise ValueError("Pipeline not initialized")
+            # Run each stage once over the whole batch; failures stay per item
+            logger.info("Executing pipeline for %d item(s), job_id=%s", len(contexts), job_id)
+            contexts = await self.pipeline.execute_batch(contexts)
 
-                logger.info("Executing pipeline for batch %d, job_id=%s", batch_idx, job_id)
-                self.context = await self.pipeline.execute(self.context)
-
-                if not self.context.error:
-                    logger.info("Pipeline execution completed for batch %d", batch_idx)
-                    # Collect artifacts from this batch iteration
-                    batch_artifacts.extend(self.context.artifacts)
+            batch_artifacts = []
+            stage_artifacts: dict[int, str] = {}
+            batch_failures: dict[int, str] = {}
+            for batch_idx, context in enumerate(contexts):
+                if not context.error:
+                    batch_artifacts.extend(context.artifacts)
+                    stage_artifacts.update(context.stage_artifacts)
                 else:
-                    logger.error("Pipeline batch %d failed: %s", batch_idx, self.context.error)
-                    # Continue with next iteration even if one fails (partial success)
-
-                # Clear CUDA cache between iterations if available
-                try:
-                    import torch
-                    torch.cuda.empty_cache()
-                    logger.debug("CUDA cache cleared after batch %d", batch_idx)
-                except Exception:
-                    pass  # Not using CUDA or torch not available
-
-            # Store checkpoints: map stage index to artifact paths
-            if job_id and batch_artifacts:
+                    logger.error("Pipeline batch %d failed: %s", batch_idx, context.error)
+                    batch_failures[batch_idx] = context.error
+                # Final and checkpointed images are on disk by now
+                context.release_images()
+
+            # Clear CUDA cache once the batch is done, if available
+            try:
+                import torch
+                torch.cuda.empty_cache()
+                logger.debug("CUDA cache cleared after batch")
+            except Exception:
+                pass  # Not using CUDA or torch not available
+
+            # Store checkpoints: map stage index to the artifact it persisted
+            if job_id and stage_artifacts:
                 if job_id not in self.checkpoint_artifacts:
                     self.checkpoint_artifacts[job_id] = {}
-                
-                for stage_idx, artifact_path in enumerate(batch_artifacts):
+
+                for stage_idx, artifact_path in stage_artifacts.items():
                     self.checkpoint_artifacts[job_id][stage_idx] = artifact_path
-                    logger.debug("Stored checkpoint for job_id=%s, artifact_index=%d: %s",
+                    logger.debug("Stored checkpoint for job_id=%s, stage_index=%d: %s",
                                job_id, stage_idx, artifact_path)
 
-            # Set final artifacts list
+            # Report the last item that succeeded, or the last failure if none did
+            succeeded = [context for context in contexts if not context.error]
+            self.context = succeeded[-1] if succeeded else contexts[-1]
             self.context.artifacts = batch_artifacts
+            if batch_failures:
+                self.context.metadata["batch_failures"] = batch_failures
 
             # Teardown and collect results
             return self._teardown(used_seed=base_seed if self.config.seed != -1 else None)
@@ -254,12 +282,17 @@ class Workbench:
 
         logger.info("Teardown: collecting %d artifacts", len(self.context.artifacts))
 
+        metadata = self.context.metadata
+        if self.pipeline is not None and self.pipeline.timings:
+            # Per-stage timings and critical path of the stage graph
+            metadata = {**metadata, "dag": self.pipeline.report()}
+
         success = self.context.error is None
         return {
             "success": success,
             "data": self.context.data,
             "artifacts": self.context.artifacts,
-            "metadata": self.context.metadata,
+            "metadata": metadata,
             "error": self.context.error,
             "used_seed": used_seed,
         }
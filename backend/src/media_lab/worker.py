@@ -1,16 +1,36 @@
 """Media processing worker runtime.
 
 Executes queued jobs with support for dispatch to workflow-specific handlers,
-progress tracking, and cancellation checkpoints.
+progress tracking, and cancellation checkpoints. ``WorkerPool`` runs several
+jobs concurrently on one event loop, with per-workflow limits, and sleeps
+until the queue signals new work. ``StoreWorker`` does the same for jobs in
+the durable JobStore, holding each one under a heartbeat-renewed lease.
 """
 
 import asyncio
 import contextlib
+import logging
+import os
+import socket
 from abc import ABC, abstractmethod
+from collections import Counter
+from itertools import count
 
+from ..db.db_models import MediaJob
 from .executor import JobExecutor, JobStatus
+from .job_store import COMPLETED, FAILED, PENDING, JobOutcome, JobStore, to_task
 from .queue import JobQueue, JobTask
 
+logger = logging.getLogger(__name__)
+
+# Artifact type stored for each workflow's output
+ARTIFACT_TYPES = {
+    "enhance": "enhanced_image",
+    "interpolate": "interpolated_video",
+    "generate": "generated_image",
+    "blend": "blended_image",
+}
+
 
 class WorkflowDispatcher(ABC):
     """Base interface for workflow-specific handlers."""
@@ -115,6 +135,23 @@ class BlendDispatcher(WorkflowDispatcher):
         }
 
 
+def build_dispatchers(executor: JobExecutor) -> dict[str, WorkflowDispatcher]:
+    """Create the handler for every supported workflow.
+
+    Args:
+        executor: JobExecutor used by the interpolation handler.
+
+    Returns:
+        Dispatchers keyed by workflow type.
+    """
+    return {
+        "enhance": EnhanceDispatcher(),
+        "interpolate": InterpolateDispatcher(executor),
+        "generate": GenerateDispatcher(),
+        "blend": BlendDispatcher(),
+    }
+
+
 class MediaWorker:
     """Worker process for executing queued media jobs."""
 
@@ -127,13 +164,10 @@ class MediaWorker:
         """
         self.queue = queue
         self.executor = executor
-        self._running = False
-        self.dispatchers = {
-            "enhance": EnhanceDispatcher(),
-            "interpolate": InterpolateDispatcher(executor),
-            "generate": GenerateDispatcher(),
-            "blend": BlendDispatcher(),
-        }
+        self._pool: WorkerPool | None = None
+        # Reused by process_one so each job does not pay for a new event loop
+        self._runner: asyncio.Runner | None = None
+        self.dispatchers = build_dispatchers(executor)
 
     async def run_job(self, task: JobTask) -> bool:
         """Execute a single job with lifecycle management.
@@ -172,16 +206,12 @@ class MediaWorker:
             return True
 
         except Exception:
-            if task.retry_count < task.max_retries:
-                task.retry_count += 1
+            # Retries wait out an exponential backoff instead of re-running at once
+            if self.queue.retry(task):
+                # reset_for_retry only accepts FAILED jobs
+                self.executor.transition(job_id, JobStatus.FAILED)
                 self.executor.reset_for_retry(job_id)
                 self.queue.notify_status_change(job_id, JobStatus.QUEUED)
-                self.queue.enqueue(
-                    job_id,
-                    task.character_id,
-                    task.workflow_type,
-                    task.parameters,
-                )
                 return False
 
             self.executor.transition(job_id, JobStatus.FAILED)
@@ -198,8 +228,10 @@ class MediaWorker:
         if not task:
             return False
 
+        if self._runner is None:
+            self._runner = asyncio.Runner()
         with contextlib.suppress(Exception):
-            asyncio.run(self.run_job(task))
+            self._runner.run(self.run_job(task))
 
         self.queue.mark_complete(task.job_id)
         return True
@@ -207,20 +239,381 @@ class MediaWorker:
     async def run(self, poll_interval: float = 1.0) -> None:
         """Run worker event loop.
 
-        Continuously polls queue and executes jobs until stopped.
+        Executes jobs one at a time until stopped, sleeping while the queue
+        is empty. Use WorkerPool directly to run jobs concurrently.
+
+        Args:
+            poll_interval: Upper bound in seconds on any idle wait.
+        """
+        self._pool = WorkerPool(self, concurrency=1, max_idle=poll_interval)
+        await self._pool.run()
+
+    def stop(self) -> None:
+        """Stop the worker event loop once the current job finishes."""
+        if self._pool is not None:
+            self._pool.stop()
+
+    def close(self) -> None:
+        """Release the event loop used by process_one."""
+        if self._runner is not None:
+            self._runner.close()
+            self._runner = None
+
+
+class WorkerPool:
+    """Runs queued jobs concurrently as asyncio tasks on one event loop."""
+
+    def __init__(
+        self,
+        worker: MediaWorker,
+        concurrency: int = 4,
+        workflow_limits: dict[str, int] | None = None,
+        max_idle: float | None = None,
+        drain_timeout: float | None = None,
+    ):
+        """Initialize pool around a worker's queue, executor and dispatchers.
+
+        Args:
+            worker: MediaWorker whose run_job executes each job.
+            concurrency: Maximum jobs running at once.
+            workflow_limits: Maximum concurrent jobs per workflow type, e.g.
+                {"interpolate": 1} so long interpolations leave room for
+                enhancements. Workflows not listed share the overall limit.
+            max_idle: Upper bound in seconds on any idle wait, as a safety
+                net; None waits for the queue's wakeup signal alone.
+            drain_timeout: Seconds to wait for in-flight jobs on shutdown
+                before cancelling and requeueing them; None waits for all.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.worker = worker
+        self.queue = worker.queue
+        self.concurrency = concurrency
+        self.workflow_limits = dict(workflow_limits or {})
+        self.max_idle = max_idle
+        self.drain_timeout = drain_timeout
+
+        self._active: Counter[str] = Counter()
+        self._tasks: dict[asyncio.Task, JobTask] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._stopping = False
+
+    @property
+    def in_flight(self) -> int:
+        """Number of jobs currently running."""
+        return len(self._tasks)
+
+    def _on_ready(self) -> None:
+        """Queue callback: wake the scheduler (safe from any thread)."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            with contextlib.suppress(RuntimeError):
+                loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def run(self) -> None:
+        """Schedule jobs until stop() is called, then drain in-flight jobs."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        # Registered per run so finished pools do not pile up on the queue
+        self.queue.register_ready_callback(self._on_ready)
+        try:
+            while not self._stopping:
+                self._wakeup.clear()
+                self._fill()
+                timeout = self._idle_timeout()
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+        finally:
+            await self._drain()
+            self.queue.unregister_ready_callback(self._on_ready)
+            self._loop = None
+
+    def stop(self) -> None:
+        """Stop taking new jobs; run() returns once in-flight jobs finish."""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _fill(self) -> None:
+        """Start jobs until every slot is busy or nothing admissible is ready."""
+        while len(self._tasks) < self.concurrency:
+            saturated = [
+                workflow
+                for workflow, limit in self.workflow_limits.items()
+                if self._active[workflow] >= limit
+            ]
+            task = self.queue.dequeue(skip_workflows=saturated)
+            if task is None:
+                return
+            self._start(task)
+
+    def _start(self, task: JobTask) -> None:
+        self._active[task.workflow_type] += 1
+        job = asyncio.create_task(self.worker.run_job(task), name=f"media-job-{task.job_id}")
+        self._tasks[job] = task
+        job.add_done_callback(self._finished)
+
+    def _finished(self, job: asyncio.Task) -> None:
+        task = self._tasks.pop(job)
+        self._active[task.workflow_type] -= 1
+        self.queue.mark_complete(task.job_id)
+        if job.cancelled():
+            # Interrupted by shutdown: hand the job back rather than lose it
+            self.worker.executor.create_job(task.job_id)
+            self.queue.enqueue(
+                task.job_id,
+                task.character_id,
+                task.workflow_type,
+                task.parameters,
+                priority=task.priority,
+                max_retries=task.max_retries,
+            )
+            self.queue.notify_status_change(task.job_id, JobStatus.QUEUED)
+        else:
+            # run_job handles dispatcher errors; anything else is dropped as in process_one
+            job.exception()
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _idle_timeout(self) -> float | None:
+        """How long to sleep when no further job can be started now."""
+        wait = None
+        if len(self._tasks) < self.concurrency:
+            ready_in = self.queue.next_ready_in()
+            # 0.0 means ready jobs are held back by workflow limits; a finishing
+            # job wakes the pool
+            if ready_in:
+                wait = ready_in
+        if self.max_idle is not None:
+            wait = self.max_idle if wait is None else min(wait, self.max_idle)
+        return wait
+
+    async def _drain(self) -> None:
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(list(self._tasks), timeout=self.drain_timeout)
+        for job in pending:
+            job.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+
+_worker_ids = count()
+
+
+class StoreWorker:
+    """Runs jobs from the durable JobStore concurrently on one event loop.
+
+    Each job is claimed under a lease. A heartbeat renews the leases while
+    jobs run; a job missing from the heartbeat's answer was cancelled or
+    lost its lease and is abandoned. Outcomes go back to the store under the
+    same worker id, batched: jobs that finish while a write is in flight are
+    settled together in the next transaction. Store calls block on SQLite,
+    so they run in a thread.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        executor: JobExecutor | None = None,
+        worker_id: str | None = None,
+        concurrency: int = 4,
+        workflow_limits: dict[str, int] | None = None,
+        poll_interval: float = 1.0,
+        heartbeat_interval: float | None = None,
+        drain_timeout: float | None = None,
+    ):
+        """Initialize the worker.
 
         Args:
-            poll_interval: Seconds between queue polls.
+            store: JobStore to claim jobs from.
+            executor: JobExecutor for the interpolation handler.
+            worker_id: Lease owner id; defaults to host:pid:n.
+            concurrency: Maximum jobs running at once.
+            workflow_limits: Maximum concurrent jobs per workflow type.
+            poll_interval: Seconds between claim attempts while idle.
+            heartbeat_interval: Seconds between lease renewals; defaults to a
+                third of the store's lease.
+            drain_timeout: Seconds to wait for in-flight jobs on shutdown
+                before cancelling them and handing them back; None waits for all.
         """
-        self._running = True
-        while self._running:
-            task = self.queue.dequeue()
-            if task:
-                await self.run_job(task)
-                self.queue.mark_complete(task.job_id)
-            else:
-                await asyncio.sleep(poll_interval)
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.store = store
+        self.dispatchers = build_dispatchers(executor or JobExecutor())
+        self.worker_id = worker_id or (
+            f"{socket.gethostname()}:{os.getpid()}:{next(_worker_ids)}"
+        )
+        self.concurrency = concurrency
+        self.workflow_limits = dict(workflow_limits or {})
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval or store.lease.total_seconds() / 3
+        self.drain_timeout = drain_timeout
+
+        self._active: Counter[str] = Counter()
+        self._tasks: dict[asyncio.Task, MediaJob] = {}
+        # Jobs whose lease is gone; their results must not be written back
+        self._abandoned: set[str] = set()
+        self._wakeup: asyncio.Event | None = None
+        self._stopping = False
+        # Outcomes waiting for the next batched write, and the task writing them
+        self._outcomes: list[tuple[JobOutcome, asyncio.Future]] = []
+        self._writer: asyncio.Task | None = None
+
+    @property
+    def in_flight(self) -> int:
+        """Number of jobs currently running."""
+        return len(self._tasks)
+
+    async def run(self) -> None:
+        """Claim and run jobs until stop() is called, then drain in-flight jobs."""
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        heartbeat = asyncio.create_task(self._heartbeat_loop())
+        try:
+            while not self._stopping:
+                self._wakeup.clear()
+                await self._fill()
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+        finally:
+            await self._drain()
+            if self._writer is not None:
+                await self._writer
+            heartbeat.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await heartbeat
 
     def stop(self) -> None:
-        """Stop the worker event loop."""
-        self._running = False
+        """Stop claiming new jobs; run() returns once in-flight jobs finish."""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _fill(self) -> None:
+        """Claim jobs until every slot is busy or nothing admissible is ready."""
+        while len(self._tasks) < self.concurrency and not self._stopping:
+            workflows = [
+                workflow
+                for workflow in self.dispatchers
+                if self._active[workflow] < self.workflow_limits.get(workflow, self.concurrency)
+            ]
+            if not workflows:
+                return
+            job = await asyncio.to_thread(self.store.claim, self.worker_id, workflows)
+            if job is None:
+                return
+            self._active[job.workflow_type] += 1
+            task = asyncio.create_task(self.run_job(job), name=f"media-job-{job.id}")
+            self._tasks[task] = job
+            task.add_done_callback(self._finished)
+
+    async def run_job(self, job: MediaJob) -> bool:
+        """Execute one claimed job and record its outcome in the store.
+
+        Validation errors (ValueError) fail the job outright, as on the API's
+        inline path; other errors use the store's retry backoff.
+
+        Args:
+            job: Job claimed by this worker.
+
+        Returns:
+            True if the job completed.
+        """
+        dispatcher = self.dispatchers.get(job.workflow_type)
+        if dispatcher is None:
+            error = f"Unknown workflow: {job.workflow_type}"
+            await self._settle(JobOutcome(job.id, FAILED, error, retry=False))
+            return False
+
+        try:
+            result = await dispatcher.execute(to_task(job))
+        except asyncio.CancelledError:
+            if job.id not in self._abandoned:
+                # Interrupted by shutdown: hand the job back rather than lose it
+                await self._settle(JobOutcome(job.id, PENDING))
+            raise
+        except ValueError as e:
+            await self._settle(JobOutcome(job.id, FAILED, str(e), retry=False))
+            return False
+        except Exception as e:
+            logger.exception("Media job %s failed", job.id)
+            await self._settle(JobOutcome(job.id, FAILED, str(e)))
+            return False
+
+        if job.id in self._abandoned:
+            return False
+        metadata = result.get("metadata")
+        artifact = {
+            "artifact_type": ARTIFACT_TYPES.get(job.workflow_type, job.workflow_type),
+            "file_path": result["artifact_path"],
+            "metadata": metadata if isinstance(metadata, dict) else {"description": metadata},
+        }
+        return await self._settle(JobOutcome(job.id, COMPLETED, artifact=artifact)) is not None
+
+    async def _settle(self, outcome: JobOutcome) -> MediaJob | None:
+        """Queue a job's outcome for the next batched write and wait for it.
+
+        The wait is shielded so a shutdown cannot lose the outcome midway.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._outcomes.append((outcome, future))
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_outcomes())
+        return await asyncio.shield(future)
+
+    async def _write_outcomes(self) -> None:
+        """Settle queued outcomes, one store transaction per batch."""
+        while self._outcomes:
+            batch, self._outcomes = self._outcomes, []
+            outcomes = [outcome for outcome, _ in batch]
+            try:
+                jobs = await asyncio.to_thread(self.store.settle, self.worker_id, outcomes)
+            except Exception as e:
+                logger.exception("Settling %d media jobs failed", len(batch))
+                jobs = [e] * len(batch)
+            for (_, future), job in zip(batch, jobs, strict=True):
+                if isinstance(job, Exception):
+                    future.set_exception(job)
+                else:
+                    future.set_result(job)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        job = self._tasks.pop(task)
+        self._active[job.workflow_type] -= 1
+        self._abandoned.discard(job.id)
+        if not task.cancelled():
+            # run_job records dispatcher errors; anything else is logged here
+            error = task.exception()
+            if error is not None:
+                logger.error("Media job %s crashed: %s", job.id, error)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _heartbeat_loop(self) -> None:
+        """Renew leases and abandon jobs the store no longer assigns to us."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not self._tasks:
+                continue
+            try:
+                held = await asyncio.to_thread(self.store.heartbeat, self.worker_id)
+            except Exception:
+                logger.exception("Heartbeat for worker %s failed", self.worker_id)
+                continue
+            for task, job in list(self._tasks.items()):
+                if job.id not in held and not task.done():
+                    # Cancelled by a user, or the lease lapsed and another worker may hold it
+                    self._abandoned.add(job.id)
+                    task.cancel()
+
+    async def _drain(self) -> None:
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(list(self._tasks), timeout=self.drain_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
@@ -447,6 +447,12 @@ class StageConfig(BaseModel):
     name: str | None = None
     parameters: dict = Field(default_factory=dict)
     loras: list["LoRAConfig"] = Field(default_factory=list)
+    # DAG wiring: ids of the stages this one consumes. When no stage lists
+    # inputs, stages run as a chain in list order.
+    id: str | None = None
+    inputs: list[str] = Field(default_factory=list)
+    # Context keys passed on to dependent stages (empty: all keys)
+    outputs: list[str] = Field(default_factory=list)
 
 
 class LoRAConfig(BaseModel):
@@ -470,6 +476,8 @@ class PipelineConfig(BaseModel):
     instruction: str | None = None
     mask_path: str | None = None
     strength: float = Field(default=0.75, ge=0.0, le=1.0)
+    # Stage indices written to disk besides the final stage; None writes every stage
+    checkpoint_stages: list[int] | None = None
     sampler: str = Field(
         default="euler",
         pattern="^(euler|euler_ancestral|heun|dpm_2|dpm_2_ancestral|lms|ddim|pndm|ddpm)$"
@@ -0,0 +1,264 @@
+"""
+Graph-backed reachability and cycle detection for temporal/causal facts.
+
+Strongly connected components are found with an iterative Tarjan's algorithm
+(no recursion, so long causal chains cannot overflow the stack). The graph is
+then condensed into a DAG of components whose transitive closure is stored as
+integer bitsets, one per component, so reachability queries are a single
+bit test.
+"""
+
+from collections.abc import Hashable, Iterable, Iterator
+
+
+class CausalGraph:
+    """
+    Directed graph over hashable node ids with SCC condensation.
+
+    Nodes are interned to dense integer indices on insertion. Derived
+    structures (components, closure) are computed lazily and discarded
+    whenever the graph is mutated.
+    """
+
+    def __init__(self, edges: Iterable[tuple[Hashable, Hashable]] | None = None):
+        self._index: dict[Hashable, int] = {}
+        self._nodes: list[Hashable] = []
+        self._succ: list[list[int]] = []
+        self._edge_set: set[tuple[int, int]] = set()
+
+        self._components: list[list[int]] | None = None
+        self._component_of: list[int] | None = None
+        self._closure: list[int] | None = None
+
+        if edges is not None:
+            for source, target in edges:
+                self.add_edge(source, target)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node: Hashable) -> bool:
+        return node in self._index
+
+    @property
+    def nodes(self) -> list[Hashable]:
+        """All node ids in insertion order."""
+        return list(self._nodes)
+
+    def add_node(self, node: Hashable) -> int:
+        """Add a node (idempotent) and return its dense index."""
+        idx = self._index.get(node)
+        if idx is None:
+            idx = len(self._nodes)
+            self._index[node] = idx
+            self._nodes.append(node)
+            self._succ.append([])
+            self._invalidate()
+        return idx
+
+    def add_edge(self, source: Hashable, target: Hashable) -> None:
+        """Add a directed edge; duplicate edges are ignored."""
+        u = self.add_node(source)
+        v = self.add_node(target)
+        if (u, v) in self._edge_set:
+            return
+        self._edge_set.add((u, v))
+        self._succ[u].append(v)
+        self._invalidate()
+
+    def has_edge(self, source: Hashable, target: Hashable) -> bool:
+        """Check whether a direct edge exists."""
+        u = self._index.get(source)
+        v = self._index.get(target)
+        return u is not None and v is not None and (u, v) in self._edge_set
+
+    def _invalidate(self) -> None:
+        self._components = None
+        self._component_of = None
+        self._closure = None
+
+    def _tarjan(self) -> None:
+        """
+        Compute SCCs with an iterative Tarjan's algorithm.
+
+        Components are emitted in reverse topological order of the condensed
+        DAG: every component appears after all components it can reach.
+        """
+        n = len(self._nodes)
+        succ = self._succ
+        index = [-1] * n
+        lowlink = [0] * n
+        on_stack = [False] * n
+        stack: list[int] = []
+        components: list[list[int]] = []
+        component_of = [-1] * n
+        counter = 0
+
+        for root in range(n):
+            if index[root] != -1:
+                continue
+
+            # Each frame is (node, position of next successor to visit)
+            work: list[tuple[int, int]] = [(root, 0)]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+
+            while work:
+                node, pos = work[-1]
+                neighbors = succ[node]
+
+                if pos < len(neighbors):
+                    work[-1] = (node, pos + 1)
+                    nxt = neighbors[pos]
+                    if index[nxt] == -1:
+                        index[nxt] = lowlink[nxt] = counter
+                        counter += 1
+                        stack.append(nxt)
+                        on_stack[nxt] = True
+                        work.append((nxt, 0))
+                    elif on_stack[nxt] and index[nxt] < lowlink[node]:
+                        lowlink[node] = index[nxt]
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+
+                if lowlink[node] == index[node]:
+                    component: list[int] = []
+                    comp_id = len(components)
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component_of[member] = comp_id
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+        self._components = components
+        self._component_of = component_of
+
+    def _ensure_components(self) -> tuple[list[list[int]], list[int]]:
+        if self._components is None or self._component_of is None:
+            self._tarjan()
+        assert self._components is not None and self._component_of is not None
+        return self._components, self._component_of
+
+    def _is_cyclic_component(self, component: list[int]) -> bool:
+        if len(component) > 1:
+            return True
+        node = component[0]
+        return (node, node) in self._edge_set
+
+    def _ensure_closure(self) -> list[int]:
+        """
+        Build the bitset transitive closure of the condensed DAG.
+
+        Bit ``d`` of ``closure[c]`` is set when component ``d`` is reachable
+        from component ``c`` by a path of at least one edge. Because Tarjan
+        emits components in reverse topological order, every successor's
+        closure is final before it is folded into its predecessors.
+        """
+        if self._closure is not None:
+            return self._closure
+
+        components, component_of = self._ensure_components()
+        closure = [0] * len(components)
+
+        for comp_id, component in enumerate(components):
+            bits = 1 << comp_id if self._is_cyclic_component(component) else 0
+            for node in component:
+                for nxt in self._succ[node]:
+                    target = component_of[nxt]
+                    if target != comp_id:
+                        bits |= (1 << target) | closure[target]
+            closure[comp_id] = bits
+
+        self._closure = closure
+        return closure
+
+    def strongly_connected_components(self) -> list[list[Hashable]]:
+        """Return every SCC (including singletons) in reverse topological order."""
+        components, _ = self._ensure_components()
+        return [[self._nodes[i] for i in component] for component in components]
+
+    def cycles(self) -> list[list[Hashable]]:
+        """
+        Return each cyclic component exactly once.
+
+        A component is cyclic if it has more than one node, or a single node
+        with a self-loop. Members are sorted for stable reporting.
+        """
+        components, _ = self._ensure_components()
+        return [
+            sorted((self._nodes[i] for i in component), key=str)
+            for component in components
+            if self._is_cyclic_component(component)
+        ]
+
+    def is_acyclic(self) -> bool:
+        """Check whether the graph has no cycles."""
+        components, _ = self._ensure_components()
+        return not any(self._is_cyclic_component(c) for c in components)
+
+    def reachable(self, source: Hashable, target: Hashable) -> bool:
+        """
+        Check whether ``target`` is reachable from ``source`` via one or more edges.
+
+        A node only reaches itself if it lies on a cycle.
+        """
+        u = self._index.get(source)
+        v = self._index.get(target)
+        if u is None or v is None:
+            return False
+        closure = self._ensure_closure()
+        _, component_of = self._ensure_components()
+        return bool(closure[component_of[u]] >> component_of[v] & 1)
+
+    def descendants(self, source: Hashable) -> set[Hashable]:
+        """Return all nodes reachable from ``source`` via one or more edges."""
+        u = self._index.get(source)
+        if u is None:
+            return set()
+        closure = self._ensure_closure()
+        components, component_of = self._ensure_components()
+        return {
+            self._nodes[node]
+            for comp_id in _iter_bits(closure[component_of[u]])
+            for node in components[comp_id]
+        }
+
+    def reachable_pairs(self) -> Iterator[tuple[Hashable, Hashable]]:
+        """
+        Yield every ``(source, target)`` pair in the transitive closure.
+
+        Self pairs are omitted even for nodes on cycles; use :meth:`cycles`
+        to report those.
+        """
+        closure = self._ensure_closure()
+        components, _ = self._ensure_components()
+
+        for comp_id, component in enumerate(components):
+            targets = [
+                node for target in _iter_bits(closure[comp_id]) for node in components[target]
+            ]
+            if not targets:
+                continue
+            for source in component:
+                source_id = self._nodes[source]
+                for target in targets:
+                    if target != source:
+                        yield source_id, self._nodes[target]
+
+
+def _iter_bits(bits: int) -> Iterator[int]:
+    """Yield the positions of set bits in ascending order."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
@@ -0,0 +1,271 @@
+"""
+Sharded dangling-reference validation for large claim sets.
+
+Claims are partitioned by a stable hash of their claim id. Each shard is
+checked against a read-only entity index (a sorted NumPy string array,
+probed with ``searchsorted``) and returns an exact dangling count plus a
+bounded sample of offending claims. Messages are only formatted for the
+samples that end up in the report.
+
+Small claim sets are checked in-process; large ones are fanned out across
+a long-lived process pool, with the index shipped to each worker once at
+start-up. The pool is only replaced when it has to check a different index.
+"""
+
+import atexit
+import heapq
+import multiprocessing
+import os
+import threading
+import zlib
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+# (claim_id, subject, claim_type)
+ClaimRef = tuple[str, str, Any]
+
+DEFAULT_SAMPLE_LIMIT = 10
+PARALLEL_THRESHOLD = 50_000
+
+
+class EntityIndex:
+    """Read-only set of entity ids backed by a sorted NumPy string array."""
+
+    def __init__(self, entity_ids: Iterable[str]):
+        self.ids = np.array(sorted({str(e) for e in entity_ids}), dtype=str)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, entity_id: object) -> bool:
+        return bool(self.contains_many([str(entity_id)])[0])
+
+    def contains_many(self, entity_ids: list[str]) -> np.ndarray:
+        """Vectorized membership test; returns a boolean array."""
+        if not entity_ids:
+            return np.zeros(0, dtype=bool)
+        if len(self.ids) == 0:
+            return np.zeros(len(entity_ids), dtype=bool)
+        probes = np.array(entity_ids, dtype=str)
+        positions = np.searchsorted(self.ids, probes)
+        positions = np.minimum(positions, len(self.ids) - 1)
+        return self.ids[positions] == probes
+
+
+def build_entity_index(*sources: Iterable[str]) -> EntityIndex:
+    """Build an index from any number of id collections (e.g. dict keys)."""
+    return EntityIndex(entity_id for source in sources for entity_id in source)
+
+
+def _same_ids(snapshot: frozenset, source: Iterable[str]) -> bool:
+    if isinstance(source, Mapping):
+        return len(snapshot) == len(source) and snapshot == source.keys()
+    return snapshot == frozenset(source)
+
+
+class EntityIndexCache:
+    """
+    Keeps the last EntityIndex until one of its sources gains or loses an id.
+
+    Comparing the sources' keys against a snapshot is a set comparison; the
+    index itself (sort plus NumPy string array) is only rebuilt on change.
+    """
+
+    def __init__(self):
+        self._index: EntityIndex | None = None
+        self._snapshots: list[frozenset] = []
+        self.builds = 0
+
+    def get(self, *sources: Iterable[str]) -> EntityIndex:
+        """Return the index over ``sources``, rebuilding it only if they changed."""
+        if (
+            self._index is not None
+            and len(sources) == len(self._snapshots)
+            and all(_same_ids(snap, src) for snap, src in zip(self._snapshots, sources))
+        ):
+            return self._index
+        self._snapshots = [frozenset(source) for source in sources]
+        self._index = build_entity_index(*self._snapshots)
+        self.builds += 1
+        return self._index
+
+    def clear(self) -> None:
+        """Force a rebuild on the next get()."""
+        self._index = None
+        self._snapshots = []
+
+
+@dataclass
+class ShardResult:
+    """Exact dangling count for one shard, plus a bounded sample."""
+
+    shard: int
+    checked: int = 0
+    total_dangling: int = 0
+    samples: list[ClaimRef] = field(default_factory=list)
+
+
+@dataclass
+class DanglingReferenceResult:
+    """Merged result across all shards."""
+
+    total_claims: int = 0
+    total_dangling: int = 0
+    samples: list[ClaimRef] = field(default_factory=list)
+    shards: int = 0
+
+
+def shard_of(claim_id: str, num_shards: int) -> int:
+    """Stable shard assignment by claim id (independent of PYTHONHASHSEED)."""
+    return zlib.crc32(claim_id.encode("utf-8")) % num_shards
+
+
+def _looks_like_id(subject: str) -> bool:
+    return "-" in subject or "_" in subject
+
+
+def check_shard(
+    shard: int, claims: list[ClaimRef], index: EntityIndex, sample_limit: int
+) -> ShardResult:
+    """Check one shard of claim references against the entity index."""
+    result = ShardResult(shard=shard, checked=len(claims))
+    candidates = [ref for ref in claims if _looks_like_id(ref[1])]
+    if not candidates:
+        return result
+
+    known = index.contains_many([ref[1] for ref in candidates])
+    missing = np.flatnonzero(~known)
+    result.total_dangling = int(len(missing))
+    result.samples = heapq.nsmallest(
+        sample_limit, (candidates[i] for i in missing), key=lambda ref: ref[0]
+    )
+    return result
+
+
+def _claim_refs(claims: Iterable[Mapping[str, Any]]) -> Iterator[ClaimRef]:
+    for claim in claims:
+        yield (str(claim.get("claim_id", "")), claim.get("subject") or "", claim.get("type"))
+
+
+# Per-worker copy of the index, installed once by the pool initializer
+_worker_index: EntityIndex | None = None
+
+
+def _init_worker(index: EntityIndex) -> None:
+    global _worker_index
+    _worker_index = index
+
+
+def _check_shard_in_worker(shard: int, claims: list[ClaimRef], sample_limit: int) -> ShardResult:
+    assert _worker_index is not None
+    return check_shard(shard, claims, _worker_index, sample_limit)
+
+
+# Process pool kept across calls, with the index its workers were started with
+_pool: ProcessPoolExecutor | None = None
+_pool_key: tuple[EntityIndex, int] | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(index: EntityIndex, workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is None or _pool_key[0] is not index or _pool_key[1] != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # spawn: forking a threaded server process can deadlock the child
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(index,),
+            )
+            _pool_key = (index, workers)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the shared process pool; the next parallel check starts a new one."""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool = None
+        _pool_key = None
+
+
+atexit.register(shutdown_pool)
+
+
+def iter_dangling_shards(
+    claims: Iterable[Mapping[str, Any]],
+    index: EntityIndex,
+    *,
+    num_shards: int | None = None,
+    workers: int | None = None,
+    sample_limit: int = DEFAULT_SAMPLE_LIMIT,
+    parallel_threshold: int = PARALLEL_THRESHOLD,
+) -> Iterator[ShardResult]:
+    """
+    Yield per-shard results as they complete.
+
+    Args:
+        claims: Claim dicts with claim_id, subject and type
+        index: Entity ids that count as known
+        num_shards: Number of hash shards (defaults to the worker count)
+        workers: Process pool size (defaults to the CPU count)
+        sample_limit: Maximum samples kept per shard
+        parallel_threshold: Below this many claims, shards run in-process
+    """
+    workers = workers or os.cpu_count() or 1
+    num_shards = num_shards or workers
+
+    shards: list[list[ClaimRef]] = [[] for _ in range(num_shards)]
+    for ref in _claim_refs(claims):
+        shards[shard_of(ref[0], num_shards)].append(ref)
+    total = sum(len(s) for s in shards)
+
+    if workers <= 1 or total < parallel_threshold:
+        for shard, refs in enumerate(shards):
+            yield check_shard(shard, refs, index, sample_limit)
+        return
+
+    pool = _get_pool(index, min(workers, num_shards))
+    futures = [
+        pool.submit(_check_shard_in_worker, shard, refs, sample_limit)
+        for shard, refs in enumerate(shards)
+    ]
+    try:
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def find_dangling_references(
+    claims: Iterable[Mapping[str, Any]],
+    index: EntityIndex,
+    *,
+    sample_limit: int = DEFAULT_SAMPLE_LIMIT,
+    **kwargs: Any,
+) -> DanglingReferenceResult:
+    """
+    Count dangling claim subjects exactly, keeping at most ``sample_limit`` samples.
+
+    Samples are ordered by claim id so the report is stable regardless of
+    the order in which shards finish.
+    """
+    merged = DanglingReferenceResult()
+    for result in iter_dangling_shards(claims, index, sample_limit=sample_limit, **kwargs):
+        merged.shards += 1
+        merged.total_claims += result.checked
+        merged.total_dangling += result.total_dangling
+        merged.samples = sorted(merged.samples + result.samples, key=lambda ref: ref[0])[
+            :sample_limit
+        ]
+    return merged
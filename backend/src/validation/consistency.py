@@ -5,10 +5,27 @@ Validates data integrity across beats, claims, edges, and relationships
 to ensure referential consistency and logical correctness.
 """
 
+from collections import Counter
+from collections.abc import Callable, Iterable, Mapping
 from dataclasses import dataclass
 from typing import Any
 
-from src.data import beats_db, causality_edges_db, claims_db
+from src.data import (
+    beats_db,
+    causality_edges_db,
+    characters_db,
+    claims_db,
+    episodes_db,
+    mythos_db,
+)
+
+from .causal_graph import CausalGraph
+from .claims import (
+    DEFAULT_SAMPLE_LIMIT,
+    EntityIndex,
+    EntityIndexCache,
+    find_dangling_references,
+)
 
 
 @dataclass
@@ -28,11 +45,26 @@ class ValidationReport:
         self.errors: list[ValidationError] = []
         self.warnings: list[ValidationError] = []
         self.passed_rules: list[str] = []
+        self.error_counts: Counter[str] = Counter()
+        self.timings_ms: dict[str, float] = {}
+        self.stats: dict[str, Any] = {}
 
     def add_error(self, rule: str, message: str, context: dict[str, Any] | None = None):
         """Add an error to the report."""
         error = ValidationError(rule=rule, severity="error", message=message, context=context)
-        self.errors.append(error)
+        self.add_validation_error(error)
+
+    def add_validation_error(self, error: ValidationError):
+        """Add a prebuilt error or warning to the report."""
+        if error.severity == "error":
+            self.errors.append(error)
+            self.error_counts[error.rule] += 1
+        else:
+            self.warnings.append(error)
+
+    def has_errors(self, rule: str) -> bool:
+        """Check if any error was recorded for a rule."""
+        return self.error_counts[rule] > 0
 
     def add_warning(self, rule: str, message: str, context: dict[str, Any] | None = None):
         """Add a warning to the report."""
@@ -60,51 +92,151 @@ class ValidationReport:
             "warnings": [
                 {"rule": w.rule, "message": w.message, "context": w.context} for w in self.warnings
             ],
+            "error_counts": dict(self.error_counts),
+            "timings_ms": {rule: round(ms, 3) for rule, ms in self.timings_ms.items()},
+            "stats": self.stats,
         }
 
 
-def validate_beat_id_existence(report: ValidationReport) -> None:
-    """
-    Validate that all beat IDs referenced in edges exist in beats database.
+def beat_field(beat: Any, name: str, default: Any = None) -> Any:
+    """Read a field from a beat stored either as a dict or as a model object."""
+    if isinstance(beat, dict):
+        return beat.get(name, default)
+    return getattr(beat, name, default)
+
+
+def _edge_context(edge: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "edge_id": edge.get("edge_id"),
+        "from_beat_id": edge.get("from_beat_id"),
+        "to_beat_id": edge.get("to_beat_id"),
+    }
+
+
+def check_edge_beat_ids(edge: dict[str, Any], beats: Mapping[str, Any]) -> list[ValidationError]:
+    """Check that both endpoints of an edge reference existing beats."""
+    errors = []
+    for field in ("from_beat_id", "to_beat_id"):
+        if edge.get(field) not in beats:
+            errors.append(
+                ValidationError(
+                    rule="beat_id_existence",
+                    severity="error",
+                    message=f"Edge references non-existent {field}: {edge.get(field)}",
+                    context=_edge_context(edge),
+                )
+            )
+    return errors
+
+
+def check_edge_self_loop(edge: dict[str, Any], beats: Mapping[str, Any]) -> list[ValidationError]:
+    """Check that an edge does not connect a beat to itself."""
+    from_beat = edge.get("from_beat_id")
+    to_beat = edge.get("to_beat_id")
+    if from_beat != to_beat:
+        return []
+    return [
+        ValidationError(
+            rule="no_self_loops",
+            severity="error",
+            message=f"Edge has self-loop: {from_beat} -> {to_beat}",
+            context={
+                "edge_id": edge.get("edge_id"),
+                "beat_id": from_beat,
+                "edge_type": edge.get("type"),
+            },
+        )
+    ]
 
-    Rule: All from_beat_id and to_beat_id in edges must reference existing beats.
-    """
-    rule_name = "beat_id_existence"
 
-    # Get all beat IDs
-    beat_ids = set(beats_db.keys())
+def check_edge_temporal(edge: dict[str, Any], beats: Mapping[str, Any]) -> list[ValidationError]:
+    """Check that a cause beat does not occur after its effect beat."""
+    from_beat_id = edge.get("from_beat_id")
+    to_beat_id = edge.get("to_beat_id")
 
-    # Check all edges
-    for edge in causality_edges_db.values():
-        # Check from_beat_id
-        if edge.get("from_beat_id") not in beat_ids:
-            report.add_error(
-                rule=rule_name,
-                message=f"Edge references non-existent from_beat_id: {edge.get('from_beat_id')}",
-                context={
-                    "edge_id": edge.get("edge_id"),
-                    "from_beat_id": edge.get("from_beat_id"),
-                    "to_beat_id": edge.get("to_beat_id"),
-                },
-            )
+    from_beat = beats.get(from_beat_id)
+    to_beat = beats.get(to_beat_id)
+    if not (from_beat and to_beat):
+        return []
+
+    from_episode = beat_field(from_beat, "episode_id", "")
+    to_episode = beat_field(to_beat, "episode_id", "")
 
-        # Check to_beat_id
-        if edge.get("to_beat_id") not in beat_ids:
-            report.add_error(
-                rule=rule_name,
-                message=f"Edge references non-existent to_beat_id: {edge.get('to_beat_id')}",
+    if from_episode == to_episode:
+        from_seconds = beat_field(from_beat, "start_seconds", 0)
+        to_seconds = beat_field(to_beat, "start_seconds", 0)
+
+        if from_seconds > to_seconds:
+            return [
+                ValidationError(
+                    rule="temporal_consistency",
+                    severity="error",
+                    message=f"Cause beat occurs after effect beat in same episode: "
+                    f"{from_beat_id} ({from_seconds}s) -> {to_beat_id} ({to_seconds}s)",
+                    context={
+                        "edge_id": edge.get("edge_id"),
+                        "from_beat_id": from_beat_id,
+                        "to_beat_id": to_beat_id,
+                        "episode_id": from_episode,
+                        "from_seconds": from_seconds,
+                        "to_seconds": to_seconds,
+                        "edge_type": edge.get("type"),
+                    },
+                )
+            ]
+    elif from_episode > to_episode:
+        return [
+            ValidationError(
+                rule="temporal_consistency",
+                severity="error",
+                message=f"Cause beat from later episode than effect beat: "
+                f"{from_beat_id} ({from_episode}) -> {to_beat_id} ({to_episode})",
                 context={
                     "edge_id": edge.get("edge_id"),
-                    "from_beat_id": edge.get("from_beat_id"),
-                    "to_beat_id": edge.get("to_beat_id"),
+                    "from_beat_id": from_beat_id,
+                    "to_beat_id": to_beat_id,
+                    "from_episode": from_episode,
+                    "to_episode": to_episode,
+                    "edge_type": edge.get("type"),
                 },
             )
+        ]
+    return []
+
+
+EdgeCheck = Callable[[dict[str, Any], Mapping[str, Any]], list[ValidationError]]
+
+# Per-edge rules, evaluated together in a single pass by ValidationEngine
+EDGE_RULES: dict[str, EdgeCheck] = {
+    "beat_id_existence": check_edge_beat_ids,
+    "no_self_loops": check_edge_self_loop,
+    "temporal_consistency": check_edge_temporal,
+}
+
+
+def _run_edge_rule(report: ValidationReport, rule_name: str) -> None:
+    check = EDGE_RULES[rule_name]
+    for edge in causality_edges_db.values():
+        for error in check(edge, beats_db):
+            report.add_validation_error(error)
 
-    # If no errors were added, mark as passed
-    if not any(e.rule == rule_name for e in report.errors):
+    if not report.has_errors(rule_name):
         report.mark_passed(rule_name)
 
 
+def validate_beat_id_existence(report: ValidationReport) -> None:
+    """
+    Validate that all beat IDs referenced in edges exist in beats database.
+
+    Rule: All from_beat_id and to_beat_id in edges must reference existing beats.
+    """
+    _run_edge_rule(report, "beat_id_existence")
+
+
+# Entity ids of the loaded databases, rebuilt only when an id is added or removed
+_entity_index = EntityIndexCache()
+
+
 def validate_no_dangling_references(report: ValidationReport) -> None:
     """
     Validate that all entity_id references in claims exist.
@@ -112,38 +244,43 @@ def validate_no_dangling_references(report: ValidationReport) -> None:
     Rule: All subject/object/entity_id references in claims should point to valid entities.
     Note: This is a warning rather than error since some references may be implicit.
     """
+    index = _entity_index.get(beats_db, characters_db, mythos_db, episodes_db)
+    check_dangling_references(report, claims_db.values(), index)
+
+
+def check_dangling_references(
+    report: ValidationReport,
+    claims: Iterable[dict[str, Any]],
+    index: EntityIndex,
+    sample_limit: int = DEFAULT_SAMPLE_LIMIT,
+    **shard_options: Any,
+) -> None:
+    """
+    Warn about claim subjects that look like IDs but match no known entity.
+
+    Large claim sets are sharded across a process pool; the total is exact
+    while only the first ``sample_limit`` dangling claims (by claim id)
+    become warnings.
+    """
     rule_name = "no_dangling_references"
 
-    # Get all known entity IDs from beats and other sources
-    known_entities = set(beats_db.keys())
-
-    # Check claims for entity references
-    dangling_count = 0
-    for claim in claims_db.values():
-        subject = claim.get("subject", "")
-
-        # Check if subject looks like an ID (contains hyphens or underscores)
-        if ("-" in subject or "_" in subject) and subject not in known_entities:
-            dangling_count += 1
-            # Only warn for first 10 to avoid spam
-            if dangling_count <= 10:
-                report.add_warning(
-                    rule=rule_name,
-                    message=f"Claim references potentially unknown entity: {subject}",
-                    context={
-                        "claim_id": claim.get("claim_id"),
-                        "subject": subject,
-                        "type": claim.get("type"),
-                    },
-                )
+    result = find_dangling_references(claims, index, sample_limit=sample_limit, **shard_options)
 
-    if dangling_count == 0:
+    for claim_id, subject, claim_type in result.samples:
+        report.add_warning(
+            rule=rule_name,
+            message=f"Claim references potentially unknown entity: {subject}",
+            context={"claim_id": claim_id, "subject": subject, "type": claim_type},
+        )
+
+    if result.total_dangling == 0:
         report.mark_passed(rule_name)
-    elif dangling_count > 10:
+    elif result.total_dangling > sample_limit:
         report.add_warning(
             rule=rule_name,
-            message=f"Found {dangling_count} potentially dangling references (showing first 10)",
-            context={"total_dangling": dangling_count},
+            message=f"Found {result.total_dangling} potentially dangling references "
+            f"(showing first {sample_limit})",
+            context={"total_dangling": result.total_dangling},
         )
 
 
@@ -153,93 +290,67 @@ def validate_no_self_loops(report: ValidationReport) -> None:
 
     Rule: An edge cannot connect a beat to itself (no self-causal loops).
     """
-    rule_name = "no_self_loops"
+    _run_edge_rule(report, "no_self_loops")
 
-    for edge in causality_edges_db.values():
-        from_beat = edge.get("from_beat_id")
-        to_beat = edge.get("to_beat_id")
 
-        if from_beat == to_beat:
-            report.add_error(
-                rule=rule_name,
-                message=f"Edge has self-loop: {from_beat} -> {to_beat}",
-                context={
-                    "edge_id": edge.get("edge_id"),
-                    "beat_id": from_beat,
-                    "edge_type": edge.get("type"),
-                },
-            )
+def validate_temporal_consistency(report: ValidationReport) -> None:
+    """
+    Validate that causes never occur after their effects.
 
-    if not any(e.rule == rule_name for e in report.errors):
-        report.mark_passed(rule_name)
+    Rule: Within an episode the cause beat must not start later than the effect
+    beat; across episodes the cause must not come from a later episode.
+    """
+    _run_edge_rule(report, "temporal_consistency")
 
 
-def validate_temporal_consistency(report: ValidationReport) -> None:
-    rule_name = "temporal_consistency"
+def validate_no_causal_cycles(report: ValidationReport) -> None:
+    """
+    Validate that the causality graph is acyclic.
 
-    for edge in causality_edges_db.values():
-        from_beat_id = edge.get("from_beat_id")
-        to_beat_id = edge.get("to_beat_id")
-
-        from_beat = beats_db.get(from_beat_id)
-        to_beat = beats_db.get(to_beat_id)
-
-        if from_beat and to_beat:
-            from_episode = from_beat.get("episode_id", "")
-            to_episode = to_beat.get("episode_id", "")
-
-            if from_episode == to_episode:
-                from_seconds = from_beat.get("start_seconds", 0)
-                to_seconds = to_beat.get("start_seconds", 0)
-
-                if from_seconds > to_seconds:
-                    report.add_error(
-                        rule=rule_name,
-                        message=f"Cause beat occurs after effect beat in same episode: "
-                        f"{from_beat_id} ({from_seconds}s) -> {to_beat_id} ({to_seconds}s)",
-                        context={
-                            "edge_id": edge.get("edge_id"),
-                            "from_beat_id": from_beat_id,
-                            "to_beat_id": to_beat_id,
-                            "episode_id": from_episode,
-                            "from_seconds": from_seconds,
-                            "to_seconds": to_seconds,
-                            "edge_type": edge.get("type"),
-                        },
-                    )
-            else:
-                if from_episode > to_episode:
-                    report.add_error(
-                        rule=rule_name,
-                        message=f"Cause beat from later episode than effect beat: "
-                        f"{from_beat_id} ({from_episode}) -> {to_beat_id} ({to_episode})",
-                        context={
-                            "edge_id": edge.get("edge_id"),
-                            "from_beat_id": from_beat_id,
-                            "to_beat_id": to_beat_id,
-                            "from_episode": from_episode,
-                            "to_episode": to_episode,
-                            "edge_type": edge.get("type"),
-                        },
-                    )
-
-    if not any(e.rule == rule_name for e in report.errors):
+    Rule: No beat may (directly or transitively) cause itself. Each cycle is
+    reported once as a strongly connected component. Single-edge self-loops
+    are covered by no_self_loops and are not reported again here.
+    """
+    check_causal_cycles(report, causality_edges_db.values())
+
+
+def check_causal_cycles(report: ValidationReport, edges: Iterable[dict[str, Any]]) -> None:
+    """Report every cyclic component of the causality graph once."""
+    rule_name = "no_causal_cycles"
+
+    graph = CausalGraph(
+        (edge.get("from_beat_id"), edge.get("to_beat_id"))
+        for edge in edges
+        if edge.get("from_beat_id") != edge.get("to_beat_id")
+    )
+
+    cycles = graph.cycles()
+    for component in cycles:
+        report.add_error(
+            rule=rule_name,
+            message=f"Causal cycle between {len(component)} beats: {', '.join(component)}",
+            context={"beat_ids": component, "size": len(component)},
+        )
+
+    if not cycles:
         report.mark_passed(rule_name)
 
 
-def run_validation() -> ValidationReport:
+def run_validation(changed_beat_ids: Iterable[str] | None = None) -> ValidationReport:
     """
     Run all consistency validation rules.
 
+    Edge rules run in a single pass through the shared ValidationEngine, which
+    only re-evaluates edges whose content (or endpoint beats) changed since
+    the previous run.
+
+    Args:
+        changed_beat_ids: Beats known to have changed, re-validated on top of
+            the changes detected by content hash
+
     Returns:
         ValidationReport with all validation results
     """
-    report = ValidationReport()
-
-    # Run all validation rules
-    validate_beat_id_existence(report)
-    validate_no_dangling_references(report)
-    validate_no_self_loops(report)
-    validate_temporal_consistency(report)
+    from .engine import get_validation_engine
 
-    return report
+    return get_validation_engine().run(changed_beat_ids=changed_beat_ids)
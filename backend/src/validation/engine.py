@@ -0,0 +1,274 @@
+"""
+Single-pass, incremental consistency validation engine.
+
+All per-edge rules are evaluated together in one pass over the causality
+edges. Results are cached per edge, keyed by the content hash of the edge and
+of both endpoint beats, so a re-run only re-evaluates edges whose own data or
+whose endpoint beats changed since the previous run.
+"""
+
+import hashlib
+import json
+import time
+from collections import defaultdict
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from .claims import DEFAULT_SAMPLE_LIMIT, EntityIndexCache
+from .consistency import (
+    EDGE_RULES,
+    ValidationError,
+    ValidationReport,
+    check_causal_cycles,
+    check_dangling_references,
+)
+
+
+def content_hash(obj: Any) -> str:
+    """Stable hash of a dict or Pydantic model's content."""
+    if hasattr(obj, "model_dump"):
+        obj = obj.model_dump(mode="json")
+    payload = json.dumps(obj, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class _EdgeResult:
+    """Cached evaluation of one edge against all edge rules."""
+
+    key: tuple[str, str | None, str | None]
+    from_beat_id: Any
+    to_beat_id: Any
+    errors: list[ValidationError] = field(default_factory=list)
+
+
+class ValidationEngine:
+    """
+    Incremental validator over beats, causality edges and claims.
+
+    The engine keeps a reverse index from beat id to the edges touching it,
+    so a beat change only invalidates the edges incident to that beat.
+    Graph-level rules (causal cycles) are recomputed only when some edge
+    changed; the claims rule runs on every call against an entity index
+    built from ``entity_sources`` (defaults to the beats alone), which is
+    only rebuilt when one of the sources gains or loses an id.
+    """
+
+    def __init__(
+        self,
+        beats: Mapping[str, Any],
+        edges: Mapping[str, dict[str, Any]],
+        claims: Mapping[str, dict[str, Any]],
+        entity_sources: Sequence[Iterable[str]] | None = None,
+        sample_limit: int = DEFAULT_SAMPLE_LIMIT,
+    ):
+        self.beats = beats
+        self.edges = edges
+        self.claims = claims
+        self.entity_sources = entity_sources if entity_sources is not None else [beats]
+        self.sample_limit = sample_limit
+        self._entity_index = EntityIndexCache()
+
+        self._beat_hashes: dict[str, str] = {}
+        self._edge_hashes: dict[str, str] = {}
+        self._edge_results: dict[str, _EdgeResult] = {}
+        self._edges_by_beat: dict[Any, set[str]] = defaultdict(set)
+        self._cycle_errors: list[ValidationError] | None = None
+
+    def reset(self) -> None:
+        """Drop every cached result so the next run re-validates everything."""
+        self._beat_hashes.clear()
+        self._edge_hashes.clear()
+        self._edge_results.clear()
+        self._edges_by_beat.clear()
+        self._cycle_errors = None
+        self._entity_index.clear()
+
+    def _refresh_beat_hashes(self) -> set[str]:
+        """Re-hash beats and return the ids whose content changed (or vanished)."""
+        candidates = set(self.beats.keys()) | set(self._beat_hashes.keys())
+
+        changed = set()
+        for beat_id in candidates:
+            beat = self.beats.get(beat_id)
+            new_hash = content_hash(beat) if beat is not None else None
+            if self._beat_hashes.get(beat_id) != new_hash:
+                changed.add(beat_id)
+                if new_hash is None:
+                    self._beat_hashes.pop(beat_id, None)
+                else:
+                    self._beat_hashes[beat_id] = new_hash
+        return changed
+
+    def _refresh_edge_hashes(self, detect_changes: bool) -> set[str]:
+        """Re-hash edges and return ids that were added, removed or modified."""
+        current = set(self.edges.keys())
+        known = set(self._edge_hashes.keys())
+
+        removed = known - current
+        for edge_id in removed:
+            del self._edge_hashes[edge_id]
+
+        candidates = current if detect_changes else current - known
+        changed = set(removed)
+        for edge_id in candidates:
+            new_hash = content_hash(self.edges[edge_id])
+            if self._edge_hashes.get(edge_id) != new_hash:
+                self._edge_hashes[edge_id] = new_hash
+                changed.add(edge_id)
+        return changed
+
+    def _unindex(self, edge_id: str) -> None:
+        result = self._edge_results.pop(edge_id, None)
+        if result is None:
+            return
+        for beat_id in (result.from_beat_id, result.to_beat_id):
+            edge_ids = self._edges_by_beat.get(beat_id)
+            if edge_ids is not None:
+                edge_ids.discard(edge_id)
+                if not edge_ids:
+                    del self._edges_by_beat[beat_id]
+
+    def _evaluate_edge(self, edge_id: str, timings: dict[str, float]) -> bool:
+        """Evaluate one edge unless its cached key still matches; return True if evaluated."""
+        edge = self.edges[edge_id]
+        from_beat_id = edge.get("from_beat_id")
+        to_beat_id = edge.get("to_beat_id")
+        key = (
+            self._edge_hashes[edge_id],
+            self._beat_hashes.get(from_beat_id),
+            self._beat_hashes.get(to_beat_id),
+        )
+
+        cached = self._edge_results.get(edge_id)
+        if cached is not None and cached.key == key:
+            return False
+
+        errors: list[ValidationError] = []
+        for rule_name, check in EDGE_RULES.items():
+            start = time.perf_counter()
+            errors.extend(check(edge, self.beats))
+            timings[rule_name] += time.perf_counter() - start
+
+        self._unindex(edge_id)
+        self._edge_results[edge_id] = _EdgeResult(
+            key=key, from_beat_id=from_beat_id, to_beat_id=to_beat_id, errors=errors
+        )
+        self._edges_by_beat[from_beat_id].add(edge_id)
+        self._edges_by_beat[to_beat_id].add(edge_id)
+        return True
+
+    def run(
+        self,
+        changed_beat_ids: Iterable[str] | None = None,
+        changed_edge_ids: Iterable[str] | None = None,
+    ) -> ValidationReport:
+        """
+        Validate the current data, reusing cached per-edge results.
+
+        Args:
+            changed_beat_ids: Beats known to have changed. Their edges are
+                re-evaluated on top of those of every beat whose content hash
+                changed, which is always checked.
+            changed_edge_ids: Edges known to have changed. When omitted every
+                edge is re-hashed; added and removed edges are always detected.
+
+        Returns:
+            ValidationReport with per-rule error counts, timings and cache stats
+        """
+        report = ValidationReport()
+        timings: dict[str, float] = dict.fromkeys(
+            [*EDGE_RULES, "no_dangling_references", "no_causal_cycles"], 0.0
+        )
+        run_start = time.perf_counter()
+
+        changed_beats = self._refresh_beat_hashes()
+        # Hinted beats are re-validated even when their hash did not change
+        forced: set[str] = set()
+        for beat_id in changed_beat_ids or ():
+            if beat_id in self.beats:
+                changed_beats.add(beat_id)
+                forced.update(self._edges_by_beat.get(beat_id, ()))
+        for edge_id in forced:
+            self._unindex(edge_id)
+        changed_edges = self._refresh_edge_hashes(detect_changes=changed_edge_ids is None)
+        if changed_edge_ids is not None:
+            for edge_id in changed_edge_ids:
+                if edge_id in self.edges:
+                    self._edge_hashes[edge_id] = content_hash(self.edges[edge_id])
+                    changed_edges.add(edge_id)
+
+        # Edges to re-evaluate: changed edges plus every edge touching a changed beat
+        dirty = {edge_id for edge_id in changed_edges if edge_id in self.edges}
+        for beat_id in changed_beats:
+            dirty.update(self._edges_by_beat.get(beat_id, ()))
+        dirty.update(edge_id for edge_id in self.edges if edge_id not in self._edge_results)
+
+        for edge_id in changed_edges - dirty:
+            self._unindex(edge_id)
+        evaluated = 0
+        for edge_id in dirty:
+            if edge_id in self.edges and self._evaluate_edge(edge_id, timings):
+                evaluated += 1
+
+        # Single aggregation pass in edge order
+        for edge_id in self.edges:
+            for error in self._edge_results[edge_id].errors:
+                report.add_validation_error(error)
+        for rule_name in EDGE_RULES:
+            if not report.has_errors(rule_name):
+                report.mark_passed(rule_name)
+
+        start = time.perf_counter()
+        index = self._entity_index.get(*self.entity_sources)
+        check_dangling_references(
+            report, self.claims.values(), index, sample_limit=self.sample_limit
+        )
+        timings["no_dangling_references"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        if self._cycle_errors is None or changed_edges:
+            cycle_report = ValidationReport()
+            check_causal_cycles(cycle_report, self.edges.values())
+            self._cycle_errors = cycle_report.errors
+        for error in self._cycle_errors:
+            report.add_validation_error(error)
+        if not report.has_errors("no_causal_cycles"):
+            report.mark_passed("no_causal_cycles")
+        timings["no_causal_cycles"] += time.perf_counter() - start
+
+        report.timings_ms = {rule: seconds * 1000 for rule, seconds in timings.items()}
+        report.stats = {
+            "edges_total": len(self.edges),
+            "edges_evaluated": evaluated,
+            "edges_cached": len(self.edges) - evaluated,
+            "beats_changed": len(changed_beats),
+            "total_ms": round((time.perf_counter() - run_start) * 1000, 3),
+        }
+        return report
+
+
+_engine: ValidationEngine | None = None
+
+
+def get_validation_engine() -> ValidationEngine:
+    """Get the shared engine bound to the loaded data dictionaries."""
+    global _engine
+    if _engine is None:
+        from src.data import (
+            beats_db,
+            causality_edges_db,
+            characters_db,
+            claims_db,
+            episodes_db,
+            mythos_db,
+        )
+
+        _engine = ValidationEngine(
+            beats_db,
+            causality_edges_db,
+            claims_db,
+            entity_sources=[beats_db, characters_db, mythos_db, episodes_db],
+        )
+    return _engine
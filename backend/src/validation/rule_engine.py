@@ -8,6 +8,8 @@ from dataclasses import dataclass, field
 from enum import Enum
 import json
 
+from .causal_graph import CausalGraph
+
 
 class RuleType(Enum):
     """Types of consistency rules."""
@@ -180,6 +182,15 @@ class RuleEngine:
         Returns:
             Set of all inferred facts
         """
+        # Transitive rules are closed in one pass over a graph instead of
+        # being fired repeatedly until a fixpoint is reached
+        general_rules = []
+        for rule in self.rules:
+            if self._is_transitive_rule(rule):
+                self._derive_transitive_closure(rule)
+            else:
+                general_rules.append(rule)
+
         new_facts = True
         iteration = 0
 
@@ -187,7 +198,7 @@ class RuleEngine:
             new_facts = False
             iteration += 1
 
-            for rule in self.rules:
+            for rule in general_rules:
                 # Try to match rule premises
                 matches = self._match_rule_premises(rule)
 
@@ -202,6 +213,53 @@ class RuleEngine:
 
         return self.inferred_facts
 
+    @staticmethod
+    def _is_transitive_rule(rule: Rule) -> bool:
+        """Check if a rule has the shape P(?a, ?b), P(?b, ?c) => Q(?a, ?c)."""
+        if len(rule.premises) != 2:
+            return False
+        first, second = rule.premises
+        conclusion = rule.conclusion
+        variables = (first.subject, first.object, second.object)
+        return (
+            first.predicate == second.predicate
+            and all(v.startswith("?") for v in variables)
+            and len(set(variables)) == 3
+            and second.subject == first.object
+            and conclusion.subject == first.subject
+            and conclusion.object == second.object
+        )
+
+    def _derive_transitive_closure(self, rule: Rule):
+        """
+        Derive every conclusion of a transitive rule from a reachability graph.
+
+        When the conclusion predicate differs from the premise predicate
+        (e.g. causes => indirectly_causes), pairs already linked directly
+        are not re-derived.
+        """
+        premise_predicate = rule.premises[0].predicate
+        premise_facts = [f for f in self.facts if f.predicate == premise_predicate]
+        if not premise_facts:
+            return
+
+        graph = CausalGraph((f.subject, f.object) for f in premise_facts)
+        confidence = min(f.confidence for f in premise_facts) * rule.confidence_factor
+        conclusion_predicate = rule.conclusion.predicate
+
+        for subject, obj in graph.reachable_pairs():
+            if conclusion_predicate != premise_predicate and graph.has_edge(subject, obj):
+                continue
+            fact = Fact(
+                predicate=conclusion_predicate,
+                subject=subject,
+                object=obj,
+                confidence=confidence,
+                source=f"inferred_from_{rule.name}",
+            )
+            if fact not in self.facts and fact not in self.inferred_facts:
+                self.inferred_facts.add(fact)
+
     def check_consistency(self) -> List[ConsistencyIssue]:
         """
         Check for consistency violations.
@@ -266,67 +324,47 @@ class RuleEngine:
             source=fact.source,
         )
 
+    def _fact_graph(self, predicates: List[str]) -> CausalGraph:
+        """Build a graph from all known and inferred facts with the given predicates."""
+        return CausalGraph(
+            (f.subject, f.object)
+            for f in self.facts.union(self.inferred_facts)
+            if f.predicate in predicates
+        )
+
     def _check_temporal_consistency(self):
         """Check for temporal ordering contradictions."""
-        before_facts = [f for f in self.facts.union(self.inferred_facts) if f.predicate == "before"]
-
-        # Check for cycles
-        for fact in before_facts:
-            # If A before B, check that B is not before A
-            reverse = Fact("before", fact.object, fact.subject)
-            if reverse in self.facts or reverse in self.inferred_facts:
-                self.issues.append(
-                    ConsistencyIssue(
-                        issue_type="temporal_contradiction",
-                        severity="error",
-                        description=f"Temporal contradiction: {fact.subject} cannot be both before and after {fact.object}",
-                        affected_entities=[fact.subject, fact.object],
-                    )
+        # Any cycle in the "before" graph means some beat is both before and after another
+        for component in self._fact_graph(["before"]).cycles():
+            if len(component) == 1:
+                description = f"Temporal contradiction: {component[0]} cannot be before itself"
+            else:
+                description = (
+                    f"Temporal contradiction: {', '.join(component)} "
+                    "cannot be both before and after each other"
+                )
+            self.issues.append(
+                ConsistencyIssue(
+                    issue_type="temporal_contradiction",
+                    severity="error",
+                    description=description,
+                    affected_entities=component,
                 )
+            )
 
     def _check_causal_loops(self):
         """Check for causal loops in the narrative."""
-        causes_facts = [
-            f
-            for f in self.facts.union(self.inferred_facts)
-            if f.predicate in ["causes", "indirectly_causes"]
-        ]
-
-        # Build causality graph
-        graph: Dict[str, Set[str]] = {}
-        for fact in causes_facts:
-            if fact.subject not in graph:
-                graph[fact.subject] = set()
-            graph[fact.subject].add(fact.object)
-
-        # Check for cycles using DFS
-        def has_cycle(node: str, visited: Set[str], path: Set[str]) -> bool:
-            if node in path:
-                return True
-            if node in visited:
-                return False
-
-            visited.add(node)
-            path.add(node)
-
-            for neighbor in graph.get(node, []):
-                if has_cycle(neighbor, visited, path):
-                    return True
-
-            path.remove(node)
-            return False
-
-        for node in graph:
-            if has_cycle(node, set(), set()):
-                self.issues.append(
-                    ConsistencyIssue(
-                        issue_type="causal_loop",
-                        severity="error",
-                        description=f"Causal loop detected involving {node}",
-                        affected_entities=[node],
-                        suggested_fix="Break the cycle by removing one causal link",
-                    )
+        # Each strongly connected component is reported once, however many nodes it has
+        for component in self._fact_graph(["causes", "indirectly_causes"]).cycles():
+            self.issues.append(
+                ConsistencyIssue(
+                    issue_type="causal_loop",
+                    severity="error",
+                    description=f"Causal loop detected involving {', '.join(component)}",
+                    affected_entities=component,
+                    suggested_fix="Break the cycle by removing one causal link",
                 )
+            )
 
     def explain_issue(self, issue: ConsistencyIssue) -> str:
         """Generate human-readable explanation of an issue."""
@@ -358,13 +396,15 @@ def run_advanced_validation() -> Dict:
     from src.data import beats_db, causality_edges_db
 
     # Add temporal facts from beats
-    sorted_beats = sorted(beats_db.values(), key=lambda b: (b.episode_id, b.timestamp))
+    sorted_beats = sorted(
+        beats_db.values(), key=lambda b: (b.get("episode_id", ""), b.get("start_seconds", 0))
+    )
     for i in range(len(sorted_beats) - 1):
         engine.add_fact(
             Fact(
                 predicate="before",
-                subject=sorted_beats[i].beat_id,
-                object=sorted_beats[i + 1].beat_id,
+                subject=sorted_beats[i]["beat_id"],
+                object=sorted_beats[i + 1]["beat_id"],
                 source="data",
             )
         )
@@ -372,7 +412,12 @@ def run_advanced_validation() -> Dict:
     # Add causal facts from edges
     for edge in causality_edges_db.values():
         engine.add_fact(
-            Fact(predicate="causes", subject=edge.from_beat, object=edge.to_beat, source="data")
+            Fact(
+                predicate="causes",
+                subject=edge.get("from_beat_id", ""),
+                object=edge.get("to_beat_id", ""),
+                source="data",
+            )
         )
 
     # Run inference
@@ -0,0 +1,84 @@
+"""Tests for the character relationship graph and its adjacency index."""
+
+from fastapi.testclient import TestClient
+
+from src.api.characters import RelationshipIndex, _relationship_index
+from src.data import characters_db, relationships_db
+from src.main import app
+
+
+def unrelated_pair() -> tuple[str, str]:
+    """Two characters with no relationship between them yet."""
+    ids = list(characters_db)
+    for a in ids:
+        for b in ids:
+            if a != b and f"{a}-{b}" not in relationships_db and f"{b}-{a}" not in relationships_db:
+                return a, b
+    raise AssertionError("every pair of characters is related")
+
+
+class TestRelationshipGraph:
+    """Tests for /api/characters/{id}/relationships/graph."""
+
+    def test_depth_one_matches_direct_relationships(self):
+        """Test that depth 1 returns exactly the character's relationships."""
+        client = TestClient(app)
+        char_id = next(iter(characters_db))
+        direct = [
+            r
+            for r in relationships_db.values()
+            if char_id in (r.from_character_id, r.to_character_id)
+        ]
+
+        graph = client.get(f"/api/characters/{char_id}/relationships/graph").json()
+        assert graph["total_relationships"] == len(direct)
+        assert graph["nodes"][0]["id"] == char_id
+        assert len(client.get(f"/api/characters/{char_id}/relationships").json()) == len(direct)
+
+    def test_fanout_and_depth_limits(self):
+        """Test that max_fanout caps relationships per character and depth is bounded."""
+        client = TestClient(app)
+        char_id = next(iter(characters_db))
+        url = f"/api/characters/{char_id}/relationships/graph"
+
+        graph = client.get(url, params={"depth": 1, "max_fanout": 1}).json()
+        assert graph["total_relationships"] <= 1
+        assert client.get(url, params={"depth": 0}).json()["total_relationships"] == 0
+        assert client.get(url, params={"depth": 99}).status_code == 422
+
+    def test_memoized_graph_invalidated_by_writes(self):
+        """Test that creating and deleting a relationship refreshes cached graphs."""
+        client = TestClient(app)
+        a, b = unrelated_pair()
+        url = f"/api/characters/{a}/relationships/graph"
+
+        before = client.get(url).json()
+        assert client.get(url).json() == before
+        assert any(key[0] == a for key in _relationship_index.graphs)
+
+        created = client.post(
+            "/api/characters/relationships",
+            json={"from_character_id": a, "to_character_id": b, "relationship_type": "rival"},
+        )
+        assert created.status_code == 201
+        try:
+            after = client.get(url).json()
+            assert after["total_relationships"] == before["total_relationships"] + 1
+            assert b in {n["id"] for n in after["nodes"]}
+        finally:
+            client.delete(f"/api/characters/relationships/{created.json()['id']}")
+
+        assert client.get(url).json() == before
+
+    def test_graph_memo_is_bounded(self):
+        """Test that client-chosen fanouts neither grow nor overflow the memo."""
+        index = RelationshipIndex(max_graphs=3)
+        char_id = next(iter(characters_db))
+
+        for max_fanout in range(1000, 1100):
+            index.graph(char_id, 1, max_fanout)
+        assert list(index.graphs) == [(char_id, 1, None)]
+
+        for other in list(characters_db)[:5]:
+            index.graph(other, 2, None)
+        assert len(index.graphs) == 3
@@ -0,0 +1,77 @@
+"""Tests for the prebuilt graph behind /api/graph."""
+
+from fastapi.testclient import TestClient
+
+from src.api import graph as graph_api
+from src.data import characters_db, mark_data_changed, relationships_db
+from src.main import app
+from src.models import GraphData, GraphEdge, GraphNode
+
+
+def make_graph() -> graph_api.PrebuiltGraph:
+    """a - b - c chain plus an isolated d and an edge to an unknown node."""
+    nodes = [GraphNode(id=i, label=i.upper(), node_type="character") for i in "abcd"]
+    edges = [
+        GraphEdge(source="a", target="b", edge_type="friend"),
+        GraphEdge(source="b", target="c", edge_type="enemy"),
+        GraphEdge(source="c", target="a", edge_type="family"),
+        GraphEdge(source="c", target="ghost", edge_type="connects_to"),
+    ]
+    return graph_api.PrebuiltGraph(GraphData(nodes=nodes, edges=edges))
+
+
+class TestPrebuiltGraph:
+    """Tests for PrebuiltGraph and the cached graph routes."""
+
+    def test_related_uses_adjacency(self):
+        """Test that a neighbourhood keeps edges among neighbours in graph order."""
+        related = make_graph().related("a")
+
+        assert [n.id for n in related.nodes] == ["a", "b", "c"]
+        assert [(e.source, e.target) for e in related.edges] == [
+            ("a", "b"),
+            ("b", "c"),
+            ("c", "a"),
+        ]
+        assert [n.id for n in make_graph().related("d").nodes] == ["d"]
+        assert make_graph().related("missing").nodes == []
+
+    def test_full_graph_etag(self):
+        """Test that a matching If-None-Match gets a 304 with no body."""
+        client = TestClient(app)
+        first = client.get("/api/graph")
+        etag = first.headers["etag"]
+
+        assert first.status_code == 200
+        assert GraphData.model_validate(first.json()).nodes
+
+        cached = client.get("/api/graph", headers={"If-None-Match": f'W/{etag}, "other"'})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+    def test_cache_invalidated_on_data_change(self):
+        """Test that the prebuilt graph is rebuilt after a data write."""
+        prebuilt = graph_api.get_prebuilt_graph()
+        assert graph_api.get_prebuilt_graph() is prebuilt
+
+        rel_id, rel = next(iter(relationships_db.items()))
+        relationships_db[rel_id] = rel.model_copy(update={"relationship_type": "rival"})
+        mark_data_changed()
+        try:
+            rebuilt = graph_api.get_prebuilt_graph()
+            assert rebuilt is not prebuilt
+            assert rebuilt.etag != prebuilt.etag
+        finally:
+            relationships_db[rel_id] = rel
+            mark_data_changed()
+
+    def test_related_route(self):
+        """Test the related-entities route against the loaded data."""
+        client = TestClient(app)
+        char_id = next(iter(characters_db))
+
+        response = client.get(f"/api/graph/related/{char_id}")
+        assert response.status_code == 200
+        assert char_id in {n["id"] for n in response.json()["nodes"]}
+        assert client.get("/api/graph/related/missing").status_code == 404
@@ -0,0 +1,16 @@
+"""Shared fixtures for collaboration tests."""
+
+import pytest
+
+from src.api import collaboration as collaboration_api
+from src.collaboration.hub import CollaborationHub
+from src.collaboration.store import OpLogStore
+
+
+@pytest.fixture(autouse=True)
+def isolated_hub(tmp_path, monkeypatch):
+    """Point the API at a fresh hub whose op logs live in a temp directory."""
+    hub = CollaborationHub(OpLogStore(str(tmp_path / "collaboration")))
+    monkeypatch.setattr(collaboration_api, "_hub", hub)
+    yield hub
+    hub.store.close()
@@ -0,0 +1,196 @@
+"""Tests for CRDT document merging."""
+
+from src.collaboration.crdt import CollaborationSession, CRDTDocument
+
+
+def make_history(n_updates: int = 10):
+    """Build a document with one node and n_updates from two users."""
+    doc = CRDTDocument("doc-1")
+    root = doc.create_node("element", "start", "alice")
+    for i in range(n_updates):
+        doc.update_node(root, "content", f"v{i}", "alice" if i % 2 else "bob")
+    return doc, root
+
+
+class TestMergeOperations:
+    """Tests for CRDTDocument.merge_operations."""
+
+    def test_generated_ids_are_unique(self):
+        """Test that rapid edits never share an op id."""
+        doc, _ = make_history(1000)
+        assert len({op.op_id for op in doc.operations}) == len(doc.operations)
+
+    def test_duplicates_are_ignored(self):
+        """Test that re-merging known ops is a no-op."""
+        source, root = make_history()
+        replica = CRDTDocument("doc-1")
+
+        assert len(replica.merge_operations(source.operations)) == len(source.operations)
+        assert replica.merge_operations(source.operations) == []
+        assert len(replica.operations) == len(source.operations)
+        assert replica.nodes[root].content == source.nodes[root].content
+
+    def test_out_of_order_ops_are_buffered(self):
+        """Test that an op is held until its causal predecessors arrive."""
+        source, root = make_history(3)
+        first, *rest = source.operations
+        replica = CRDTDocument("doc-1")
+
+        assert replica.merge_operations(rest) == []
+        assert len(replica.get_buffered_operations()) == len(rest)
+
+        applied = replica.merge_operations([first])
+
+        assert [op.op_id for op in applied] == [op.op_id for op in source.operations]
+        assert replica.get_buffered_operations() == []
+        assert replica.nodes[root].content == "v2"
+
+    def test_reverse_delivery_converges(self):
+        """Test that a fully reversed stream converges to the same state."""
+        source, root = make_history(2000)
+        replica = CRDTDocument("doc-1")
+
+        applied = replica.merge_operations(reversed(source.operations))
+
+        assert len(applied) == len(source.operations)
+        assert dict(replica.vector_clock) == dict(source.vector_clock)
+        assert replica.nodes[root].content == source.nodes[root].content
+
+    def test_merge_operation_stream(self):
+        """Test batched merging of a large op stream."""
+        source, root = make_history(5000)
+        replica = CRDTDocument("doc-1")
+
+        total = replica.merge_operation_stream(iter(source.operations), batch_size=333)
+
+        assert total == len(source.operations)
+        assert replica.nodes[root].content == source.nodes[root].content
+
+    def test_buffer_is_bounded(self):
+        """Test that ops whose predecessors never arrive cannot grow the buffer forever."""
+        source, _ = make_history(20)
+        replica = CRDTDocument("doc-1", max_buffered=5)
+
+        replica.merge_operations(source.operations[1:])
+
+        assert len(replica.get_buffered_operations()) == 5
+        assert replica.dropped_operations == len(source.operations) - 6
+
+    def test_buffer_survives_serialization(self):
+        """Test that buffered ops are kept across to_dict/from_dict."""
+        source, root = make_history(3)
+        first, *rest = source.operations
+        replica = CRDTDocument("doc-1")
+        replica.merge_operations(rest)
+
+        restored = CRDTDocument.from_dict(replica.to_dict())
+        restored.merge_operations([first])
+
+        assert restored.nodes[root].content == "v2"
+        assert restored.has_operation(rest[-1].op_id)
+
+
+class TestCollaborationSession:
+    """Tests for CollaborationSession."""
+
+    def test_apply_operation_indexes_op(self):
+        """Test that session-applied ops are deduplicated afterwards."""
+        source, _ = make_history(1)
+        session = CollaborationSession("s1", CRDTDocument("doc-1"))
+        session.join("alice")
+        session.join("bob")
+
+        for op in source.operations:
+            assert session.apply_operation(op)
+
+        assert session.document.merge_operations(source.operations) == []
+
+
+class TestCompaction:
+    """Tests for causal-stability garbage collection."""
+
+    def test_stable_clock_is_pointwise_minimum(self):
+        """Test that the stable clock is bounded by every known replica."""
+        doc, _ = make_history(4)
+        doc.observe_replica_clock("peer", {"alice": 2, "bob": 1})
+        assert doc.stable_clock() == {"alice": 2, "bob": 1}
+
+        doc.observe_replica_clock("peer", {"alice": 1})
+        assert doc.stable_clock() == {"alice": 2, "bob": 1}
+
+    def test_compact_drops_only_stable_ops(self):
+        """Test that ops not yet seen by every replica are kept."""
+        doc, root = make_history(4)
+        doc.observe_replica_clock("peer", {"alice": 2, "bob": 1})
+
+        dropped = doc.compact()
+
+        assert dropped == 3
+        assert len(doc.operations) == 2
+        assert doc.snapshot_clock == {"alice": 2, "bob": 1}
+        assert doc.nodes[root].content == "v3"
+
+    def test_compacted_ops_are_still_deduplicated(self):
+        """Test that re-sent compacted ops are not applied twice."""
+        source, _ = make_history(6)
+        replica = CRDTDocument("doc-1")
+        replica.merge_operations(source.operations)
+        replica.compact()
+
+        assert replica.operations == []
+        assert replica.merge_operations(source.operations) == []
+
+    def test_stable_tombstones_are_purged(self):
+        """Test that a deleted node is removed once its delete is stable."""
+        doc = CRDTDocument("doc-1")
+        root = doc.create_node("element", "root", "alice")
+        child = doc.create_node("text", "gone", "alice", parent=root)
+        doc.delete_node(child, "alice")
+        doc.observe_replica_clock("peer", {"alice": 2})
+
+        doc.compact()
+        assert child in doc.nodes
+
+        doc.observe_replica_clock("peer", {"alice": 3})
+        doc.compact()
+        assert child not in doc.nodes
+        assert doc.nodes[root].children == []
+
+    def test_serialization_is_snapshot_plus_tail(self):
+        """Test that only the uncompacted tail is serialized."""
+        doc, root = make_history(10)
+        doc.observe_replica_clock("peer", {"alice": 3, "bob": 3})
+        doc.compact()
+
+        data = doc.to_dict()
+        restored = CRDTDocument.from_dict(data)
+
+        assert len(data["operations"]) == len(doc.operations)
+        assert restored.snapshot_clock == doc.snapshot_clock
+        assert restored.nodes[root].content == "v9"
+        assert restored.requires_snapshot({"alice": 1})
+        assert not restored.requires_snapshot({"alice": 3, "bob": 3})
+
+    def test_session_compacts_after_acknowledgements(self):
+        """Test that a session keeps its log bounded as users acknowledge."""
+        doc = CRDTDocument("doc-1")
+        session = CollaborationSession("s1", doc, compact_every=50)
+        session.join("alice")
+        root = doc.create_node("element", "", "alice")
+
+        for i in range(500):
+            doc.update_node(root, "content", str(i), "alice")
+            session.acknowledge("alice", dict(doc.vector_clock))
+
+        assert len(doc.operations) < 50
+
+    def test_leaving_user_releases_log(self):
+        """Test that a departed user no longer pins the log."""
+        doc, _ = make_history(5)
+        session = CollaborationSession("s1", doc, compact_every=0)
+        session.join("carol")
+        assert doc.compact() == 0
+
+        log_size = len(doc.operations)
+        session.leave("carol")
+        assert doc.compact() == log_size
@@ -0,0 +1,193 @@
+"""Tests for the multi-document collaboration hub."""
+
+import asyncio
+
+import pytest
+
+from src.collaboration.crdt import CRDTDocument
+from src.collaboration.hub import CollaborationHub
+from src.collaboration.store import OpLogStore
+from src.collaboration.sync import decode_op_batch
+
+
+def make_edits(user_id: str, n: int, doc_id: str = "doc-1"):
+    """A fresh replica's ops: one node plus n content updates."""
+    doc = CRDTDocument(doc_id)
+    node_id = doc.create_node("element", "", user_id)
+    for i in range(n):
+        doc.update_node(node_id, "content", f"{user_id}-{i}", user_id)
+    return doc.operations, node_id
+
+
+async def settle(hub: CollaborationHub, timeout: float = 2.0):
+    """Wait until every actor's inbox is drained and merged."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(hub.tick_interval * 2 + 0.01)
+        if not hub.get_metrics()["queue_depth"]:
+            return
+
+
+class TestCollaborationHub:
+    """Tests for CollaborationHub and its document actors."""
+
+    def test_submissions_are_merged_per_tick(self):
+        """Test that edits queued within one tick are merged as a single batch."""
+
+        async def run():
+            hub = CollaborationHub(tick_interval=0.05)
+            ops, node_id = make_edits("alice", 20)
+            for op in ops:
+                await hub.submit("doc-1", "alice", [op])
+            await settle(hub)
+
+            assert hub.metrics.batches_merged == 1
+            assert hub.metrics.ops_merged == 21
+            assert hub.get_session("doc-1").document.nodes[node_id].content == "alice-19"
+
+        asyncio.run(run())
+
+    def test_full_inbox_applies_backpressure(self):
+        """Test that submitters wait once a document's inbox is full."""
+
+        async def run():
+            hub = CollaborationHub(tick_interval=1.0, max_queue=2)
+            ops, _ = make_edits("alice", 3)
+            for op in ops[:3]:
+                await hub.submit("doc-1", "alice", [op])
+
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(hub.submit("doc-1", "alice", [ops[3]]), timeout=0.05)
+            assert hub.get_metrics()["queue_depth"] == 2
+
+        asyncio.run(run())
+
+    def test_fan_out_skips_sender(self):
+        """Test that merged edits are pushed to other users but not echoed."""
+
+        async def run():
+            hub = CollaborationHub(tick_interval=0)
+            sent = {"alice": [], "bob": []}
+
+            senders = []
+            for user_id in sent:
+
+                async def send(data, user_id=user_id):
+                    sent[user_id].append(data)
+
+                senders.append(asyncio.create_task(hub.connect("doc-1", user_id, send).run()))
+
+            ops, _ = make_edits("alice", 5)
+            await hub.submit("doc-1", "alice", ops)
+            await settle(hub)
+
+            assert sent["alice"] == []
+            assert len(decode_op_batch(sent["bob"][0])) == 6
+            assert hub.get_metrics()["fanout_latency_ms"]["max"] > 0
+
+            for task in senders:
+                task.cancel()
+
+        asyncio.run(run())
+
+    def test_slow_consumers_get_capped_batches(self):
+        """Test that a large backlog is sent in chunks of max_send_ops."""
+
+        async def run():
+            hub = CollaborationHub(tick_interval=0, max_send_ops=4)
+            batches = []
+
+            async def send(data):
+                batches.append(decode_op_batch(data))
+
+            sender = asyncio.create_task(hub.connect("doc-1", "bob", send).run())
+            ops, _ = make_edits("alice", 9)
+            await hub.submit("doc-1", "alice", ops)
+            await settle(hub)
+
+            assert [len(b) for b in batches] == [4, 4, 2]
+            sender.cancel()
+
+        asyncio.run(run())
+
+    def test_idle_documents_are_evicted_and_reloaded(self, tmp_path):
+        """Test that an idle document is persisted, dropped and reloaded intact."""
+
+        async def run():
+            hub = CollaborationHub(OpLogStore(str(tmp_path)), tick_interval=0, idle_timeout=0.05)
+            ops, node_id = make_edits("alice", 5)
+            await hub.submit("doc-1", "alice", ops)
+            await asyncio.sleep(0.2)
+
+            assert hub.get_session("doc-1") is None
+            assert hub.metrics.evictions == 1
+
+            reloaded = hub.open("doc-1").session.document
+            assert reloaded.nodes[node_id].content == "alice-4"
+            await hub.shutdown()
+
+        asyncio.run(run())
+
+    def test_log_is_fsynced_without_further_edits(self, tmp_path):
+        """Test that the actor fsyncs pending records once their interval passes."""
+
+        async def run():
+            store = OpLogStore(str(tmp_path), fsync_every=1000, fsync_interval=0.02)
+            hub = CollaborationHub(store, tick_interval=0)
+            ops, _ = make_edits("alice", 3)
+            await hub.submit("doc-1", "alice", ops)
+            await settle(hub)
+
+            log = hub.open("doc-1").log
+            assert log.records == 1
+            await asyncio.sleep(0.1)
+            assert log.sync_due_in() is None
+            await hub.shutdown()
+
+        asyncio.run(run())
+
+    def test_shutdown_merges_queued_edits(self, tmp_path):
+        """Test that edits still waiting for a tick are persisted on shutdown."""
+
+        async def run():
+            hub = CollaborationHub(OpLogStore(str(tmp_path)), tick_interval=1.0)
+            ops, node_id = make_edits("alice", 3)
+            await hub.submit("doc-1", "alice", ops[:2])
+            # The actor now holds the first submission while it waits out the tick
+            await asyncio.sleep(0.05)
+            await hub.submit("doc-1", "alice", ops[2:])
+            await hub.shutdown()
+
+            reloaded = OpLogStore(str(tmp_path)).load("doc-1")
+            assert reloaded.nodes[node_id].content == "alice-2"
+
+        asyncio.run(run())
+
+    def test_many_documents_and_editors(self):
+        """Test that concurrent editors across documents all converge."""
+
+        async def run():
+            hub = CollaborationHub(tick_interval=0.001)
+            n_docs, n_editors = 10, 20
+
+            async def editor(doc_id: str, user_id: str):
+                ops, _ = make_edits(user_id, 10, doc_id)
+                for op in ops:
+                    await hub.submit(doc_id, user_id, [op])
+                    await asyncio.sleep(0)
+
+            await asyncio.gather(
+                *(
+                    editor(f"doc-{d}", f"user-{d}-{e}")
+                    for d in range(n_docs)
+                    for e in range(n_editors)
+                )
+            )
+            await settle(hub)
+
+            assert hub.metrics.ops_merged == n_docs * n_editors * 11
+            for d in range(n_docs):
+                document = hub.get_session(f"doc-{d}").document
+                assert len(document.nodes) == n_editors
+
+        asyncio.run(run())
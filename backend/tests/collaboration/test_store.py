@@ -0,0 +1,183 @@
+"""Tests for the durable op log store."""
+
+import os
+
+import pytest
+
+from src.collaboration.crdt import CRDTDocument
+from src.collaboration.store import LOG_MAGIC, DocumentLog, OpLogStore
+
+
+def edit(doc: CRDTDocument, n: int, user_id: str = "alice"):
+    """Make n edits and return the ops they created."""
+    start = len(doc.operations)
+    node_id = doc.root_id or doc.create_node("element", "", user_id)
+    for i in range(n):
+        doc.update_node(node_id, "content", f"v{i}", user_id)
+    return doc.operations[start:]
+
+
+class TestDocumentLog:
+    """Tests for DocumentLog."""
+
+    def test_load_replays_log(self, tmp_path):
+        """Test that a document is rebuilt from the log alone."""
+        doc = CRDTDocument("doc-1")
+        log = DocumentLog(str(tmp_path), "doc-1")
+        log.append(edit(doc, 5))
+        log.append(edit(doc, 5, "bob"))
+        log.close()
+
+        loaded = DocumentLog(str(tmp_path), "doc-1").load()
+
+        assert loaded.nodes[doc.root_id].content == "v4"
+        assert dict(loaded.vector_clock) == dict(doc.vector_clock)
+
+    def test_load_uses_snapshot_and_tail(self, tmp_path):
+        """Test that loading starts from the snapshot and replays only later records."""
+        doc = CRDTDocument("doc-1")
+        log = DocumentLog(str(tmp_path), "doc-1")
+        log.append(edit(doc, 10))
+        log.write_snapshot(doc)
+        log.append(edit(doc, 3, "bob"))
+        log.close()
+
+        reopened = DocumentLog(str(tmp_path), "doc-1")
+        tail = list(reopened.iter_records(reopened.snapshot_offset))
+        loaded = reopened.load()
+
+        assert len(tail) == 1
+        assert dict(loaded.vector_clock) == dict(doc.vector_clock)
+
+    def test_snapshot_cuts_the_log(self, tmp_path):
+        """Test that a snapshot empties the log and loading still sees every op."""
+        doc = CRDTDocument("doc-1")
+        log = DocumentLog(str(tmp_path), "doc-1")
+        for _ in range(5):
+            log.append(edit(doc, 10))
+        log.write_snapshot(doc)
+
+        assert os.path.getsize(log.path) == len(LOG_MAGIC)
+        log.append(edit(doc, 2, "bob"))
+        log.close()
+
+        reopened = DocumentLog(str(tmp_path), "doc-1")
+        assert reopened.records == 1
+        assert dict(reopened.load().vector_clock) == dict(doc.vector_clock)
+
+    def test_crash_before_cut_replays_idempotently(self, tmp_path):
+        """Test that a snapshot next to the uncut log loads to the same state."""
+        doc = CRDTDocument("doc-1")
+        log = DocumentLog(str(tmp_path), "doc-1")
+        log.append(edit(doc, 10))
+        log.sync()
+        with open(log.path, "rb") as f:
+            uncut = f.read()
+        log.write_snapshot(doc)
+        log.close()
+        with open(log.path, "wb") as f:
+            f.write(uncut)
+
+        loaded = DocumentLog(str(tmp_path), "doc-1").load()
+
+        assert dict(loaded.vector_clock) == dict(doc.vector_clock)
+        assert loaded.nodes[doc.root_id].content == "v9"
+
+    def test_torn_write_is_truncated(self, tmp_path):
+        """Test that a partial trailing record is cut off on recovery."""
+        doc = CRDTDocument("doc-1")
+        log = DocumentLog(str(tmp_path), "doc-1")
+        log.append(edit(doc, 2))
+        log.append(edit(doc, 2))
+        log.close()
+        intact = os.path.getsize(log.path)
+        with open(log.path, "ab") as f:
+            f.write(b"\x40\x00\x00\x00garbage")
+
+        recovered = DocumentLog(str(tmp_path), "doc-1")
+
+        assert recovered.records == 2
+        assert recovered.truncated_bytes == 11
+        assert os.path.getsize(log.path) == intact
+        assert recovered.append(edit(doc, 1)) == intact
+
+    def test_corrupt_record_is_truncated(self, tmp_path):
+        """Test that a record failing its checksum ends the log."""
+        doc = CRDTDocument("doc-1")
+        log = DocumentLog(str(tmp_path), "doc-1")
+        log.append(edit(doc, 2))
+        second = log.append(edit(doc, 2))
+        log.close()
+        with open(log.path, "r+b") as f:
+            f.seek(second + 12)
+            f.write(b"\xff")
+
+        recovered = DocumentLog(str(tmp_path), "doc-1")
+
+        assert recovered.records == 1
+        assert os.path.getsize(log.path) == second
+
+    def test_read_since_uses_clock_index(self, tmp_path):
+        """Test that missing ops are read starting at the indexed offset."""
+        doc = CRDTDocument("doc-1")
+        log = DocumentLog(str(tmp_path), "doc-1")
+        offsets = [log.append(edit(doc, 10)) for _ in range(5)]
+
+        assert log.offset_for({}) == len(LOG_MAGIC)
+        assert log.offset_for({"alice": 25}) == offsets[2]
+        assert log.offset_for(dict(doc.vector_clock)) == log.size
+
+        missing = log.read_since({"alice": 25})
+        assert [op.vector_clock["alice"] for op in missing] == list(range(26, 52))
+
+    def test_fsync_batching(self, tmp_path):
+        """Test that appends are synced in groups rather than per record."""
+        doc = CRDTDocument("doc-1")
+        log = DocumentLog(str(tmp_path), "doc-1", fsync_every=4, fsync_interval=3600)
+        for _ in range(3):
+            log.append(edit(doc, 1))
+        assert log._unsynced == 3
+
+        log.append(edit(doc, 1))
+        assert log._unsynced == 0
+
+    def test_records_are_flushed_before_fsync(self, tmp_path):
+        """Test that each record reaches the file at once and reports its fsync deadline."""
+        doc = CRDTDocument("doc-1")
+        log = DocumentLog(str(tmp_path), "doc-1", fsync_every=64, fsync_interval=3600)
+        assert log.sync_due_in() is None
+
+        log.append(edit(doc, 1))
+        assert os.path.getsize(log.path) == log.size
+        assert 0 < log.sync_due_in() <= 3600
+
+        log.sync()
+        assert log.sync_due_in() is None
+
+
+class TestOpLogStore:
+    """Tests for OpLogStore."""
+
+    def test_unknown_document(self, tmp_path):
+        """Test that loading a document that was never stored returns None."""
+        assert OpLogStore(str(tmp_path)).load("missing") is None
+
+    def test_documents_are_isolated(self, tmp_path):
+        """Test that documents with awkward ids get separate logs."""
+        store = OpLogStore(str(tmp_path))
+        first, second = CRDTDocument("a b"), CRDTDocument("a%20b")
+        store.open("a b").append(edit(first, 2))
+        store.open("a%20b").append(edit(second, 3))
+        store.close()
+
+        reopened = OpLogStore(str(tmp_path))
+        assert len(reopened.load("a b").operations) == 3
+        assert len(reopened.load("a%20b").operations) == 4
+
+    @pytest.mark.parametrize("doc_id", ["", ".", "..", "a/b", "..\\x"])
+    def test_unsafe_ids_are_rejected(self, tmp_path, doc_id):
+        """Test that ids which could escape the store's root are refused."""
+        store = OpLogStore(str(tmp_path / "collaboration"))
+        with pytest.raises(ValueError):
+            store.open(doc_id)
+        assert os.listdir(tmp_path) == ["collaboration"]
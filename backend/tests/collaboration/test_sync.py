@@ -0,0 +1,211 @@
+"""Tests for the delta-sync protocol."""
+
+import asyncio
+import zlib
+
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from src.api import collaboration as collaboration_api
+from src.collaboration.crdt import CollaborationSession, CRDTDocument
+from src.collaboration.sync import SyncConnection, decode_op_batch, encode_op_batch
+
+
+def make_doc(n_updates: int = 10):
+    doc = CRDTDocument("doc-1")
+    root = doc.create_node("element", "start", "alice", attributes={"tone": "dark"})
+    for i in range(n_updates):
+        doc.update_node(root, "content", f"v{i}", "alice" if i % 2 else "bob")
+    return doc, root
+
+
+def make_user_doc(user_id: str, n_updates: int = 3):
+    """A document whose node and updates were all made by one user."""
+    doc = CRDTDocument("doc-1")
+    root = doc.create_node("element", "start", user_id)
+    for i in range(n_updates):
+        doc.update_node(root, "content", f"v{i}", user_id)
+    return doc, root
+
+
+class TestOpBatchCodec:
+    """Tests for the binary op batch encoding."""
+
+    def test_round_trip(self):
+        """Test that every op field survives encoding."""
+        doc, _ = make_doc()
+        decoded = decode_op_batch(encode_op_batch(doc.operations))
+        assert [op.to_dict() for op in decoded] == [op.to_dict() for op in doc.operations]
+
+    def test_batch_is_smaller_than_json(self):
+        """Test that the binary batch beats plain JSON on size."""
+        import json
+
+        doc, _ = make_doc(500)
+        as_json = json.dumps([op.to_dict() for op in doc.operations]).encode()
+        assert len(encode_op_batch(doc.operations)) < len(as_json) / 4
+
+    def test_rejects_foreign_payload(self):
+        """Test that non-batch bytes are refused."""
+        try:
+            decode_op_batch(b"nope")
+            assert False, "Expected ValueError"
+        except ValueError:
+            pass
+
+    @pytest.mark.parametrize(
+        "corrupt",
+        [
+            lambda data: data[:5],
+            lambda data: data[:5] + zlib.compress(b"\xff\xff"),
+            lambda data: data[:-3],
+            lambda data: data[:4],
+        ],
+    )
+    def test_malformed_batches_raise_value_error(self, corrupt):
+        """Test that truncated or garbled batches surface as ValueError."""
+        doc, _ = make_doc(3)
+        with pytest.raises(ValueError):
+            decode_op_batch(corrupt(encode_op_batch(doc.operations)))
+
+
+class TestDeltaSync:
+    """Tests for clock-based delta computation."""
+
+    def test_pending_ops_match_missing_range(self):
+        """Test that only ops beyond the client's clock are returned."""
+        doc, _ = make_doc(10)
+        pending = doc.get_pending_operations({"alice": 3, "bob": 5})
+
+        assert [op.vector_clock[op.user_id] for op in pending] == [4, 5, 6]
+        assert pending == [op for op in doc.operations if op in pending]
+
+    def test_sync_for_user_uses_full_clock(self):
+        """Test that a user only receives what their replica lacks."""
+        doc, _ = make_doc(10)
+        session = CollaborationSession("s1", doc)
+        session.join("carol")
+
+        assert len(session.sync_for_user("carol", {})) == len(doc.operations)
+        assert session.sync_for_user("carol", dict(doc.vector_clock)) == []
+        assert session.sync_for_user("carol") == []
+
+    def test_connection_coalesces_notifications(self):
+        """Test that a burst of notifications produces one batch."""
+
+        async def run():
+            doc, root = make_doc(0)
+            session = CollaborationSession("s1", doc)
+            session.join("carol")
+            sent = []
+
+            async def send_bytes(data):
+                sent.append(data)
+
+            connection = SyncConnection(session, "carol", send_bytes)
+            connection.update_clock(dict(doc.vector_clock))
+            task = asyncio.create_task(connection.run())
+
+            for i in range(20):
+                doc.update_node(root, "content", str(i), "alice")
+                connection.notify()
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            connection.close()
+            await task
+
+            assert len(sent) == 1
+            assert len(decode_op_batch(sent[0])) == 20
+
+        asyncio.run(run())
+
+
+class TestCollaborationWebSocket:
+    """End-to-end tests for the WebSocket endpoint."""
+
+    def test_edits_are_pushed_to_other_users(self):
+        """Test that one user's edits reach another as a binary batch."""
+        from src.main import app
+
+        editor, root = make_user_doc("alice")
+        client = TestClient(app)
+
+        with client.websocket_connect("/api/collaboration/ws-doc/ws?user_id=bob") as bob:
+            bob.send_json({"type": "sync", "vector_clock": {}})
+            with client.websocket_connect(
+                "/api/collaboration/ws-doc/ws?user_id=alice"
+            ) as alice:
+                alice.send_json({"type": "sync", "vector_clock": {}})
+                alice.send_bytes(encode_op_batch(editor.operations))
+
+                received = decode_op_batch(bob.receive_bytes())
+
+        replica = CRDTDocument("ws-doc")
+        replica.merge_operations(received)
+        assert replica.nodes[root].content == "v2"
+
+    def test_app_shutdown_snapshots_open_documents(self, isolated_hub):
+        """Test that stopping the app shuts the hub down and persists documents."""
+        from src.main import app
+
+        editor, root = make_user_doc("alice")
+        with TestClient(app) as client:
+            with client.websocket_connect("/api/collaboration/ws-doc/ws?user_id=bob") as bob:
+                bob.send_json({"type": "sync", "vector_clock": {}})
+                with client.websocket_connect(
+                    "/api/collaboration/ws-doc/ws?user_id=alice"
+                ) as alice:
+                    alice.send_bytes(encode_op_batch(editor.operations))
+                    bob.receive_bytes()
+
+        assert collaboration_api._hub is None
+        assert isolated_hub.get_session("ws-doc") is None
+        reloaded = isolated_hub.store.load("ws-doc")
+        assert reloaded.nodes[root].content == "v2"
+
+    @pytest.mark.parametrize(
+        "send",
+        [
+            lambda ws: ws.send_bytes(b"CRDB\x01garbage"),
+            lambda ws: ws.send_text("{not json"),
+            lambda ws: ws.send_json({"type": "sync", "vector_clock": {"bob": "many"}}),
+            lambda ws: ws.send_json({"type": "sync", "vector_clock": [1, 2]}),
+        ],
+    )
+    def test_malformed_frames_close_with_unsupported_data(self, send):
+        """Test that a bad client frame closes the socket with code 1003."""
+        from src.main import app
+
+        client = TestClient(app)
+        with client.websocket_connect("/api/collaboration/ws-doc/ws?user_id=bob") as bob:
+            send(bob)
+            with pytest.raises(WebSocketDisconnect) as closed:
+                bob.receive_bytes()
+
+        assert closed.value.code == 1003
+
+    def test_path_like_document_id_is_refused(self):
+        """Test that a doc id of '..' cannot reach outside the store's root."""
+        from src.main import app
+
+        client = TestClient(app)
+        with pytest.raises(WebSocketDisconnect) as closed:
+            with client.websocket_connect("/api/collaboration/%2E%2E/ws?user_id=bob") as ws:
+                ws.receive_bytes()
+
+        assert closed.value.code == 1008
+        assert client.get("/api/collaboration/%2E%2E").status_code == 400
+
+    def test_ops_of_another_user_close_the_socket(self):
+        """Test that a client cannot submit ops stamped with someone else's id."""
+        from src.main import app
+
+        forged, _ = make_user_doc("bob")
+        client = TestClient(app)
+        with client.websocket_connect("/api/collaboration/ws-doc/ws?user_id=alice") as alice:
+            alice.send_bytes(encode_op_batch(forged.operations))
+            with pytest.raises(WebSocketDisconnect) as closed:
+                alice.receive_bytes()
+
+        assert closed.value.code == 1003
@@ -0,0 +1,189 @@
+"""Tests for the character-level text sequence CRDT."""
+
+import random
+
+from src.collaboration.crdt import CRDTDocument, OperationType
+from src.collaboration.sync import decode_op_batch, encode_op_batch
+from src.collaboration.text import TextCRDT
+
+
+def make_replicas(content: str = "hello"):
+    """Two replicas of a document with one shared node."""
+    alice = CRDTDocument("doc-1")
+    node_id = alice.create_node("element", content, "alice")
+    bob = CRDTDocument("doc-1")
+    bob.merge_operations(alice.operations)
+    return alice, bob, node_id
+
+
+def exchange(a: CRDTDocument, b: CRDTDocument):
+    """Deliver every op each replica is missing from the other."""
+    a_ops, b_ops = list(a.operations), list(b.operations)
+    a.merge_operations(b_ops)
+    b.merge_operations(a_ops)
+
+
+class TestTextCRDT:
+    """Tests for TextCRDT on its own."""
+
+    def test_local_edits(self):
+        """Test inserts and deletes at visible indexes."""
+        text = TextCRDT("hello")
+        text.local_insert(5, " world", "alice")
+        text.local_insert(0, ">", "alice")
+        text.local_delete(1, 5)
+
+        assert text.value == "> world"
+
+    def test_typing_run_is_one_block(self):
+        """Test that sequential typing extends a single block."""
+        text = TextCRDT()
+        for i, char in enumerate("narrative"):
+            text.local_insert(i, char, "alice")
+
+        assert text.value == "narrative"
+        assert len(text.blocks) == 1
+
+    def test_delete_splits_block(self):
+        """Test that deleting from the middle of a run tombstones only that span."""
+        text = TextCRDT("abcdef")
+        payload = text.local_delete(2, 2)
+
+        assert payload == {"spans": [["", 3, 2]]}
+        assert text.value == "abef"
+        assert [b.deleted for b in text.blocks] == [False, True, False]
+
+    def test_serialization_round_trip(self):
+        """Test that blocks and ids survive to_dict/from_dict."""
+        text = TextCRDT("abc")
+        text.local_insert(1, "xy", "bob")
+        text.local_delete(0, 1)
+
+        restored = TextCRDT.from_dict(text.to_dict())
+        restored.local_insert(len(restored), "!", "bob")
+
+        assert restored.value == "xybc!"
+        assert restored.blocks[-1].start > text.max_lamport
+
+
+class TestDocumentTextEditing:
+    """Tests for text ops integrated through CRDTDocument."""
+
+    def test_concurrent_inserts_converge(self):
+        """Test that concurrent inserts at the same index keep both edits."""
+        alice, bob, node_id = make_replicas("hello")
+        alice.insert_text(node_id, 5, " alice", "alice")
+        bob.insert_text(node_id, 5, " bob", "bob")
+
+        exchange(alice, bob)
+
+        assert alice.nodes[node_id].content == bob.nodes[node_id].content
+        assert sorted(alice.nodes[node_id].content.split()) == ["alice", "bob", "hello"]
+
+    def test_concurrent_insert_and_delete(self):
+        """Test that an insert inside a concurrently deleted range survives."""
+        alice, bob, node_id = make_replicas("the dark forest")
+        alice.delete_text(node_id, 4, 5, "alice")
+        bob.insert_text(node_id, 6, "XX", "bob")
+
+        exchange(alice, bob)
+
+        assert alice.nodes[node_id].content == "the XXforest"
+        assert bob.nodes[node_id].content == "the XXforest"
+
+    def test_ops_carry_only_the_span(self):
+        """Test that a text op's payload does not contain the full content."""
+        alice, _, node_id = make_replicas("x" * 1000)
+        op = alice.insert_text(node_id, 500, "y", "alice")
+
+        assert op.op_type == OperationType.TEXT_INSERT
+        assert op.value["text"] == "y"
+        assert len(encode_op_batch([op])) < 200
+
+    def test_randomized_convergence(self):
+        """Test convergence under random concurrent edits and shuffled delivery."""
+        rng = random.Random(7)
+        alice, bob, node_id = make_replicas("seed")
+        for _ in range(20):
+            for doc, user in ((alice, "alice"), (bob, "bob")):
+                for _ in range(rng.randint(1, 5)):
+                    length = len(doc.nodes[node_id].content)
+                    if length and rng.random() < 0.3:
+                        doc.delete_text(node_id, rng.randrange(length), rng.randint(1, 3), user)
+                    else:
+                        doc.insert_text(node_id, rng.randint(0, length), rng.choice("abc"), user)
+            a_ops, b_ops = list(alice.operations), list(bob.operations)
+            rng.shuffle(a_ops)
+            rng.shuffle(b_ops)
+            alice.merge_operations(b_ops)
+            bob.merge_operations(a_ops)
+
+            assert alice.nodes[node_id].content == bob.nodes[node_id].content
+
+    def test_text_ops_round_trip_codec_and_snapshot(self):
+        """Test that text ops survive the binary codec and document snapshots."""
+        alice, bob, node_id = make_replicas("abc")
+        alice.insert_text(node_id, 3, "def", "alice")
+        alice.delete_text(node_id, 0, 1, "alice")
+
+        bob.merge_operations(decode_op_batch(encode_op_batch(alice.operations)))
+        restored = CRDTDocument.from_dict(alice.to_dict())
+        restored.insert_text(node_id, 0, "A", "alice")
+
+        assert bob.nodes[node_id].content == "bcdef"
+        assert restored.nodes[node_id].content == "Abcdef"
+
+    def test_whole_content_update_resets_sequence(self):
+        """Test that a plain content update replaces the text state."""
+        alice, bob, node_id = make_replicas("abc")
+        alice.insert_text(node_id, 3, "d", "alice")
+        alice.update_node(node_id, "content", "fresh", "alice")
+        alice.insert_text(node_id, 5, "!", "alice")
+
+        bob.merge_operations(alice.operations)
+
+        assert alice.nodes[node_id].content == "fresh!"
+        assert bob.nodes[node_id].content == "fresh!"
+
+    def test_update_interleaved_with_concurrent_inserts_converges(self):
+        """Test that replicas agree when an update races character edits."""
+        alice, bob, node_id = make_replicas("hello")
+        alice.insert_text(node_id, 5, "!", "alice")
+        exchange(alice, bob)
+
+        bob.insert_text(node_id, 0, ">", "bob")
+        alice.update_node(node_id, "content", "fresh", "alice")
+        bob.insert_text(node_id, 1, " ", "bob")
+        alice.insert_text(node_id, 5, "?", "alice")
+        carol = CRDTDocument.from_dict(bob.to_dict())
+        carol.merge_operations(reversed(alice.operations))
+
+        exchange(alice, bob)
+
+        assert alice.nodes[node_id].content == "fresh?"
+        assert bob.nodes[node_id].content == "fresh?"
+        assert carol.nodes[node_id].content == "fresh?"
+        assert not (alice.resync_nodes or bob.resync_nodes or carol.resync_nodes)
+
+    def test_concurrent_updates_pick_the_same_winner(self):
+        """Test that concurrent content updates resolve identically everywhere."""
+        alice, bob, node_id = make_replicas("hello")
+        alice.update_node(node_id, "content", "from alice", "alice")
+        bob.update_node(node_id, "content", "from bob", "bob")
+        bob.insert_text(node_id, 8, "!", "bob")
+
+        exchange(alice, bob)
+
+        assert alice.nodes[node_id].content == bob.nodes[node_id].content
+        restored = CRDTDocument.from_dict(alice.to_dict())
+        assert restored.nodes[node_id].epoch == bob.nodes[node_id].epoch
+
+    def test_unknown_origin_flags_resync(self):
+        """Test that an op whose origin is missing flags the node instead of vanishing."""
+        alice, bob, node_id = make_replicas("abc")
+        op = alice.insert_text(node_id, 3, "d", "alice")
+        op.value["origin"] = ["ghost", 1]
+
+        bob.merge_operations([op])
+
+        assert bob.resync_nodes == {node_id}
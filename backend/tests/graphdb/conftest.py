@@ -0,0 +1,19 @@
+"""Shared fixtures for graphdb tests."""
+
+import pytest
+
+from src.graphdb import query_cache
+from src.graphdb import routes as graph_routes
+
+
+@pytest.fixture(autouse=True)
+def isolated_sync_manifest(tmp_path, monkeypatch):
+    """Keep the routes' sync manifest out of the real data directory."""
+    monkeypatch.setattr(graph_routes, "SYNC_MANIFEST_PATH", tmp_path / "sync_manifest.json")
+    monkeypatch.setattr(graph_routes, "_sync_engine", None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_query_cache(monkeypatch):
+    """Start every test with an empty read-query cache."""
+    monkeypatch.setattr(query_cache, "_query_cache", None)
@@ -0,0 +1,107 @@
+"""Recording stand-in for the Neo4j adapter and driver used by the graphdb tests."""
+
+import asyncio
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+
+from neo4j.exceptions import TransientError
+
+
+class FakeRecord(dict):
+    def data(self):
+        return dict(self)
+
+
+class FakeResult:
+    def __init__(self, records: list[dict]):
+        self.records = records
+
+    async def __aiter__(self):
+        for record in self.records:
+            yield FakeRecord(record)
+
+    async def single(self):
+        return self.records[0] if self.records else None
+
+    async def data(self):
+        return self.records
+
+    async def consume(self):
+        return None
+
+
+class FakeTransaction:
+    def __init__(self, adapter: "FakeAdapter"):
+        self.adapter = adapter
+
+    async def run(self, query: str, parameters: dict | None = None, **kwargs):
+        return await self.adapter.record(query, {**(parameters or {}), **kwargs})
+
+
+class FakeSession:
+    def __init__(self, adapter: "FakeAdapter"):
+        self.adapter = adapter
+
+    async def run(self, query: str, parameters: dict | None = None, **kwargs):
+        return await self.adapter.record(query, {**(parameters or {}), **kwargs})
+
+    async def execute_write(self, work, *args, **kwargs):
+        self.adapter.transactions += 1
+        return await work(FakeTransaction(self.adapter), *args, **kwargs)
+
+    async def execute_read(self, work, *args, **kwargs):
+        return await work(FakeTransaction(self.adapter), *args, **kwargs)
+
+
+class FakeAdapter:
+    """Adapter double that records every statement in execution order.
+
+    Write batches report every row as written; ``delay`` keeps statements
+    in flight long enough to observe concurrency, and statements containing
+    ``fail_on`` raise a Neo4j error instead of being recorded. ``respond``
+    may return the records of a read statement (or None for the default).
+    """
+
+    def __init__(
+        self,
+        delay: float = 0.0,
+        fail_on: str | None = None,
+        respond: Callable[[str, dict], list[dict] | None] | None = None,
+    ):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.respond = respond
+        self.transactions = 0
+        self.statements: list[tuple[str, dict]] = []
+        self.access_modes: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @asynccontextmanager
+    async def session(self, access_mode: str = "WRITE"):
+        self.access_modes.append(access_mode)
+        yield FakeSession(self)
+
+    async def record(self, query, params: dict) -> FakeResult:
+        # Accept neo4j.Query objects as well as plain strings
+        query = " ".join(getattr(query, "text", query).split())
+        if self.fail_on is not None and self.fail_on in query:
+            raise TransientError(f"simulated failure: {self.fail_on}")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            self.statements.append((query, params))
+        finally:
+            self.in_flight -= 1
+
+        if self.respond is not None:
+            records = self.respond(query, params)
+            if records is not None:
+                return FakeResult(records)
+
+        rows = next((v for v in params.values() if isinstance(v, list)), None)
+        if rows is None:
+            return FakeResult([])
+        return FakeResult([{"merged": len(rows), "created": len(rows)}])
+
@@ -0,0 +1,100 @@
+"""Tests for the sparse-matrix graph analytics."""
+
+import numpy as np
+from fastapi.testclient import TestClient
+from scipy import sparse
+
+from src.graphdb.analytics import (
+    GraphAnalytics,
+    betweenness,
+    get_analytics,
+    louvain,
+    modularity,
+    pagerank,
+)
+from src.graphdb.memory_graph import InMemoryGraph, get_memory_graph
+
+
+def two_cliques() -> sparse.csr_matrix:
+    """Two 4-cliques joined by a single bridge edge 3 - 4."""
+    adjacency = np.zeros((8, 8))
+    for group in (range(4), range(4, 8)):
+        for i in group:
+            for j in group:
+                if i < j:
+                    adjacency[i, j] = 1
+    adjacency[3, 4] = 1
+    return sparse.csr_matrix(adjacency)
+
+
+class TestGraphAnalytics:
+    """Tests for PageRank, betweenness and Louvain."""
+
+    def test_pagerank_favours_sinks_of_chains(self):
+        """Test that PageRank sums to 1 and grows along a causal chain."""
+        chain = sparse.csr_matrix(np.array([[0, 1, 0], [0, 0, 1], [0, 0, 0]], dtype=float))
+        rank = pagerank(chain)
+
+        assert np.isclose(rank.sum(), 1.0)
+        assert rank[0] < rank[1] < rank[2]
+
+    def test_betweenness_exact_and_sampled(self):
+        """Test Brandes betweenness against known values, exact and sampled."""
+        chain = sparse.csr_matrix(np.array([[0, 1, 0], [0, 0, 1], [0, 0, 0]], dtype=float))
+        assert betweenness(chain).tolist() == [0.0, 0.5, 0.0]
+        assert betweenness(chain, directed=False).tolist() == [0.0, 1.0, 0.0]
+
+        exact = betweenness(two_cliques(), directed=False, samples=None)
+        sampled = betweenness(two_cliques(), directed=False, samples=6, seed=1)
+        assert set(np.argsort(exact)[-2:]) == {3, 4}
+        assert set(np.argsort(sampled)[-2:]) == {3, 4}
+
+    def test_louvain_splits_cliques(self):
+        """Test that Louvain separates two loosely joined cliques."""
+        matrix = two_cliques()
+        labels = louvain(matrix)
+
+        assert len(set(labels[:4])) == 1
+        assert len(set(labels[4:])) == 1
+        assert labels[0] != labels[4]
+        assert modularity((matrix + matrix.T).tocsr(), labels) > 0.4
+
+    def test_projection_scores(self):
+        """Test analytics computed over the causality projection of a graph."""
+        graph = InMemoryGraph()
+        for node_id in "abcde":
+            graph.add_node(node_id, "Beat", {"beat_id": node_id, "summary": node_id.upper()})
+        graph.add_node("eric", "Character", {"name": "Eric"})
+        for src, dst in [("a", "c"), ("b", "c"), ("c", "d"), ("c", "e")]:
+            graph.add_relationship(src, dst, "CAUSES", {"confidence": 0.9})
+        graph.add_relationship("eric", "c", "APPEARS_IN")
+        analytics = GraphAnalytics.compute(graph.freeze(), "causality")
+
+        assert "eric" not in analytics.node_ids
+        assert analytics.top("betweenness", limit=1)[0]["id"] == "c"
+        assert analytics.scores("c")["name"] == "C"
+        assert analytics.scores("missing") is None
+        assert sum(g["size"] for g in analytics.community_groups()) == 5
+
+    def test_cached_per_graph_and_served_by_routes(self):
+        """Test that analytics are cached and exposed by the analysis routes."""
+        from src.main import app
+
+        assert get_analytics("causality") is get_analytics("causality")
+        client = TestClient(app)
+        top = client.get("/api/graph/neo4j/analysis/betweenness", params={"limit": 3}).json()
+        assert len(top) == 3
+        assert top[0]["score"] >= top[-1]["score"]
+
+        beat_id = top[0]["id"]
+        scores = client.get(f"/api/graph/neo4j/analysis/scores/{beat_id}").json()
+        assert scores["betweenness"] == top[0]["score"]
+
+        communities = client.get(
+            "/api/graph/neo4j/analysis/communities", params={"projection": "relationships"}
+        ).json()
+        members = sum(g["size"] for g in communities["communities"])
+        assert members == get_memory_graph().node_labels.count("Character")
+        assert client.get(
+            "/api/graph/neo4j/analysis/pagerank", params={"projection": "mythos"}
+        ).status_code == 422
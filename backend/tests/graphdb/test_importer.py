@@ -0,0 +1,116 @@
+"""Tests for the concurrent MERGE import pipeline."""
+
+import asyncio
+
+from src.graphdb.importer import ImportPipeline, NodeSpec, RelationshipSpec, plan_from_data
+
+from .fake_neo4j import FakeAdapter
+
+
+def make_plan(n_beats: int = 10):
+    beats = NodeSpec("Beat", [{"id": f"b{i}"} for i in range(n_beats)], indexes=("episode_id",))
+    characters = NodeSpec("Character", [{"id": "eric"}, {"id": "kiara"}])
+    causes = RelationshipSpec(
+        "CAUSES",
+        "Beat",
+        "Beat",
+        [
+            {"id": f"e{i}", "from_id": f"b{i}", "to_id": f"b{i + 1}", "properties": {}}
+            for i in range(n_beats - 1)
+        ],
+        keyed=True,
+    )
+    relates = RelationshipSpec(
+        "RELATES_TO",
+        "Character",
+        "Character",
+        [{"from_id": "eric", "to_id": "kiara", "properties": {"relationship_type": "friend"}}],
+    )
+    return [beats, characters], [causes, relates]
+
+
+class TestImportPipeline:
+    """Tests for ImportPipeline against a recording driver."""
+
+    def test_schema_before_writes(self):
+        """Test that constraints and indexes are created before any batch."""
+        adapter = FakeAdapter()
+        nodes, rels = make_plan()
+        report = asyncio.run(ImportPipeline(adapter, batch_size=4).run(nodes, rels))
+
+        queries = [q for q, _ in adapter.statements]
+        assert report.schema_statements == 4
+        assert queries[0].startswith("CREATE CONSTRAINT beat_id IF NOT EXISTS")
+        assert "ON (n.episode_id)" in queries[1]
+        assert queries[3] == "CALL db.awaitIndexes()"
+        assert all("MERGE" in q for q in queries[4:])
+        assert not any(q.startswith("CREATE (") or " CREATE (" in q for q in queries)
+
+    def test_labeled_merge_and_keyed_relationships(self):
+        """Test that relationships match labeled endpoints and parallel edges keep ids."""
+        adapter = FakeAdapter()
+        nodes, rels = make_plan()
+        asyncio.run(ImportPipeline(adapter).run(nodes, rels))
+
+        queries = [q for q, _ in adapter.statements]
+        causes = next(q for q in queries if ":CAUSES" in q)
+        relates = next(q for q in queries if ":RELATES_TO" in q)
+        assert "MATCH (a:Beat {id: rel.from_id})" in causes
+        assert "MERGE (a)-[r:CAUSES {id: rel.id}]->(b)" in causes
+        assert "MATCH (b:Character {id: rel.to_id})" in relates
+        assert "MERGE (a)-[r:RELATES_TO]->(b)" in relates
+
+    def test_relationships_wait_for_their_labels(self):
+        """Test bounded concurrency and that edges follow their endpoint nodes."""
+        adapter = FakeAdapter(delay=0.01)
+        nodes, rels = make_plan(n_beats=40)
+        report = asyncio.run(ImportPipeline(adapter, batch_size=5, concurrency=3).run(nodes, rels))
+
+        order = [q for q, _ in adapter.statements]
+        last_beat = max(i for i, q in enumerate(order) if "MERGE (n:Beat" in q)
+        first_causes = min(i for i, q in enumerate(order) if ":CAUSES" in q)
+        assert first_causes > last_beat
+        assert 1 < adapter.max_in_flight <= 3
+
+        assert report.nodes_written == 42
+        assert report.relationships_written == 40
+        beat_batches = [b for b in report.batches if b.name == "Beat"]
+        assert len(beat_batches) == 8
+        assert all(b.rows_per_second > 0 and b.error is None for b in report.batches)
+
+    def test_plan_from_data(self):
+        """Test that the plan covers the loaded data and skips omitted entities."""
+        from src.data import beats_db, causality_edges_db
+
+        nodes, rels = plan_from_data(beats=beats_db, causality_edges=causality_edges_db)
+
+        assert [n.label for n in nodes] == ["Beat"]
+        assert len(nodes[0].rows) == len(beats_db)
+        assert [r.rel_type for r in rels] == ["CAUSES"]
+        assert {r["id"] for r in rels[0].rows} == set(causality_edges_db)
+
+    def test_import_route_reports_batches(self):
+        """Test that /import runs the pipeline and returns per-batch throughput."""
+        from fastapi.testclient import TestClient
+
+        from src.data import relationships_db
+        from src.graphdb.routes import get_neo4j_adapter
+        from src.main import app
+
+        adapter = FakeAdapter()
+
+        async def override():
+            yield adapter
+
+        app.dependency_overrides[get_neo4j_adapter] = override
+        try:
+            response = TestClient(app).post("/api/graph/neo4j/import", params={"batch_size": 50})
+        finally:
+            app.dependency_overrides.pop(get_neo4j_adapter)
+
+        body = response.json()
+        assert response.status_code == 200
+        assert body["status"] == "success"
+        assert body["relationships_imported"] >= len(relationships_db)
+        assert {b["name"] for b in body["batches"]} >= {"Beat", "Claim", "CAUSES"}
+        assert all(b["rows"] <= 50 for b in body["batches"])
@@ -0,0 +1,115 @@
+"""Tests for the in-process CSR graph engine."""
+
+from fastapi.testclient import TestClient
+
+from src.graphdb.memory_graph import InMemoryGraph, get_memory_graph
+
+
+def make_graph() -> InMemoryGraph:
+    """a -> b -> c -> d, a -> c, plus a character linked to beat b."""
+    graph = InMemoryGraph()
+    for node_id in "abcd":
+        graph.add_node(node_id, "Beat", {"beat_id": node_id})
+    graph.add_node("eric", "Character", {"name": "Eric"})
+    for src, dst in [("a", "b"), ("b", "c"), ("c", "d"), ("a", "c")]:
+        graph.add_relationship(src, dst, "CAUSES", {"confidence": 0.9})
+    graph.add_relationship("eric", "b", "APPEARS_IN")
+    assert not graph.add_relationship("eric", "missing", "APPEARS_IN")
+    return graph.freeze()
+
+
+class TestInMemoryGraph:
+    """Tests for InMemoryGraph operations."""
+
+    def test_csr_degrees(self):
+        """Test that CSR row pointers give in + out degree."""
+        graph = make_graph()
+
+        assert graph.degree("c") == {"total_degree": 3, "rel_types": ["CAUSES"]}
+        assert graph.degree("b")["rel_types"] == ["APPEARS_IN", "CAUSES"]
+        assert graph.degree("missing") is None
+
+    def test_neighbors_by_direction_and_type(self):
+        """Test neighbor lookups in the adapter's result format."""
+        graph = make_graph()
+
+        out = graph.get_neighbors("b", direction="out")
+        assert [(n["id"], n["_relationship_type"]) for n in out] == [("c", "CAUSES")]
+        incoming = {n["id"] for n in graph.get_neighbors("b", direction="in")}
+        assert incoming == {"a", "eric"}
+        assert [n["id"] for n in graph.get_neighbors("b", rel_type="APPEARS_IN")] == ["eric"]
+
+    def test_find_paths_shortest_first(self):
+        """Test directed path enumeration within max_depth."""
+        graph = make_graph()
+
+        paths = graph.find_paths("a", "d", max_depth=3)
+        assert [[n["id"] for n in p["nodes"]] for p in paths] == [
+            ["a", "c", "d"],
+            ["a", "b", "c", "d"],
+        ]
+        assert graph.find_paths("a", "d", max_depth=2)[0]["length"] == 2
+        assert graph.find_paths("d", "a") == []
+
+    def test_shortest_path_is_undirected(self):
+        """Test that shortest paths ignore direction like Neo4j's shortestPath."""
+        graph = make_graph()
+
+        path = graph.shortest_path("eric", "d")
+        assert [n["id"] for n in path["nodes"]] == ["eric", "b", "c", "d"]
+        assert [r["type"] for r in path["relationships"]] == ["APPEARS_IN", "CAUSES", "CAUSES"]
+        assert graph.shortest_path("eric", "d", max_depth=2) is None
+
+    def test_subgraph_depth(self):
+        """Test that a subgraph holds nodes within depth and edges on those paths."""
+        graph = make_graph()
+
+        subgraph = graph.get_subgraph("eric", depth=1)
+        assert [n["id"] for n in subgraph["nodes"]] == ["eric", "b"]
+        assert len(subgraph["relationships"]) == 1
+
+        subgraph = graph.get_subgraph("eric", depth=2)
+        assert {n["id"] for n in subgraph["nodes"]} == {"eric", "a", "b", "c"}
+        assert len(subgraph["relationships"]) == 3
+
+    def test_central_nodes(self):
+        """Test ranking nodes of a label by degree."""
+        graph = make_graph()
+
+        assert [n["id"] for n in graph.central_nodes("Beat", limit=2)] == ["b", "c"]
+
+
+class TestGraphRoutes:
+    """Tests for the graph routes served from memory."""
+
+    def test_routes_use_memory_backend(self):
+        """Test that traversal routes work without a Neo4j server."""
+        from src.main import app
+
+        client = TestClient(app)
+        graph = get_memory_graph()
+        edge = graph._relationship(0)
+
+        neighbors = client.get(f"/api/graph/neo4j/neighbors/{edge['from_id']}")
+        assert neighbors.status_code == 200
+        assert edge["to_id"] in {n["id"] for n in neighbors.json()}
+
+        shortest = client.get(
+            "/api/graph/neo4j/paths/shortest",
+            params={"start_id": edge["from_id"], "end_id": edge["to_id"]},
+        )
+        assert shortest.json()["found"] is True
+        assert shortest.json()["path"]["path_length"] == 1
+
+        subgraph = client.get(f"/api/graph/neo4j/subgraph/{edge['from_id']}?depth=1")
+        assert subgraph.status_code == 200
+        assert subgraph.json()["nodes"][0]["id"] == edge["from_id"]
+
+        degree = client.get(f"/api/graph/neo4j/analysis/degree/{edge['from_id']}")
+        assert degree.json()["total_degree"] >= 1
+        assert client.get("/api/graph/neo4j/analysis/degree/nope").status_code == 404
+
+        central = client.get("/api/graph/neo4j/analysis/central-nodes?label=Character")
+        assert central.status_code == 200
+        degrees = [n["degree"] for n in central.json()]
+        assert degrees == sorted(degrees, reverse=True)
@@ -0,0 +1,214 @@
+"""Tests for the bidirectional BFS / Yen's k-shortest path engine."""
+
+import asyncio
+import math
+import random
+
+from fastapi.testclient import TestClient
+
+from src.graphdb.memory_graph import InMemoryGraph
+from src.graphdb.neo4j_adapter import Neo4jAdapter
+from src.graphdb.paths import MAX_PATHS, PathEngine
+
+from .fake_neo4j import FakeAdapter
+
+
+def make_graph() -> InMemoryGraph:
+    """a -> b -> d is short but doubtful; a -> c -> e -> d is longer but confident."""
+    graph = InMemoryGraph()
+    for node_id in "abcde":
+        graph.add_node(node_id, "Beat", {"beat_id": node_id})
+    graph.add_relationship("a", "b", "CAUSES", {"confidence": 0.2})
+    graph.add_relationship("b", "d", "CAUSES", {"confidence": 0.3})
+    graph.add_relationship("a", "c", "CAUSES", {"confidence": 0.9})
+    graph.add_relationship("c", "e", "CAUSES", {"confidence": 0.9})
+    graph.add_relationship("e", "d", "CAUSES", {"confidence": 0.9})
+    graph.add_relationship("d", "a", "ENABLES", {"confidence": 1.0})
+    return graph.freeze()
+
+
+def random_graph(n: int, m: int, seed: int) -> InMemoryGraph:
+    rng = random.Random(seed)
+    graph = InMemoryGraph()
+    for i in range(n):
+        graph.add_node(f"n{i}", "Beat", {})
+    for _ in range(m):
+        src, dst = rng.sample(range(n), 2)
+        graph.add_relationship(
+            f"n{src}", f"n{dst}", "CAUSES", {"confidence": round(rng.uniform(0.05, 1.0), 2)}
+        )
+    return graph.freeze()
+
+
+def all_simple_path_costs(graph: InMemoryGraph, start: str, end: str, max_depth: int):
+    """Every directed simple path cost by exhaustive DFS (the old approach)."""
+    engine = PathEngine(graph, timeout=None)
+    target = graph.index[end]
+    costs = []
+    stack = [(graph.index[start], [graph.index[start]], 0.0)]
+    while stack:
+        u, nodes, cost = stack.pop()
+        if len(nodes) > max_depth:
+            continue
+        for e, v in graph._incident(u, "out"):
+            if v in nodes:
+                continue
+            if v == target:
+                costs.append(cost + engine._cost(e))
+            else:
+                stack.append((v, nodes + [v], cost + engine._cost(e)))
+    return sorted(costs)
+
+
+class TestPathEngine:
+    """Tests for PathEngine searches."""
+
+    def test_bfs_finds_fewest_hops(self):
+        """Test that the unweighted search takes the two-hop path."""
+        engine = PathEngine(make_graph(), weight=None)
+        search = engine.shortest("a", "d")
+        summary = engine.summarize(search.paths[0])
+        assert [n["id"] for n in summary["nodes"]] == ["a", "b", "d"]
+        assert summary["confidence"] is None
+
+    def test_bfs_respects_direction_and_depth(self):
+        """Test that directed search follows edge direction within max_depth."""
+        graph = make_graph()
+        assert PathEngine(graph, weight=None).shortest("d", "c", max_depth=1).paths == []
+        path = PathEngine(graph, weight=None).shortest("d", "c", max_depth=2).paths[0]
+        assert path.length == 2
+        undirected = PathEngine(graph, direction="both", weight=None)
+        assert undirected.shortest("d", "c", max_depth=2).paths[0].length == 2
+
+    def test_weighted_prefers_confident_path(self):
+        """Test that the weighted search maximises the product of confidences."""
+        engine = PathEngine(make_graph())
+        path = engine.describe(engine.shortest("a", "d").paths[0])
+        assert [n["id"] for n in path["nodes"]] == ["a", "c", "e", "d"]
+        assert math.isclose(path["confidence"], 0.9**3)
+
+    def test_weighted_respects_max_depth(self):
+        """Test that a confident path longer than max_depth is not returned."""
+        engine = PathEngine(make_graph())
+        path = engine.shortest("a", "d", max_depth=2).paths[0]
+        assert path.length == 2
+
+    def test_k_shortest_orders_by_confidence(self):
+        """Test that Yen's search returns both paths, best first."""
+        engine = PathEngine(make_graph())
+        search = engine.k_shortest("a", "d", k=5)
+        assert [[engine.graph.node_ids[u] for u in p.nodes] for p in search.paths] == [
+            ["a", "c", "e", "d"],
+            ["a", "b", "d"],
+        ]
+        assert not search.truncated
+
+    def test_k_shortest_matches_exhaustive_enumeration(self):
+        """Test Yen's costs against every simple path on random graphs."""
+        for seed in range(5):
+            graph = random_graph(30, 120, seed)
+            expected = all_simple_path_costs(graph, "n0", "n1", max_depth=5)
+            search = PathEngine(graph, timeout=None).k_shortest("n0", "n1", k=8, max_depth=5)
+            costs = [p.cost for p in search.paths]
+            assert len(costs) == min(8, len(expected))
+            for got, want in zip(costs, expected):
+                assert math.isclose(got, want, abs_tol=1e-9)
+            for p in search.paths:
+                assert len(set(p.nodes)) == len(p.nodes)
+                assert p.length <= 5
+
+    def test_k_is_capped(self):
+        """Test that a search never returns more than MAX_PATHS paths."""
+        graph = random_graph(40, 400, 1)
+        search = PathEngine(graph, weight=None, timeout=None).k_shortest(
+            "n0", "n1", k=MAX_PATHS * 2, max_depth=6
+        )
+        assert len(search.paths) == MAX_PATHS
+
+    def test_timeout_truncates(self):
+        """Test that an exhausted time budget is reported, not raised."""
+        search = PathEngine(make_graph(), timeout=-1.0).k_shortest("a", "d")
+        assert search.truncated
+        assert search.paths == []
+
+    def test_unknown_or_same_node(self):
+        """Test that missing endpoints and start == end find nothing."""
+        engine = PathEngine(make_graph())
+        assert engine.shortest("a", "missing").paths == []
+        assert engine.k_shortest("a", "a").paths == []
+
+
+class TestPathRoutes:
+    """Tests for the path endpoints on the in-memory backend."""
+
+    def test_paths_weighted_and_capped(self, monkeypatch):
+        """Test that /paths ranks by confidence and validates its caps."""
+        from src.graphdb import routes as graph_routes
+        from src.main import app
+
+        monkeypatch.setattr(graph_routes, "get_memory_graph", make_graph)
+        client = TestClient(app)
+
+        response = client.post(
+            "/api/graph/neo4j/paths", json={"start_id": "a", "end_id": "d", "limit": 1}
+        )
+        body = response.json()
+        assert body["path_count"] == 1 and body["truncated"] is False
+        assert [n["id"] for n in body["paths"][0]["nodes"]] == ["a", "c", "e", "d"]
+
+        response = client.post(
+            "/api/graph/neo4j/paths",
+            json={"start_id": "a", "end_id": "d", "limit": MAX_PATHS + 1},
+        )
+        assert response.status_code == 422
+
+    def test_shortest_weighted(self, monkeypatch):
+        """Test the weighted option of /paths/shortest."""
+        from src.graphdb import routes as graph_routes
+        from src.main import app
+
+        monkeypatch.setattr(graph_routes, "get_memory_graph", make_graph)
+        client = TestClient(app)
+
+        # Undirected: c-a-b has 2 hops (0.18), c-e-d-b has 3 but more confidence (0.243)
+        params = {"start_id": "c", "end_id": "b", "weighted": True}
+        path = client.get("/api/graph/neo4j/paths/shortest", params=params).json()["path"]
+        assert path["path_length"] == 3
+        params["weighted"] = False
+        path = client.get("/api/graph/neo4j/paths/shortest", params=params).json()["path"]
+        assert path["path_length"] == 2
+
+    def test_search_runs_off_the_event_loop(self, monkeypatch):
+        """Test that both routes run the CPU-bound search in a worker thread."""
+        from src.graphdb import routes as graph_routes
+        from src.main import app
+
+        loops = []
+
+        def graph():
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+            return make_graph()
+
+        monkeypatch.setattr(graph_routes, "get_memory_graph", graph)
+        client = TestClient(app)
+        client.post("/api/graph/neo4j/paths", json={"start_id": "a", "end_id": "d"})
+        client.get("/api/graph/neo4j/paths/shortest", params={"start_id": "a", "end_id": "d"})
+        assert loops == [None, None]
+
+
+class TestNeo4jPaths:
+    """Tests for the Cypher sent by the adapter's path methods."""
+
+    def test_find_paths_uses_bounded_shortest_paths(self):
+        """Test that find_paths no longer enumerates every variable-length path."""
+        adapter = FakeAdapter(respond=lambda query, params: [])
+        find_paths = Neo4jAdapter.find_paths.__get__(adapter)
+        asyncio.run(find_paths("a", "d", max_depth=4, rel_types=["CAUSES"], limit=3))
+
+        query, params = adapter.statements[0]
+        assert "allShortestPaths" in query
+        assert "[:CAUSES*1..4]" in query
+        assert params["limit"] == 3
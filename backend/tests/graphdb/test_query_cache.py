@@ -0,0 +1,282 @@
+"""Tests for the Neo4j read-query result cache."""
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.graphdb import routes as graph_routes
+from src.graphdb.neo4j_adapter import Neo4jAdapter
+from src.graphdb.query_cache import QueryCache, get_query_cache, query_route
+
+from .fake_neo4j import FakeAdapter
+
+
+class CachingFakeAdapter(FakeAdapter):
+    """Fake driver behind the real adapter read/write methods."""
+
+    execute_read_query = Neo4jAdapter.execute_read_query
+    execute_cached_read = Neo4jAdapter.execute_cached_read
+    execute_query = Neo4jAdapter.execute_query
+
+
+def counting_loader(result):
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return result
+
+    return load, calls
+
+
+class TestQueryCache:
+    """Tests for QueryCache lookups, eviction and invalidation."""
+
+    def test_hit_after_miss(self):
+        """Test that a repeated query is served without reloading."""
+        cache = QueryCache()
+        load, calls = counting_loader([{"id": "b1"}])
+
+        async def run():
+            first = await cache.get_or_load("MATCH (n) RETURN n", {"id": 1}, load)
+            second = await cache.get_or_load("MATCH (n) RETURN n", {"id": 1}, load)
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert first == second == [{"id": "b1"}]
+        assert len(calls) == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_whitespace_and_param_order_share_entry(self):
+        """Test that formatting and parameter order do not split entries."""
+        cache = QueryCache()
+        load, calls = counting_loader([])
+
+        async def run():
+            await cache.get_or_load("MATCH (n)\n  RETURN n", {"a": 1, "b": 2}, load)
+            await cache.get_or_load("MATCH (n) RETURN n", {"b": 2, "a": 1}, load)
+
+        asyncio.run(run())
+        assert len(calls) == 1
+
+    def test_different_params_miss(self):
+        """Test that different parameters are cached separately."""
+        cache = QueryCache()
+        load, calls = counting_loader([])
+
+        async def run():
+            await cache.get_or_load("q", {"id": 1}, load)
+            await cache.get_or_load("q", {"id": 2}, load)
+
+        asyncio.run(run())
+        assert len(calls) == 2
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = QueryCache(max_entries=2)
+        load, calls = counting_loader([])
+
+        async def run():
+            await cache.get_or_load("a", None, load)
+            await cache.get_or_load("b", None, load)
+            await cache.get_or_load("a", None, load)  # refresh a
+            await cache.get_or_load("c", None, load)  # evicts b
+            await cache.get_or_load("a", None, load)
+            await cache.get_or_load("b", None, load)
+
+        asyncio.run(run())
+        assert len(calls) == 4
+        assert cache.evictions == 2
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are reloaded."""
+        cache = QueryCache(ttl=0.0)
+        load, calls = counting_loader([])
+
+        async def run():
+            await cache.get_or_load("q", None, load)
+            await cache.get_or_load("q", None, load)
+
+        asyncio.run(run())
+        assert len(calls) == 2
+
+    def test_invalidate_drops_entries(self):
+        """Test that invalidation forces a reload."""
+        cache = QueryCache()
+        load, calls = counting_loader([])
+
+        async def run():
+            await cache.get_or_load("q", None, load)
+            cache.invalidate()
+            await cache.get_or_load("q", None, load)
+
+        asyncio.run(run())
+        assert len(calls) == 2
+        assert cache.get_metrics()["invalidations"] == 1
+
+    def test_write_during_load_is_not_cached(self):
+        """Test that a result loaded across a write is not stored."""
+        cache = QueryCache()
+
+        async def load():
+            cache.invalidate()
+            return ["stale"]
+
+        async def run():
+            return await cache.get_or_load("q", None, load)
+
+        assert asyncio.run(run()) == ["stale"]
+        assert cache.get_metrics()["entries"] == 0
+
+    def test_concurrent_misses_share_one_load(self):
+        """Test that identical concurrent lookups issue a single load."""
+        cache = QueryCache()
+        load, calls = counting_loader(["row"])
+
+        async def run():
+            return await asyncio.gather(*(cache.get_or_load("q", None, load) for _ in range(5)))
+
+        assert asyncio.run(run()) == [["row"]] * 5
+        assert len(calls) == 1
+
+    def test_lookup_after_write_does_not_join_stale_load(self):
+        """Test that a lookup after invalidate() starts a new load."""
+        cache = QueryCache()
+        release = None
+        results = iter([["stale"], ["fresh"]])
+
+        async def load():
+            value = next(results)
+            if value == ["stale"]:
+                await release.wait()
+            return value
+
+        async def run():
+            nonlocal release
+            release = asyncio.Event()
+            first = asyncio.create_task(cache.get_or_load("q", None, load))
+            await asyncio.sleep(0)
+            cache.invalidate()
+            second = await asyncio.wait_for(cache.get_or_load("q", None, load), 1)
+            release.set()
+            return await first, second, await cache.get_or_load("q", None, load)
+
+        assert asyncio.run(run()) == (["stale"], ["fresh"], ["fresh"])
+
+    def test_waiters_retry_when_the_loader_is_cancelled(self):
+        """Test that cancelling the first caller does not cancel the others."""
+        cache = QueryCache()
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return ["row"]
+
+        async def run():
+            first = asyncio.create_task(cache.get_or_load("q", None, load))
+            await asyncio.sleep(0)
+            waiters = [asyncio.create_task(cache.get_or_load("q", None, load)) for _ in range(3)]
+            await asyncio.sleep(0)
+            first.cancel()
+            return await asyncio.gather(*waiters), first.cancelled()
+
+        assert asyncio.run(run()) == ([["row"]] * 3, True)
+        assert len(calls) == 2
+
+    def test_failed_load_is_not_cached(self):
+        """Test that errors propagate and the next lookup retries."""
+        cache = QueryCache()
+        attempts = []
+
+        async def load():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("boom")
+            return ["ok"]
+
+        async def run():
+            try:
+                await cache.get_or_load("q", None, load)
+            except RuntimeError:
+                pass
+            return await cache.get_or_load("q", None, load)
+
+        assert asyncio.run(run()) == ["ok"]
+        assert len(attempts) == 2
+
+    def test_metrics_per_route(self):
+        """Test that hits and misses are attributed to the current route."""
+        cache = QueryCache()
+        load, _ = counting_loader([])
+
+        async def run():
+            query_route.set("/a")
+            await cache.get_or_load("q", None, load)
+            await cache.get_or_load("q", None, load)
+
+        asyncio.run(run())
+        routes = cache.get_metrics()["routes"]
+        assert routes["/a"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+class TestAdapterCaching:
+    """Tests for cache use in the Neo4j adapter."""
+
+    def test_read_query_is_cached_until_a_write(self):
+        """Test that adapter writes invalidate cached reads."""
+        adapter = CachingFakeAdapter()
+
+        async def run():
+            await adapter.execute_cached_read("MATCH (b:Beat) RETURN b", {"episode_id": "e1"})
+            await adapter.execute_cached_read("MATCH (b:Beat) RETURN b", {"episode_id": "e1"})
+            await adapter.execute_query("MATCH (b:Beat) SET b.seen = true")
+            await adapter.execute_cached_read("MATCH (b:Beat) RETURN b", {"episode_id": "e1"})
+
+        asyncio.run(run())
+        reads = [q for q, _ in adapter.statements if q.endswith("RETURN b")]
+        assert len(reads) == 2
+        assert adapter.access_modes == ["READ", "WRITE", "READ"]
+
+    def test_client_query_is_never_cached(self):
+        """Test that /query runs client Cypher uncached in a read session."""
+        adapter = CachingFakeAdapter()
+        app = FastAPI()
+        app.include_router(graph_routes.router)
+        app.dependency_overrides[graph_routes.get_neo4j_adapter] = lambda: adapter
+        client = TestClient(app)
+
+        for _ in range(2):
+            response = client.post(
+                "/api/graph/neo4j/query",
+                json={"query": "CREATE (b:Beat) RETURN b", "read_only": True},
+            )
+            assert response.json()["error"] is None
+        assert len(adapter.statements) == 2
+        assert adapter.access_modes == ["READ", "READ"]
+        assert get_query_cache().get_metrics()["entries"] == 0
+
+
+class TestCacheRoutes:
+    """Tests for route attribution and the metrics endpoint."""
+
+    def test_beats_by_episode_metrics(self):
+        """Test that a repeated route request is a cache hit for that route."""
+        adapter = CachingFakeAdapter()
+        app = FastAPI()
+        app.include_router(graph_routes.router)
+        app.dependency_overrides[graph_routes.get_neo4j_adapter] = lambda: adapter
+        client = TestClient(app)
+
+        for _ in range(2):
+            response = client.get("/api/graph/neo4j/query/beats-by-episode/s01e01")
+            assert response.status_code == 200
+        assert len(adapter.statements) == 1
+
+        metrics = client.get("/api/graph/neo4j/cache/metrics").json()
+        route = metrics["routes"]["/api/graph/neo4j/query/beats-by-episode/{episode_id}"]
+        assert (route["hits"], route["misses"]) == (1, 1)
+        assert metrics["entries"] == 1
+        assert get_query_cache().hits == 1
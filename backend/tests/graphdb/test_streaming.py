@@ -0,0 +1,146 @@
+"""Tests for streaming reads and keyset pagination against a recording driver."""
+
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.graphdb import routes as graph_routes
+from src.graphdb.neo4j_adapter import Neo4jAdapter
+
+from .fake_neo4j import FakeAdapter
+
+BEAT_IDS = [f"b{i}" for i in range(5)]
+
+
+class StreamingFakeAdapter(FakeAdapter):
+    """Fake driver behind the real adapter streaming methods."""
+
+    list_nodes = Neo4jAdapter.list_nodes
+    iter_nodes = Neo4jAdapter.iter_nodes
+    _node_page = Neo4jAdapter._node_page
+    stream_subgraph = Neo4jAdapter.stream_subgraph
+    stream_read_query = Neo4jAdapter.stream_read_query
+
+
+def keyset_responder(query: str, params: dict):
+    """Serve node pages the way ``WHERE n.id > $after ... LIMIT $limit`` would."""
+    if "n.id > $after" in query:
+        after = params["after"]
+        ids = [i for i in BEAT_IDS if after is None or i > after][: params["limit"]]
+        return [{"n": {"id": i}, "internal_id": k} for k, i in enumerate(ids)]
+    if "RETURN DISTINCT n" in query:
+        return [{"n": {"id": "b0"}, "label": "Beat"}, {"n": {"id": "b1"}, "label": "Beat"}]
+    if "a.id IN $ids" in query:
+        return [{"r": {"confidence": 0.9}, "rel_type": "CAUSES", "from_id": "b0", "to_id": "b1"}]
+    if query.startswith("MATCH (b:Beat) RETURN b.id"):
+        return [{"id": i} for i in BEAT_IDS]
+    return None
+
+
+def make_client(adapter: FakeAdapter) -> TestClient:
+    app = FastAPI()
+    app.include_router(graph_routes.router)
+    app.dependency_overrides[graph_routes.get_neo4j_adapter] = lambda: adapter
+    return TestClient(app)
+
+
+def ndjson(response) -> list[dict]:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+class TestKeysetPagination:
+    """Tests for keyset-paginated node listing."""
+
+    def test_list_nodes_after_cursor(self):
+        """Test that a page starts after the given id."""
+        adapter = StreamingFakeAdapter(respond=keyset_responder)
+        nodes = asyncio.run(adapter.list_nodes("Beat", limit=2, after="b1"))
+        assert [n["id"] for n in nodes] == ["b2", "b3"]
+        assert "SKIP" not in adapter.statements[0][0]
+
+    def test_iter_nodes_pages_with_last_id(self):
+        """Test that iteration resumes each page after the previous page's last id."""
+        adapter = StreamingFakeAdapter(respond=keyset_responder)
+
+        async def run():
+            return [node["id"] async for node in adapter.iter_nodes("Beat", page_size=2)]
+
+        assert asyncio.run(run()) == BEAT_IDS
+        assert [params["after"] for _, params in adapter.statements] == [None, "b1", "b3"]
+
+    def test_iter_nodes_exact_multiple_fetches_empty_page(self):
+        """Test that a full last page is followed by one empty page."""
+        adapter = StreamingFakeAdapter(respond=keyset_responder)
+
+        async def run():
+            return [node["id"] async for node in adapter.iter_nodes("Beat", page_size=5)]
+
+        assert asyncio.run(run()) == BEAT_IDS
+        assert len(adapter.statements) == 2
+
+
+class TestStreamingRoutes:
+    """Tests for the NDJSON streaming endpoints."""
+
+    def test_stream_nodes(self):
+        """Test that every node is streamed as one NDJSON line."""
+        client = make_client(StreamingFakeAdapter(respond=keyset_responder))
+        response = client.get("/api/graph/neo4j/stream/nodes/Beat", params={"page_size": 2})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert [n["id"] for n in ndjson(response)] == BEAT_IDS
+
+    def test_stream_nodes_resumes_after(self):
+        """Test that an export can resume from a cursor."""
+        client = make_client(StreamingFakeAdapter(respond=keyset_responder))
+        response = client.get("/api/graph/neo4j/stream/nodes/Beat", params={"after": "b2"})
+        assert [n["id"] for n in ndjson(response)] == ["b3", "b4"]
+
+    def test_stream_nodes_rejects_invalid_label(self):
+        """Test that labels are not interpolated into Cypher unchecked."""
+        client = make_client(StreamingFakeAdapter(respond=keyset_responder))
+        response = client.get("/api/graph/neo4j/stream/nodes/Beat) DETACH DELETE n //")
+        assert response.status_code == 400
+
+    def test_stream_subgraph(self):
+        """Test that nodes are streamed before relationships."""
+        client = make_client(StreamingFakeAdapter(respond=keyset_responder))
+        lines = ndjson(client.get("/api/graph/neo4j/stream/subgraph/b0"))
+        assert [line["kind"] for line in lines] == ["node", "node", "relationship"]
+        assert lines[2]["from_id"] == "b0" and lines[2]["type"] == "CAUSES"
+
+    def test_stream_subgraph_reads_relationships_among_nodes(self):
+        """Test that relationships are matched between the streamed nodes, read-only."""
+        adapter = StreamingFakeAdapter(respond=keyset_responder)
+        ndjson(make_client(adapter).get("/api/graph/neo4j/stream/subgraph/b0"))
+        query, params = adapter.statements[1]
+        assert "path" not in query and "*" not in query
+        assert sorted(params["ids"]) == ["b0", "b1"]
+        assert adapter.access_modes == ["READ"]
+
+    def test_stream_query(self):
+        """Test that read query records are streamed from a read session."""
+        adapter = StreamingFakeAdapter(respond=keyset_responder)
+        client = make_client(adapter)
+        response = client.post(
+            "/api/graph/neo4j/stream/query", json={"query": "MATCH (b:Beat) RETURN b.id as id"}
+        )
+        assert [r["id"] for r in ndjson(response)] == BEAT_IDS
+        assert adapter.access_modes == ["READ"]
+
+    def test_stream_query_rejects_writes(self):
+        """Test that write queries cannot be streamed."""
+        client = make_client(StreamingFakeAdapter(respond=keyset_responder))
+        response = client.post(
+            "/api/graph/neo4j/stream/query",
+            json={"query": "CREATE (n:Beat)", "read_only": False},
+        )
+        assert response.status_code == 400
+
+    def test_stream_error_ends_with_error_line(self):
+        """Test that a driver failure mid-stream is reported as the last line."""
+        client = make_client(StreamingFakeAdapter(fail_on="MATCH (n:Beat)"))
+        lines = ndjson(client.get("/api/graph/neo4j/stream/nodes/Beat"))
+        assert len(lines) == 1 and "error" in lines[0]
@@ -0,0 +1,175 @@
+"""Tests for incremental Neo4j sync against a recording driver."""
+
+import asyncio
+import copy
+
+from src.graphdb.importer import plan_from_data
+from src.graphdb.sync import SyncEngine
+
+from .fake_neo4j import FakeAdapter
+
+
+def make_data():
+    beats = {
+        f"b{i}": {
+            "beat_id": f"b{i}",
+            "episode_id": "s01e01",
+            "start_time": "00:00",
+            "end_time": "00:01",
+            "start_seconds": i,
+            "end_seconds": i + 1,
+            "summary": f"Beat {i}",
+        }
+        for i in range(5)
+    }
+    edges = {
+        f"e{i}": {"edge_id": f"e{i}", "from_beat_id": f"b{i}", "to_beat_id": f"b{i + 1}"}
+        for i in range(4)
+    }
+    claims = {"c1": {"claim_id": "c1", "subject": "kiara", "predicate": "is", "object": "vampire"}}
+    return {"beats": beats, "causality_edges": edges, "claims": claims}
+
+
+def sync(engine: SyncEngine, data: dict, **kwargs):
+    return asyncio.run(engine.sync(*plan_from_data(**data), **kwargs))
+
+
+class TestSyncEngine:
+    """Tests for SyncEngine diffing and batched writes."""
+
+    def test_first_sync_writes_everything_then_nothing(self, tmp_path):
+        """Test that an unchanged second sync sends no statements."""
+        adapter = FakeAdapter()
+        engine = SyncEngine(adapter, tmp_path / "manifest.json")
+        data = make_data()
+
+        report = sync(engine, data)
+        assert report.upserts == {"Beat": 5, "Claim": 1, "CAUSES": 4}
+        assert report.transactions == 3
+        assert adapter.statements[0][0].startswith("CREATE CONSTRAINT")
+
+        adapter.statements.clear()
+        report = sync(SyncEngine(adapter, tmp_path / "manifest.json"), data)
+        assert not report.changed
+        assert adapter.statements == []
+
+    def test_one_beat_edit_is_one_tiny_transaction(self, tmp_path):
+        """Test that editing one beat upserts only that beat."""
+        adapter = FakeAdapter()
+        engine = SyncEngine(adapter, tmp_path / "manifest.json")
+        data = make_data()
+        sync(engine, data)
+
+        data = copy.deepcopy(data)
+        data["beats"]["b2"]["summary"] = "Rewritten"
+        adapter.statements.clear()
+        adapter.transactions = 0
+        report = sync(engine, data)
+
+        assert report.upserts == {"Beat": 1}
+        assert adapter.transactions == 1
+        query, params = adapter.statements[0]
+        assert "MERGE (n:Beat {id: node.id})" in query
+        assert [row["summary"] for row in params["nodes"]] == ["Rewritten"]
+
+    def test_deletes_and_moved_edges(self, tmp_path):
+        """Test that removals are deleted and re-pointed edges are replaced."""
+        adapter = FakeAdapter()
+        engine = SyncEngine(adapter, tmp_path / "manifest.json")
+        data = make_data()
+        sync(engine, data)
+
+        data = copy.deepcopy(data)
+        del data["claims"]["c1"]
+        data["causality_edges"]["e3"]["to_beat_id"] = "b0"
+        adapter.statements.clear()
+        report = sync(engine, data)
+
+        assert report.deletes == {"Claim": 1, "CAUSES": 1}
+        assert report.upserts == {"CAUSES": 1}
+        queries = [q for q, _ in adapter.statements]
+        # Relationship deletes, then node deletes, then relationship upserts
+        assert "DELETE r" in queries[0]
+        assert adapter.statements[0][1]["relationships"] == [
+            {"id": "e3", "from_id": "b3", "to_id": "b4"}
+        ]
+        assert "DETACH DELETE n" in queries[1]
+        assert adapter.statements[1][1]["ids"] == ["c1"]
+        assert "MERGE (a)-[r:CAUSES {id: rel.id}]->(b)" in queries[2]
+        assert engine.manifest.entities["CAUSES"]["e3"][1:] == ["b3", "b0"]
+
+    def test_upserts_replace_properties(self, tmp_path):
+        """Test that sync upserts drop properties that are no longer in the row."""
+        adapter = FakeAdapter()
+        sync(SyncEngine(adapter, tmp_path / "manifest.json"), make_data())
+        queries = [q for q, _ in adapter.statements if "MERGE" in q]
+        assert any("SET n = node" in q for q in queries)
+        assert any("SET r = rel.properties, r.id = rel.id" in q for q in queries)
+        assert not any("+=" in q for q in queries)
+
+    def test_deleted_nodes_drop_attached_relationships(self, tmp_path):
+        """Test that DETACH DELETE also removes the node's relationships from the manifest."""
+        adapter = FakeAdapter()
+        engine = SyncEngine(adapter, tmp_path / "manifest.json")
+        data = make_data()
+        sync(engine, data)
+
+        data = copy.deepcopy(data)
+        del data["beats"]["b4"]
+        report = sync(engine, data)
+
+        assert report.deletes == {"Beat": 1}
+        assert "e3" not in engine.manifest.entities["CAUSES"]
+        assert set(engine.manifest.entities["CAUSES"]) == {"e0", "e1", "e2"}
+
+    def test_failed_batch_is_retried(self, tmp_path):
+        """Test that a failed batch stays pending in the manifest."""
+        engine = SyncEngine(FakeAdapter(fail_on="MERGE (n:Claim"), tmp_path / "manifest.json")
+        data = make_data()
+
+        report = sync(engine, data)
+        assert [e["entity"] for e in report.errors] == ["Claim"]
+        assert not engine.manifest.entities.get("Claim")
+
+        report = sync(SyncEngine(FakeAdapter(), tmp_path / "manifest.json"), data)
+        assert report.upserts == {"Claim": 1}
+        assert report.errors == []
+
+    def test_dry_run_and_batching(self, tmp_path):
+        """Test that dry runs send nothing and large diffs are split into batches."""
+        adapter = FakeAdapter()
+        engine = SyncEngine(adapter, tmp_path / "manifest.json", batch_size=2)
+
+        report = sync(engine, make_data(), dry_run=True)
+        assert report.upserts["Beat"] == 5
+        assert adapter.statements == []
+        assert engine.manifest.empty
+
+        sync(engine, make_data())
+        beat_batches = [p["nodes"] for q, p in adapter.statements if "MERGE (n:Beat" in q]
+        assert [len(b) for b in beat_batches] == [2, 2, 1]
+
+    def test_full_import_records_manifest(self):
+        """Test that /import leaves a manifest so a following /sync is a no-op."""
+        from fastapi.testclient import TestClient
+
+        from src.graphdb.routes import get_neo4j_adapter
+        from src.main import app
+
+        adapter = FakeAdapter()
+
+        async def override():
+            yield adapter
+
+        app.dependency_overrides[get_neo4j_adapter] = override
+        try:
+            client = TestClient(app)
+            assert client.post("/api/graph/neo4j/import").status_code == 200
+            adapter.statements.clear()
+            body = client.post("/api/graph/neo4j/sync").json()
+        finally:
+            app.dependency_overrides.pop(get_neo4j_adapter)
+
+        assert body["status"] == "unchanged"
+        assert body["transactions"] == 0
+        assert adapter.statements == []
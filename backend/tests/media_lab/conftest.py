@@ -0,0 +1,23 @@
+"""Shared fixtures for media lab tests."""
+
+import pytest
+
+from src.media_lab.offload import StageExecutor
+
+
+class RecordingExecutor(StageExecutor):
+    """Inline executor that records which kernels ran."""
+
+    def __init__(self):
+        super().__init__("inline")
+        self.calls: list[str] = []
+
+    async def run(self, fn, *args, **kwargs):
+        self.calls.append(fn.__name__)
+        return await super().run(fn, *args, **kwargs)
+
+
+@pytest.fixture
+def recording_executor() -> RecordingExecutor:
+    """A fresh inline executor that records kernel calls."""
+    return RecordingExecutor()
@@ -6,12 +6,23 @@ Tests verify:
 - seed incrementation for fixed seeds
 - random seed generation for each iteration
 - correct artifact collection
+- batched stage execution with per-item failure isolation
 """
 
 import asyncio
 
+import numpy as np
 import pytest
 
+from src.media_lab import kernels
+from src.media_lab.dag import DagPipeline
+from src.media_lab.pipeline import (
+    ImageBuffer,
+    PipelineContext,
+    RefinerStage,
+    TextToImageStage,
+)
+from src.media_lab.stages.img2img import Img2ImgStage
 from src.media_lab.workbench import Workbench
 from src.models import PipelineConfig, StageConfig
 
@@ -305,3 +316,107 @@ class TestBatchGeneration:
         assert len(result["artifacts"]) == 3
         # All should be unique
         assert len(set(result["artifacts"])) == 3
+
+
+def copy_unless_blank(image: np.ndarray, out: np.ndarray) -> None:
+    """Test kernel that rejects all-zero images."""
+    if not image.reshape(-1, *image.shape[-3:]).any(axis=(1, 2, 3)).all():
+        raise ValueError("blank image")
+    out[...] = image
+
+
+def item_context(job_id: str, image: np.ndarray | None = None, **data) -> PipelineContext:
+    context = PipelineContext()
+    context.set("job_id", job_id)
+    context.set("image", {"dimensions": (16, 16)})
+    for key, value in data.items():
+        context.set(key, value)
+    if image is not None:
+        context.set_image("image", ImageBuffer(image))
+    return context
+
+
+class TestBatchedExecution:
+    """Tests for running each stage once over a whole batch."""
+
+    def test_failed_item_is_isolated(self, tmp_path, monkeypatch):
+        """Test that one failing item leaves the rest of the batch running."""
+        monkeypatch.chdir(tmp_path)
+        pipeline = DagPipeline.chain([TextToImageStage(), RefinerStage()])
+        contexts = [PipelineContext() for _ in range(3)]
+        for index, context in enumerate(contexts):
+            context.set("job_id", f"isolated_{index}")
+            if index != 1:
+                context.set("prompt", f"Item {index}")
+
+        contexts = async_test(pipeline.execute_batch(contexts))
+
+        assert [context.error is None for context in contexts] == [True, False, True]
+        assert "prompt" in contexts[1].error
+        assert "refiner" not in contexts[1].metadata
+        assert all("refiner" in contexts[index].metadata for index in (0, 2))
+
+    def test_img2img_batch_makes_one_stacked_call(
+        self, tmp_path, monkeypatch, recording_executor
+    ):
+        """Test that same-sized items share one kernel call and match single runs."""
+        monkeypatch.chdir(tmp_path)
+        rng = np.random.default_rng(3)
+        images = [rng.integers(0, 255, (16, 16, 3), dtype=np.uint8) for _ in range(3)]
+        stage = Img2ImgStage(strength=0.6)
+        stage.executor = recording_executor
+        contexts = [item_context(f"item_{index}", image) for index, image in enumerate(images)]
+
+        async_test(stage.execute_batch(contexts))
+
+        assert stage.executor.calls.count("unsharp_mask") == 1
+        for image, context in zip(images, contexts):
+            expected = np.empty_like(image)
+            kernels.unsharp_mask(image, 0.6, 2.0, out=expected)
+            assert np.array_equal(context.get_image("image").array, expected)
+            assert context.get("img2img_path") in context.artifacts
+
+    def test_img2img_batch_invalid_item(self, tmp_path, monkeypatch, recording_executor):
+        """Test that an item with invalid parameters fails alone."""
+        monkeypatch.chdir(tmp_path)
+        stage = Img2ImgStage()
+        stage.executor = recording_executor
+        good = item_context("good", np.zeros((8, 8, 3), np.uint8))
+        bad = item_context("bad", np.zeros((8, 8, 3), np.uint8), strength=2.0)
+
+        async_test(stage.execute_batch([good, bad]))
+
+        assert good.error is None
+        assert "strength" in bad.error
+
+    def test_run_image_batch_retries_items_after_group_failure(self, recording_executor):
+        """Test that a failed stacked call falls back to per-item calls."""
+        stage = Img2ImgStage()
+        stage.executor = recording_executor
+        images = [
+            ImageBuffer(np.full((4, 4, 3), 9, np.uint8)),
+            ImageBuffer(np.zeros((4, 4, 3), np.uint8)),
+            ImageBuffer(np.full((4, 4, 3), 5, np.uint8)),
+        ]
+
+        results = async_test(stage.run_image_batch(copy_unless_blank, images))
+
+        assert isinstance(results[1], ValueError)
+        assert (results[0].array == 9).all()
+        assert (results[2].array == 5).all()
+        assert len(stage.executor.calls) == 4
+
+    def test_run_image_batch_does_not_retry_single_item_group(self, recording_executor):
+        """Test that a failing group of one image runs its kernel only once."""
+        stage = Img2ImgStage()
+        stage.executor = recording_executor
+        images = [
+            ImageBuffer(np.full((4, 4, 3), 9, np.uint8)),
+            ImageBuffer(np.zeros((6, 6, 3), np.uint8)),
+        ]
+
+        results = async_test(stage.run_image_batch(copy_unless_blank, images))
+
+        assert (results[0].array == 9).all()
+        assert isinstance(results[1], ValueError)
+        assert len(stage.executor.calls) == 2
@@ -0,0 +1,256 @@
+"""Tests for DAG pipeline scheduling."""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from src.media_lab.dag import DagPipeline, PipelineNode
+from src.media_lab.offload import SharedArray
+from src.media_lab.pipeline import (
+    ImageBuffer,
+    PipelineContext,
+    PipelineStage,
+    TextToImageStage,
+    UpscalerStage,
+)
+from src.media_lab.workbench import Workbench
+from src.models import PipelineConfig, StageConfig
+
+
+def async_test(coro):
+    """Helper to run async tests."""
+    return asyncio.run(coro)
+
+
+class SleepStage(PipelineStage):
+    """Stage that waits, records what it saw, and emits a filled image."""
+
+    def __init__(self, name: str, seconds: float = 0.0, value: int = 0, fail: bool = False):
+        super().__init__(name)
+        self.seconds = seconds
+        self.value = value
+        self.fail = fail
+        self.seen_images: list[list[str]] = []
+
+    async def execute(self, context: PipelineContext) -> PipelineContext:
+        await asyncio.sleep(self.seconds)
+        if self.fail:
+            raise ValueError(f"{self.name} exploded")
+        self.seen_images.append(sorted(context.images))
+        context.set(self.name, self.value)
+        context.set("last", self.name)
+        context.metadata[self.name] = {"value": self.value}
+        context.set_image("image", ImageBuffer(np.full((2, 2, 3), self.value, np.uint8)))
+        return context
+
+
+class SharedStage(PipelineStage):
+    """Stage that emits a shared-memory image, as process-mode kernels do."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.blocks: list[SharedArray] = []
+
+    async def execute(self, context: PipelineContext) -> PipelineContext:
+        block = SharedArray.copy_of(np.full((2, 2, 3), 7, np.uint8))
+        self.blocks.append(block)
+        context.set_image("image", ImageBuffer(block))
+        return context
+
+
+class PassStage(PipelineStage):
+    """Stage that records the storage of its input image and passes it on."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.storages: list = []
+
+    async def execute(self, context: PipelineContext) -> PipelineContext:
+        self.storages.append(context.get_image("image").storage)
+        return context
+
+
+def diamond(left: SleepStage, right: SleepStage, **join_options) -> DagPipeline:
+    return DagPipeline(
+        [
+            PipelineNode("root", SleepStage("root", value=1), index=0),
+            PipelineNode("left", left, inputs=["root"], index=1),
+            PipelineNode("right", right, inputs=["root"], index=2),
+            PipelineNode(
+                "join", SleepStage("join", value=9), inputs=["left", "right"], index=3,
+                **join_options,
+            ),
+        ]
+    )
+
+
+def run(pipeline: DagPipeline, items: int = 1) -> list[PipelineContext]:
+    return async_test(pipeline.execute_batch([PipelineContext() for _ in range(items)]))
+
+
+class TestDagPipeline:
+    """Tests for DagPipeline."""
+
+    def test_independent_branches_overlap(self):
+        """Test that sibling branches run concurrently."""
+        pipeline = diamond(SleepStage("left", 0.2, 2), SleepStage("right", 0.2, 3))
+
+        started = time.perf_counter()
+        (result,) = run(pipeline)
+        elapsed = time.perf_counter() - started
+
+        assert result.error is None
+        assert elapsed < 0.35
+        left, right = pipeline.timings["left"], pipeline.timings["right"]
+        assert left.start < right.end and right.start < left.end
+
+    def test_fan_in_merges_inputs(self):
+        """Test that a join sees both branches' data and images."""
+        pipeline = diamond(SleepStage("left", value=2), SleepStage("right", value=3))
+
+        (result,) = run(pipeline)
+
+        assert result.get("left") == 2 and result.get("right") == 3
+        assert pipeline.nodes["join"].stage.seen_images == [["image", "left", "right"]]
+        assert set(result.metadata) == {"root", "left", "right", "join"}
+        assert (result.get_image("image").array == 9).all()
+
+    def test_outputs_limit_passed_keys(self):
+        """Test that a node's outputs restrict what dependents receive."""
+        left = SleepStage("left", value=2)
+        pipeline = DagPipeline(
+            [
+                PipelineNode("left", left, outputs=["left"], index=0),
+                PipelineNode("next", SleepStage("next"), inputs=["left"], index=1),
+            ]
+        )
+
+        (result,) = run(pipeline)
+
+        assert result.get("left") == 2
+        assert result.get("last") == "next"
+
+    def test_failed_branch_stops_dependents_only(self):
+        """Test that a failure skips downstream nodes but not siblings."""
+        right = SleepStage("right", value=3)
+        pipeline = diamond(SleepStage("left", fail=True), right)
+
+        (result,) = run(pipeline)
+
+        assert "left exploded" in result.error
+        assert right.seen_images
+        assert pipeline.nodes["join"].stage.seen_images == []
+
+    def test_critical_path_follows_slowest_branch(self):
+        """Test that the report names the slow branch as critical."""
+        pipeline = diamond(SleepStage("left", 0.05, 2), SleepStage("right", 0.15, 3))
+        run(pipeline)
+
+        report = pipeline.report()
+
+        assert report["critical_path"] == ["root", "right", "join"]
+        assert report["critical_path_seconds"] >= 0.15
+        assert set(report["stage_timings"]) == {"root", "left", "right", "join"}
+        assert report["stage_timings"]["right"]["stage"] == "right"
+
+    def test_fan_out_keeps_each_branch_output(self, tmp_path, monkeypatch):
+        """Test that sibling nodes of one stage type write separate outputs."""
+        monkeypatch.chdir(tmp_path)
+        pipeline = DagPipeline(
+            [
+                PipelineNode("base", TextToImageStage(), index=0),
+                PipelineNode("up2", UpscalerStage(2), inputs=["base"], index=1),
+                PipelineNode("up4", UpscalerStage(4), inputs=["base"], index=2),
+            ]
+        )
+        context = PipelineContext()
+        context.set("prompt", "Castle")
+        context.set("job_id", "fan_out")
+
+        (result,) = async_test(pipeline.execute_batch([context]))
+
+        assert result.artifacts == [
+            "artifacts/fan_out/generated.png",
+            "artifacts/fan_out/generated_up2.png",
+            "artifacts/fan_out/generated_up4.png",
+        ]
+        assert result.metadata["upscaler:up2"]["upscale_factor"] == 2
+        assert result.metadata["upscaler:up4"]["upscale_factor"] == 4
+        assert "text_to_image" in result.metadata
+
+    def test_forks_share_the_parents_shared_memory(self):
+        """Test that dependents get the parent's SharedArray, not a plain view."""
+        shared, passed = SharedStage("shared"), PassStage("pass")
+        pipeline = DagPipeline(
+            [
+                PipelineNode("shared", shared, index=0),
+                PipelineNode("pass", passed, inputs=["shared"], index=1),
+            ]
+        )
+
+        (result,) = run(pipeline)
+
+        block = shared.blocks[0]
+        assert passed.storages == [block]
+        # The passed-through view outlives the node that produced it
+        assert (result.get_image("image").array == 7).all()
+        result.release_images()
+        assert block.array is None
+
+    def test_chain_matches_stage_order(self):
+        """Test that chain() wires each stage to the previous one."""
+        stages = [SleepStage("a"), SleepStage("b"), SleepStage("c")]
+        pipeline = DagPipeline.chain(stages)
+        assert pipeline.stages == stages
+        assert pipeline.sinks == ["2"]
+
+    @pytest.mark.parametrize(
+        "nodes, message",
+        [
+            ([("a", []), ("a", [])], "Duplicate"),
+            ([("a", ["missing"])], "unknown input"),
+            ([("a", ["b"]), ("b", ["a"])], "cycle"),
+        ],
+    )
+    def test_invalid_graphs(self, nodes, message):
+        """Test that malformed graphs are rejected."""
+        graph = [PipelineNode(node_id, SleepStage(node_id), inputs) for node_id, inputs in nodes]
+        with pytest.raises(ValueError, match=message):
+            DagPipeline(graph)
+
+
+class TestWorkbenchDag:
+    """Tests for DAG configs in Workbench."""
+
+    def test_graph_config_reports_timings(self, tmp_path, monkeypatch):
+        """Test that a wired config runs as a graph and reports its timings."""
+        monkeypatch.chdir(tmp_path)
+        config = PipelineConfig(
+            stages=[
+                StageConfig(stage_type="text_to_image", id="base"),
+                StageConfig(stage_type="refiner", id="refine", inputs=["base"]),
+                StageConfig(stage_type="detailer", id="detail", inputs=["refine"]),
+            ],
+            batch_size=2,
+            seed=7,
+        )
+        wb = Workbench(config)
+        result = async_test(wb.execute({"prompt": "Graph"}, job_id="dag_graph"))
+
+        assert result["success"] is True
+        assert len(result["artifacts"]) == 6
+        dag = result["metadata"]["dag"]
+        assert dag["critical_path"] == ["base", "refine", "detail"]
+        assert set(dag["stage_timings"]) == {"base", "refine", "detail"}
+
+    def test_unknown_input_fails_execution(self):
+        """Test that a miswired config fails gracefully."""
+        config = PipelineConfig(
+            stages=[StageConfig(stage_type="text_to_image", inputs=["nowhere"])],
+        )
+        result = async_test(Workbench(config).execute({"prompt": "Graph"}))
+
+        assert result["success"] is False
+        assert "nowhere" in result["error"]
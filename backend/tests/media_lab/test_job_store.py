@@ -0,0 +1,377 @@
+"""Tests for the SQLite-backed media job store."""
+
+import asyncio
+import threading
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.media_lab.job_store import JobOutcome, JobStore, get_job_store, to_task
+from src.media_lab.worker import StoreWorker, WorkflowDispatcher
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2026, 1, 1, tzinfo=UTC)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'jobs.db'}"
+
+
+@pytest.fixture
+def store(db_url, clock):
+    return JobStore(db_url, lease_seconds=10, retry_base_delay=5.0, clock=clock)
+
+
+class TestJobStore:
+    """Tests for JobStore queue semantics."""
+
+    def test_wal_mode(self, store):
+        """Test that the store switches the database to WAL."""
+        with store.engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+
+    def test_jobs_survive_reopen(self, db_url, store):
+        """Test that queued jobs are still there for a new store instance."""
+        job = store.submit("kiara", "generate", {"prompt": "x"}, priority=2)
+        reopened = JobStore(db_url)
+        stored = reopened.get(job.id)
+        assert stored.status == "pending"
+        assert stored.parameters == {"prompt": "x"}
+        assert stored.priority == 2
+
+    def test_priority_then_fairness(self, store, clock):
+        """Test claim order: priority, then least-busy character, then age."""
+        for i in range(3):
+            store.submit("kiara", "generate", {"name": f"kiara-{i}"})
+            clock.advance(1)
+        store.submit("eric", "generate", {"name": "eric-0"})
+        store.submit("kiara", "generate", {"name": "urgent"}, priority=5)
+
+        names = []
+        for _ in range(4):
+            names.append(store.claim("w1").parameters["name"])
+        # Once kiara has a job running, eric's newer job goes ahead of kiara's backlog
+        assert names == ["urgent", "eric-0", "kiara-0", "kiara-1"]
+
+    def test_large_backlog_does_not_starve_other_characters(self, store, clock):
+        """Test that a character with a few jobs gets turns past a big, older batch."""
+        for i in range(100):
+            store.submit("kiara", "generate", {"name": f"kiara-{i}"})
+        clock.advance(1)
+        for i in range(5):
+            store.submit("eric", "generate", {"name": f"eric-{i}"})
+
+        owners = [store.claim("w1").character_id for _ in range(6)]
+
+        assert owners == ["kiara", "eric"] * 3
+
+    def test_workflow_filter_and_targeted_claim(self, store):
+        """Test claiming only some workflows, or one specific job."""
+        enhance = store.submit("kiara", "enhance", {"name": "e"})
+        store.submit("kiara", "generate", {"name": "g"})
+        assert store.claim("w1", workflow_types=["generate"]).parameters["name"] == "g"
+        assert store.claim("w1", job_id=enhance.id).id == enhance.id
+        assert store.claim("w1", job_id=enhance.id) is None
+
+    def test_no_double_claims_across_instances(self, db_url, store):
+        """Test that concurrent claimers from separate stores never share a job."""
+        for i in range(200):
+            store.submit(f"char-{i % 7}", "generate", {"name": str(i)})
+
+        claimed: list[list[str]] = [[] for _ in range(4)]
+
+        def work(n: int):
+            worker = JobStore(db_url)
+            while (job := worker.claim(f"w{n}")) is not None:
+                claimed[n].append(job.id)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        ids = [job_id for ids in claimed for job_id in ids]
+        assert len(ids) == 200
+        assert len(set(ids)) == 200
+
+    def test_expired_lease_is_requeued(self, store, clock):
+        """Test that a dead worker's job goes back to the queue."""
+        job = store.submit("kiara", "generate", {"name": "a"})
+        store.claim("dead")
+        clock.advance(11)
+
+        reclaimed = store.claim("alive")
+        assert reclaimed.id == job.id
+        assert reclaimed.attempts == 2
+        assert store.complete(job.id, "dead") is None
+        assert store.complete(job.id, "alive").status == "completed"
+
+    def test_heartbeat_keeps_lease(self, store, clock):
+        """Test that heartbeats extend the lease and report lost jobs."""
+        first = store.submit("kiara", "generate", {"name": "a"})
+        second = store.submit("eric", "generate", {"name": "b"})
+        store.claim("w1")
+        store.claim("w1")
+
+        for _ in range(3):
+            clock.advance(8)
+            assert store.heartbeat("w1") == {first.id, second.id}
+        assert store.requeue_expired() == 0
+
+        store.cancel(second.id)
+        assert store.heartbeat("w1") == {first.id}
+
+    def test_expired_lease_fails_when_retries_exhausted(self, store, clock):
+        """Test that a job that keeps killing workers eventually fails."""
+        job = store.submit("kiara", "generate", {"name": "a"}, max_retries=1)
+        for _ in range(2):
+            assert store.claim("w1") is not None
+            clock.advance(11)
+        assert store.requeue_expired() == 1
+        failed = store.get(job.id)
+        assert failed.status == "failed"
+        assert failed.error_message == "Lease expired"
+
+    def test_fail_backs_off_then_fails(self, store, clock):
+        """Test exponential retry delays and the final failure."""
+        job = store.submit("kiara", "generate", {"name": "a"}, max_retries=2)
+
+        store.claim("w1")
+        retried = store.fail(job.id, "w1", "boom")
+        assert retried.status == "pending"
+        assert retried.available_at == clock.now + timedelta(seconds=5)
+        assert store.claim("w1") is None
+
+        clock.advance(5)
+        store.claim("w1")
+        assert store.fail(job.id, "w1", "boom").available_at == clock.now + timedelta(seconds=10)
+
+        clock.advance(10)
+        claimed = store.claim("w1")
+        assert to_task(claimed).retry_count == 2
+        failed = store.fail(job.id, "w1", "boom")
+        assert failed.status == "failed"
+        assert failed.error_message == "boom"
+
+        assert store.retry(job.id).status == "pending"
+        assert store.retry(job.id) is None
+
+    def test_cancel(self, store):
+        """Test that pending and running jobs cancel, finished ones do not."""
+        pending = store.submit("kiara", "generate", {"name": "a"})
+        running = store.submit("kiara", "generate", {"name": "b"})
+        assert store.cancel(pending.id).status == "cancelled"
+        store.claim("w1")
+        assert store.cancel(running.id).status == "cancelled"
+        assert store.complete(running.id, "w1") is None
+        assert store.cancel(running.id) is None
+        assert store.claim("w1") is None
+
+    def test_progress_is_batched(self, store):
+        """Test that progress is buffered and written on flush."""
+        jobs = [store.submit("kiara", "generate", {"name": str(i)}) for i in range(3)]
+        for job in jobs:
+            store.claim("w1")
+            store.record_progress(job.id, 10)
+            store.record_progress(job.id, 40)
+        assert store.get(jobs[0].id).progress == 0
+
+        assert store.flush() == 3
+        assert [store.get(job.id).progress for job in jobs] == [40, 40, 40]
+        assert store.flush() == 0
+
+
+    def test_settle_writes_a_batch(self, store):
+        """Test that several outcomes, with artifacts, are written together."""
+        jobs = [store.submit("kiara", "generate", {"name": str(i)}) for i in range(3)]
+        for _ in jobs:
+            store.claim("w1")
+        store.cancel(jobs[2].id)
+        artifact = {"artifact_type": "generated_image", "file_path": "a.png"}
+
+        settled = store.settle(
+            "w1",
+            [
+                JobOutcome(jobs[0].id, "completed", artifact=artifact),
+                JobOutcome(jobs[1].id, "failed", "boom", retry=False),
+                JobOutcome(jobs[2].id, "completed", artifact=artifact),
+            ],
+        )
+
+        assert [job and job.status for job in settled] == ["completed", "failed", None]
+        assert [a.file_path for a in store.artifacts(jobs[0].id)] == ["a.png"]
+        assert store.artifacts(jobs[2].id) == []
+
+    def test_keep_leases_renews_while_running(self, db_url):
+        """Test that a synchronous caller's lease outlives its nominal length."""
+        store = JobStore(db_url, lease_seconds=0.2)
+        job = store.submit("kiara", "enhance", {})
+        store.claim("api", job_id=job.id)
+
+        with store.keep_leases("api", interval=0.05):
+            threading.Event().wait(0.5)
+            assert store.requeue_expired() == 0
+
+        assert store.complete(job.id, "api").status == "completed"
+
+
+class SlowDispatcher(WorkflowDispatcher):
+    def __init__(self):
+        self.started = asyncio.Event()
+
+    async def execute(self, task):
+        self.started.set()
+        await asyncio.sleep(60)
+        return {"artifact_path": "never.png", "metadata": {}}
+
+
+class TestStoreWorker:
+    """Tests for StoreWorker running jobs claimed from the store."""
+
+    def run_until(self, worker, condition):
+        async def scenario():
+            runner = asyncio.create_task(worker.run())
+            while not await condition():
+                await asyncio.sleep(0.01)
+            worker.stop()
+            await runner
+
+        asyncio.run(asyncio.wait_for(scenario(), 10))
+
+    def test_completes_queued_jobs(self, store):
+        """Test that queued jobs are claimed, run and completed with artifacts."""
+        jobs = [store.submit("kiara", workflow, {}) for workflow in ("generate", "blend")]
+        worker = StoreWorker(store, worker_id="w1", poll_interval=0.01)
+
+        async def done():
+            return all(store.get(job.id).status == "completed" for job in jobs)
+
+        self.run_until(worker, done)
+        artifacts = store.artifacts(jobs[0].id)
+        assert [artifact.artifact_type for artifact in artifacts] == ["generated_image"]
+        assert store.get(jobs[0].id).lease_owner is None
+
+    def test_outcomes_are_settled_in_batches(self, store):
+        """Test that jobs finishing together share one store transaction."""
+        jobs = [store.submit(f"c{i}", "generate", {}) for i in range(4)]
+        worker = StoreWorker(store, worker_id="w1", poll_interval=0.01)
+        batches = []
+        settle = store.settle
+
+        def recording_settle(worker_id, outcomes):
+            batches.append(len(outcomes))
+            threading.Event().wait(0.05)
+            return settle(worker_id, outcomes)
+
+        store.settle = recording_settle
+
+        async def done():
+            return all(store.get(job.id).status == "completed" for job in jobs)
+
+        self.run_until(worker, done)
+        assert sum(batches) == 4
+        assert len(batches) < 4
+
+    def test_cancelled_job_is_abandoned(self, store):
+        """Test that a job cancelled in the store stops at the next heartbeat."""
+        job = store.submit("kiara", "generate", {})
+        worker = StoreWorker(store, worker_id="w1", poll_interval=0.01, heartbeat_interval=0.01)
+        worker.dispatchers["generate"] = slow = SlowDispatcher()
+
+        async def cancelled():
+            if slow.started.is_set() and store.get(job.id).status == "processing":
+                store.cancel(job.id)
+            return store.get(job.id).status == "cancelled" and worker.in_flight == 0
+
+        self.run_until(worker, cancelled)
+        assert store.artifacts(job.id) == []
+
+    def test_shutdown_hands_jobs_back(self, store):
+        """Test that jobs interrupted by shutdown return to the queue uncounted."""
+        job = store.submit("kiara", "generate", {})
+        worker = StoreWorker(store, worker_id="w1", poll_interval=0.01, drain_timeout=0)
+        worker.dispatchers["generate"] = slow = SlowDispatcher()
+
+        async def started():
+            return slow.started.is_set()
+
+        self.run_until(worker, started)
+        released = store.get(job.id)
+        assert released.status == "pending"
+        assert released.attempts == 0
+        assert released.lease_owner is None
+
+
+class TestJobsApi:
+    """Tests for the job endpoints on top of the store."""
+
+    @pytest.fixture
+    def client(self, store):
+        from src.main import app
+
+        app.dependency_overrides[get_job_store] = lambda: store
+        yield TestClient(app)
+        app.dependency_overrides.pop(get_job_store)
+
+    def test_enhance_runs_inline(self, client, store):
+        """Test that enhance jobs complete on submit and store their artifact."""
+        response = client.post(
+            "/api/media-lab/jobs",
+            json={
+                "character_id": "kiara",
+                "workflow_type": "enhance",
+                "parameters": {"source_image_path": "in.png"},
+            },
+        )
+        body = response.json()
+        assert body["status"] == "SUCCEEDED" and body["progress"] == 100
+        assert body["artifacts"][0]["metadata_json"]["operation"] == "enhance"
+
+        artifacts = client.get(f"/api/media-lab/jobs/{body['id']}/artifacts").json()
+        assert artifacts["total_artifacts"] == 1
+
+    def test_invalid_enhance_fails_and_retries(self, client):
+        """Test that validation errors fail the job and retry requeues it."""
+        body = client.post(
+            "/api/media-lab/jobs",
+            json={"character_id": "kiara", "workflow_type": "enhance", "parameters": {}},
+        ).json()
+        assert body["status"] == "FAILED"
+        assert "source_image_path" in body["error_message"]
+
+        retried = client.post(f"/api/media-lab/jobs/{body['id']}/retry").json()
+        assert retried["status"] == "QUEUED"
+
+    def test_queued_job_shared_with_workers(self, client, store):
+        """Test that jobs a worker claims through the store show up in the API."""
+        body = client.post(
+            "/api/media-lab/jobs",
+            json={"character_id": "kiara", "workflow_type": "generate"},
+        ).json()
+        assert body["status"] == "QUEUED"
+
+        store.claim("worker-1")
+        listed = client.get("/api/media-lab/jobs", params={"status": "RUNNING"}).json()
+        assert [job["id"] for job in listed["jobs"]] == [body["id"]]
+
+        cancelled = client.post(f"/api/media-lab/jobs/{body['id']}/cancel").json()
+        assert cancelled["status"] == "CANCELLED"
+        response = client.post(f"/api/media-lab/jobs/{body['id']}/cancel")
+        assert response.status_code == 409
+        assert client.get("/api/media-lab/jobs/missing").status_code == 404
@@ -0,0 +1,118 @@
+"""Tests for running stage kernels off the event loop."""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.media_lab import kernels
+from src.media_lab.offload import SharedArray, StageExecutor
+from src.media_lab.stages.detailer import DetailerStage, PipelineContext
+
+
+def shm_entries() -> set[str]:
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+
+def slow_kernel(seconds: float, out: np.ndarray) -> None:
+    time.sleep(seconds)
+    out[...] = 7
+
+
+class TestStageExecutor:
+    """Tests for StageExecutor modes."""
+
+    def test_thread_pool_keeps_loop_responsive(self):
+        """Test that the event loop keeps running while a kernel works."""
+        executor = StageExecutor("thread", max_workers=1)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        async def scenario():
+            task = asyncio.create_task(ticker())
+            result = await executor.run(slow_kernel, 0.2, out=((2, 2), np.uint8))
+            task.cancel()
+            return result
+
+        try:
+            result = asyncio.run(scenario())
+        finally:
+            executor.shutdown()
+        assert (result == 7).all()
+        assert ticks >= 5
+
+    def test_process_pool_matches_inline(self):
+        """Test that shared-memory process execution gives the inline result."""
+        image = np.random.default_rng(0).integers(0, 255, (64, 48, 3), dtype=np.uint8)
+        out = (image.shape, np.uint8)
+        inline = asyncio.run(
+            StageExecutor("inline").run(kernels.unsharp_mask, image, 0.75, 2.0, out=out)
+        )
+
+        before = shm_entries()
+        executor = StageExecutor("process", max_workers=1)
+        try:
+            shared = asyncio.run(executor.run(kernels.unsharp_mask, image, 0.75, 2.0, out=out))
+        finally:
+            executor.shutdown()
+        assert np.array_equal(shared, inline)
+        assert shm_entries() <= before
+
+    def test_shared_array_round_trip(self):
+        """Test that an attached handle sees the owner's data."""
+        source = np.arange(12, dtype=np.uint8).reshape(3, 4)
+        with SharedArray.copy_of(source) as owner:
+            view = owner.handle().attach()
+            assert np.array_equal(view.array, source)
+            view.array[0, 0] = 99
+            assert owner.array[0, 0] == 99
+            view.close()
+
+    def test_unknown_kind(self):
+        """Test that an unknown executor kind is rejected."""
+        with pytest.raises(ValueError):
+            StageExecutor("gpu")
+
+
+class TestStageOffload:
+    """Tests for stages routing their heavy steps through the executor."""
+
+    def test_detailer_offloads_load_filter_composite_save(
+        self, tmp_path: Path, recording_executor
+    ):
+        """Test that DetailerStage does its pixel work via run_cpu."""
+        image_path = tmp_path / "source.png"
+        Image.fromarray(np.full((32, 32, 3), 128, dtype=np.uint8)).save(image_path)
+
+        stage = DetailerStage()
+        stage.executor = recording_executor
+        context = PipelineContext()
+        context.set("image", {"image_path": str(image_path)})
+
+        asyncio.run(stage.execute(context))
+        assert stage.executor.calls == [
+            "load_rgb",
+            "unsharp_mask",
+            "composite_roi",
+            "save_rgb",
+        ]
+        assert Path(context.get("detail_path")).exists()
+
+    def test_load_image_errors(self, tmp_path: Path):
+        """Test that the async decoder keeps load_image_file's errors."""
+        stage = DetailerStage()
+        with pytest.raises(FileNotFoundError):
+            asyncio.run(stage.decode_image(str(tmp_path / "missing.png")))
+        invalid = tmp_path / "invalid.png"
+        invalid.write_text("not an image")
+        with pytest.raises(ValueError):
+            asyncio.run(stage.decode_image(str(invalid)))
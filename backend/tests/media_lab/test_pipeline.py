@@ -1,7 +1,16 @@
 """Tests for pipeline infrastructure."""
 
 import asyncio
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.media_lab import kernels
+from src.media_lab.offload import SharedArray, StageExecutor
 from src.media_lab.pipeline import (
+    ImageBuffer,
     Pipeline,
     PipelineContext,
     PipelineStage,
@@ -10,6 +19,8 @@ from src.media_lab.pipeline import (
     DetailerStage,
     UpscalerStage,
 )
+from src.media_lab.stages.img2img import Img2ImgStage
+from src.media_lab.stages.refiner import RefinerStage as ImageRefinerStage
 
 
 def async_test(coro):
@@ -326,3 +337,90 @@ class TestPipeline:
             assert "upscaler" in result.metadata
 
         async_test(run())
+
+
+def image_chain(executor: StageExecutor) -> Pipeline:
+    img2img = Img2ImgStage(strength=0.5)
+    refiner = ImageRefinerStage(strength=0.3)
+    img2img.executor = executor
+    refiner.executor = executor
+    return Pipeline([img2img, refiner])
+
+
+@pytest.fixture
+def source_context(tmp_path, monkeypatch) -> PipelineContext:
+    """Context with a source image, run from tmp_path so artifacts land there."""
+    monkeypatch.chdir(tmp_path)
+    source = np.random.default_rng(1).integers(0, 255, (48, 64, 3), dtype=np.uint8)
+    path = tmp_path / "source.png"
+    Image.fromarray(source).save(path)
+    context = PipelineContext()
+    context.set("source_image_path", str(path))
+    context.set("strength", 0.5)
+    return context
+
+
+class TestImageHandoff:
+    """Tests for passing decoded images between stages in memory."""
+
+    def test_stages_hand_off_pixels_without_decoding(self, source_context, recording_executor):
+        """Test that only the first stage decodes and the output chains."""
+        context = source_context
+        source = np.asarray(Image.open(context.get("source_image_path")))
+
+        context = async_test(image_chain(recording_executor).execute(context))
+
+        assert recording_executor.calls.count("load_rgb") == 1
+        expected = np.empty_like(source)
+        kernels.unsharp_mask(source, 0.5, 2.0, out=expected)
+        kernels.unsharp_mask(expected.copy(), 0.3, 1.0, out=expected)
+        assert np.array_equal(context.get_image("image").array, expected)
+
+    def test_only_final_stage_persisted_with_checkpoints(
+        self, source_context, recording_executor
+    ):
+        """Test that intermediates stay in memory when checkpoints are set."""
+        context = source_context
+        context.checkpoint_stages = set()
+
+        context = async_test(image_chain(recording_executor).execute(context))
+
+        assert recording_executor.calls.count("save_rgb") == 1
+        assert context.artifacts == [context.get("refined_path")]
+        assert context.get("img2img_path") is None
+        assert context.stage_artifacts == {1: context.get("refined_path")}
+
+    def test_checkpointed_stage_persisted(self, source_context, recording_executor):
+        """Test that a checkpointed intermediate is written to disk."""
+        context = source_context
+        context.checkpoint_stages = {0}
+
+        context = async_test(image_chain(recording_executor).execute(context))
+
+        assert len(context.artifacts) == 2
+        assert os.path.exists(context.stage_artifacts[0])
+
+    def test_process_mode_keeps_images_in_shared_memory(self, source_context):
+        """Test that process-pool stages chain through SharedArray blocks."""
+        executor = StageExecutor("process", max_workers=1)
+        context = source_context
+        context.checkpoint_stages = set()
+        try:
+            context = async_test(image_chain(executor).execute(context))
+        finally:
+            executor.shutdown()
+
+        image = context.get_image("image")
+        assert isinstance(image.storage, SharedArray)
+        name = image.storage.handle().name
+        context.release_images()
+        assert not os.path.exists(f"/dev/shm/{name}")
+
+    def test_set_image_releases_replaced_buffer(self):
+        """Test that replacing an image frees its shared block."""
+        context = PipelineContext()
+        first = ImageBuffer(SharedArray((2, 2, 3), np.uint8))
+        context.set_image("image", first)
+        context.set_image("image", ImageBuffer(np.zeros((2, 2, 3), np.uint8)))
+        assert first.storage.array is None
+
@@ -0,0 +1,313 @@
+"""Tests for the media job scheduler."""
+
+import asyncio
+
+from src.media_lab.executor import JobExecutor, JobStatus
+from src.media_lab.queue import JobQueue
+from src.media_lab.worker import MediaWorker, WorkerPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def drain(queue: JobQueue) -> list[str]:
+    order = []
+    while (task := queue.dequeue()) is not None:
+        order.append(task.job_id)
+        queue.mark_complete(task.job_id)
+    return order
+
+
+class TestJobQueue:
+    """Tests for JobQueue scheduling."""
+
+    def test_fifo_for_one_character(self):
+        """Test that one character's jobs keep their submission order."""
+        queue = JobQueue()
+        for i in range(3):
+            queue.enqueue(f"j{i}", "kiara", "enhance", {})
+        assert drain(queue) == ["j0", "j1", "j2"]
+
+    def test_priority_first(self):
+        """Test that higher priorities are dequeued first."""
+        queue = JobQueue()
+        queue.enqueue("low", "kiara", "enhance", {}, priority=-1)
+        queue.enqueue("normal", "kiara", "enhance", {})
+        queue.enqueue("high", "kiara", "enhance", {}, priority=5)
+        assert drain(queue) == ["high", "normal", "low"]
+
+    def test_fair_sharing_between_characters(self):
+        """Test that a large batch for one character does not starve another."""
+        queue = JobQueue()
+        for i in range(100):
+            queue.enqueue(f"kiara-{i}", "kiara", "generate", {})
+        queue.enqueue("eric-0", "eric", "generate", {})
+        queue.enqueue("eric-1", "eric", "generate", {})
+
+        order = drain(queue)
+        assert order[:4] == ["kiara-0", "eric-0", "kiara-1", "eric-1"]
+        assert len(order) == 102
+
+    def test_cancel(self):
+        """Test that cancelled jobs are skipped and no longer counted."""
+        queue = JobQueue()
+        for i in range(3):
+            queue.enqueue(f"j{i}", "kiara", "enhance", {})
+        assert queue.cancel("j1")
+        assert not queue.cancel("j1")
+        assert not queue.cancel("unknown")
+        assert queue.size() == 2
+        assert drain(queue) == ["j0", "j2"]
+
+    def test_reenqueue_replaces_pending_task(self):
+        """Test that enqueueing a queued id again supersedes the old task."""
+        queue = JobQueue()
+        queue.enqueue("j0", "kiara", "enhance", {"v": 1})
+        queue.enqueue("j0", "kiara", "enhance", {"v": 2}, priority=1)
+        task = queue.dequeue()
+        assert task.parameters == {"v": 2}
+        assert queue.dequeue() is None
+
+    def test_retry_backoff(self):
+        """Test that retries wait out an exponentially growing delay."""
+        clock = FakeClock()
+        queue = JobQueue(retry_base_delay=1.0, clock=clock)
+        queue.enqueue("j0", "kiara", "enhance", {}, max_retries=2)
+
+        task = queue.dequeue()
+        assert queue.retry(task)
+        assert queue.is_queued("j0") and not queue.is_running("j0")
+        assert queue.dequeue() is None
+        assert queue.next_ready_in() == 1.0
+
+        clock.now = 1.0
+        task = queue.dequeue()
+        assert task.job_id == "j0" and task.retry_count == 1
+        assert queue.retry(task)
+        clock.now = 2.5
+        assert queue.dequeue() is None
+        clock.now = 3.0
+        task = queue.dequeue()
+        assert task.retry_count == 2
+        assert not queue.retry(task)
+        assert queue.next_ready_in() is None
+
+    def test_cancel_waiting_retry(self):
+        """Test that a job waiting out its backoff can be cancelled."""
+        clock = FakeClock()
+        queue = JobQueue(clock=clock)
+        queue.enqueue("j0", "kiara", "enhance", {})
+        queue.retry(queue.dequeue())
+        assert queue.cancel("j0")
+        clock.now = 100.0
+        assert queue.dequeue() is None
+        assert queue.size() == 0
+
+
+    def test_dequeue_skipping_workflows(self):
+        """Test that skipped workflows stay queued in their original order."""
+        queue = JobQueue()
+        queue.enqueue("i0", "kiara", "interpolate", {})
+        queue.enqueue("e0", "kiara", "enhance", {})
+        queue.enqueue("i1", "eric", "interpolate", {})
+        queue.enqueue("e1", "eric", "enhance", {})
+
+        assert queue.dequeue(skip_workflows={"interpolate"}).job_id == "e0"
+        assert queue.dequeue(skip_workflows={"interpolate"}).job_id == "e1"
+        assert queue.dequeue(skip_workflows={"interpolate"}) is None
+        assert drain(queue) == ["i0", "i1"]
+
+    def test_ready_callback(self):
+        """Test that enqueueing notifies ready callbacks."""
+        queue = JobQueue()
+        calls = []
+        queue.register_ready_callback(lambda: calls.append(1))
+        queue.enqueue("j0", "kiara", "enhance", {})
+        assert calls == [1]
+
+    def test_unregister_ready_callback(self):
+        """Test that an unregistered callback is no longer notified."""
+        queue = JobQueue()
+        calls = []
+
+        def callback():
+            calls.append(1)
+
+        queue.register_ready_callback(callback)
+        queue.unregister_ready_callback(callback)
+        queue.unregister_ready_callback(callback)
+        queue.enqueue("j0", "kiara", "enhance", {})
+        assert calls == []
+
+
+class FailingDispatcher:
+    def __init__(self):
+        self.calls = 0
+
+    async def execute(self, task):
+        self.calls += 1
+        raise RuntimeError("boom")
+
+
+class TestWorkerRetries:
+    """Tests for MediaWorker retry scheduling."""
+
+    def test_failed_job_is_delayed_not_requeued(self):
+        """Test that a failing job is retried only after its backoff."""
+        clock = FakeClock()
+        queue = JobQueue(retry_base_delay=5.0, clock=clock)
+        executor = JobExecutor()
+        worker = MediaWorker(queue, executor)
+        dispatcher = worker.dispatchers["enhance"] = FailingDispatcher()
+
+        executor.create_job("j0")
+        queue.enqueue("j0", "kiara", "enhance", {})
+        task = queue.dequeue()
+        assert not asyncio.run(worker.run_job(task))
+        queue.mark_complete("j0")
+
+        assert queue.is_queued("j0")
+        assert executor.get_status("j0") == JobStatus.QUEUED
+        assert not worker.process_one()
+        clock.now = 5.0
+        assert worker.process_one()
+        assert dispatcher.calls == 2
+
+
+class SleepingDispatcher:
+    """Records how many jobs of its workflow overlap."""
+
+    def __init__(self, seconds: float = 0.05):
+        self.seconds = seconds
+        self.active = 0
+        self.peak = 0
+        self.finished: list[str] = []
+
+    async def execute(self, task):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.seconds)
+        finally:
+            self.active -= 1
+        self.finished.append(task.job_id)
+        return {}
+
+
+def make_pool(**kwargs) -> tuple[JobQueue, JobExecutor, WorkerPool]:
+    queue = JobQueue()
+    executor = JobExecutor()
+    pool = WorkerPool(MediaWorker(queue, executor), **kwargs)
+    return queue, executor, pool
+
+
+def submit(queue: JobQueue, executor: JobExecutor, job_id: str, workflow: str):
+    executor.create_job(job_id)
+    queue.enqueue(job_id, "kiara", workflow, {})
+
+
+async def run_until(pool: WorkerPool, done, timeout: float = 2.0):
+    """Run the pool until done() holds, then stop it and wait for the drain."""
+    runner = asyncio.create_task(pool.run())
+    async with asyncio.timeout(timeout):
+        while not done():
+            await asyncio.sleep(0.005)
+    pool.stop()
+    await runner
+
+
+class TestWorkerPool:
+    """Tests for concurrent job execution."""
+
+    def test_runs_jobs_concurrently(self):
+        """Test that jobs overlap up to the concurrency limit."""
+        queue, executor, pool = make_pool(concurrency=3)
+        dispatcher = pool.worker.dispatchers["generate"] = SleepingDispatcher()
+        for i in range(6):
+            submit(queue, executor, f"j{i}", "generate")
+
+        asyncio.run(run_until(pool, lambda: len(dispatcher.finished) == 6))
+        assert dispatcher.peak == 3
+        assert all(executor.get_status(f"j{i}") == JobStatus.SUCCEEDED for i in range(6))
+
+    def test_workflow_limit_does_not_block_others(self):
+        """Test that saturated interpolation leaves slots for enhancement."""
+        queue, executor, pool = make_pool(concurrency=4, workflow_limits={"interpolate": 1})
+        interpolate = pool.worker.dispatchers["interpolate"] = SleepingDispatcher(0.05)
+        enhance = pool.worker.dispatchers["enhance"] = SleepingDispatcher(0.01)
+        for i in range(3):
+            submit(queue, executor, f"i{i}", "interpolate")
+        for i in range(3):
+            submit(queue, executor, f"e{i}", "enhance")
+
+        async def scenario():
+            await run_until(pool, lambda: len(enhance.finished) == 3)
+            # Draining finished the interpolation that was running, no more
+            return len(interpolate.finished)
+
+        assert asyncio.run(scenario()) == 1
+        assert interpolate.peak == 1
+        assert enhance.peak == 3
+        assert queue.size() == 2
+
+    def test_wakes_on_enqueue(self):
+        """Test that an idle pool starts a job as soon as it is enqueued."""
+        queue, executor, pool = make_pool(concurrency=1)
+        dispatcher = pool.worker.dispatchers["generate"] = SleepingDispatcher(0)
+
+        async def scenario():
+            runner = asyncio.create_task(pool.run())
+            await asyncio.sleep(0.01)
+            submit(queue, executor, "j0", "generate")
+            async with asyncio.timeout(0.5):
+                while not dispatcher.finished:
+                    await asyncio.sleep(0)
+            pool.stop()
+            await runner
+
+        asyncio.run(scenario())
+        assert executor.get_status("j0") == JobStatus.SUCCEEDED
+        assert pool.max_idle is None
+
+    def test_stop_drains_in_flight_jobs(self):
+        """Test that stopping waits for running jobs and starts no new ones."""
+        queue, executor, pool = make_pool(concurrency=2)
+        dispatcher = pool.worker.dispatchers["generate"] = SleepingDispatcher(0.05)
+        for i in range(4):
+            submit(queue, executor, f"j{i}", "generate")
+
+        asyncio.run(run_until(pool, lambda: dispatcher.active == 2))
+        assert dispatcher.finished == ["j0", "j1"]
+        assert pool.in_flight == 0
+        assert queue.size() == 2
+
+    def test_drain_timeout_requeues(self):
+        """Test that jobs still running after the drain timeout go back to the queue."""
+        queue, executor, pool = make_pool(concurrency=1, drain_timeout=0.01)
+        dispatcher = pool.worker.dispatchers["generate"] = SleepingDispatcher(10)
+        submit(queue, executor, "j0", "generate")
+
+        asyncio.run(run_until(pool, lambda: dispatcher.active == 1))
+        assert queue.is_queued("j0")
+        assert executor.get_status("j0") == JobStatus.QUEUED
+
+    def test_repeated_runs_do_not_leak_ready_callbacks(self):
+        """Test that each run removes its wakeup callback from the queue."""
+        queue = JobQueue()
+        worker = MediaWorker(queue, JobExecutor())
+
+        async def scenario():
+            for _ in range(3):
+                runner = asyncio.create_task(worker.run(poll_interval=0.01))
+                await asyncio.sleep(0.02)
+                assert len(queue._ready_callbacks) == 1
+                worker.stop()
+                await runner
+
+        asyncio.run(scenario())
+        assert queue._ready_callbacks == []
@@ -286,3 +286,19 @@ class TestWorkbench:
             checkpoint = wb.get_checkpoint(job_id, stage_idx)
             assert checkpoint is not None
             assert isinstance(checkpoint, str)
+
+    def test_checkpoint_stages_limit_persisted_artifacts(
+        self, config_with_upscaler, tmp_path, monkeypatch
+    ):
+        """Test that only checkpointed and final stages write artifacts."""
+        monkeypatch.chdir(tmp_path)
+        config = config_with_upscaler.model_copy(update={"checkpoint_stages": [1]})
+        wb = Workbench(config)
+        job_id = "checkpoint_subset_test"
+        result = async_test(wb.execute({"prompt": "Test prompt"}, job_id=job_id))
+
+        assert result["success"] is True
+        assert len(result["artifacts"]) == 2
+        assert wb.get_checkpoint(job_id, 0) is None
+        assert wb.get_checkpoint(job_id, 1).endswith("_refined.png")
+        assert wb.get_checkpoint(job_id, 3).endswith("_upscaled.png")
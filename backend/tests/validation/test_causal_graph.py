@@ -0,0 +1,117 @@
+"""Tests for SCC-based cycle detection and bitset reachability."""
+
+from src.validation.causal_graph import CausalGraph
+from src.validation.rule_engine import Fact, RuleEngine
+
+
+class TestCausalGraph:
+    """Tests for CausalGraph."""
+
+    def test_acyclic_chain_reachability(self):
+        """Test closure queries over a simple chain."""
+        graph = CausalGraph([("a", "b"), ("b", "c"), ("c", "d")])
+        assert graph.is_acyclic()
+        assert graph.reachable("a", "d")
+        assert not graph.reachable("d", "a")
+        assert not graph.reachable("a", "a")
+        assert graph.descendants("b") == {"c", "d"}
+
+    def test_unknown_nodes(self):
+        """Test queries on nodes that were never added."""
+        graph = CausalGraph([("a", "b")])
+        assert not graph.reachable("a", "zzz")
+        assert graph.descendants("zzz") == set()
+
+    def test_each_cycle_reported_once(self):
+        """Test that every cyclic component appears exactly once."""
+        graph = CausalGraph(
+            [("a", "b"), ("b", "c"), ("c", "a"), ("c", "d"), ("d", "e"), ("e", "d"), ("f", "f")]
+        )
+        cycles = sorted(graph.cycles())
+        assert cycles == [["a", "b", "c"], ["d", "e"], ["f"]]
+        assert graph.reachable("a", "a")
+        assert graph.reachable("b", "e")
+        assert not graph.reachable("d", "a")
+
+    def test_components_reverse_topological(self):
+        """Test that components are emitted after everything they reach."""
+        graph = CausalGraph([("a", "b"), ("b", "c")])
+        order = [c[0] for c in graph.strongly_connected_components()]
+        assert order == ["c", "b", "a"]
+
+    def test_reachable_pairs(self):
+        """Test enumeration of the transitive closure."""
+        graph = CausalGraph([("a", "b"), ("b", "c")])
+        assert set(graph.reachable_pairs()) == {("a", "b"), ("a", "c"), ("b", "c")}
+
+    def test_long_chain_does_not_recurse(self):
+        """Test a chain far deeper than the recursion limit."""
+        n = 50_000
+        graph = CausalGraph((i, i + 1) for i in range(n))
+        assert graph.is_acyclic()
+        assert graph.reachable(0, n)
+
+        graph.add_edge(n, 0)
+        cycles = graph.cycles()
+        assert len(cycles) == 1
+        assert len(cycles[0]) == n + 1
+
+    def test_mutation_invalidates_closure(self):
+        """Test that adding an edge refreshes cached results."""
+        graph = CausalGraph([("a", "b")])
+        assert not graph.reachable("a", "c")
+        graph.add_edge("b", "c")
+        assert graph.reachable("a", "c")
+
+
+class TestRuleEngineClosure:
+    """Tests for graph-backed transitive rules in RuleEngine."""
+
+    def test_temporal_transitivity_closure(self):
+        """Test that 'before' is closed over arbitrarily long chains."""
+        engine = RuleEngine()
+        engine.load_default_rules()
+        for i in range(20):
+            engine.add_fact(Fact("before", f"b{i}", f"b{i + 1}", source="data"))
+
+        inferred = engine.run_inference()
+
+        assert Fact("before", "b0", "b20") in inferred
+        assert Fact("before", "b0", "b1") not in inferred
+
+    def test_indirect_causation_skips_direct_links(self):
+        """Test that direct causes are not re-derived as indirect."""
+        engine = RuleEngine()
+        engine.load_default_rules()
+        engine.add_fact(Fact("causes", "a", "b", source="data"))
+        engine.add_fact(Fact("causes", "b", "c", source="data"))
+
+        inferred = engine.run_inference()
+
+        assert Fact("indirectly_causes", "a", "c") in inferred
+        assert Fact("indirectly_causes", "a", "b") not in inferred
+
+    def test_causal_loop_reported_once(self):
+        """Test that a causal cycle yields a single issue for the component."""
+        engine = RuleEngine()
+        engine.add_fact(Fact("causes", "a", "b", source="data"))
+        engine.add_fact(Fact("causes", "b", "c", source="data"))
+        engine.add_fact(Fact("causes", "c", "a", source="data"))
+
+        issues = engine.check_consistency()
+        loops = [i for i in issues if i.issue_type == "causal_loop"]
+
+        assert len(loops) == 1
+        assert loops[0].affected_entities == ["a", "b", "c"]
+
+    def test_temporal_contradiction(self):
+        """Test that opposing 'before' facts are flagged."""
+        engine = RuleEngine()
+        engine.add_fact(Fact("before", "a", "b", source="data"))
+        engine.add_fact(Fact("before", "b", "a", source="data"))
+
+        issues = engine.check_consistency()
+        contradictions = [i for i in issues if i.issue_type == "temporal_contradiction"]
+
+        assert len(contradictions) == 1
+        assert contradictions[0].affected_entities == ["a", "b"]
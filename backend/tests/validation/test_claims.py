@@ -0,0 +1,129 @@
+"""Tests for sharded dangling-reference validation."""
+
+from src.validation import claims as claims_module
+from src.validation.claims import (
+    EntityIndex,
+    EntityIndexCache,
+    build_entity_index,
+    find_dangling_references,
+    shard_of,
+)
+from src.validation.consistency import ValidationReport, check_dangling_references
+
+
+def make_claims(n: int, known_every: int = 2) -> list[dict]:
+    return [
+        {
+            "claim_id": f"claim-{i:05d}",
+            "subject": f"ent_{i}" if i % known_every == 0 else f"ghost_{i}",
+            "type": "fact",
+        }
+        for i in range(n)
+    ]
+
+
+class TestEntityIndex:
+    """Tests for EntityIndex."""
+
+    def test_membership(self):
+        """Test scalar and vectorized lookups."""
+        index = EntityIndex(["b", "a", "c", "a"])
+        assert len(index) == 3
+        assert "a" in index
+        assert "zz" not in index
+        assert list(index.contains_many(["c", "d", "0"])) == [True, False, False]
+
+    def test_empty_index(self):
+        """Test lookups against an empty index."""
+        index = build_entity_index([], {})
+        assert "a" not in index
+        assert list(index.contains_many(["a"])) == [False]
+
+    def test_cache_rebuilds_only_on_id_change(self):
+        """Test that the cached index is reused until a source's ids change."""
+        beats = {"b1": {}, "b2": {}}
+        characters = {"kiara": {}}
+        cache = EntityIndexCache()
+
+        first = cache.get(beats, characters)
+        beats["b1"] = {"edited": True}
+        assert cache.get(beats, characters) is first
+
+        del beats["b2"]
+        beats["b3"] = {}
+        rebuilt = cache.get(beats, characters)
+        assert rebuilt is not first
+        assert "b3" in rebuilt and "b2" not in rebuilt
+        assert cache.builds == 2
+
+
+class TestFindDanglingReferences:
+    """Tests for find_dangling_references."""
+
+    def test_exact_total_with_bounded_samples(self):
+        """Test that totals are exact while samples are capped."""
+        claims = make_claims(1000)
+        index = build_entity_index(c["subject"] for c in claims if c["subject"].startswith("ent"))
+
+        result = find_dangling_references(claims, index, sample_limit=5, num_shards=7)
+
+        assert result.total_claims == 1000
+        assert result.total_dangling == 500
+        assert [ref[0] for ref in result.samples] == [
+            "claim-00001",
+            "claim-00003",
+            "claim-00005",
+            "claim-00007",
+            "claim-00009",
+        ]
+
+    def test_non_id_subjects_ignored(self):
+        """Test that plain-word subjects are not treated as references."""
+        claims = [{"claim_id": "c1", "subject": "vampires", "type": "rule"}]
+        result = find_dangling_references(claims, build_entity_index([]))
+        assert result.total_dangling == 0
+
+    def test_process_pool_matches_in_process(self):
+        """Test that sharding across processes gives identical results."""
+        claims = make_claims(2000, known_every=3)
+        index = build_entity_index(c["subject"] for c in claims if c["subject"].startswith("ent"))
+
+        serial = find_dangling_references(claims, index, workers=1)
+        parallel = find_dangling_references(claims, index, workers=2, parallel_threshold=0)
+
+        assert parallel.shards == 2
+        assert parallel.total_dangling == serial.total_dangling
+        assert parallel.samples == serial.samples
+
+        # The pool outlives the call and is reused for the same index
+        pool = claims_module._pool
+        find_dangling_references(claims, index, workers=2, parallel_threshold=0)
+        assert claims_module._pool is pool
+        claims_module.shutdown_pool()
+        assert claims_module._pool is None
+
+    def test_shard_assignment_is_stable(self):
+        """Test that shard ids are deterministic and in range."""
+        assert shard_of("claim-0001", 8) == shard_of("claim-0001", 8)
+        assert all(0 <= shard_of(f"c{i}", 8) < 8 for i in range(100))
+
+
+class TestCheckDanglingReferences:
+    """Tests for report integration."""
+
+    def test_report_caps_warnings(self):
+        """Test that only ten samples plus one summary warning are reported."""
+        report = ValidationReport()
+        check_dangling_references(report, make_claims(100), build_entity_index([]))
+
+        assert len(report.warnings) == 11
+        assert report.warnings[-1].context == {"total_dangling": 100}
+        assert "no_dangling_references" not in report.passed_rules
+
+    def test_sample_limit(self):
+        """Test that the number of sampled warnings is configurable."""
+        report = ValidationReport()
+        check_dangling_references(report, make_claims(100), build_entity_index([]), sample_limit=3)
+
+        assert len(report.warnings) == 4
+        assert "showing first 3" in report.warnings[-1].message
@@ -0,0 +1,142 @@
+"""Tests for the single-pass, incremental validation engine."""
+
+from pydantic import BaseModel
+
+from src.validation.engine import ValidationEngine
+
+
+class BeatModel(BaseModel):
+    beat_id: str
+    episode_id: str
+    start_seconds: float
+
+
+def make_data():
+    beats = {
+        "b1": {"beat_id": "b1", "episode_id": "s01e01", "start_seconds": 10},
+        "b2": {"beat_id": "b2", "episode_id": "s01e01", "start_seconds": 20},
+        "b3": {"beat_id": "b3", "episode_id": "s01e02", "start_seconds": 5},
+    }
+    edges = {
+        "e1": {"edge_id": "e1", "from_beat_id": "b1", "to_beat_id": "b2"},
+        "e2": {"edge_id": "e2", "from_beat_id": "b2", "to_beat_id": "b3"},
+        "e3": {"edge_id": "e3", "from_beat_id": "b3", "to_beat_id": "b3"},
+        "e4": {"edge_id": "e4", "from_beat_id": "b1", "to_beat_id": "missing"},
+    }
+    claims = {"c1": {"claim_id": "c1", "subject": "b1"}}
+    return beats, edges, claims
+
+
+class TestValidationEngine:
+    """Tests for ValidationEngine."""
+
+    def test_single_pass_counts(self):
+        """Test that all edge rules are evaluated and counted per rule."""
+        beats, edges, claims = make_data()
+        report = ValidationEngine(beats, edges, claims).run()
+
+        assert report.error_counts["no_self_loops"] == 1
+        assert report.error_counts["beat_id_existence"] == 1
+        assert report.error_counts["temporal_consistency"] == 0
+        assert "temporal_consistency" in report.passed_rules
+        assert set(report.timings_ms) >= {
+            "beat_id_existence",
+            "no_self_loops",
+            "temporal_consistency",
+            "no_dangling_references",
+            "no_causal_cycles",
+        }
+        assert report.stats["edges_evaluated"] == 4
+
+    def test_second_run_uses_cache(self):
+        """Test that unchanged data is not re-evaluated."""
+        beats, edges, claims = make_data()
+        engine = ValidationEngine(beats, edges, claims)
+        first = engine.run()
+        second = engine.run()
+
+        assert second.stats["edges_evaluated"] == 0
+        assert second.stats["edges_cached"] == 4
+        assert second.summary()["total_errors"] == first.summary()["total_errors"]
+
+    def test_entity_index_rebuilt_only_when_ids_change(self):
+        """Test that the claims rule reuses the entity index between runs."""
+        beats, edges, claims = make_data()
+        engine = ValidationEngine(beats, edges, claims)
+        engine.run()
+        beats["b1"]["start_seconds"] = 11
+        engine.run()
+        assert engine._entity_index.builds == 1
+
+        beats["b4"] = {"beat_id": "b4", "episode_id": "s01e02", "start_seconds": 30}
+        engine.run()
+        assert engine._entity_index.builds == 2
+
+    def test_beat_change_revalidates_incident_edges_only(self):
+        """Test that changing a beat only re-runs edges touching it."""
+        beats, edges, claims = make_data()
+        engine = ValidationEngine(beats, edges, claims)
+        engine.run()
+
+        beats["b1"]["start_seconds"] = 30
+        report = engine.run(changed_beat_ids=["b1"])
+
+        assert report.stats["edges_evaluated"] == 2
+        assert report.error_counts["temporal_consistency"] == 1
+
+    def test_hint_does_not_hide_other_changes(self):
+        """Test that beats outside the hint are still checked by hash."""
+        beats, edges, claims = make_data()
+        engine = ValidationEngine(beats, edges, claims)
+        engine.run()
+
+        beats["b2"]["start_seconds"] = 1
+        report = engine.run(changed_beat_ids=["b3"])
+
+        assert report.stats["beats_changed"] == 2
+        assert report.error_counts["temporal_consistency"] == 1
+
+    def test_detects_changes_without_hints(self):
+        """Test content-hash change detection when no ids are given."""
+        beats, edges, claims = make_data()
+        engine = ValidationEngine(beats, edges, claims)
+        engine.run()
+
+        beats["b2"]["start_seconds"] = 1
+        report = engine.run()
+
+        assert report.stats["beats_changed"] == 1
+        assert report.error_counts["temporal_consistency"] == 1
+
+    def test_added_and_removed_edges(self):
+        """Test that edge additions and removals are picked up."""
+        beats, edges, claims = make_data()
+        engine = ValidationEngine(beats, edges, claims)
+        engine.run()
+
+        del edges["e3"]
+        edges["e5"] = {"edge_id": "e5", "from_beat_id": "b3", "to_beat_id": "b1"}
+        report = engine.run(changed_edge_ids=[])
+
+        assert report.error_counts["no_self_loops"] == 0
+        assert report.error_counts["temporal_consistency"] == 1
+        assert report.stats["edges_evaluated"] == 1
+
+    def test_causal_cycle_recomputed_on_edge_change(self):
+        """Test that graph-level rules follow edge changes."""
+        beats, edges, claims = make_data()
+        engine = ValidationEngine(beats, edges, claims)
+        assert engine.run().error_counts["no_causal_cycles"] == 0
+
+        edges["e6"] = {"edge_id": "e6", "from_beat_id": "b3", "to_beat_id": "b2"}
+        assert engine.run().error_counts["no_causal_cycles"] == 1
+
+    def test_model_beats(self):
+        """Test that beats stored as Pydantic models are supported."""
+        beats, edges, claims = make_data()
+        model_beats = {beat_id: BeatModel(**beat) for beat_id, beat in beats.items()}
+        model_beats["b2"] = BeatModel(beat_id="b2", episode_id="s01e01", start_seconds=1)
+
+        report = ValidationEngine(model_beats, edges, claims).run()
+
+        assert report.error_counts["temporal_consistency"] == 1
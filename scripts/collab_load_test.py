@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Load test for the collaboration hub.
+
+Simulates many concurrent editors against a running backend
+(``uvicorn src.main:app`` in backend/). Each editor keeps a local CRDT
+replica, sends its edits as binary op batches over the WebSocket endpoint,
+and merges the batches pushed back by the server. At the end every replica
+of a document must have converged.
+
+Example:
+    python scripts/collab_load_test.py --docs 10 --editors 30 --edits 50
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import urllib.request
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import websockets  # noqa: E402
+
+from src.collaboration.crdt import CRDTDocument  # noqa: E402
+from src.collaboration.sync import decode_op_batch, encode_op_batch  # noqa: E402
+
+
+class Editor:
+    """One simulated user editing one document."""
+
+    def __init__(self, doc_id: str, user_id: str):
+        self.doc_id = doc_id
+        self.user_id = user_id
+        self.replica = CRDTDocument(doc_id)
+        self.sent_ops = 0
+        self.received_ops = 0
+        self.send_latencies: list[float] = []
+
+    async def receive(self, ws):
+        async for message in ws:
+            if isinstance(message, bytes):
+                ops = decode_op_batch(message)
+                self.received_ops += len(ops)
+                self.replica.merge_operations(ops)
+            else:
+                payload = json.loads(message)
+                if payload.get("type") == "snapshot":
+                    self.replica = CRDTDocument.from_dict(payload["document"])
+
+    async def run(
+        self,
+        base_url: str,
+        edits: int,
+        interval: float,
+        settle: float,
+        barrier: asyncio.Barrier,
+    ):
+        url = f"{base_url}/api/collaboration/{self.doc_id}/ws?user_id={self.user_id}"
+        async with websockets.connect(url, max_size=None) as ws:
+            await ws.send(json.dumps({"type": "sync", "vector_clock": {}}))
+            reader = asyncio.create_task(self.receive(ws))
+
+            node_id = self.replica.create_node("element", "", self.user_id)
+            pending = [self.replica.operations[-1]]
+            for i in range(edits):
+                ops = pending + [self.replica.insert_text(node_id, i, "x", self.user_id)]
+                pending = []
+
+                began = time.perf_counter()
+                await ws.send(encode_op_batch(ops))
+                self.send_latencies.append(time.perf_counter() - began)
+                self.sent_ops += len(ops)
+                await asyncio.sleep(interval)
+
+            # Stay connected until every editor is done, then catch up
+            await barrier.wait()
+            await asyncio.sleep(settle)
+            clock = dict(self.replica.vector_clock)
+            await ws.send(json.dumps({"type": "sync", "vector_clock": clock}))
+            await asyncio.sleep(settle)
+            reader.cancel()
+
+
+def fetch_metrics(base_url: str) -> dict:
+    http_url = base_url.replace("ws://", "http://").replace("wss://", "https://")
+    with urllib.request.urlopen(f"{http_url}/api/collaboration/metrics") as response:
+        return json.load(response)
+
+
+async def run_load_test(args) -> int:
+    run_id = uuid.uuid4().hex[:6]
+    editors = [
+        Editor(f"load-{run_id}-{d}", f"editor-{d}-{e}")
+        for d in range(args.docs)
+        for e in range(args.editors)
+    ]
+
+    barrier = asyncio.Barrier(len(editors))
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(e.run(args.url, args.edits, args.interval, args.settle, barrier) for e in editors)
+    )
+    elapsed = time.perf_counter() - started
+
+    sent = sum(e.sent_ops for e in editors)
+    received = sum(e.received_ops for e in editors)
+    latencies = sorted(t for e in editors for t in e.send_latencies)
+
+    diverged = 0
+    for d in range(args.docs):
+        replicas = [e.replica for e in editors if e.doc_id == f"load-{run_id}-{d}"]
+        states = {
+            json.dumps({k: n.content for k, n in r.nodes.items()}, sort_keys=True)
+            for r in replicas
+        }
+        diverged += len(states) > 1
+
+    print(f"Editors:          {len(editors)} across {args.docs} documents")
+    print(f"Elapsed:          {elapsed:.2f}s")
+    print(f"Ops sent:         {sent} ({sent / elapsed:.0f}/s)")
+    print(f"Ops received:     {received} ({received / elapsed:.0f}/s)")
+    if latencies:
+        print(
+            f"Send latency:     p50={statistics.median(latencies) * 1000:.2f}ms "
+            f"p99={latencies[int(0.99 * (len(latencies) - 1))] * 1000:.2f}ms"
+        )
+    print(f"Diverged docs:    {diverged}")
+    try:
+        print("Server metrics:   " + json.dumps(fetch_metrics(args.url), indent=2))
+    except OSError as e:
+        print(f"Server metrics:   unavailable ({e})")
+
+    return 1 if diverged else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collaboration hub load test")
+    parser.add_argument("--url", default="ws://localhost:8000", help="Backend base URL")
+    parser.add_argument("--docs", type=int, default=5, help="Number of documents")
+    parser.add_argument("--editors", type=int, default=40, help="Editors per document")
+    parser.add_argument("--edits", type=int, default=50, help="Edits per editor")
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between edits")
+    parser.add_argument("--settle", type=float, default=1.0, help="Seconds to wait for pushes")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(run_load_test(args)))
+
+
+if __name__ == "__main__":
+    main()